@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Erkennung von JSON-APIs beim Rendern für Recrawls ohne Browser.
+
+JavaScript-lastige Seiten laden ihren Inhalt oft per XHR/fetch als JSON
+und erzeugen daraus erst im Browser das HTML. Beim Rendern werden die
+JSON-Antworten dieser Requests mitgeschnitten. Nach dem Parsen wird
+geprüft, welche Antwort die Felder des erzeugten Items enthält (Titel,
+Beschreibung, Artikeltext, ...). Für diese Antwort werden der Endpunkt
+und die JSON-Pfade der Felder pro Domain gespeichert:
+
+- Enthält die API-URL den Pfad der Seite, wird daraus eine Vorlage
+  ('{path}') für alle Seiten der Domain
+- Sonst gilt der Endpunkt nur für genau diese Seite (z.B. Startseiten)
+
+Ab MIN_CONFIRMATIONS übereinstimmenden Beobachtungen wird der Endpunkt in
+späteren Läufen direkt per HTTP abgefragt und auf das Item abgebildet.
+Fehlen dabei Pflichtfelder, wird die Seite doch gerendert; nach
+wiederholten Fehlschlägen wird der Endpunkt verworfen.
+"""
+
+import re
+import json
+import html
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, quote
+
+from itemadapter import ItemAdapter
+from crawler.items import WebPageRecord, NewsArticleRecord, item_kind
+from crawler.state import JsonStateStore
+
+
+# Item-Klasse pro Item-Art für aus JSON erzeugte Items
+RECORD_CLASSES = {
+    'webpages': WebPageRecord,
+    'news': NewsArticleRecord,
+}
+
+JSON_CONTENT_TYPES = ('application/json', '+json', 'text/json')
+
+# Texte ab dieser Länge werden über ihren Anfang statt exakt verglichen
+LONG_TEXT = 200
+
+TAG_RE = re.compile(r'<[^>]+>')
+SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(value) -> str:
+    """Entfernt HTML-Tags und Entities und fasst Whitespace zusammen."""
+    if not isinstance(value, str):
+        return ''
+    return SPACE_RE.sub(' ', html.unescape(TAG_RE.sub(' ', value))).strip()
+
+
+def flatten_strings(data, prefix: str = '', limit: int = 5000) -> Dict[str, str]:
+    """
+    Sammelt alle Zeichenketten eines JSON-Dokuments mit ihrem Pfad.
+
+    Args:
+        data: Geparstes JSON
+        prefix: Pfad des aktuellen Knotens
+        limit: Höchstzahl gesammelter Werte
+
+    Returns:
+        Dict: Pfad (z.B. 'document.teaser.0.title') -> Zeichenkette
+    """
+    result: Dict[str, str] = {}
+    stack = [(prefix, data)]
+    while stack and len(result) < limit:
+        path, value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend((f'{path}.{key}' if path else str(key), child) for key, child in value.items())
+        elif isinstance(value, list):
+            stack.extend((f'{path}.{index}' if path else str(index), child) for index, child in enumerate(value))
+        elif isinstance(value, str) and value.strip():
+            result[path] = value
+    return result
+
+
+def resolve_path(data, path: str):
+    """
+    Liest einen Wert über seinen Pfad aus einem JSON-Dokument.
+
+    Returns:
+        Wert oder None, wenn der Pfad nicht existiert
+    """
+    for key in path.split('.'):
+        if isinstance(data, list):
+            try:
+                data = data[int(key)]
+            except (ValueError, IndexError):
+                return None
+        elif isinstance(data, dict):
+            data = data.get(key)
+        else:
+            return None
+        if data is None:
+            return None
+    return data
+
+
+def matches(expected: str, candidate: str) -> bool:
+    """
+    Prüft ob ein JSON-Wert dem Feldwert des gerenderten Items entspricht.
+
+    Kurze Werte müssen übereinstimmen, lange Texte (Artikeltext) nur in
+    ihrem Anfang, da das HTML oft aus mehreren JSON-Absätzen besteht.
+    """
+    if not expected or not candidate:
+        return False
+    if len(expected) < LONG_TEXT:
+        return expected == candidate
+    return len(candidate) >= LONG_TEXT and candidate[:LONG_TEXT] == expected[:LONG_TEXT]
+
+
+def page_path(url: str) -> str:
+    """Pfad einer Seiten-URL ohne führenden und abschließenden Schrägstrich."""
+    return urlparse(url).path.strip('/')
+
+
+def url_template(api_url: str, page_url: str) -> Optional[str]:
+    """
+    Erzeugt aus einer API-URL eine Vorlage für alle Seiten der Domain.
+
+    Args:
+        api_url: Beobachtete API-URL
+        page_url: URL der gerenderten Seite
+
+    Returns:
+        str: Vorlage mit '{path}' bzw. '{path_quoted}' oder None, wenn die
+        API-URL den Seitenpfad nicht enthält
+    """
+    path = page_path(page_url)
+    if not path or '{' in api_url:
+        return None
+    quoted = quote(path, safe='')
+    if quoted != path and quoted in api_url:
+        return api_url.replace(quoted, '{path_quoted}')
+    if path in api_url:
+        return api_url.replace(path, '{path}')
+    return None
+
+
+class ApiDiscovery:
+    """
+    Schneidet JSON-Antworten beim Rendern mit und lernt API-Endpunkte pro Domain.
+    """
+
+    # Höchstzahl mitgeschnittener Antworten pro Page
+    MAX_CANDIDATES = 20
+
+    def __init__(self, fields: Dict[str, List[str]], required_fields: Dict[str, List[str]],
+                 max_body_bytes: int = 2 * 1024 * 1024, min_confirmations: int = 2,
+                 max_failures: int = 3, state_file: Optional[str] = None, stats=None):
+        """
+        Args:
+            fields: Auf JSON-Pfade abgebildete Felder pro Item-Art
+            required_fields: Pflichtfelder pro Item-Art (wie beim Fast Path)
+            max_body_bytes: Größere JSON-Antworten werden nicht ausgewertet
+            min_confirmations: Beobachtungen, ab denen ein Endpunkt genutzt wird
+            max_failures: Fehlschläge in Folge, nach denen ein Endpunkt verworfen wird
+            state_file: JSON-Datei für die gelernten Endpunkte (None = nicht speichern)
+            stats: Scrapy-Stats-Collector (optional)
+        """
+        self.fields = fields
+        self.required_fields = required_fields
+        self.max_body_bytes = max_body_bytes
+        self.min_confirmations = min_confirmations
+        self.max_failures = max_failures
+        self.stats = stats
+        self.store = JsonStateStore(state_file) if state_file else None
+        self.domains: Dict[str, Dict[str, Dict[str, Any]]] = self.store.load() if self.store else {}
+        # Mitgeschnittene JSON-Antworten pro offener Page
+        self.candidates: Dict[Any, List[Tuple[str, Any]]] = {}
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Erstellt die Erkennung aus den Crawler-Settings."""
+        settings = crawler.settings
+        return cls(
+            fields=settings.getdict('API_DISCOVERY_FIELDS'),
+            required_fields=settings.getdict('FASTPATH_REQUIRED_FIELDS'),
+            max_body_bytes=settings.getint('API_DISCOVERY_MAX_BYTES', 2 * 1024 * 1024),
+            min_confirmations=settings.getint('API_DISCOVERY_MIN_CONFIRMATIONS', 2),
+            max_failures=settings.getint('API_DISCOVERY_MAX_FAILURES', 3),
+            state_file=settings.get('API_DISCOVERY_STATE_FILE'),
+            stats=crawler.stats,
+        )
+
+    def _inc(self, key: str, count: int = 1):
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
+
+    # -----------------------------------------
+    # Erkennung beim Rendern
+    # -----------------------------------------
+
+    async def observe(self, response):
+        """
+        Schneidet eine JSON-Antwort eines XHR/fetch-Requests mit.
+
+        Wird als Playwright-Event-Handler für 'response' registriert.
+
+        Args:
+            response: Playwright-Response
+        """
+        try:
+            request = response.request
+            if request.resource_type not in ('xhr', 'fetch') or request.method != 'GET' or not response.ok:
+                return
+            content_type = (await response.header_value('content-type') or '').lower()
+            if not any(marker in content_type for marker in JSON_CONTENT_TYPES):
+                return
+            length = await response.header_value('content-length')
+            if length and length.isdigit() and int(length) > self.max_body_bytes:
+                return
+            page = response.frame.page
+            candidates = self.candidates.setdefault(page, [])
+            if len(candidates) >= self.MAX_CANDIDATES:
+                return
+            body = await response.body()
+            if len(body) > self.max_body_bytes:
+                return
+            candidates.append((response.url, json.loads(body)))
+        except Exception as e:
+            # Page geschlossen, Body nicht verfügbar oder kein gültiges JSON
+            self.logger.debug("API response not recorded: %s", e)
+
+    def forget(self, page):
+        """Verwirft die mitgeschnittenen Antworten einer geschlossenen Page."""
+        self.candidates.pop(page, None)
+
+    def learn(self, page, page_url: str, domain: str, item) -> Optional[str]:
+        """
+        Sucht unter den mitgeschnittenen Antworten einer Page den Endpunkt des Items.
+
+        Args:
+            page: Playwright-Page, deren Antworten ausgewertet werden
+            page_url: URL der gerenderten Seite
+            domain: Domain der Seite
+            item: Aus dem gerenderten HTML erzeugtes Item
+
+        Returns:
+            str: Schlüssel des (bestätigten) Endpunkts oder None
+        """
+        candidates = self.candidates.pop(page, None)
+        kind = item_kind(item)
+        if not candidates or kind not in self.fields or kind not in RECORD_CLASSES:
+            return None
+
+        adapter = ItemAdapter(item)
+        expected = {name: normalize_text(adapter.get(name)) for name in self.fields[kind]}
+        required = self.required_fields.get(kind, [])
+
+        best = None
+        for api_url, data in candidates:
+            strings = {path: normalize_text(value) for path, value in flatten_strings(data).items()}
+            mapping = {}
+            for name, value in expected.items():
+                for path, candidate in strings.items():
+                    if matches(value, candidate):
+                        mapping[name] = path
+                        break
+            if not all(name in mapping for name in required) or not mapping:
+                continue
+            if best is None or len(mapping) > len(best[1]):
+                best = (api_url, mapping)
+        if best is None:
+            return None
+
+        api_url, mapping = best
+        template = url_template(api_url, page_url)
+        key = f'{kind} {template}' if template else f'{kind} {page_url}'
+        endpoints = self.domains.setdefault(domain, {})
+        endpoint = endpoints.get(key)
+        if endpoint is None or endpoint['fields'] != mapping:
+            if endpoint is None:
+                self._inc('api/discovered')
+                self.logger.info(f"API endpoint candidate for {domain}: {template or api_url} ({', '.join(mapping)})")
+            endpoint = endpoints[key] = {
+                'kind': kind,
+                'url': template or api_url,
+                'template': bool(template),
+                'fields': mapping,
+                'confirmations': 0,
+                'failures': 0,
+            }
+        endpoint['confirmations'] += 1
+        endpoint['url'] = template or api_url
+        return key
+
+    # -----------------------------------------
+    # Abruf in späteren Läufen
+    # -----------------------------------------
+
+    def endpoint_for(self, url: str, domain: str, kind: str) -> Optional[Tuple[str, str]]:
+        """
+        Liefert den bestätigten API-Endpunkt einer Seite.
+
+        Args:
+            url: URL der Seite
+            domain: Domain der Seite
+            kind: Item-Art des Callbacks
+
+        Returns:
+            Tuple: (Schlüssel des Endpunkts, API-URL) oder None
+        """
+        endpoints = self.domains.get(domain)
+        if not endpoints:
+            return None
+        endpoint = endpoints.get(f'{kind} {url}')
+        if endpoint and endpoint['confirmations'] >= self.min_confirmations:
+            return f'{kind} {url}', endpoint['url']
+
+        path = page_path(url)
+        if not path:
+            return None
+        for key, endpoint in endpoints.items():
+            if endpoint['template'] and endpoint['kind'] == kind and endpoint['confirmations'] >= self.min_confirmations:
+                return key, endpoint['url'].replace('{path_quoted}', quote(path, safe='')).replace('{path}', path)
+        return None
+
+    def build_item(self, key: str, domain: str, page_url: str, data, **extra):
+        """
+        Bildet eine JSON-Antwort über die gelernten Pfade auf ein Item ab.
+
+        Args:
+            key: Schlüssel des Endpunkts
+            domain: Domain der Seite
+            page_url: URL der Seite (nicht der API)
+            data: Geparste JSON-Antwort
+            **extra: Weitere Felder des Items (z.B. status_code)
+
+        Returns:
+            Item oder None, wenn der Endpunkt unbekannt ist
+        """
+        endpoint = self.domains.get(domain, {}).get(key)
+        if endpoint is None:
+            return None
+        values = {}
+        for name, path in endpoint['fields'].items():
+            value = normalize_text(resolve_path(data, path))
+            if value:
+                values[name] = value
+        if endpoint['kind'] == 'webpages':
+            values['internal_links'] = [
+                value for value in flatten_strings(data).values()
+                if value.startswith('http') and urlparse(value).netloc == domain
+            ][:10]
+        elif endpoint['kind'] == 'news' and values.get('article_text'):
+            values['word_count'] = len(values['article_text'].split())
+        return RECORD_CLASSES[endpoint['kind']](url=page_url, domain=domain, **values, **extra)
+
+    def missing_fields(self, item) -> List[str]:
+        """Fehlende Pflichtfelder eines aus JSON erzeugten Items."""
+        if item is None:
+            return ['item']
+        adapter = ItemAdapter(item)
+        return [name for name in self.required_fields.get(item_kind(item), []) if not adapter.get(name)]
+
+    def record(self, domain: str, key: str, hit: bool):
+        """
+        Erfasst das Ergebnis eines API-Abrufs.
+
+        Args:
+            domain: Domain der Seite
+            key: Schlüssel des Endpunkts
+            hit: Ob das Item vollständig aus der API erzeugt wurde
+        """
+        self._inc(f"api/{'hit' if hit else 'miss'}")
+        endpoint = self.domains.get(domain, {}).get(key)
+        if endpoint is None:
+            return
+        if hit:
+            endpoint['failures'] = 0
+            return
+        endpoint['failures'] += 1
+        if endpoint['failures'] >= self.max_failures:
+            del self.domains[domain][key]
+            self._inc('api/dropped')
+            self.logger.info(f"API endpoint dropped for {domain}: {endpoint['url']}")
+
+    def save(self):
+        """Speichert die gelernten Endpunkte aller Domains."""
+        if self.store:
+            self.store.data = {domain: endpoints for domain, endpoints in self.domains.items() if endpoints}
+            self.store.save()
+
@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-Benchmarks der Pipelines und Middlewares mit synthetischen Items.
+
+Erzeugt Items (WebPageItem, NewsArticleItem, TenderItem bzw. die
+kompakten Records) und Request/Response-Paare mit realistischen
+Feldgrößen und misst jede Komponente einzeln sowie als Kette:
+
+- ops/s: Zeitmessung über alle Operationen (ohne Erzeugen der Daten)
+- alloc B/op: Spitzenwert neu belegten Speichers pro Operation (tracemalloc,
+  eigener Durchlauf über eine Stichprobe)
+- retained B/op: nach der Operation weiterhin belegter Speicher
+- peak RSS: Zuwachs des Prozess-RSS während der Zeitmessung
+
+Die Ergebnisse lassen sich als Baseline speichern und mit einer früheren
+Baseline vergleichen; Rückschritte über der Schwelle beenden das Programm
+mit Exit-Code 1 (z.B. als Schritt vor dem Deployment).
+
+    python -m crawler.benchmark --items 1000000
+    python -m crawler.benchmark --components csv,json --records
+    python -m crawler.benchmark --save-baseline benchmarks/baseline.json
+    python -m crawler.benchmark --baseline benchmarks/baseline.json --threshold 0.15
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+import psutil
+from scrapy import Spider, Request
+from scrapy.crawler import Crawler
+from scrapy.exceptions import DropItem
+from scrapy.http import HtmlResponse
+from scrapy.utils.project import get_project_settings
+
+from crawler.items import (
+    WebPageItem, NewsArticleItem, TenderItem, WebPageRecord, NewsArticleRecord, TenderRecord,
+)
+from crawler.middlewares import RotateUserAgentMiddleware, RetryMiddleware
+from crawler.pipelines import CrawlerPipeline, DuplicateFilterPipeline, CSVExportPipeline, JSONExportPipeline
+
+
+DOMAINS = ['bund.de', 'bundestag.de', 'euractiv.de', 'dw.com', 'zdf.de',
+           'spiegel.de', 'faz.net', 'welt.de', 'handelsblatt.com', 'zeit.de']
+
+WORDS = (
+    'bundesregierung haushalt energie klimaschutz digitalisierung verwaltung europa '
+    'ausschreibung vergabe infrastruktur bildung forschung gesundheit verkehr wirtschaft '
+    'sicherheit verteidigung landwirtschaft umwelt arbeit soziales finanzen justiz kommune'
+).split()
+
+# Komponenten und ihre Ketten (Reihenfolge wie in den Settings)
+ITEM_COMPONENTS = ('crawler', 'dedup', 'csv', 'json')
+REQUEST_COMPONENTS = ('useragent', 'retry')
+CHAINS = {
+    'pipeline-chain': ITEM_COMPONENTS,
+    'middleware-chain': REQUEST_COMPONENTS,
+}
+
+
+class SyntheticData:
+    """
+    Erzeugt synthetische Items und Request/Response-Paare.
+
+    Texte werden aus einem festen Vorrat gezogen, damit das Erzeugen die
+    Messung nicht dominiert; jedes Item ist trotzdem ein eigenes Objekt
+    mit eigener URL, weil die Pipelines Items verändern.
+    """
+
+    def __init__(self, seed: int = 1, kinds=('webpages', 'news', 'tenders'), records: bool = False,
+                 duplicate_rate: float = 0.02, retry_rate: float = 0.05):
+        """
+        Args:
+            seed: Startwert des Zufallsgenerators
+            kinds: Item-Arten im Strom ('webpages', 'news', 'tenders')
+            records: Kompakte Records statt scrapy.Item verwenden
+            duplicate_rate: Anteil der Items mit bereits erzeugter URL
+            retry_rate: Anteil der Responses mit Status für einen Neuversuch
+        """
+        self.random = random.Random(seed)
+        self.kinds = list(kinds)
+        self.records = records
+        self.duplicate_rate = duplicate_rate
+        self.retry_rate = retry_rate
+        self.sequence = 0
+        self.texts = [self._sentence(self.random.randint(6, 14)) for _ in range(500)]
+        self.articles = [' '.join(self._sentence(15) for _ in range(self.random.randint(40, 90))) for _ in range(50)]
+        self.links = [self._url(self.random.choice(DOMAINS)) for _ in range(2000)]
+
+    def _sentence(self, words: int) -> str:
+        return ' '.join(self.random.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+    def _url(self, domain: str) -> str:
+        path = '/'.join(self.random.choice(WORDS) for _ in range(self.random.randint(2, 4)))
+        return f'https://www.{domain}/{path}/{self.random.randint(1, 10 ** 6)}.html'
+
+    def _next_url(self) -> Tuple[str, str]:
+        """Nächste URL mit Domain (mit duplicate_rate eine bereits erzeugte)."""
+        if self.sequence and self.random.random() < self.duplicate_rate:
+            sequence = self.random.randrange(self.sequence)
+        else:
+            sequence = self.sequence
+            self.sequence += 1
+        domain = DOMAINS[sequence % len(DOMAINS)]
+        return f'https://www.{domain}/artikel/{sequence}.html', domain
+
+    def item(self):
+        """Ein Item der nächsten Art im Strom."""
+        choice = self.random.choice
+        kind = choice(self.kinds)
+        url, domain = self._next_url()
+        url = f'  {url}  '  # Leerzeichen wie aus unsauberem HTML
+        if kind == 'webpages':
+            fields = dict(
+                title=f'  {choice(self.texts)}  ', url=url, domain=domain,
+                description=' '.join(choice(self.texts) for _ in range(3)),
+                keywords=', '.join(self.random.sample(WORDS, 6)), language='de', status_code=200,
+                content_type='text/html; charset=utf-8',
+                internal_links=self.random.sample(self.links, self.random.randint(20, 80)),
+            )
+            return WebPageRecord(**fields) if self.records else WebPageItem(**fields)
+        if kind == 'news':
+            text = choice(self.articles)
+            fields = dict(
+                title=choice(self.texts), url=url, domain=domain, description=choice(self.texts),
+                author='Redaktion', publish_date='2026-10-19T08:00:00+02:00', category=choice(WORDS),
+                tags=self.random.sample(WORDS, 5), article_text=text,
+                image_urls=[f'https://img.{domain}/{self.random.randint(1, 10 ** 6)}.jpg'],
+                word_count=text.count(' ') + 1,
+            )
+            return NewsArticleRecord(**fields) if self.records else NewsArticleItem(**fields)
+        fields = dict(
+            tender_title=choice(self.texts), tender_id=f'VG-{self.random.randint(10 ** 5, 10 ** 6)}',
+            organization=f'Bundesamt für {choice(WORDS).capitalize()}', deadline='2026-11-30',
+            budget=f'{self.random.randint(10, 5000)}.000 EUR', category=choice(WORDS), location='Berlin',
+            contact_info={'email': 'vergabe@example.de', 'phone': '+49 30 123456'},
+            requirements=' '.join(choice(self.texts) for _ in range(4)), url=url,
+        )
+        return TenderRecord(**fields) if self.records else TenderItem(**fields)
+
+    def items(self, count: int) -> list:
+        return [self.item() for _ in range(count)]
+
+    def exchange(self) -> Tuple[Request, HtmlResponse]:
+        """Ein Request mit der zugehörigen Response."""
+        domain = self.random.choice(DOMAINS)
+        url = self._url(domain)
+        request = Request(url, meta={'domain': domain, 'playwright': True})
+        status = self.random.choice((503, 429, 500)) if self.random.random() < self.retry_rate else 200
+        response = HtmlResponse(url, status=status, body=b'<html></html>', request=request)
+        return request, response
+
+    def exchanges(self, count: int) -> list:
+        return [self.exchange() for _ in range(count)]
+
+
+class Harness:
+    """
+    Baut die Komponenten auf und liefert pro Komponente eine Operation.
+    """
+
+    def __init__(self, workdir: str):
+        """
+        Args:
+            workdir: Arbeitsverzeichnis für die Export-Dateien (data/ darin)
+        """
+        self.workdir = workdir
+        # scrapy.cfg wird nicht gelesen (wie im Workflow über die Umgebung)
+        os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'crawler.settings')
+        self.settings = get_project_settings()
+        self.crawler = Crawler(Spider, self.settings)
+        self.spider = Spider(name='benchmark')
+        self.opened = []
+
+    def _open(self, pipeline):
+        """Öffnet eine Export-Pipeline im Arbeitsverzeichnis."""
+        cwd = os.getcwd()
+        os.chdir(self.workdir)
+        try:
+            pipeline.open_spider(self.spider)
+        finally:
+            os.chdir(cwd)
+        self.opened.append(pipeline)
+        return pipeline
+
+    def operation(self, name: str) -> Callable:
+        """
+        Operation einer Komponente für ein Item bzw. ein Request/Response-Paar.
+
+        Args:
+            name: Komponente ('crawler', 'dedup', 'csv', 'json', 'useragent', 'retry')
+
+        Returns:
+            Callable: Verarbeitet ein Item und liefert es zurück (None bei DropItem)
+        """
+        spider = self.spider
+        if name in ('crawler', 'dedup', 'csv', 'json'):
+            pipeline = {
+                'crawler': CrawlerPipeline,
+                'dedup': DuplicateFilterPipeline,
+                'csv': CSVExportPipeline,
+                'json': JSONExportPipeline,
+            }[name]()
+            if name in ('csv', 'json'):
+                self._open(pipeline)
+            process = pipeline.process_item
+
+            def run_item(item):
+                try:
+                    return process(item, spider)
+                except DropItem:
+                    return None
+            return run_item
+
+        if name == 'useragent':
+            process_request = RotateUserAgentMiddleware.from_crawler(self.crawler).process_request
+
+            def run_request(exchange):
+                process_request(exchange[0], spider)
+                return exchange
+            return run_request
+
+        if name == 'retry':
+            process_response = RetryMiddleware.from_crawler(self.crawler).process_response
+
+            def run_response(exchange):
+                process_response(exchange[0], exchange[1], spider)
+                return exchange
+            return run_response
+
+        raise ValueError(f"Unbekannte Komponente: {name}")
+
+    def chain(self, names) -> Callable:
+        """Hintereinander ausgeführte Operationen (Abbruch nach DropItem)."""
+        operations = [self.operation(name) for name in names]
+
+        def run(value):
+            for operation in operations:
+                value = operation(value)
+                if value is None:
+                    return None
+            return value
+        return run
+
+    def close(self):
+        """Schließt die Export-Dateien."""
+        for pipeline in self.opened:
+            pipeline.close_spider(self.spider)
+        self.opened = []
+
+
+def measure(operation: Callable, generate: Callable[[int], list], count: int, batch_size: int = 10000,
+            alloc_sample: int = 2000) -> Dict[str, Any]:
+    """
+    Misst eine Operation über count synthetische Eingaben.
+
+    Args:
+        operation: Zu messende Operation
+        generate: Erzeugt eine Liste von Eingaben
+        count: Anzahl der Operationen der Zeitmessung
+        batch_size: Eingaben pro vorab erzeugtem Batch
+        alloc_sample: Operationen des Speicher-Durchlaufs (0 = ohne)
+
+    Returns:
+        Dict: ops_per_sec, us_per_op, alloc_bytes_per_op, retained_bytes_per_op, peak_rss_mb
+    """
+    process = psutil.Process()
+    rss_start = rss_peak = process.memory_info().rss
+    elapsed = 0.0
+    done = 0
+    gc.collect()
+    while done < count:
+        batch = generate(min(batch_size, count - done))
+        start = time.perf_counter()
+        for value in batch:
+            operation(value)
+        elapsed += time.perf_counter() - start
+        done += len(batch)
+        del batch
+        rss_peak = max(rss_peak, process.memory_info().rss)
+
+    result = {
+        'ops': done,
+        'ops_per_sec': round(done / elapsed, 1) if elapsed else None,
+        'us_per_op': round(elapsed / done * 1e6, 3) if done else None,
+        'peak_rss_mb': round((rss_peak - rss_start) / (1024 * 1024), 1),
+    }
+
+    if alloc_sample:
+        batch = generate(alloc_sample)
+        allocated = retained = 0
+        tracemalloc.start()
+        for value in batch:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            operation(value)
+            current, peak = tracemalloc.get_traced_memory()
+            allocated += peak - before
+            retained += current - before
+        tracemalloc.stop()
+        result['alloc_bytes_per_op'] = round(allocated / len(batch))
+        result['retained_bytes_per_op'] = round(retained / len(batch))
+    return result
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """
+    Vergleicht Ergebnisse mit einer Baseline.
+
+    Args:
+        results: Aktuelle Ergebnisse pro Komponente
+        baseline: Gespeicherte Ergebnisse pro Komponente
+        threshold: Zulässige relative Verschlechterung (0.1 = 10 %)
+
+    Returns:
+        List[str]: Beschreibungen der Rückschritte (leer = keine)
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous.get('ops_per_sec') and current.get('ops_per_sec'):
+            change = current['ops_per_sec'] / previous['ops_per_sec'] - 1
+            current['ops_change'] = round(change, 3)
+            if change < -threshold:
+                regressions.append(
+                    f"{name}: {current['ops_per_sec']:.0f} ops/s statt {previous['ops_per_sec']:.0f} ({change:+.1%})"
+                )
+        # Kleine Werte schwanken stark; erst ab 256 Bytes Unterschied werten
+        if previous.get('alloc_bytes_per_op') is not None and current.get('alloc_bytes_per_op') is not None:
+            growth = current['alloc_bytes_per_op'] - previous['alloc_bytes_per_op']
+            if growth > 256 and growth > previous['alloc_bytes_per_op'] * threshold:
+                regressions.append(
+                    f"{name}: {current['alloc_bytes_per_op']} B/op statt {previous['alloc_bytes_per_op']} B/op"
+                )
+    return regressions
+
+
+def format_table(results: Dict[str, Dict[str, Any]]) -> str:
+    """Ergebnisse als Tabelle für die Konsole."""
+    lines = [f"{'Komponente':<18} {'ops/s':>12} {'µs/op':>9} {'alloc B/op':>11} {'retained B/op':>14} {'peak RSS MB':>12} {'Δ Baseline':>11}"]
+    for name, result in results.items():
+        change = result.get('ops_change')
+        lines.append(
+            f"{name:<18} {result['ops_per_sec'] or 0:>12,.0f} {result['us_per_op'] or 0:>9.2f} "
+            f"{result.get('alloc_bytes_per_op', '-'):>11} {result.get('retained_bytes_per_op', '-'):>14} "
+            f"{result['peak_rss_mb']:>12} {f'{change:+.1%}' if change is not None else '-':>11}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeile des Benchmarks."""
+    parser = argparse.ArgumentParser(description='Micro-Benchmarks der Pipelines und Middlewares')
+    parser.add_argument('--items', type=int, default=200000, help='Operationen pro Komponente')
+    parser.add_argument('--components', default=','.join(ITEM_COMPONENTS + REQUEST_COMPONENTS + tuple(CHAINS)),
+                        help='Komponenten und Ketten (kommagetrennt)')
+    parser.add_argument('--kinds', default='webpages,news,tenders', help='Item-Arten im Strom')
+    parser.add_argument('--records', action='store_true', help='Kompakte Records statt scrapy.Item')
+    parser.add_argument('--duplicates', type=float, default=0.02, help='Anteil doppelter URLs')
+    parser.add_argument('--retry-rate', type=float, default=0.05, help='Anteil der Responses mit Retry-Status')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Vorab erzeugte Eingaben pro Batch')
+    parser.add_argument('--alloc-sample', type=int, default=2000, help='Operationen des Speicher-Durchlaufs (0 = ohne)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Ergebnisse als JSON schreiben')
+    parser.add_argument('--save-baseline', help='Ergebnisse als Baseline speichern')
+    parser.add_argument('--baseline', help='Mit dieser Baseline vergleichen')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Zulässige Verschlechterung (0.1 = 10 %%)')
+    args = parser.parse_args(argv)
+
+    # Log-Ausgaben der Komponenten (z.B. Retries) würden die Messung dominieren
+    logging.disable(logging.CRITICAL)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    workdir = tempfile.mkdtemp(prefix='crawler-benchmark-')
+    try:
+        for name in [name.strip() for name in args.components.split(',') if name.strip()]:
+            data = SyntheticData(seed=args.seed, kinds=args.kinds.split(','), records=args.records,
+                                 duplicate_rate=args.duplicates, retry_rate=args.retry_rate)
+            harness = Harness(workdir)
+            members = CHAINS.get(name, (name,))
+            operation = harness.chain(members) if name in CHAINS else harness.operation(name)
+            generate = data.exchanges if members[0] in REQUEST_COMPONENTS else data.items
+            try:
+                results[name] = measure(operation, generate, args.items, batch_size=args.batch_size,
+                                        alloc_sample=args.alloc_sample)
+            finally:
+                harness.close()
+            print(f"{name}: {results[name]['ops_per_sec']:,.0f} ops/s", file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        logging.disable(logging.NOTSET)
+
+    report = {
+        'python': sys.version.split()[0],
+        'items': args.items,
+        'kinds': args.kinds,
+        'records': args.records,
+        'results': results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline.get('results', {}), args.threshold)
+        report['baseline'] = args.baseline
+        report['regressions'] = regressions
+
+    print(format_table(results))
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if regressions:
+        print("\nRückschritte gegenüber der Baseline:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
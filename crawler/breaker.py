@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Circuit Breaker und Fehlerauswertung pro Domain.
+
+Fehler werden pro Domain klassifiziert (403/429, Serverfehler, Timeouts,
+TLS, DNS, Verbindungsabbrüche, Browser). Nach CIRCUIT_BREAKER_THRESHOLD
+Fehlern in Folge wird der Breaker der Domain geöffnet: weitere Requests
+werden sofort abgewiesen, statt jeweils eine volle Playwright-Navigation
+zu belegen. Nach einer Abkühlzeit lässt der Breaker einzelne Proben durch
+(halb offen). Gelingt eine Probe, schließt er wieder; scheitert sie,
+öffnet er erneut mit verdoppelter Abkühlzeit. Endet eine Probe ohne
+Ergebnis (verworfen, Browser-Neustart), wird ihr Platz freigegeben.
+
+Browser-Abstürze und -Neustarts (Klasse 'browser') sagen nichts über
+die Domain aus und zählen nicht zur Schwelle.
+
+Offene Breaker werden zwischen Läufen gespeichert, damit tote Domains
+auch im nächsten Lauf nicht sofort wieder Browser-Slots belegen.
+"""
+
+import time
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from scrapy.exceptions import IgnoreRequest
+from crawler.state import JsonStateStore
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Fehlerklassen, die nicht der Domain angelastet werden
+NEUTRAL_CATEGORIES = frozenset({'browser'})
+
+# Erkennungsmerkmale in Exception-Typ und -Meldung, in Prüfreihenfolge
+FAILURE_PATTERNS = (
+    ('dns', ('dnslookuperror', 'err_name_not_resolved', 'name or service not known')),
+    ('tls', ('ssl', 'tls', 'err_cert', 'certificate')),
+    ('timeout', ('timeout', 'timed out', 'err_timed_out')),
+    ('browser', ('target page, context or browser has been closed', 'browser has been closed',
+                 'target closed', 'crashed')),
+    ('connection', ('connectionrefused', 'connectionlost', 'connectiondone', 'err_connection',
+                    'responseneverreceived', 'responsefailed', 'err_empty_response')),
+)
+
+
+class DomainUnavailable(IgnoreRequest):
+    """Request wurde wegen eines offenen Circuit Breakers nicht gestartet."""
+
+
+def classify_exception(exception: BaseException) -> str:
+    """
+    Ordnet eine Download-Exception einer Fehlerklasse zu.
+
+    Args:
+        exception: Exception aus dem Download
+
+    Returns:
+        str: 'dns', 'tls', 'timeout', 'browser', 'connection' oder 'other'
+    """
+    text = f"{type(exception).__name__} {exception}".lower()
+    for category, patterns in FAILURE_PATTERNS:
+        if any(pattern in text for pattern in patterns):
+            return category
+    return 'other'
+
+
+def classify_status(status: int) -> Optional[str]:
+    """
+    Ordnet einen HTTP-Status einer Fehlerklasse zu.
+
+    Args:
+        status: HTTP-Status der Response
+
+    Returns:
+        str: 'http_403', 'http_429', 'http_5xx' oder None (kein Domain-Fehler)
+    """
+    if status in (401, 403):
+        return 'http_403'
+    if status == 429:
+        return 'http_429'
+    if status >= 500:
+        return 'http_5xx'
+    return None
+
+
+class CircuitBreakerRegistry:
+    """
+    Zustand der Circuit Breaker aller Domains und Fehlerstatistik des Laufs.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 300, max_cooldown: float = 3600,
+                 half_open_probes: int = 1, state_file: Optional[str] = None, stats=None):
+        """
+        Args:
+            threshold: Fehler in Folge, ab denen der Breaker öffnet
+            cooldown: Abkühlzeit nach dem ersten Öffnen (Sekunden)
+            max_cooldown: Obergrenze der verdoppelten Abkühlzeit (Sekunden)
+            half_open_probes: Gleichzeitige Proben im halb offenen Zustand
+            state_file: JSON-Datei für offene Breaker (None = nicht speichern)
+            stats: Scrapy-Stats-Collector (optional)
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.half_open_probes = half_open_probes
+        self.stats = stats
+        self.store = JsonStateStore(state_file) if state_file else None
+        self.domains: Dict[str, Dict[str, Any]] = {}
+        self.logger = logging.getLogger(__name__)
+
+        now = time.time()
+        for domain, saved in (self.store.load() if self.store else {}).items():
+            if saved.get('open_until', 0) > now:
+                breaker = self._breaker(domain)
+                breaker.update(state=OPEN, open_until=saved['open_until'],
+                               cooldown=saved.get('cooldown', cooldown), opened=0)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Erstellt die Registry aus den Crawler-Settings."""
+        settings = crawler.settings
+        return cls(
+            threshold=settings.getint('CIRCUIT_BREAKER_THRESHOLD', 5),
+            cooldown=settings.getfloat('CIRCUIT_BREAKER_COOLDOWN', 300),
+            max_cooldown=settings.getfloat('CIRCUIT_BREAKER_MAX_COOLDOWN', 3600),
+            half_open_probes=settings.getint('CIRCUIT_BREAKER_HALF_OPEN_PROBES', 1),
+            state_file=settings.get('CIRCUIT_BREAKER_STATE_FILE'),
+            stats=crawler.stats,
+        )
+
+    def _breaker(self, domain: str) -> Dict[str, Any]:
+        """Liefert (bzw. erstellt) den Zustand einer Domain."""
+        breaker = self.domains.get(domain)
+        if breaker is None:
+            breaker = self.domains[domain] = {
+                'state': CLOSED,
+                'consecutive': 0,
+                'successes': 0,
+                'failures': Counter(),
+                'short_circuited': 0,
+                'opened': 0,
+                'open_until': 0.0,
+                'cooldown': self.cooldown,
+                'probes': 0,
+                'last_error': None,
+            }
+        return breaker
+
+    def allow(self, domain: str) -> bool:
+        """
+        Prüft ob ein Request für eine Domain gestartet werden darf.
+
+        Args:
+            domain: Domain des Requests
+
+        Returns:
+            bool: False, solange der Breaker offen ist oder alle Proben laufen
+        """
+        breaker = self.domains.get(domain)
+        if breaker is None or breaker['state'] == CLOSED:
+            return True
+
+        if breaker['state'] == OPEN:
+            if time.time() < breaker['open_until']:
+                return self._reject(breaker)
+            breaker['state'] = HALF_OPEN
+            breaker['probes'] = 0
+            self.logger.info(f"Circuit Breaker halb offen, teste {domain}")
+
+        if breaker['probes'] >= self.half_open_probes:
+            return self._reject(breaker)
+        breaker['probes'] += 1
+        if self.stats is not None:
+            self.stats.inc_value('breaker/probes')
+        return True
+
+    def is_probing(self, domain: str) -> bool:
+        """True, wenn der Breaker der Domain halb offen ist (zugelassene Requests sind Proben)."""
+        breaker = self.domains.get(domain)
+        return breaker is not None and breaker['state'] == HALF_OPEN
+
+    def release_probe(self, domain: str):
+        """
+        Gibt den Platz einer Probe ohne Ergebnis wieder frei.
+
+        Args:
+            domain: Domain des Requests
+        """
+        breaker = self.domains.get(domain)
+        if breaker is not None and breaker['state'] == HALF_OPEN and breaker['probes'] > 0:
+            breaker['probes'] -= 1
+
+    def _reject(self, breaker: Dict[str, Any]) -> bool:
+        """Zählt einen abgewiesenen Request."""
+        breaker['short_circuited'] += 1
+        if self.stats is not None:
+            self.stats.inc_value('breaker/short_circuited')
+        return False
+
+    def record_success(self, domain: str):
+        """
+        Erfasst einen erfolgreichen Request und schließt einen halb offenen Breaker.
+
+        Args:
+            domain: Domain des Requests
+        """
+        breaker = self._breaker(domain)
+        breaker['successes'] += 1
+        breaker['consecutive'] = 0
+        if breaker['state'] != CLOSED:
+            self.logger.info(f"Circuit Breaker geschlossen: {domain} antwortet wieder")
+            breaker.update(state=CLOSED, cooldown=self.cooldown, probes=0, open_until=0.0)
+
+    def record_failure(self, domain: str, category: str, message: Optional[str] = None):
+        """
+        Erfasst einen Fehler und öffnet den Breaker bei Erreichen der Schwelle.
+
+        Args:
+            domain: Domain des Requests
+            category: Fehlerklasse (classify_exception/classify_status)
+            message: Fehlermeldung für den Bericht
+        """
+        breaker = self._breaker(domain)
+        breaker['failures'][category] += 1
+        breaker['consecutive'] += 1
+        breaker['last_error'] = message or category
+        if self.stats is not None:
+            self.stats.inc_value(f'breaker/failures/{category}')
+
+        if breaker['state'] == HALF_OPEN:
+            # Probe gescheitert: erneut öffnen, Abkühlzeit verdoppeln
+            self._open(domain, breaker, min(breaker['cooldown'] * 2, self.max_cooldown))
+        elif breaker['state'] == CLOSED and breaker['consecutive'] >= self.threshold:
+            self._open(domain, breaker, breaker['cooldown'])
+
+    def _open(self, domain: str, breaker: Dict[str, Any], cooldown: float):
+        """Öffnet den Breaker einer Domain."""
+        breaker.update(state=OPEN, cooldown=cooldown, open_until=time.time() + cooldown, probes=0)
+        breaker['opened'] += 1
+        if self.stats is not None:
+            self.stats.inc_value('breaker/opened')
+        top = breaker['failures'].most_common(1)[0][0]
+        self.logger.warning(
+            f"Circuit Breaker offen: {domain} nach {breaker['consecutive']} Fehlern ({top}), "
+            f"Pause {cooldown:.0f}s"
+        )
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Fehlerbericht des Laufs (für das Dashboard).
+
+        Returns:
+            Dict: Zusammenfassung und Zustand pro Domain mit Fehlern
+        """
+        domains = []
+        totals = Counter()
+        for domain, breaker in sorted(self.domains.items()):
+            failures = sum(breaker['failures'].values())
+            totals.update(breaker['failures'])
+            if not failures and not breaker['short_circuited'] and breaker['state'] == CLOSED:
+                continue
+            domains.append({
+                'domain': domain,
+                'state': breaker['state'],
+                'successes': breaker['successes'],
+                'failures': failures,
+                'failure_rate': round(failures / (failures + breaker['successes']), 3) if failures else 0.0,
+                'categories': dict(breaker['failures']),
+                'short_circuited': breaker['short_circuited'],
+                'opened': breaker['opened'],
+                'open_until': (
+                    datetime.fromtimestamp(breaker['open_until']).isoformat(timespec='seconds')
+                    if breaker['state'] != CLOSED else None
+                ),
+                'last_error': breaker['last_error'],
+            })
+        domains.sort(key=lambda entry: (entry['state'] == CLOSED, -entry['failures']))
+        return {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'open_domains': sum(1 for entry in domains if entry['state'] != CLOSED),
+            'failures': dict(totals),
+            'short_circuited': sum(entry['short_circuited'] for entry in domains),
+            'domains': domains,
+        }
+
+    def save(self):
+        """Speichert offene Breaker für den nächsten Lauf."""
+        if not self.store:
+            return
+        self.store.data = {
+            domain: {'open_until': breaker['open_until'], 'cooldown': breaker['cooldown']}
+            for domain, breaker in self.domains.items()
+            if breaker['state'] != CLOSED
+        }
+        self.store.save()
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Zeitbudget eines Crawl-Laufs mit Deadline.
+
+Der Workflow bricht den Job nach einer festen Zeit ab. Damit CSV-Export,
+Pipelines und Upload trotzdem vollständig sind, erhält der Spider eine
+Deadline. Aus den beobachteten Ladezeiten pro Domain wird geschätzt, wie
+viele der wartenden Requests bis dahin noch schaffbar sind:
+
+- Requests werden nach Wert priorisiert (Startseiten vor Artikeln,
+  innerhalb einer Stufe schnelle Domains zuerst)
+- Passt die Warteschlange nicht mehr ins Budget, werden nur noch die
+  wertvollsten Requests zugelassen
+- Eine Sicherheitsmarge vor der Deadline werden keine Requests mehr
+  gestartet; laufende werden abgearbeitet und der Spider sauber beendet
+"""
+
+import time
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from scrapy.exceptions import IgnoreRequest
+from crawler.state import JsonStateStore
+
+
+class BudgetExhausted(IgnoreRequest):
+    """Request wurde wegen des Zeitbudgets nicht mehr gestartet."""
+
+
+def parse_deadline(value) -> Optional[float]:
+    """
+    Wandelt eine Deadline (Unix-Zeit oder ISO-Zeitstempel) in Unix-Zeit um.
+
+    Args:
+        value: Wert aus den Settings bzw. der Umgebung
+
+    Returns:
+        float: Unix-Zeit oder None wenn nicht gesetzt
+    """
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value)).timestamp()
+
+
+class CrawlBudget:
+    """
+    Schätzt die Restarbeit und entscheidet über die Zulassung von Requests.
+    """
+
+    # Gewicht neuer Messungen in der gleitenden Ladezeit
+    ALPHA = 0.3
+
+    def __init__(self, deadline: float, margin: float = 120, concurrency: int = 1,
+                 value_priorities: Optional[Dict[str, int]] = None,
+                 default_render_seconds: float = 8.0, default_http_seconds: float = 1.0,
+                 state_file: Optional[str] = None, stats=None):
+        """
+        Args:
+            deadline: Deadline als Unix-Zeit
+            margin: Ab so vielen Sekunden vor der Deadline wird nichts Neues gestartet
+            concurrency: Gleichzeitige Requests (Startwert CONCURRENT_REQUESTS, die
+                CrawlBudgetMiddleware setzt die Kapazität der Download-Lanes)
+            value_priorities: Basis-Priorität pro Callback-Name
+            default_render_seconds: Angenommene Ladezeit unbekannter Domains (gerendert)
+            default_http_seconds: Angenommene Ladezeit unbekannter Domains (einfaches HTTP)
+            state_file: JSON-Datei für die gelernten Ladezeiten (None = nicht speichern)
+            stats: Scrapy-Stats-Collector (optional)
+        """
+        self.deadline = deadline
+        self.margin = margin
+        self.concurrency = max(1, concurrency)
+        self.value_priorities = value_priorities or {}
+        self.defaults = {'render': default_render_seconds, 'http': default_http_seconds}
+        self.stats = stats
+        self.store = JsonStateStore(state_file) if state_file else None
+        self.domains: Dict[str, Dict[str, float]] = self.store.load() if self.store else {}
+
+        # Wartende Requests pro Priorität (geplant, aber noch nicht gestartet)
+        self.pending: Counter = Counter()
+        self.cutoff: Optional[int] = None
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """
+        Erstellt das Budget aus den Crawler-Settings.
+
+        Die Deadline ist die frühere von CRAWL_DEADLINE und Start plus
+        CRAWL_BUDGET_MINUTES. Ohne beides gibt es kein Budget (None).
+        """
+        settings = crawler.settings
+        deadlines = []
+        deadline = parse_deadline(settings.get('CRAWL_DEADLINE'))
+        if deadline:
+            deadlines.append(deadline)
+        minutes = settings.getfloat('CRAWL_BUDGET_MINUTES', 0)
+        if minutes > 0:
+            deadlines.append(time.time() + minutes * 60)
+        if not deadlines:
+            return None
+
+        return cls(
+            deadline=min(deadlines),
+            margin=settings.getfloat('CRAWL_BUDGET_MARGIN_SECONDS', 120),
+            concurrency=settings.getint('CONCURRENT_REQUESTS'),
+            value_priorities=settings.getdict('CRAWL_BUDGET_PRIORITIES'),
+            default_render_seconds=settings.getfloat('CRAWL_BUDGET_DEFAULT_RENDER_SECONDS', 8.0),
+            default_http_seconds=settings.getfloat('CRAWL_BUDGET_DEFAULT_HTTP_SECONDS', 1.0),
+            state_file=settings.get('CRAWL_BUDGET_STATE_FILE'),
+            stats=crawler.stats,
+        )
+
+    def remaining(self) -> float:
+        """Verbleibende Sekunden bis zum Beginn der Sicherheitsmarge."""
+        return self.deadline - self.margin - time.time()
+
+    def estimate(self, domain: str, rendered: bool = True) -> float:
+        """
+        Geschätzte Ladezeit einer Seite.
+
+        Args:
+            domain: Domain der Seite
+            rendered: Playwright-Request (sonst einfaches HTTP)
+
+        Returns:
+            float: Sekunden
+        """
+        mode = 'render' if rendered else 'http'
+        return self.domains.get(domain, {}).get(mode, self.defaults[mode])
+
+    def record(self, domain: str, rendered: bool, seconds: float):
+        """
+        Erfasst die gemessene Ladezeit einer Seite.
+
+        Args:
+            domain: Domain der Seite
+            rendered: Playwright-Request (sonst einfaches HTTP)
+            seconds: Dauer vom Start des Downloads bis zur Response
+        """
+        mode = 'render' if rendered else 'http'
+        learned = self.domains.setdefault(domain, {})
+        previous = learned.get(mode)
+        learned[mode] = round(seconds if previous is None else previous + self.ALPHA * (seconds - previous), 3)
+
+    def priority(self, callback: str, domain: str, rendered: bool = True) -> int:
+        """
+        Scheduler-Priorität eines neuen Requests.
+
+        Der Wert des Callbacks bestimmt die Stufe, innerhalb einer Stufe
+        kommen schnelle Domains zuerst.
+
+        Args:
+            callback: Name des Callbacks (z.B. 'parse', 'parse_article')
+            domain: Domain der Seite
+            rendered: Playwright-Request (sonst einfaches HTTP)
+
+        Returns:
+            int: Priorität (höher = früher)
+        """
+        return int(self.value_priorities.get(callback, 0)) - int(round(self.estimate(domain, rendered)))
+
+    def scheduled(self, priority: int):
+        """Ein Request wurde in die Warteschlange gestellt."""
+        self.pending[priority] += 1
+
+    def dequeued(self, priority: int):
+        """Ein Request hat die Warteschlange verlassen (gestartet oder verworfen)."""
+        if self.pending[priority] > 1:
+            self.pending[priority] -= 1
+        else:
+            self.pending.pop(priority, None)
+
+    def average_cost(self) -> float:
+        """Mittlere gelernte Ladezeit (gerendert) über alle Domains."""
+        times = [learned['render'] for learned in self.domains.values() if 'render' in learned]
+        return sum(times) / len(times) if times else self.defaults['render']
+
+    def update_cutoff(self) -> Optional[int]:
+        """
+        Berechnet die Mindestpriorität, damit die Warteschlange ins Budget passt.
+
+        Returns:
+            int: Mindestpriorität oder None, wenn alle wartenden Requests passen
+        """
+        affordable = max(0.0, self.remaining()) * self.concurrency / self.average_cost()
+        total = 0
+        cutoff = None
+        for priority in sorted(self.pending, reverse=True):
+            total += self.pending[priority]
+            if total > affordable:
+                # Diese Stufe wird noch begonnen, alle niedrigeren verworfen
+                cutoff = priority
+                break
+        self.cutoff = cutoff
+        if cutoff is not None and self.stats is not None:
+            self.stats.max_value('budget/cutoff_priority', cutoff)
+        return cutoff
+
+    def admit(self, domain: str, priority: int, rendered: bool = True) -> Optional[str]:
+        """
+        Entscheidet ob ein Request noch gestartet wird.
+
+        Args:
+            domain: Domain der Seite
+            priority: Priorität des Requests
+            rendered: Playwright-Request (sonst einfaches HTTP)
+
+        Returns:
+            str: Grund der Ablehnung ('deadline', 'priority', 'too_slow') oder None
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            return 'deadline'
+        if self.cutoff is not None and priority < self.cutoff:
+            return 'priority'
+        if self.estimate(domain, rendered) > remaining:
+            return 'too_slow'
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        """Kennzahlen für das Log am Ende des Laufs."""
+        return {
+            'remaining_s': int(self.remaining() + self.margin),
+            'pending': sum(self.pending.values()),
+            'cutoff': self.cutoff,
+            'avg_render_s': round(self.average_cost(), 2),
+        }
+
+    def save(self):
+        """Speichert die gelernten Ladezeiten."""
+        if self.store:
+            self.store.data = self.domains
+            self.store.save()
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpoints eines laufenden Crawls zum Fortsetzen nach einem Abbruch.
+
+Ein Checkpoint enthält die noch offenen Requests, die Fingerprints des
+Duplikatfilters und den Zustand der Export-Pipelines (gesehene URLs,
+Zähler, Byte-Offsets der CSV-Dateien). Er wird als gzip-komprimiertes
+JSON atomar geschrieben. Neben dem Checkpoint liegt eine Kopie der
+CSV-Dateien bis zu diesen Offsets (<spider>.exports/), damit ein Lauf
+auch dort fortgesetzt werden kann, wo nur CHECKPOINT_DIR erhalten
+bleibt (z.B. im CI-Cache).
+
+Playwright-Requests tragen PageMethod-Objekte und andere nicht
+serialisierbare Werte in meta. PageMethods werden mit Methode und
+Argumenten kodiert, laufzeitbezogene Einträge (z.B. playwright_page)
+werden verworfen.
+"""
+
+import os
+import gzip
+import shutil
+import json
+import logging
+from typing import Dict, Any, Optional
+
+from scrapy import Request, Spider
+from scrapy.utils.request import request_from_dict
+from scrapy_playwright.page import PageMethod
+
+
+FORMAT_VERSION = 1
+
+# Meta-Einträge, die nur während eines Downloads gültig sind
+TRANSIENT_META = frozenset({
+    'playwright_page',
+    'download_slot',
+    'download_latency',
+    'budget_started',
+    'content_gate',
+    'content_gate_received',
+    'checkpoint_seq',
+})
+
+logger = logging.getLogger(__name__)
+
+
+def encode_value(value):
+    """
+    Wandelt einen Meta-Wert in eine JSON-taugliche Form um.
+
+    Args:
+        value: Beliebiger Wert aus request.meta
+
+    Returns:
+        JSON-taugliche Darstellung
+
+    Raises:
+        TypeError: Wenn der Wert nicht kodiert werden kann
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, PageMethod):
+        return {'__page_method__': [value.method, encode_value(list(value.args)), encode_value(value.kwargs)]}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): encode_value(v) for k, v in value.items()}
+    if isinstance(value, bytes):
+        return {'__bytes__': value.decode('latin-1')}
+    raise TypeError(f"{type(value).__name__} ist nicht serialisierbar")
+
+
+def decode_value(value):
+    """Kehrt encode_value() um."""
+    if isinstance(value, list):
+        return [decode_value(v) for v in value]
+    if isinstance(value, dict):
+        if '__page_method__' in value:
+            method, args, kwargs = value['__page_method__']
+            return PageMethod(method, *decode_value(args), **decode_value(kwargs))
+        if '__bytes__' in value:
+            return value['__bytes__'].encode('latin-1')
+        return {k: decode_value(v) for k, v in value.items()}
+    return value
+
+
+def encode_request(request: Request, spider: Spider) -> Dict[str, Any]:
+    """
+    Serialisiert einen Request inklusive Playwright-Meta-Daten.
+
+    Args:
+        request: Der Request
+        spider: Spider mit den Callback-Methoden
+
+    Returns:
+        Dict: JSON-taugliche Darstellung
+    """
+    data = request.to_dict(spider=spider)
+    meta = {}
+    for key, value in data.pop('meta', {}).items():
+        if key in TRANSIENT_META:
+            continue
+        try:
+            meta[key] = encode_value(value)
+        except TypeError as e:
+            logger.debug(f"Meta '{key}' von {request.url} nicht gesichert: {e}")
+    data['meta'] = meta
+    data['headers'] = {
+        key.decode('latin-1'): [v.decode('latin-1') for v in values]
+        for key, values in data['headers'].items()
+    }
+    data['body'] = data['body'].decode('latin-1')
+    return encode_value(data)
+
+
+def decode_request(data: Dict[str, Any], spider: Spider) -> Request:
+    """
+    Erstellt einen Request aus encode_request() neu.
+
+    Args:
+        data: Serialisierter Request
+        spider: Spider mit den Callback-Methoden
+
+    Returns:
+        Request: Der wiederhergestellte Request
+    """
+    data = decode_value(data)
+    data['body'] = data['body'].encode('latin-1')
+    data['headers'] = {key: [v.encode('latin-1') for v in values] for key, values in data['headers'].items()}
+    return request_from_dict(data, spider=spider)
+
+
+class CheckpointStore:
+    """
+    Liest und schreibt den Checkpoint eines Spiders.
+    """
+
+    def __init__(self, directory: str, spider_name: str):
+        """
+        Args:
+            directory: Verzeichnis der Checkpoints
+            spider_name: Name des Spiders (ein Checkpoint pro Spider)
+        """
+        self.path = os.path.join(directory, f'{spider_name}.json.gz')
+        self.export_dir = os.path.join(directory, f'{spider_name}.exports')
+
+    @classmethod
+    def from_settings(cls, settings, spider_name: str):
+        """Erstellt den Store aus den Crawler-Settings."""
+        return cls(settings.get('CHECKPOINT_DIR', 'data/state/checkpoint'), spider_name)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Lädt den Checkpoint.
+
+        Returns:
+            Dict: Checkpoint oder None, wenn keiner (lesbar) vorliegt
+        """
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Checkpoint {self.path} nicht lesbar, starte neu: {e}")
+            return None
+        if data.get('version') != FORMAT_VERSION:
+            logger.warning(f"Checkpoint {self.path} hat ein unbekanntes Format, starte neu")
+            return None
+        return data
+
+    def save(self, data: Dict[str, Any]):
+        """Schreibt den Checkpoint atomar (temporäre Datei + Umbenennen)."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as file:
+            json.dump({'version': FORMAT_VERSION, **data}, file, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Entfernt den Checkpoint (und die Kopie der Exporte) nach einem vollständigen Lauf."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(self.export_dir, ignore_errors=True)
+
+
+def resume_checkpoint(crawler) -> Optional[Dict[str, Any]]:
+    """
+    Liefert den Checkpoint, mit dem der Lauf fortgesetzt wird.
+
+    CHECKPOINT_RESUME: 'auto' setzt fort, wenn ein Checkpoint vorliegt,
+    'true' ebenso (mit Warnung wenn keiner vorliegt), 'false' startet neu.
+
+    Args:
+        crawler: Scrapy-Crawler-Objekt
+
+    Returns:
+        Dict: Checkpoint oder None für einen neuen Lauf
+    """
+    settings = crawler.settings
+    mode = str(settings.get('CHECKPOINT_RESUME', 'auto')).lower()
+    if not settings.getbool('CHECKPOINT_ENABLED') or mode in ('false', '0', 'no', ''):
+        return None
+
+    store = CheckpointStore.from_settings(settings, crawler.spidercls.name)
+    data = store.load()
+    if data is None and mode != 'auto':
+        logger.warning(f"Kein Checkpoint zum Fortsetzen gefunden ({store.path})")
+    return data
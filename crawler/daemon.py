@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Schnittstellen für den Daemon-Modus des Crawlers.
+
+Im Daemon-Modus bleiben Reactor und Browser zwischen einzelnen Crawls
+aktiv. URL-Batches werden über einen lokalen HTTP-Endpunkt oder ein
+Spool-Verzeichnis angenommen, die Ergebnisse pro Batch als JSON
+gespeichert und über den Endpunkt abgefragt.
+"""
+
+import os
+import hmac
+import json
+import time
+import uuid
+import logging
+from typing import Dict, Any, List, Optional, Callable
+
+from twisted.web import resource, http
+
+
+# Signal an Pipelines: URL für einen weiteren Batch wieder exportieren (Argument: url)
+batch_url_released = object()
+
+
+class Batch:
+    """
+    Ein angenommener URL-Batch mit seinen Ergebnissen.
+    """
+
+    __slots__ = ('id', 'urls', 'pending', 'results', 'item_urls', 'created', 'finished')
+
+    def __init__(self, batch_id: str, urls: List[str]):
+        """
+        Args:
+            batch_id: Eindeutige ID des Batches
+            urls: URLs des Batches
+        """
+        self.id = batch_id
+        self.urls = urls
+        self.pending = len(urls)
+        self.results: List[Dict[str, Any]] = []
+        # Item-URLs des Batches (Duplikatfilter der Pipelines gilt pro Batch)
+        self.item_urls = set()
+        self.created = time.time()
+        self.finished: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Liefert den Batch-Zustand als JSON-taugliches Dictionary."""
+        return {
+            'batch_id': self.id,
+            'status': 'done' if self.finished else 'running',
+            'urls': len(self.urls),
+            'pending': self.pending,
+            'succeeded': sum(1 for r in self.results if r['ok']),
+            'failed': sum(1 for r in self.results if not r['ok']),
+            'dropped': sum(1 for r in self.results if r.get('dropped')),
+            'duration_s': round((self.finished or time.time()) - self.created, 3),
+            'results': self.results,
+        }
+
+
+class BatchRegistry:
+    """
+    Verwaltet laufende und abgeschlossene Batches.
+
+    Abgeschlossene Batches werden in results_dir/<batch_id>.json abgelegt.
+    """
+
+    # Anzahl abgeschlossener Batches, die im Speicher abfragbar bleiben
+    MAX_FINISHED = 200
+
+    def __init__(self, results_dir: str):
+        """
+        Args:
+            results_dir: Verzeichnis für die Ergebnisdateien
+        """
+        self.results_dir = results_dir
+        self.batches: Dict[str, Batch] = {}
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(results_dir, exist_ok=True)
+
+    def create(self, urls: List[str], batch_id: Optional[str] = None) -> Batch:
+        """
+        Legt einen neuen Batch an.
+
+        Args:
+            urls: URLs des Batches
+            batch_id: Vorgegebene ID (z.B. Name der Spool-Datei)
+
+        Returns:
+            Batch: Der angelegte Batch
+        """
+        batch = Batch(batch_id or uuid.uuid4().hex[:12], urls)
+        self.batches[batch.id] = batch
+        self._prune()
+        if not urls:
+            self._finish(batch)
+        return batch
+
+    def get(self, batch_id: str) -> Optional[Batch]:
+        """Liefert einen Batch anhand seiner ID."""
+        return self.batches.get(batch_id)
+
+    def request_done(self, batch_id: Optional[str], url: str, ok: bool, **details):
+        """
+        Erfasst das Ergebnis einer URL.
+
+        Args:
+            batch_id: ID des Batches (None = kein Daemon-Request)
+            url: Ursprüngliche URL des Requests
+            ok: Ob ein Item erzeugt wurde
+            **details: Zusätzliche Angaben (title, status, error)
+        """
+        batch = self.batches.get(batch_id) if batch_id else None
+        if batch is None or batch.finished:
+            return
+
+        batch.results.append({'url': url, 'ok': ok, **details})
+        batch.pending -= 1
+        if batch.pending <= 0:
+            self._finish(batch)
+
+    def _finish(self, batch: Batch):
+        """Schließt einen Batch ab und schreibt seine Ergebnisdatei."""
+        batch.finished = time.time()
+        path = os.path.join(self.results_dir, f'{batch.id}.json')
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(batch.as_dict(), file, ensure_ascii=False, indent=2)
+
+        summary = batch.as_dict()
+        self.logger.info(
+            f"Batch {batch.id} abgeschlossen: {summary['succeeded']} ok, "
+            f"{summary['failed']} fehlgeschlagen in {summary['duration_s']}s"
+        )
+
+    def _prune(self):
+        """Entfernt die ältesten abgeschlossenen Batches aus dem Speicher."""
+        finished = [b for b in self.batches.values() if b.finished]
+        for batch in finished[:max(0, len(finished) - self.MAX_FINISHED)]:
+            del self.batches[batch.id]
+
+
+def read_url_file(path: str) -> List[str]:
+    """
+    Liest URLs aus einer Spool-Datei.
+
+    Unterstützt JSON (Liste oder {"urls": [...]}) und Textdateien mit
+    einer URL pro Zeile.
+
+    Args:
+        path: Pfad der Spool-Datei
+
+    Returns:
+        List[str]: Die enthaltenen URLs
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        content = file.read()
+
+    if path.endswith('.json'):
+        data = json.loads(content or '[]')
+        urls = data.get('urls', []) if isinstance(data, dict) else data
+    else:
+        urls = content.splitlines()
+
+    return [url.strip() for url in urls if isinstance(url, str) and url.strip()]
+
+
+class DaemonResource(resource.Resource):
+    """
+    Lokaler HTTP-Endpunkt des Daemons.
+
+    POST /crawl          Body: {"urls": [...]} (leer = Standard-URLs) -> Batch-ID
+    GET  /batches/<id>   Zustand und Ergebnisse eines Batches
+    GET  /status         Übersicht über alle Batches im Speicher
+
+    Browser-Anfragen (Origin-Header) werden nur von der konfigurierten
+    Origin angenommen, sonst könnte jede im Browser geöffnete Seite
+    Batches einplanen und deren Ergebnisse lesen. Ist ein Token gesetzt,
+    muss jede Anfrage es im Header X-Daemon-Token mitschicken.
+    """
+
+    isLeaf = True
+
+    def __init__(self, registry: BatchRegistry, submit: Callable[[List[str]], Batch],
+                 allowed_origin: Optional[str] = None, token: Optional[str] = None):
+        """
+        Args:
+            registry: Batch-Verwaltung
+            submit: Funktion, die URLs als neuen Batch einplant
+            allowed_origin: Einzige Origin, die per Browser zugreifen darf (None = keine)
+            token: Geheimer Token für den Header X-Daemon-Token (None = nicht erforderlich)
+        """
+        super(DaemonResource, self).__init__()
+        self.registry = registry
+        self.submit = submit
+        self.allowed_origin = allowed_origin.encode('utf-8') if allowed_origin else None
+        self.token = token.encode('utf-8') if token else None
+
+    def _json(self, request, data, code: int = http.OK) -> bytes:
+        """Setzt Status und Header und serialisiert die Antwort."""
+        request.setResponseCode(code)
+        request.setHeader(b'Content-Type', b'application/json; charset=utf-8')
+        request.setHeader(b'Vary', b'Origin')
+        if self.allowed_origin and request.getHeader(b'Origin') == self.allowed_origin:
+            # Nur das konfigurierte Dashboard darf die Antwort lesen
+            request.setHeader(b'Access-Control-Allow-Origin', self.allowed_origin)
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    def _denied(self, request) -> Optional[bytes]:
+        """Antwort für nicht erlaubte Anfragen (fremde Origin, fehlender Token), sonst None."""
+        origin = request.getHeader(b'Origin')
+        if origin is not None and origin != self.allowed_origin:
+            return self._json(request, {'error': 'origin not allowed'}, http.FORBIDDEN)
+        if self.token and not hmac.compare_digest(request.getHeader(b'X-Daemon-Token') or b'', self.token):
+            return self._json(request, {'error': 'invalid token'}, http.UNAUTHORIZED)
+        return None
+
+    def render_OPTIONS(self, request) -> bytes:
+        """CORS-Preflight für POST aus dem Dashboard (nur für DAEMON_ALLOWED_ORIGIN)."""
+        origin = request.getHeader(b'Origin')
+        if origin is None or origin != self.allowed_origin:
+            return self._json(request, {'error': 'origin not allowed'}, http.FORBIDDEN)
+        request.setHeader(b'Access-Control-Allow-Methods', b'GET, POST, OPTIONS')
+        request.setHeader(b'Access-Control-Allow-Headers', b'Content-Type, X-Daemon-Token')
+        return self._json(request, {}, http.NO_CONTENT)
+
+    def render_POST(self, request) -> bytes:
+        """Nimmt einen neuen URL-Batch an."""
+        denied = self._denied(request)
+        if denied is not None:
+            return denied
+        if request.path != b'/crawl':
+            return self._json(request, {'error': 'not found'}, http.NOT_FOUND)
+
+        try:
+            body = json.loads(request.content.read() or b'{}')
+        except ValueError:
+            return self._json(request, {'error': 'invalid JSON'}, http.BAD_REQUEST)
+
+        urls = body.get('urls', []) if isinstance(body, dict) else body
+        if not isinstance(urls, list):
+            return self._json(request, {'error': 'urls must be a list'}, http.BAD_REQUEST)
+
+        batch = self.submit([u for u in urls if isinstance(u, str)])
+        return self._json(request, {'batch_id': batch.id, 'urls': len(batch.urls)}, http.ACCEPTED)
+
+    def render_GET(self, request) -> bytes:
+        """Liefert den Zustand eines Batches oder die Übersicht."""
+        denied = self._denied(request)
+        if denied is not None:
+            return denied
+        path = request.path.decode('utf-8', 'replace')
+
+        if path == '/status':
+            return self._json(request, {
+                'batches': [
+                    {k: v for k, v in b.as_dict().items() if k != 'results'}
+                    for b in self.registry.batches.values()
+                ],
+            })
+
+        if path.startswith('/batches/'):
+            batch = self.registry.get(path[len('/batches/'):])
+            if batch is not None:
+                return self._json(request, batch.as_dict())
+
+        return self._json(request, {'error': 'not found'}, http.NOT_FOUND)
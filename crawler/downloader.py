@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Downloader mit getrennten Lanes für Browser-Renderings und einfache HTTP-Requests.
+
+Im Standard-Downloader teilen sich alle Requests CONCURRENT_REQUESTS;
+ein langsames Rendering blockiert damit Kapazität, die Feeds, API-Abrufe
+oder statische Seiten nutzen könnten. Hier hat jede Lane ein eigenes
+Limit gleichzeitiger Übertragungen und eine eigene Warteschlange:
+
+- browser: Playwright-Requests, Größe aus PLAYWRIGHT_MAX_CONTEXTS
+- http: alle übrigen Requests, Größe aus CONCURRENT_REQUESTS
+
+Die Lane kommt aus meta['download_lane'], sonst aus meta['playwright'].
+Domain-Slots (Verzögerung, Requests pro Domain) gelten unverändert
+über beide Lanes. Die Engine holt neue Requests, solange eine Lane
+frei ist; wartende Requests einer vollen Lane sind durch
+DOWNLOAD_LANE_BACKLOG begrenzt.
+"""
+
+import logging
+from collections import deque
+from typing import Dict
+
+from twisted.internet.defer import Deferred
+from scrapy import Request, Spider
+from scrapy.core.downloader import Downloader, Slot
+
+
+class Lane:
+    """
+    Limit und Warteschlange einer Lane.
+    """
+
+    def __init__(self, name: str, concurrency: int):
+        """
+        Args:
+            name: Name der Lane (für Stats und Logs)
+            concurrency: Gleichzeitige Übertragungen
+        """
+        self.name = name
+        self.concurrency = concurrency
+        # Requests der Lane im Downloader (inklusive Middlewares und Domain-Slot)
+        self.active = 0
+        # Laufende Übertragungen
+        self.transferring = 0
+        # Requests, deren Domain-Slot frei ist, die aber auf die Lane warten
+        self.queue = deque()
+
+    def is_full(self) -> bool:
+        return self.active >= self.concurrency
+
+    def __repr__(self) -> str:
+        return (
+            f"<Lane {self.name} concurrency={self.concurrency} active={self.active} "
+            f"transferring={self.transferring} waiting={len(self.queue)}>"
+        )
+
+
+class LaneDownloader(Downloader):
+    """
+    Scrapy-Downloader (Setting DOWNLOADER) mit einer Lane pro Request-Art.
+    """
+
+    LANE_META = 'download_lane'
+
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        settings = crawler.settings
+        self.stats = crawler.stats
+        self.logger = logging.getLogger(__name__)
+
+        sizes = {
+            'browser': settings.getint('PLAYWRIGHT_MAX_CONTEXTS') or settings.getint('CONCURRENT_REQUESTS'),
+            'http': settings.getint('CONCURRENT_REQUESTS'),
+        }
+        for name, size in settings.getdict('DOWNLOAD_LANES').items():
+            if size:
+                sizes[name] = int(size)
+        self.lanes: Dict[str, Lane] = {name: Lane(name, max(1, size)) for name, size in sizes.items()}
+        self.backlog = settings.getint('DOWNLOAD_LANE_BACKLOG', 4)
+
+        # Obergrenze über alle Lanes (wird vom MemoryPressureController gesenkt)
+        self.total_concurrency = sum(lane.concurrency for lane in self.lanes.values()) + self.backlog
+        self.logger.info("Download-Lanes: %s", ', '.join(
+            f"{lane.name}={lane.concurrency}" for lane in self.lanes.values()
+        ))
+
+    def lane_for(self, request: Request) -> Lane:
+        """
+        Lane eines Requests.
+
+        Args:
+            request: Scrapy-Request
+
+        Returns:
+            Lane: Aus meta['download_lane'], sonst browser für Playwright-Requests
+        """
+        name = request.meta.get(self.LANE_META)
+        if name not in self.lanes:
+            name = 'browser' if request.meta.get('playwright') else 'http'
+        return self.lanes[name]
+
+    def fetch(self, request: Request, spider: Spider) -> Deferred:
+        lane = self.lane_for(request)
+        lane.active += 1
+        self.stats.inc_value(f'download_lanes/{lane.name}/requests')
+
+        def _deactivate(result):
+            lane.active -= 1
+            return result
+
+        return super().fetch(request, spider).addBoth(_deactivate)
+
+    def needs_backout(self) -> bool:
+        """Neue Requests annehmen, solange eine Lane frei ist (bis zur Obergrenze)."""
+        if len(self.active) >= self.total_concurrency:
+            return True
+        return all(lane.is_full() for lane in self.lanes.values())
+
+    def _download(self, slot: Slot, request: Request, spider: Spider) -> Deferred:
+        lane = self.lane_for(request)
+        if lane.transferring < lane.concurrency:
+            return self._lane_download(lane, slot, request, spider)
+
+        # Den Domain-Slot belegen, damit er keine weiteren Requests freigibt
+        slot.transferring.add(request)
+        deferred = Deferred()
+        lane.queue.append((slot, request, spider, deferred))
+        self.stats.inc_value(f'download_lanes/{lane.name}/waited')
+        self.stats.max_value(f'download_lanes/{lane.name}/max_waiting', len(lane.queue))
+        return deferred
+
+    def _lane_download(self, lane: Lane, slot: Slot, request: Request, spider: Spider) -> Deferred:
+        """Startet die Übertragung und gibt den Platz der Lane danach frei."""
+        lane.transferring += 1
+
+        def _release(result):
+            lane.transferring -= 1
+            self._process_lane(lane)
+            return result
+
+        return super()._download(slot, request, spider).addBoth(_release)
+
+    def _process_lane(self, lane: Lane):
+        """Startet wartende Requests der Lane, solange Plätze frei sind."""
+        while lane.queue and lane.transferring < lane.concurrency:
+            slot, request, spider, deferred = lane.queue.popleft()
+            self._lane_download(lane, slot, request, spider).chainDeferred(deferred)
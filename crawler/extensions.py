@@ -0,0 +1,767 @@
+# -*- coding: utf-8 -*-
+"""
+Scrapy Extensions für die Überwachung und Steuerung des Crawl-Laufs.
+
+Extensions hängen sich über Signale an den Crawler und können den
+Engine- und Browser-Zustand beobachten und beeinflussen.
+"""
+
+import gc
+import time
+import asyncio
+import logging
+from typing import Optional
+
+import psutil
+from itemadapter import ItemAdapter
+from twisted.internet import defer, reactor, task, threads
+from twisted.python.threadpool import ThreadPool
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import TextResponse
+from scrapy.utils.defer import deferred_from_coro
+from scrapy.utils.log import LogCounterHandler
+from crawler.history import PageHistoryStore, history_metadata
+from crawler.items import item_kind
+from crawler.logs import PreparedQueueHandler, QueueLogging, RateLimitFilter
+from crawler.warc import WarcWriter
+
+
+# Signal an Pipelines: Puffer unter Speicherdruck sofort schreiben (Argument: level)
+memory_pressure = object()
+
+
+def playwright_handler(crawler):
+    """
+    Liefert den Playwright-Download-Handler eines Crawlers.
+
+    Args:
+        crawler: Scrapy-Crawler-Objekt
+
+    Returns:
+        ScrapyPlaywrightDownloadHandler oder None, wenn (noch) nicht geladen
+    """
+    engine = crawler.engine
+    if engine is None or engine.downloader is None:
+        return None
+    # DownloadHandlers._handlers/_get_handler sind privat (Stand Scrapy 2.11,
+    # scrapy-playwright 0.0.36 laut requirements.txt); fehlen sie, gibt es
+    # keinen Zugriff auf den Handler statt eines AttributeError.
+    handlers = engine.downloader.handlers
+    handler = getattr(handlers, '_handlers', {}).get('https')
+    if handler is None and hasattr(handlers, '_get_handler'):
+        handler = handlers._get_handler('https')
+    return handler if hasattr(handler, 'browser_type') else None
+
+
+class BrowserLifecycleManager:
+    """
+    Extension zum Recyceln des Playwright-Browsers.
+
+    Der Browser wird nach BROWSER_MAX_PAGES gerenderten Seiten oder bei
+    Überschreiten von BROWSER_MAX_RSS_MB neu gestartet. Vor dem Neustart
+    wird die Engine pausiert, bis alle laufenden Renders und offenen
+    Pages abgearbeitet sind. Hängt der Browser (laufende Renders, aber
+    kein Fortschritt innerhalb von BROWSER_HANG_TIMEOUT), wird er
+    zwangsweise beendet. Betroffene Requests werden von der
+    BrowserRecoveryMiddleware neu eingeplant.
+
+    scrapy-playwright startet den Browser nur, solange der Handler noch
+    kein 'browser'-Attribut hat. Nach einem Neustart oder Absturz wird
+    das Attribut deshalb entfernt, damit die nächste Anfrage einen neuen
+    Browser startet (die Kontexte entfernt der Handler beim Schließen selbst).
+    Die Start-Kontexte aus PLAYWRIGHT_CONTEXTS legt die Extension danach
+    mit ihren Optionen (User-Agent, Viewport, ...) neu an; sonst würde der
+    Handler sie bei der nächsten Anfrage ohne diese Optionen erzeugen.
+    Dafür nutzt sie context_wrappers und _create_browser_context des
+    Handlers (private API von scrapy-playwright 0.0.36).
+    """
+
+    def __init__(self, crawler):
+        """
+        Args:
+            crawler: Scrapy-Crawler-Objekt
+        """
+        settings = crawler.settings
+        if not settings.getbool('BROWSER_RECYCLE_ENABLED'):
+            raise NotConfigured("BROWSER_RECYCLE_ENABLED is False")
+
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.max_pages = settings.getint('BROWSER_MAX_PAGES', 200)
+        self.max_rss_mb = settings.getint('BROWSER_MAX_RSS_MB', 350)
+        self.check_interval = settings.getfloat('BROWSER_CHECK_INTERVAL', 10)
+        self.drain_timeout = settings.getfloat('BROWSER_DRAIN_TIMEOUT', 60)
+        self.hang_timeout = settings.getfloat('BROWSER_HANG_TIMEOUT', 120)
+        self.startup_contexts = settings.getdict('PLAYWRIGHT_CONTEXTS')
+
+        self.pages_since_restart = 0
+        self.inflight = 0
+        self.last_progress = time.monotonic()
+        self.restarting = False
+        self.watched_browser = None
+        self.task: Optional[task.LoopingCall] = None
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Extension."""
+        ext = cls(crawler)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.request_reached_downloader, signal=signals.request_reached_downloader)
+        crawler.signals.connect(ext.request_left_downloader, signal=signals.request_left_downloader)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        return ext
+
+    def spider_opened(self, spider):
+        """Startet die periodische Prüfung des Browsers."""
+        self.task = task.LoopingCall(self._check)
+        self.task.start(self.check_interval, now=False)
+
+    def spider_closed(self, spider):
+        """Stoppt die periodische Prüfung."""
+        if self.task and self.task.running:
+            self.task.stop()
+
+    def request_reached_downloader(self, request, spider):
+        """Zählt laufende Playwright-Renders."""
+        if request.meta.get('playwright'):
+            self.inflight += 1
+
+    def request_left_downloader(self, request, spider):
+        """Zählt beendete Playwright-Renders."""
+        if request.meta.get('playwright'):
+            self.inflight = max(0, self.inflight - 1)
+            self.last_progress = time.monotonic()
+
+    def response_received(self, response, request, spider):
+        """Zählt gerenderte Seiten seit dem letzten Neustart."""
+        if request.meta.get('playwright'):
+            self.pages_since_restart += 1
+            self._watch_browser(self._browser())
+
+    def _playwright_handler(self):
+        """Liefert den Playwright-Download-Handler (falls geladen)."""
+        return playwright_handler(self.crawler)
+
+    def _browser(self):
+        """Liefert den aktuellen Browser (None wenn nicht gestartet)."""
+        return getattr(self._playwright_handler(), 'browser', None)
+
+    def _watch_browser(self, browser):
+        """Registriert den Disconnect-Handler für einen neu gestarteten Browser."""
+        if browser is None or browser is self.watched_browser:
+            return
+        self.watched_browser = browser
+        browser.on('disconnected', lambda b: self._browser_disconnected(b))
+
+    def _browser_disconnected(self, browser):
+        """
+        Entfernt einen getrennten Browser aus dem Playwright-Handler.
+
+        Args:
+            browser: Der getrennte Browser
+        """
+        if not self.restarting:
+            self.logger.error("Browser unerwartet beendet (Absturz), wird bei der nächsten Anfrage neu gestartet")
+            self.stats.inc_value('browser/crashes')
+            asyncio.ensure_future(self._restore_startup_contexts(browser))
+
+        handler = self._playwright_handler()
+        if handler is not None and getattr(handler, 'browser', None) is browser:
+            del handler.browser
+        if self.watched_browser is browser:
+            self.watched_browser = None
+        self.pages_since_restart = 0
+
+    async def _restore_startup_contexts(self, old_browser, timeout: float = 5.0):
+        """
+        Legt die Start-Kontexte aus PLAYWRIGHT_CONTEXTS nach einem Neustart neu an.
+
+        Wartet, bis der Handler die Kontexte des alten Browsers entfernt hat;
+        dessen Close-Callback entfernt Kontexte nach Namen und würde sonst
+        einen bereits neu angelegten Kontext gleichen Namens austragen.
+
+        Args:
+            old_browser: Der beendete Browser
+            timeout: Maximale Wartezeit auf das Schließen der alten Kontexte (Sekunden)
+        """
+        handler = self._playwright_handler()
+        if handler is None or not self.startup_contexts \
+                or not hasattr(handler, 'context_wrappers') or not hasattr(handler, '_create_browser_context'):
+            return
+
+        def stale(name):
+            wrapper = handler.context_wrappers.get(name)
+            return wrapper is not None and wrapper.context.browser is old_browser
+
+        deadline = time.monotonic() + timeout
+        while any(stale(name) for name in self.startup_contexts) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+        for name, kwargs in self.startup_contexts.items():
+            async with handler.context_launch_lock:
+                if name in handler.context_wrappers:
+                    continue
+                try:
+                    await handler._create_browser_context(name=name, context_kwargs=dict(kwargs))
+                except Exception as e:
+                    self.logger.warning(f"Start-Kontext '{name}' nicht neu angelegt: {e}")
+                    continue
+            self.stats.inc_value('browser/startup_contexts_restored')
+
+    @staticmethod
+    def _browser_processes():
+        """Liefert alle Chromium-Prozesse unterhalb des Crawler-Prozesses."""
+        processes = []
+        for child in psutil.Process().children(recursive=True):
+            try:
+                if 'chrom' in child.name().lower():
+                    processes.append(child)
+            except psutil.Error:
+                continue
+        return processes
+
+    def browser_rss_mb(self) -> float:
+        """
+        Summiert den Speicherverbrauch (RSS) aller Chromium-Prozesse.
+
+        Returns:
+            float: RSS in Megabyte
+        """
+        total = 0
+        for process in self._browser_processes():
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    def _check(self):
+        """Periodische Prüfung (LoopingCall, liefert ein Deferred)."""
+        return deferred_from_coro(self._check_browser())
+
+    async def _check_browser(self):
+        """Entscheidet ob der Browser recycelt oder zwangsbeendet wird."""
+        browser = self._browser()
+        if self.restarting or browser is None:
+            return
+        self._watch_browser(browser)
+
+        rss_mb = self.browser_rss_mb()
+        self.stats.max_value('browser/max_rss_mb', int(rss_mb))
+
+        if self.inflight and time.monotonic() - self.last_progress > self.hang_timeout:
+            self.logger.error(f"Browser hängt seit {self.hang_timeout:.0f}s ({self.inflight} Renders offen), erzwinge Neustart")
+            self.stats.inc_value('browser/hang_restarts')
+            await self._restart(drain=False)
+        elif self.pages_since_restart >= self.max_pages:
+            self.logger.info(f"Browser-Recycling nach {self.pages_since_restart} Seiten")
+            await self._restart(drain=True)
+        elif rss_mb > self.max_rss_mb:
+            self.logger.info(f"Browser-Recycling wegen Speicher ({rss_mb:.0f} MB > {self.max_rss_mb} MB)")
+            await self._restart(drain=True)
+
+    def _open_pages(self) -> int:
+        """Zählt offene Pages in allen Kontexten des Browsers."""
+        browser = self._browser()
+        if browser is None:
+            return 0
+        return sum(len(context.pages) for context in browser.contexts)
+
+    async def _restart(self, drain: bool):
+        """
+        Startet den Browser neu.
+
+        Args:
+            drain: Vorher laufende Renders und offene Pages abarbeiten lassen
+        """
+        self.restarting = True
+        engine = self.crawler.engine
+        engine.pause()
+        try:
+            if drain:
+                deadline = time.monotonic() + self.drain_timeout
+                while (self.inflight or self._open_pages()) and time.monotonic() < deadline:
+                    await asyncio.sleep(0.5)
+                if self.inflight or self._open_pages():
+                    self.logger.warning(
+                        f"Drain-Timeout: {self.inflight} Renders und {self._open_pages()} Pages noch offen"
+                    )
+
+            browser = self._browser()
+            if browser is not None:
+                try:
+                    await asyncio.wait_for(browser.close(), timeout=10)
+                except Exception as e:
+                    self.logger.warning(f"Browser reagiert nicht ({e}), beende Prozesse")
+                    for process in self._browser_processes():
+                        try:
+                            process.kill()
+                        except psutil.Error:
+                            pass
+                # Falls das Disconnect-Ereignis (noch) nicht kam
+                self._browser_disconnected(browser)
+                # Vor dem Fortsetzen der Engine, damit kein Request 'default' ohne Optionen anlegt
+                await self._restore_startup_contexts(browser)
+
+            self.stats.inc_value('browser/restarts')
+            self.pages_since_restart = 0
+            self.last_progress = time.monotonic()
+        finally:
+            self.restarting = False
+            engine.unpause()
+
+
+class MemoryPressureController:
+    """
+    Extension für stufenweisen Lastabwurf unter Speicherdruck.
+
+    Überwacht den RSS des Crawler-Prozesses plus aller Chromium-Prozesse
+    und vergleicht ihn mit MEMORY_PRESSURE_LIMIT_MB. Mit jeder
+    überschrittenen Schwelle (MEMORY_PRESSURE_THRESHOLDS) wird eine
+    weitere Stufe aktiviert:
+
+    1. Screenshots pausieren, Pipeline-Puffer schreiben, weniger
+       gleichzeitige Playwright-Kontexte
+    2. CONCURRENT_REQUESTS halbieren, eine Page pro neuem Kontext
+    3. Nur noch ein Request und ein Kontext, Garbage Collection
+
+    Liegt der Verbrauch über mehrere Prüfungen hinweg deutlich unter der
+    Schwelle der aktuellen Stufe, wird sie schrittweise zurückgenommen.
+    Der Crawl wird so langsamer statt (wie durch MEMUSAGE_LIMIT_MB) hart
+    beendet.
+
+    Kontexte werden begrenzt, indem die Extension Plätze des
+    Kontext-Semaphors von scrapy-playwright belegt; freigegebene Plätze
+    laufender Kontexte gehen dadurch zuerst an die Extension. Die
+    Start-Kontexte aus PLAYWRIGHT_CONTEXTS belegen ihre Plätze dauerhaft
+    und zählen nicht zur Basis; mindestens ein Platz bleibt immer für
+    Kontexte des Crawls (z.B. pro Domain) frei.
+
+    Seiten pro Kontext werden über handler.config.max_pages_per_context
+    begrenzt (nicht öffentliche Konfiguration von scrapy-playwright,
+    Stand 0.0.36 laut requirements.txt; fehlt sie, entfällt diese Stufe).
+    """
+
+    # Anteil der Basis-Kapazität pro Stufe: (Requests, Kontexte)
+    LEVELS = {
+        0: (1.0, 1.0),
+        1: (1.0, 0.5),
+        2: (0.5, 0.5),
+        3: (0.0, 0.0),
+    }
+
+    def __init__(self, crawler):
+        """
+        Args:
+            crawler: Scrapy-Crawler-Objekt
+        """
+        settings = crawler.settings
+        if not settings.getbool('MEMORY_PRESSURE_ENABLED'):
+            raise NotConfigured("MEMORY_PRESSURE_ENABLED is False")
+
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.limit_mb = settings.getint('MEMORY_PRESSURE_LIMIT_MB', 1024)
+        self.thresholds = sorted(float(t) for t in settings.getlist('MEMORY_PRESSURE_THRESHOLDS', [0.7, 0.8, 0.9]))
+        self.recovery_margin = settings.getfloat('MEMORY_PRESSURE_RECOVERY_MARGIN', 0.1)
+        self.recovery_checks = settings.getint('MEMORY_PRESSURE_RECOVERY_CHECKS', 3)
+        self.check_interval = settings.getfloat('MEMORY_PRESSURE_CHECK_INTERVAL', 5)
+
+        self.base_concurrency: Optional[int] = None
+        self.fallback_concurrency = settings.getint('CONCURRENT_REQUESTS')
+        # Plätze ohne die dauerhaft belegten Start-Kontexte
+        self.base_contexts = max(
+            0, settings.getint('PLAYWRIGHT_MAX_CONTEXTS') - len(settings.getdict('PLAYWRIGHT_CONTEXTS'))
+        )
+        self.base_pages_per_context = None
+
+        self.level = 0
+        self.calm_checks = 0
+        self.held_contexts = []
+        self.spider = None
+        self.process = psutil.Process()
+        self.task: Optional[task.LoopingCall] = None
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Extension."""
+        ext = cls(crawler)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        """Startet die periodische Messung."""
+        self.spider = spider
+        self.task = task.LoopingCall(self._check)
+        self.task.start(self.check_interval, now=False)
+
+    def spider_closed(self, spider):
+        """Stoppt die Messung und gibt belegte Kontext-Plätze frei."""
+        if self.task and self.task.running:
+            self.task.stop()
+        self._hold_contexts(0)
+
+    def usage_mb(self) -> float:
+        """
+        Speicherverbrauch von Crawler und Browser.
+
+        Returns:
+            float: RSS des Prozesses plus aller Chromium-Prozesse in Megabyte
+        """
+        try:
+            rss = self.process.memory_info().rss
+        except psutil.Error:
+            rss = 0
+        for process in BrowserLifecycleManager._browser_processes():
+            try:
+                rss += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return rss / (1024 * 1024)
+
+    def target_level(self, ratio: float) -> int:
+        """
+        Ermittelt die Stufe für einen Verbrauch (mit Hysterese beim Zurücknehmen).
+
+        Args:
+            ratio: Verbrauch relativ zu MEMORY_PRESSURE_LIMIT_MB
+
+        Returns:
+            int: Neue Stufe (0 = keine Einschränkung)
+        """
+        pressure = sum(1 for threshold in self.thresholds if ratio >= threshold)
+        if pressure >= self.level:
+            self.calm_checks = 0
+            return pressure
+
+        # Erst zurücknehmen, wenn der Verbrauch mehrfach deutlich unter der Schwelle lag
+        if ratio < self.thresholds[self.level - 1] - self.recovery_margin:
+            self.calm_checks += 1
+        else:
+            self.calm_checks = 0
+        if self.calm_checks >= self.recovery_checks:
+            self.calm_checks = 0
+            return self.level - 1
+        return self.level
+
+    def _check(self):
+        """Periodische Messung (LoopingCall)."""
+        usage = self.usage_mb()
+        self.stats.max_value('memory_pressure/max_usage_mb', int(usage))
+
+        level = self.target_level(usage / self.limit_mb if self.limit_mb else 0.0)
+        if level != self.level:
+            self._apply(level, usage)
+
+    def _apply(self, level: int, usage: float):
+        """
+        Aktiviert eine Stufe.
+
+        Args:
+            level: Neue Stufe
+            usage: Gemessener Verbrauch in Megabyte
+        """
+        previous, self.level = self.level, level
+        request_share, context_share = self.LEVELS[min(level, max(self.LEVELS))]
+
+        engine = self.crawler.engine
+        if engine is not None and engine.downloader is not None and self.base_concurrency is None:
+            # Beim LaneDownloader ist die Obergrenze die Summe der Lanes, nicht CONCURRENT_REQUESTS
+            self.base_concurrency = engine.downloader.total_concurrency
+        concurrency = max(1, int((self.base_concurrency or self.fallback_concurrency) * request_share))
+        if engine is not None and engine.downloader is not None:
+            engine.downloader.total_concurrency = concurrency
+
+        if self.base_contexts:
+            contexts = max(1, int(self.base_contexts * context_share))
+            self._hold_contexts(self.base_contexts - contexts)
+        else:
+            contexts = None
+
+        config = getattr(playwright_handler(self.crawler), 'config', None)
+        if hasattr(config, 'max_pages_per_context'):
+            if self.base_pages_per_context is None:
+                self.base_pages_per_context = config.max_pages_per_context
+            config.max_pages_per_context = 1 if level >= 2 else self.base_pages_per_context
+
+        if self.spider is not None:
+            self.spider.screenshots_paused = level >= 1
+
+        if level > previous:
+            self.stats.inc_value('memory_pressure/shed_steps')
+            self.stats.max_value('memory_pressure/max_level', level)
+            self.crawler.signals.send_catch_log(signal=memory_pressure, level=level)
+            if level >= max(self.LEVELS):
+                gc.collect()
+            self.logger.warning(
+                f"Speicherdruck {usage:.0f}/{self.limit_mb} MB: Stufe {level} "
+                f"({concurrency} Requests, {contexts or '-'} Kontexte, Screenshots pausiert)"
+            )
+        else:
+            self.stats.inc_value('memory_pressure/recoveries')
+            self.logger.info(
+                f"Speicherdruck gesunken ({usage:.0f}/{self.limit_mb} MB): Stufe {level} "
+                f"({concurrency} Requests, {contexts or '-'} Kontexte)"
+            )
+
+    def _hold_contexts(self, count: int):
+        """
+        Belegt bzw. gibt Plätze des Kontext-Semaphors von scrapy-playwright frei.
+
+        Args:
+            count: Anzahl Plätze, die der Crawl nicht nutzen darf
+        """
+        semaphore = getattr(playwright_handler(self.crawler), 'context_semaphore', None)
+        if semaphore is None:
+            return
+
+        while len(self.held_contexts) < count:
+            self.held_contexts.append(asyncio.ensure_future(semaphore.acquire()))
+        while len(self.held_contexts) > count:
+            holder = self.held_contexts.pop()
+            # cancel() schlägt nur fehl, wenn der Platz bereits belegt ist
+            if not holder.cancel():
+                semaphore.release()
+
+
+class PageHistoryRecorder:
+    """
+    Extension zum Erfassen jeder Beobachtung einer Seite in der Seitenhistorie.
+    
+    Hängt sich an item_scraped (Item und Response stehen dort gemeinsam zur
+    Verfügung) und schreibt Metadaten und optional das HTML über einen
+    eigenen Writer-Thread in den PageHistoryStore. Anders als die CSV-Dateien,
+    die jeder Lauf überschreibt, bleibt die Historie über alle Läufe erhalten.
+    """
+
+    def __init__(self, crawler):
+        """
+        Args:
+            crawler: Scrapy-Crawler-Objekt
+        """
+        settings = crawler.settings
+        if not settings.getbool('HISTORY_ENABLED'):
+            raise NotConfigured("HISTORY_ENABLED is False")
+
+        self.stats = crawler.stats
+        self.directory = settings.get('HISTORY_DIR', 'data/state/history')
+        self.segment_max_bytes = settings.getint('HISTORY_SEGMENT_MAX_MB', 64) * 1024 * 1024
+        self.store_html = settings.getbool('HISTORY_STORE_HTML', True)
+        self.keyframe_ratio = settings.getfloat('HISTORY_KEYFRAME_RATIO', 0.5)
+        self.delta_max_bytes = settings.getint('HISTORY_DELTA_MAX_KB', 4096) * 1024
+
+        self.store: Optional[PageHistoryStore] = None
+        self.pool: Optional[ThreadPool] = None
+        self.inflight = set()
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Extension."""
+        ext = cls(crawler)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        return ext
+
+    def spider_opened(self, spider):
+        """Öffnet den Speicher und startet den Writer-Thread."""
+        self.store = PageHistoryStore(
+            self.directory,
+            segment_max_bytes=self.segment_max_bytes,
+            store_html=self.store_html,
+            keyframe_ratio=self.keyframe_ratio,
+            delta_max_bytes=self.delta_max_bytes,
+        )
+        self.pool = ThreadPool(minthreads=1, maxthreads=1, name='page-history')
+        self.pool.start()
+
+    def item_scraped(self, item, response, spider):
+        """Übergibt eine Beobachtung an den Writer-Thread."""
+        adapter = ItemAdapter(item)
+        url = adapter.get('url')
+        if not url or self.store is None:
+            return
+
+        html = None
+        if self.store_html and isinstance(response, TextResponse) and response.url == url:
+            html = response.text
+
+        d = threads.deferToThreadPool(
+            reactor, self.pool, self.store.record,
+            url, item_kind(item), history_metadata(item), html, adapter.get('timestamp'),
+        )
+        d.addCallback(lambda result: self.stats.inc_value(f'history/{result}'))
+        d.addErrback(lambda failure: self.logger.error(f"Fehler in der Seitenhistorie ({url}): {failure.value}"))
+        d.addBoth(lambda _: self.inflight.discard(d))
+        self.inflight.add(d)
+
+    @defer.inlineCallbacks
+    def spider_closed(self, spider):
+        """Wartet auf ausstehende Schreibvorgänge und schließt den Speicher."""
+        if self.store is None:
+            return
+        yield defer.DeferredList(list(self.inflight))
+        self.pool.stop()
+        self.store.close()
+        self.store = None
+
+
+class AsyncLogging:
+    """
+    Extension für das Logging über eine Queue und einen eigenen Thread.
+    
+    Ersetzt beim Start der Engine die Handler des Root-Loggers durch
+    einen Queue-Handler (mit Begrenzung gleichartiger Meldungen und
+    optionaler JSON-Ausgabe, siehe crawler.logs). Der Zähler der
+    Log-Level für die Stats bleibt synchron. Nach dem Stoppen der Engine
+    werden alle wartenden Records geschrieben und die ursprünglichen
+    Handler wiederhergestellt.
+    """
+
+    def __init__(self, crawler):
+        """
+        Args:
+            crawler: Scrapy-Crawler-Objekt
+        """
+        settings = crawler.settings
+        if not settings.getbool('LOG_ASYNC'):
+            raise NotConfigured("LOG_ASYNC is False")
+        if any(isinstance(handler, PreparedQueueHandler) for handler in logging.getLogger().handlers):
+            raise NotConfigured("Logging läuft bereits über eine Queue")
+
+        rate_limit = None
+        if settings.getbool('LOG_RATE_LIMIT_ENABLED', True):
+            rate_limit = RateLimitFilter(
+                burst=settings.getint('LOG_RATE_LIMIT_BURST', 20),
+                interval=settings.getfloat('LOG_RATE_LIMIT_INTERVAL', 60.0),
+                sample=settings.getint('LOG_RATE_LIMIT_SAMPLE', 100),
+                exempt_level=logging.getLevelName(settings.get('LOG_RATE_LIMIT_EXEMPT_LEVEL', 'ERROR')),
+                stats=crawler.stats,
+            )
+        self.logging = QueueLogging(
+            rate_limit=rate_limit,
+            json_file=settings.get('LOG_JSON_FILE'),
+            json_level=logging.getLevelName(settings.get('LOG_JSON_LEVEL') or settings.get('LOG_LEVEL', 'DEBUG')),
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Extension."""
+        ext = cls(crawler)
+        crawler.signals.connect(ext.engine_started, signal=signals.engine_started)
+        crawler.signals.connect(ext.engine_stopped, signal=signals.engine_stopped)
+        return ext
+
+    def engine_started(self):
+        """
+        Leitet die Handler um.
+
+        Erst hier, weil Scrapy den eigenen Root-Handler nach dem Erstellen
+        der Extensions noch einmal neu installiert.
+        """
+        if any(isinstance(handler, PreparedQueueHandler) for handler in logging.getLogger().handlers):
+            return
+        self.logging.start(keep=(LogCounterHandler,))
+
+    def engine_stopped(self):
+        """Schreibt wartende Records und stellt die ursprünglichen Handler wieder her."""
+        self.logging.stop()
+
+
+def header_list(headers) -> list:
+    """Scrapy-Header als Liste von (Name, Wert)-Paaren (mehrfache Header bleiben erhalten)."""
+    return [
+        (name.decode('latin-1'), value.decode('latin-1'))
+        for name, values in headers.items()
+        for value in values
+    ]
+
+
+class WarcArchiver:
+    """
+    Extension zum Archivieren jeder Seite als WARC-Records.
+    
+    Hängt sich wie der PageHistoryRecorder an item_scraped. Im Reactor
+    werden nur Header und Body übernommen; Digest, Kompression,
+    Schreiben und Rotation erledigt ein eigener Writer-Thread (siehe
+    crawler.warc). Jede URL wird pro Lauf nur einmal archiviert, auch
+    wenn mehrere Items aus derselben Response entstehen.
+    """
+
+    def __init__(self, crawler):
+        """
+        Args:
+            crawler: Scrapy-Crawler-Objekt
+        """
+        settings = crawler.settings
+        if not settings.getbool('WARC_ENABLED'):
+            raise NotConfigured("WARC_ENABLED is False")
+
+        self.stats = crawler.stats
+        self.directory = settings.get('WARC_DIR', 'data/warc')
+        self.prefix = settings.get('WARC_PREFIX', 'crawl')
+        self.max_size = settings.getint('WARC_MAX_SIZE_MB', 1024) * 1024 * 1024
+        self.digests_file = settings.get('WARC_DIGESTS_FILE') or None
+
+        self.writer: Optional[WarcWriter] = None
+        self.pool: Optional[ThreadPool] = None
+        self.archived = set()
+        self.inflight = set()
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Extension."""
+        ext = cls(crawler)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        return ext
+
+    def spider_opened(self, spider):
+        """Startet den Writer-Thread (die erste Datei wird beim ersten Record angelegt)."""
+        self.writer = WarcWriter(
+            self.directory,
+            prefix=self.prefix,
+            max_size=self.max_size,
+            digests_file=self.digests_file,
+        )
+        self.pool = ThreadPool(minthreads=1, maxthreads=1, name='warc-writer')
+        self.pool.start()
+
+    def item_scraped(self, item, response, spider):
+        """Übergibt die Response eines Items an den Writer-Thread."""
+        if self.writer is None or not isinstance(response, TextResponse) or response.url in self.archived:
+            return
+        self.archived.add(response.url)
+        url = response.url
+
+        d = threads.deferToThreadPool(
+            reactor, self.pool, self.writer.write,
+            url, response.status, header_list(response.headers), response.body,
+            header_list(response.request.headers), response.request.method, time.time(),
+        )
+        d.addCallback(lambda result: self.stats.inc_value(f'warc/{result}'))
+        d.addErrback(lambda failure: self.logger.error("Fehler im WARC-Archiv (%s): %s", url, failure.value))
+        d.addBoth(lambda _: self.inflight.discard(d))
+        self.inflight.add(d)
+
+    @defer.inlineCallbacks
+    def spider_closed(self, spider):
+        """Wartet auf ausstehende Records, schließt die Datei und schreibt den Index."""
+        if self.writer is None:
+            return
+        yield defer.DeferredList(list(self.inflight))
+        try:
+            counts = yield threads.deferToThreadPool(reactor, self.pool, self.writer.close)
+        finally:
+            self.pool.stop()
+        self.stats.set_value('warc/files', counts['files'])
+        self.stats.set_value('warc/bytes', counts['bytes'])
+        self.writer = None
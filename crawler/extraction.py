@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+Extraktion von Artikel-Metadaten und Artikel-Volltext.
+
+Metadaten werden zuerst aus JSON-LD (schema.org NewsArticle), Microdata
+und OpenGraph-Tags gelesen. Nur wenn dort kein Artikeltext vorhanden ist,
+wird der Volltext per Boilerplate-Entfernung aus dem HTML ermittelt.
+Diese Extraktion ist CPU-lastig und läuft deshalb in einem Prozess-Pool,
+damit der Reactor (und damit Playwright) nicht blockiert wird.
+"""
+
+import re
+import json
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse, urljoin
+
+import lxml.html
+from lxml import etree
+
+
+# schema.org-Typen, die als Artikel behandelt werden
+ARTICLE_TYPES = {
+    'NewsArticle', 'Article', 'ReportageNewsArticle', 'AnalysisNewsArticle',
+    'OpinionNewsArticle', 'BackgroundNewsArticle', 'LiveBlogPosting', 'BlogPosting',
+}
+
+# Elemente, die nie zum Artikeltext gehören
+BOILERPLATE_TAGS = (
+    'script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside',
+    'form', 'iframe', 'svg', 'button', 'template',
+)
+
+# class/id-Hinweise auf Teaser, Kommentare, Werbung usw.
+NEGATIVE_HINTS = re.compile(
+    r'comment|teaser|related|share|social|footer|sidebar|newsletter|advert|'
+    r'promo|banner|cookie|consent|paywall|breadcrumb|navigation',
+    re.IGNORECASE
+)
+
+# Mindestlänge eines Absatzes, damit er als Fließtext zählt
+MIN_PARAGRAPH_LENGTH = 40
+
+
+def _normalize_whitespace(text: Optional[str]) -> str:
+    """Reduziert alle Whitespace-Folgen auf ein Leerzeichen."""
+    return ' '.join(text.split()) if text else ''
+
+
+def _as_list(value) -> list:
+    """Wandelt Einzelwerte in eine Liste um (JSON-LD erlaubt beides)."""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _names(value) -> List[str]:
+    """Liest Namen aus JSON-LD Person/Organization-Objekten oder Strings."""
+    names = []
+    for entry in _as_list(value):
+        if isinstance(entry, dict):
+            entry = entry.get('name')
+        entry = _normalize_whitespace(entry if isinstance(entry, str) else None)
+        if entry:
+            names.append(entry)
+    return names
+
+
+def _image_urls(value) -> List[str]:
+    """Liest Bild-URLs aus JSON-LD ImageObject-Objekten oder Strings."""
+    urls = []
+    for entry in _as_list(value):
+        if isinstance(entry, dict):
+            entry = entry.get('url') or entry.get('contentUrl')
+        if isinstance(entry, str) and entry:
+            urls.append(entry)
+    return urls
+
+
+def _iter_json_ld_objects(data):
+    """Durchläuft JSON-LD-Daten inklusive verschachtelter @graph-Listen."""
+    for entry in _as_list(data):
+        if not isinstance(entry, dict):
+            continue
+        yield entry
+        if '@graph' in entry:
+            yield from _iter_json_ld_objects(entry['@graph'])
+
+
+def find_json_ld_article(scripts: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Sucht das erste Artikel-Objekt in den JSON-LD-Blöcken einer Seite.
+
+    Args:
+        scripts: Inhalte aller <script type="application/ld+json">-Tags
+
+    Returns:
+        Dict: Das JSON-LD-Objekt des Artikels oder None
+    """
+    for script in scripts:
+        try:
+            data = json.loads(script)
+        except (TypeError, ValueError):
+            continue
+
+        for entry in _iter_json_ld_objects(data):
+            types = {t for t in _as_list(entry.get('@type')) if isinstance(t, str)}
+            if types & ARTICLE_TYPES:
+                return entry
+    return None
+
+
+# Microdata-Properties, deren Wert in einem Attribut statt im Text steht
+MICRODATA_ATTRIBUTES = {
+    'meta': 'content', 'time': 'datetime', 'a': 'href', 'link': 'href',
+    'img': 'src', 'source': 'src', 'data': 'value',
+}
+
+
+def _microdata_value(node) -> Optional[str]:
+    """Liest den Wert einer Microdata-Property nach schema.org-Regeln."""
+    tag = node.root.tag if isinstance(node.root.tag, str) else ''
+    attribute = MICRODATA_ATTRIBUTES.get(tag.lower())
+    if attribute and node.attrib.get(attribute):
+        return node.attrib[attribute]
+    if 'itemscope' in node.attrib:
+        # Verschachteltes Objekt (z.B. Person, ImageObject)
+        nested = node.xpath('.//*[@itemprop="name" or @itemprop="url"]')
+        return _microdata_value(nested[0]) if nested else None
+    return _normalize_whitespace(' '.join(node.xpath('.//text()').getall())) or None
+
+
+def find_microdata_article(response) -> Optional[Dict[str, Any]]:
+    """
+    Sucht das erste Artikel-Objekt in den Microdata-Annotationen einer Seite.
+
+    Die Properties werden unter ihren schema.org-Namen zurückgegeben, also
+    im selben Format wie ein JSON-LD-Objekt.
+
+    Args:
+        response: Scrapy-Response der Artikelseite
+
+    Returns:
+        Dict: Properties des Artikels oder None
+    """
+    for scope in response.xpath('//*[@itemscope][@itemtype]'):
+        itemtype = scope.attrib.get('itemtype', '').rstrip('/').rsplit('/', 1)[-1]
+        if itemtype not in ARTICLE_TYPES:
+            continue
+
+        article: Dict[str, Any] = {}
+        for node in scope.xpath('.//*[@itemprop]'):
+            # Properties verschachtelter Objekte gehören nicht zum Artikel
+            owner = node.xpath('ancestor::*[@itemscope][1]')
+            if owner and owner[0].root is not scope.root:
+                continue
+            value = _microdata_value(node)
+            if not value:
+                continue
+            for name in node.attrib['itemprop'].split():
+                if name in article:
+                    article[name] = _as_list(article[name]) + [value]
+                else:
+                    article[name] = value
+        return article
+    return None
+
+
+def extract_article_metadata(response) -> Dict[str, Any]:
+    """
+    Extrahiert Artikel-Metadaten aus JSON-LD, Microdata und OpenGraph.
+
+    JSON-LD hat Vorrang, fehlende Properties werden aus Microdata und
+    fehlende Felder danach aus OpenGraph- und article:*-Meta-Tags ergänzt. Die Funktion ist günstig und läuft
+    direkt im Callback.
+
+    Args:
+        response: Scrapy-Response der Artikelseite
+
+    Returns:
+        Dict: Gefundene Felder (title, description, author, publish_date,
+        category, tags, image_urls und ggf. article_text)
+    """
+    metadata: Dict[str, Any] = {}
+
+    article = find_json_ld_article(
+        response.css('script[type="application/ld+json"]::text').getall()
+    ) or {}
+
+    for name, value in (find_microdata_article(response) or {}).items():
+        article.setdefault(name, value)
+
+    if article:
+        metadata['title'] = _normalize_whitespace(article.get('headline')) or None
+        metadata['description'] = _normalize_whitespace(article.get('description')) or None
+        metadata['author'] = ', '.join(_names(article.get('author'))) or None
+        metadata['publish_date'] = article.get('datePublished')
+        metadata['category'] = ', '.join(
+            s for s in _as_list(article.get('articleSection')) if isinstance(s, str)
+        ) or None
+
+        keywords = article.get('keywords')
+        if isinstance(keywords, str):
+            keywords = keywords.split(',')
+        metadata['tags'] = [k.strip() for k in _as_list(keywords) if isinstance(k, str) and k.strip()]
+        metadata['image_urls'] = _image_urls(article.get('image'))
+        metadata['article_text'] = _normalize_whitespace(article.get('articleBody')) or None
+
+    def meta_property(name: str) -> Optional[str]:
+        return response.css(f'meta[property="{name}"]::attr(content)').get()
+
+    # OpenGraph als Fallback für fehlende Felder
+    fallbacks = {
+        'title': meta_property('og:title'),
+        'description': meta_property('og:description')
+                       or response.css('meta[name="description"]::attr(content)').get(),
+        'author': meta_property('article:author')
+                  or response.css('meta[name="author"]::attr(content)').get(),
+        'publish_date': meta_property('article:published_time'),
+        'category': meta_property('article:section'),
+    }
+    for key, value in fallbacks.items():
+        if not metadata.get(key) and value:
+            metadata[key] = _normalize_whitespace(value)
+
+    if not metadata.get('tags'):
+        metadata['tags'] = response.css('meta[property="article:tag"]::attr(content)').getall()
+
+    if not metadata.get('image_urls'):
+        metadata['image_urls'] = response.css('meta[property="og:image"]::attr(content)').getall()
+    metadata['image_urls'] = [urljoin(response.url, u) for u in metadata['image_urls']]
+
+    return metadata
+
+
+def extract_article_text(html: str, min_paragraph_length: int = MIN_PARAGRAPH_LENGTH) -> str:
+    """
+    Ermittelt den Artikeltext per Boilerplate-Entfernung.
+
+    Absätze werden nach Textlänge und Link-Dichte bewertet, die Punkte
+    ihrem Eltern-Element (und abgeschwächt dem Großeltern-Element)
+    gutgeschrieben. Das Element mit der höchsten Punktzahl gilt als
+    Artikel-Container. Die Funktion ist modulweit definiert, damit sie
+    im Prozess-Pool ausgeführt werden kann.
+
+    Args:
+        html: HTML-Quelltext der Seite
+        min_paragraph_length: Mindestlänge eines Absatzes in Zeichen
+
+    Returns:
+        str: Artikeltext mit Absätzen getrennt durch Leerzeilen
+    """
+    if not html:
+        return ''
+
+    try:
+        root = lxml.html.document_fromstring(html)
+    except ValueError:
+        # Strings mit XML-Encoding-Deklaration werden nur als Bytes akzeptiert
+        root = lxml.html.document_fromstring(html.encode('utf-8'))
+    except etree.ParserError:
+        return ''
+
+    etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+
+    scores: Dict[Any, float] = {}
+    for paragraph in root.iter('p'):
+        text = _normalize_whitespace(paragraph.text_content())
+        if len(text) < min_paragraph_length:
+            continue
+
+        link_length = sum(len(a.text_content()) for a in paragraph.iter('a'))
+        score = len(text) * max(0.0, 1.0 - link_length / len(text))
+
+        parent = paragraph.getparent()
+        if parent is None:
+            continue
+        hints = f"{parent.get('class', '')} {parent.get('id', '')}"
+        if NEGATIVE_HINTS.search(hints):
+            score *= 0.2
+
+        scores[parent] = scores.get(parent, 0.0) + score
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0.0) + score / 2
+
+    if not scores:
+        body = root.find('body')
+        return _normalize_whitespace(body.text_content() if body is not None else '')
+
+    container = max(scores, key=scores.get)
+    paragraphs = []
+    for element in container.iter('p', 'h2', 'h3', 'li'):
+        text = _normalize_whitespace(element.text_content())
+        if element.tag == 'p' and len(text) < min_paragraph_length:
+            continue
+        if text:
+            paragraphs.append(text)
+
+    return '\n\n'.join(paragraphs)
+
+
+def looks_like_article_url(url: str) -> bool:
+    """
+    Heuristik ob eine URL auf einen einzelnen Artikel zeigt.
+
+    Artikel-URLs deutscher Nachrichtenseiten haben typischerweise einen
+    Pfad mit mehreren Ebenen und einen sprechenden Slug mit Bindestrichen
+    oder enden auf .html.
+
+    Args:
+        url: Zu prüfende URL
+
+    Returns:
+        bool: True wenn die URL wie ein Artikel aussieht
+    """
+    path = urlparse(url).path
+    segments = [s for s in path.split('/') if s]
+    if len(segments) < 2:
+        return False
+
+    slug = segments[-1].lower()
+    return slug.endswith(('.html', '.htm')) or slug.count('-') >= 3
+
+
+class ArticleTextExtractor:
+    """
+    Führt die Volltext-Extraktion in einem Prozess-Pool aus.
+
+    Der Pool wird beim ersten Aufruf erstellt. Mit max_workers=0 läuft
+    die Extraktion direkt im aufrufenden Thread (z.B. für Debugging).
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """
+        Args:
+            max_workers: Anzahl der Worker-Prozesse (0 = ohne Pool)
+        """
+        self.max_workers = max_workers
+        self._executor = None
+        self.logger = logging.getLogger(__name__)
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Erstellt den Prozess-Pool bei Bedarf."""
+        if self._executor is None and self.max_workers > 0:
+            # 'spawn' statt 'fork': der Crawler-Prozess hat bereits Threads
+            # (Twisted-Threadpool, Playwright-Treiber), Forken wäre unsicher
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            self.logger.info(f"Text-Extraktion mit {self.max_workers} Worker-Prozessen gestartet")
+        return self._executor
+
+    async def extract(self, html: str) -> str:
+        """
+        Extrahiert den Artikeltext ohne den Event-Loop zu blockieren.
+
+        Args:
+            html: HTML-Quelltext der Seite
+
+        Returns:
+            str: Extrahierter Artikeltext
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return extract_article_text(html)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, extract_article_text, html)
+        except BrokenProcessPool:
+            self.logger.error("Prozess-Pool der Text-Extraktion abgestürzt, wird neu erstellt")
+            self._executor = None
+            return extract_article_text(html)
+
+    def shutdown(self):
+        """Beendet den Prozess-Pool und verwirft ausstehende Aufgaben."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Fast Path: Items ohne Browser-Rendering aus dem statischen HTML erzeugen.
+
+Viele Seiten liefern JSON-LD, Microdata und OpenGraph-Tags bereits im
+statischen HTML. Der Spider lädt eine Seite deshalb zuerst per einfachem
+HTTP-Request. Sind alle Pflichtfelder vorhanden, wird das Item direkt
+erzeugt, sonst wird die Seite über Playwright gerendert.
+
+Pro Domain wird die Erfolgsquote gelernt. Domains, deren statisches HTML
+selten ausreicht, werden direkt gerendert (mit gelegentlichen Proben),
+damit der zusätzliche HTTP-Request nicht bei jeder Seite anfällt.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional
+
+from itemadapter import ItemAdapter
+from crawler.items import item_kind
+from crawler.state import JsonStateStore
+
+
+class FastPathTracker:
+    """
+    Entscheidet pro Domain über den Fast Path und lernt dessen Erfolgsquote.
+    """
+
+    # Gewicht neuer Ergebnisse in der gleitenden Erfolgsquote
+    ALPHA = 0.2
+
+    # Mindestanzahl Versuche bevor eine Domain vom Fast Path ausgenommen wird
+    MIN_SAMPLES = 5
+
+    def __init__(self, required_fields: Dict[str, List[str]], min_hit_rate: float = 0.3,
+                 probe_interval: int = 20, state_file: Optional[str] = None, stats=None):
+        """
+        Args:
+            required_fields: Pflichtfelder pro Item-Art ('webpages', 'news')
+            min_hit_rate: Unterhalb dieser Erfolgsquote wird direkt gerendert
+            probe_interval: Jede n-te Seite einer ausgenommenen Domain wird trotzdem probiert
+            state_file: JSON-Datei für die gelernten Quoten (None = nicht speichern)
+            stats: Scrapy-Stats-Collector (optional)
+        """
+        self.required_fields = required_fields
+        self.min_hit_rate = min_hit_rate
+        self.probe_interval = probe_interval
+        self.stats = stats
+        self.store = JsonStateStore(state_file) if state_file else None
+        self.domains: Dict[str, Dict[str, Any]] = self.store.load() if self.store else {}
+        self.skipped: Dict[str, int] = {}
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Erstellt den Tracker aus den Crawler-Settings."""
+        settings = crawler.settings
+        return cls(
+            required_fields=settings.getdict('FASTPATH_REQUIRED_FIELDS'),
+            min_hit_rate=settings.getfloat('FASTPATH_MIN_HIT_RATE', 0.3),
+            probe_interval=settings.getint('FASTPATH_PROBE_INTERVAL', 20),
+            state_file=settings.get('FASTPATH_STATE_FILE'),
+            stats=crawler.stats,
+        )
+
+    def should_try(self, domain: str) -> bool:
+        """
+        Prüft ob für eine Domain zuerst der Fast Path versucht wird.
+
+        Args:
+            domain: Domain der Seite
+
+        Returns:
+            bool: True für Fast Path, False für direktes Rendering
+        """
+        learned = self.domains.get(domain)
+        if not learned or learned['samples'] < self.MIN_SAMPLES or learned['hit_rate'] >= self.min_hit_rate:
+            return True
+
+        # Gelegentliche Probe, damit Änderungen der Seite erkannt werden
+        skipped = self.skipped.get(domain, 0) + 1
+        if skipped >= self.probe_interval:
+            self.skipped[domain] = 0
+            return True
+        self.skipped[domain] = skipped
+        if self.stats is not None:
+            self.stats.inc_value(f'fastpath/{domain}/skipped')
+        return False
+
+    def missing_fields(self, item) -> List[str]:
+        """
+        Liefert die fehlenden Pflichtfelder eines Items.
+
+        Args:
+            item: Aus dem statischen HTML erzeugtes Item (oder None)
+
+        Returns:
+            List[str]: Namen der fehlenden Felder (leer = vollständig)
+        """
+        if item is None:
+            return ['item']
+        required = self.required_fields.get(item_kind(item), [])
+        adapter = ItemAdapter(item)
+        return [name for name in required if not adapter.get(name)]
+
+    def record(self, domain: str, hit: bool, missing: Optional[List[str]] = None):
+        """
+        Erfasst das Ergebnis eines Fast-Path-Versuchs.
+
+        Args:
+            domain: Domain der Seite
+            hit: Ob das Item ohne Rendering erzeugt wurde
+            missing: Fehlende Pflichtfelder bei einem Fehlschlag
+        """
+        learned = self.domains.setdefault(domain, {'samples': 0, 'hit_rate': 1.0 if hit else 0.0})
+        learned['samples'] += 1
+        learned['hit_rate'] += self.ALPHA * ((1.0 if hit else 0.0) - learned['hit_rate'])
+
+        if self.stats is not None:
+            outcome = 'hit' if hit else 'miss'
+            self.stats.inc_value(f'fastpath/{outcome}')
+            self.stats.inc_value(f'fastpath/{domain}/{outcome}')
+            for name in missing or []:
+                self.stats.inc_value(f'fastpath/missing/{name}')
+
+    def coverage(self) -> Dict[str, float]:
+        """Gelernte Erfolgsquote pro Domain."""
+        return {domain: round(learned['hit_rate'], 3) for domain, learned in sorted(self.domains.items())}
+
+    def save(self):
+        """Speichert die gelernten Quoten aller Domains."""
+        if self.store:
+            self.store.data = self.domains
+            self.store.save()
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+HAR-Aufzeichnung und -Wiedergabe für reproduzierbare Render-Läufe.
+
+Aufzeichnen: Jede Startseite wird mit Playwright in einem eigenen
+Kontext geladen; der gesamte Verkehr der Seite (Dokument, Skripte,
+XHR, Bilder) landet mit Bodies und Timings in HAR_DIR/<domain>.har.
+
+Wiedergabe: Mit HAR_REPLAY beantwortet die HarReplayMiddleware alle
+Requests aus den HAR-Dateien, ohne Netzwerkzugriff. Playwright-Seiten
+bekommen einen Route-Handler, der jeden Browser-Request aus dem Archiv
+erfüllt (oder abbricht); einfache HTTP-Requests erhalten direkt eine
+Response. Jede Antwort wird um die aufgezeichnete Latenz des Eintrags
+verzögert (skalierbar über HAR_REPLAY_LATENCY_SCALE).
+
+    python -m crawler.har record [URL ...]      # Standard: Start-URLs des WebSpiders
+    python -m crawler.har profile               # Latenzprofil pro Host
+    scrapy crawl webspider -s HAR_REPLAY=1 -s DOWNLOAD_DELAY=0
+"""
+
+import os
+import sys
+import json
+import base64
+import asyncio
+import argparse
+import logging
+from collections import defaultdict
+from statistics import median
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+
+# Timing-Phasen eines HAR-Eintrags, die zusammen die Latenz ergeben
+# (ssl ist laut HAR-Spezifikation in connect enthalten)
+TIMING_PHASES = ('blocked', 'dns', 'connect', 'send', 'wait', 'receive')
+
+# Header, die nach dem Dekodieren durch den Browser nicht mehr zum Body passen
+STALE_HEADERS = frozenset({'content-encoding', 'transfer-encoding', 'content-length'})
+
+
+def entry_latency(entry: Dict[str, Any]) -> float:
+    """
+    Aufgezeichnete Latenz eines HAR-Eintrags (Sekunden).
+
+    Args:
+        entry: Eintrag aus log.entries
+
+    Returns:
+        float: Summe der Timing-Phasen (nicht gemessene Phasen sind -1)
+    """
+    timings = entry.get('timings') or {}
+    total = sum(value for value in (timings.get(phase, -1) for phase in TIMING_PHASES) if value and value > 0)
+    if not total and entry.get('time', 0) > 0:
+        total = entry['time']
+    return total / 1000.0
+
+
+def strip_query(url: str) -> str:
+    """URL ohne Query und Fragment (Rückfall für Cache-Busting-Parameter)."""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+
+
+def har_file(directory: str, url: str) -> str:
+    """Pfad der HAR-Datei einer Startseite (eine Datei pro Domain)."""
+    host = urlsplit(url).hostname or 'unknown'
+    if host.startswith('www.'):
+        host = host[4:]
+    return os.path.join(directory, f'{host}.har')
+
+
+class HarArchive:
+    """
+    Alle Einträge der HAR-Dateien eines Verzeichnisses, nach Methode und URL indiziert.
+
+    Wiederholte Requests auf dieselbe URL bekommen die Einträge in der
+    aufgezeichneten Reihenfolge; danach wird der letzte wiederholt.
+    """
+
+    def __init__(self, directory: str, latency_scale: float = 1.0, ignore_query: bool = True):
+        """
+        Args:
+            directory: Verzeichnis mit *.har-Dateien
+            latency_scale: Faktor für die aufgezeichneten Latenzen (0 = ohne Verzögerung)
+            ignore_query: Unbekannte URLs über die URL ohne Query zuordnen
+        """
+        self.directory = directory
+        self.latency_scale = latency_scale
+        self.ignore_query = ignore_query
+        self.entries: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self.fallback: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self.served: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.files = 0
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+        self._load()
+
+    def _load(self):
+        """Liest alle HAR-Dateien des Verzeichnisses ein."""
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith('.har'))
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    entries = json.load(file)['log']['entries']
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning("HAR-Datei %s nicht lesbar: %s", path, e)
+                continue
+            self.files += 1
+            for entry in sorted(entries, key=lambda entry: entry.get('startedDateTime', '')):
+                method = entry['request']['method'].upper()
+                url = entry['request']['url'].split('#', 1)[0]
+                self.entries[(method, url)].append(entry)
+                self.fallback[(method, strip_query(url))].append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.entries.values())
+
+    def lookup(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Sucht den passenden Eintrag für einen Request.
+
+        Args:
+            method: HTTP-Methode
+            url: URL des Requests
+
+        Returns:
+            Dict: HAR-Eintrag oder None, wenn die URL nicht aufgezeichnet wurde
+        """
+        key = (method.upper(), url.split('#', 1)[0])
+        entries = self.entries.get(key)
+        if not entries and self.ignore_query:
+            key = (key[0], strip_query(key[1]))
+            entries = self.fallback.get(key)
+            key = ('?',) + key
+        if not entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        index = self.served[key]
+        self.served[key] = index + 1
+        return entries[min(index, len(entries) - 1)]
+
+    def delay(self, entry: Dict[str, Any]) -> float:
+        """Verzögerung der Antwort eines Eintrags (Sekunden)."""
+        return entry_latency(entry) * self.latency_scale
+
+    @staticmethod
+    def response_parts(entry: Dict[str, Any]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        """
+        Status, Header und Body eines Eintrags.
+
+        Args:
+            entry: HAR-Eintrag
+
+        Returns:
+            Tuple: (Status, Header-Liste ohne Kodierungs-Header, dekodierter Body)
+        """
+        response = entry['response']
+        content = response.get('content') or {}
+        text = content.get('text') or ''
+        if content.get('encoding') == 'base64':
+            body = base64.b64decode(text)
+        else:
+            body = text.encode('utf-8')
+        headers = [
+            (header['name'], header['value']) for header in response.get('headers', [])
+            if header['name'].lower() not in STALE_HEADERS and not header['name'].startswith(':')
+        ]
+        return response.get('status') or 200, headers, body
+
+    def profile(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Latenzprofil pro Host aus den aufgezeichneten Timings.
+
+        Returns:
+            Dict: Anzahl Requests, Median und 90. Perzentil der Latenz (ms) pro Host
+        """
+        latencies = defaultdict(list)
+        for entries in self.entries.values():
+            for entry in entries:
+                latencies[urlsplit(entry['request']['url']).hostname].append(entry_latency(entry) * 1000)
+        result = {}
+        for host, values in sorted(latencies.items(), key=lambda item: -len(item[1])):
+            ordered = sorted(values)
+            result[host] = {
+                'requests': len(ordered),
+                'median_ms': int(median(ordered)),
+                'p90_ms': int(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]),
+            }
+        return result
+
+    async def route(self, route, playwright_request):
+        """
+        Playwright-Route-Handler: erfüllt den Request aus dem Archiv oder bricht ihn ab.
+
+        Args:
+            route: Playwright-Route
+            playwright_request: Playwright-Request
+        """
+        entry = self.lookup(playwright_request.method, playwright_request.url)
+        if entry is None:
+            self.logger.debug("Nicht aufgezeichnet, abgebrochen: %s", playwright_request.url)
+            await route.abort('internetdisconnected')
+            return
+        status, headers, body = self.response_parts(entry)
+        delay = self.delay(entry)
+        if delay:
+            await asyncio.sleep(delay)
+        await route.fulfill(status=status, headers=dict(headers), body=body)
+
+
+# Archive pro Verzeichnis, damit Page-Init-Callbacks (nur Name im Meta) sie finden
+_archives: Dict[str, HarArchive] = {}
+
+
+def open_archive(directory: str, **kwargs) -> HarArchive:
+    """Lädt ein Archiv einmal pro Prozess und liefert es bei weiteren Aufrufen zurück."""
+    if directory not in _archives:
+        _archives[directory] = HarArchive(directory, **kwargs)
+    return _archives[directory]
+
+
+async def record(urls: List[str], directory: str, launch_options: Optional[Dict[str, Any]] = None,
+                 context_options: Optional[Dict[str, Any]] = None, wait_until: str = 'networkidle',
+                 settle_ms: int = 2000, timeout_ms: int = 60000) -> Dict[str, int]:
+    """
+    Zeichnet den Verkehr jeder URL in eine eigene HAR-Datei auf.
+
+    Args:
+        urls: Startseiten
+        directory: Zielverzeichnis
+        launch_options: Optionen für den Browser-Start
+        context_options: Optionen für den Browser-Kontext (User-Agent, Viewport, ...)
+        wait_until: Ladezustand, bis zu dem gewartet wird
+        settle_ms: Zusätzliche Wartezeit für nachgeladene Inhalte
+        timeout_ms: Timeout der Navigation
+
+    Returns:
+        Dict: Anzahl aufgezeichneter Einträge pro Datei (-1 bei Fehler)
+    """
+    from playwright.async_api import async_playwright
+
+    os.makedirs(directory, exist_ok=True)
+    result = {}
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(**(launch_options or {}))
+        try:
+            for url in urls:
+                path = har_file(directory, url)
+                context = await browser.new_context(
+                    **(context_options or {}), record_har_path=path, record_har_content='embed',
+                )
+                page = await context.new_page()
+                try:
+                    await page.goto(url, wait_until=wait_until, timeout=timeout_ms)
+                    await page.wait_for_timeout(settle_ms)
+                except Exception as e:
+                    print(f"{url}: {e}", file=sys.stderr)
+                    result[path] = -1
+                finally:
+                    # Die HAR-Datei wird beim Schließen des Kontexts geschrieben
+                    await context.close()
+                if result.get(path) != -1:
+                    with open(path, 'r', encoding='utf-8') as file:
+                        result[path] = len(json.load(file)['log']['entries'])
+        finally:
+            await browser.close()
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeile für Aufzeichnung und Latenzprofil."""
+    from scrapy.utils.project import get_project_settings
+    from crawler.spiders.webspider import WebSpider
+
+    os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'crawler.settings')
+    settings = get_project_settings()
+    parser = argparse.ArgumentParser(description='HAR-Aufzeichnung für reproduzierbare Render-Läufe')
+    parser.add_argument('--dir', default=settings.get('HAR_DIR', 'data/har'), help='Verzeichnis der HAR-Dateien')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rec = commands.add_parser('record', help='Startseiten aufzeichnen')
+    rec.add_argument('urls', nargs='*', help='URLs (Standard: Start-URLs des WebSpiders)')
+    rec.add_argument('--wait-until', default=settings.get('HAR_RECORD_WAIT_UNTIL', 'networkidle'))
+    rec.add_argument('--settle-ms', type=int, default=settings.getint('HAR_RECORD_SETTLE_MS', 2000))
+
+    commands.add_parser('profile', help='Latenzprofil pro Host')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        result = asyncio.run(record(
+            args.urls or list(WebSpider.start_urls),
+            args.dir,
+            launch_options=settings.getdict('PLAYWRIGHT_LAUNCH_OPTIONS'),
+            context_options=settings.getdict('PLAYWRIGHT_CONTEXTS').get('default'),
+            wait_until=args.wait_until,
+            settle_ms=args.settle_ms,
+        ))
+        for path, count in result.items():
+            print(f"{path}: {'Fehler' if count < 0 else f'{count} Einträge'}")
+        return 0 if all(count >= 0 for count in result.values()) else 1
+
+    archive = HarArchive(args.dir)
+    if not archive.files:
+        print(f"Keine HAR-Dateien in {args.dir}", file=sys.stderr)
+        return 1
+    for host, profile in archive.profile().items():
+        print(f"{host:<40} {profile['requests']:>5} Requests  median {profile['median_ms']:>5} ms  p90 {profile['p90_ms']:>5} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,695 @@
+# -*- coding: utf-8 -*-
+"""
+Versionierte Seitenhistorie (append-only) mit Kompaktierung.
+
+Jede Beobachtung einer URL wird an die aktuelle Segment-Datei angehängt.
+Eine neue Version entsteht nur, wenn sich der Inhalt (Hash über die
+extrahierten Felder ohne flüchtige Felder) ändert; unveränderte
+Beobachtungen sind kleine Marker-Records und verlängern im
+Index nur 'last_seen' der Version. Das HTML einer Version wird optional
+gespeichert, als Delta zum letzten Keyframe derselben URL oder als
+vollständiger Keyframe (zlib).
+
+Aufbau von HISTORY_DIR:
+
+    CURRENT                       Name der aktiven Generation
+    gen-000002/segments/segment-000001.dat
+                                  Records: >II (Header-Länge, Payload-Länge),
+                                  JSON-Header, Payload (zlib)
+    gen-000002/index.sqlite3      URL -> Versionen mit Position im Segment
+
+Ohne CURRENT liegen segments/ und index.sqlite3 direkt in HISTORY_DIR
+(bis zur ersten Kompaktierung). Die Kompaktierung schreibt eine neue
+Generation und schaltet CURRENT mit einem einzigen os.replace() um.
+
+Abfragen und Kompaktierung über die Kommandozeile:
+
+    python -m crawler.history versions https://www.bund.de/
+    python -m crawler.history show https://www.bund.de/ --at 2026-10-01 --html
+    python -m crawler.history changes --since 7d --domain bund.de
+    python -m crawler.history compact
+"""
+
+import os
+import re
+import sys
+import json
+import zlib
+import shutil
+import struct
+import sqlite3
+import hashlib
+import argparse
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+from urllib.parse import urlparse
+
+from crawler.serialization import get_serializer, all_fieldnames
+
+
+RECORD_HEADER = struct.Struct('>II')
+
+# Felder, die sich bei jeder Beobachtung ändern und keine Inhaltsänderung sind
+VOLATILE_FIELDS = ('timestamp', 'screenshot_path')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    url TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    kind TEXT,
+    domain TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    observations INTEGER NOT NULL DEFAULT 1,
+    content_hash TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    has_html INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (url, version)
+);
+CREATE INDEX IF NOT EXISTS versions_first_seen ON versions (first_seen);
+CREATE INDEX IF NOT EXISTS versions_domain ON versions (domain, first_seen);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+TOKEN_PATTERN = re.compile(r'[^>]*>|[^>]+')
+
+# Länge der Token-Folgen, über die Übereinstimmungen mit dem Keyframe gesucht werden
+DELTA_GRAM = 4
+
+CURRENT_FILE = 'CURRENT'
+
+
+def data_directory(directory: str) -> str:
+    """
+    Verzeichnis der aktiven Generation (Segmente und Index).
+
+    Args:
+        directory: HISTORY_DIR
+
+    Returns:
+        str: Generation aus CURRENT, ohne CURRENT das Verzeichnis selbst
+    """
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), 'r', encoding='utf-8') as file:
+            name = file.read().strip()
+    except FileNotFoundError:
+        return directory
+    return os.path.join(directory, name) if name else directory
+
+
+def history_metadata(item) -> Dict[str, Any]:
+    """
+    Liefert die versionierten Felder eines Items (ohne flüchtige Felder).
+
+    Args:
+        item: Item oder Record
+
+    Returns:
+        Dict: Feldwerte
+    """
+    data = get_serializer(type(item), all_fieldnames(item)).as_dict(item)
+    for name in VOLATILE_FIELDS:
+        data.pop(name, None)
+    return data
+
+
+def content_hash(metadata: Dict[str, Any]) -> str:
+    """
+    Stabiler Hash über die versionierten Felder.
+
+    Das HTML geht bewusst nicht ein: Werbeplätze, CSRF-Nonces, Zeitstempel
+    und Tracking-Parameter ändern sich bei jedem Rendern, sodass sonst
+    fast jede Beobachtung eine neue Version wäre. Es wird nur als Payload
+    einer Version gespeichert, wenn sich die Felder ändern.
+    """
+    canonical = json.dumps(metadata, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def _tokens(html: str) -> List[str]:
+    """Zerlegt HTML hinter jedem '>' in Tokens (Grundlage des Deltas)."""
+    return TOKEN_PATTERN.findall(html)
+
+
+def make_delta(base_tokens: List[str], tokens: List[str]) -> List[Any]:
+    """
+    Erstellt ein Delta: [start, ende] kopiert Tokens aus der Basis, Strings werden eingefügt.
+
+    Greedy in linearer Zeit (statt SequenceMatcher, der bei großen Seiten
+    im Writer-Thread sekundenlang den GIL hält): Jede Folge von DELTA_GRAM
+    Tokens wird im Keyframe nachgeschlagen und die Übereinstimmung so weit
+    wie möglich verlängert. Das Delta ist dadurch nicht minimal, bleibt
+    aber bei kleinen Änderungen klein.
+
+    Args:
+        base_tokens: Tokens des Keyframes
+        tokens: Tokens der neuen Version
+
+    Returns:
+        List: Delta-Operationen
+    """
+    positions: Dict[Tuple[str, ...], int] = {}
+    for i in range(len(base_tokens) - DELTA_GRAM, -1, -1):
+        positions[tuple(base_tokens[i:i + DELTA_GRAM])] = i
+
+    ops: List[Any] = []
+    literal: List[str] = []
+    j, n, m = 0, len(tokens), len(base_tokens)
+    while j < n:
+        start = positions.get(tuple(tokens[j:j + DELTA_GRAM]))
+        if start is None:
+            literal.append(tokens[j])
+            j += 1
+            continue
+        end = start + DELTA_GRAM
+        j += DELTA_GRAM
+        while end < m and j < n and base_tokens[end] == tokens[j]:
+            end += 1
+            j += 1
+        if literal:
+            ops.append(''.join(literal))
+            literal = []
+        if ops and isinstance(ops[-1], list) and ops[-1][1] == start:
+            ops[-1][1] = end
+        else:
+            ops.append([start, end])
+    if literal:
+        ops.append(''.join(literal))
+    return ops
+
+
+def apply_delta(base_tokens: List[str], ops: List[Any]) -> str:
+    """Setzt eine Version aus Keyframe-Tokens und Delta zusammen."""
+    return ''.join(
+        ''.join(base_tokens[op[0]:op[1]]) if isinstance(op, list) else op
+        for op in ops
+    )
+
+
+def _parse_time(value: str) -> str:
+    """Wandelt ISO-Datum oder relative Angabe ('7d', '12h') in einen ISO-Zeitstempel um."""
+    match = re.fullmatch(r'(\d+)([dh])', value.strip())
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        delta = timedelta(days=amount) if unit == 'd' else timedelta(hours=amount)
+        return (datetime.now() - delta).isoformat()
+    return datetime.fromisoformat(value).isoformat()
+
+
+class PageHistoryStore:
+    """
+    Append-only Versionsspeicher für gecrawlte Seiten.
+
+    Nicht thread-sicher: Schreiben erfolgt aus genau einem Writer-Thread.
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024,
+                 store_html: bool = True, keyframe_ratio: float = 0.5, delta_max_bytes: int = 4 * 1024 * 1024):
+        """
+        Args:
+            directory: Basisverzeichnis der Historie
+            segment_max_bytes: Größe, ab der ein neues Segment begonnen wird
+            store_html: HTML der Versionen speichern
+            keyframe_ratio: Neuer Keyframe, wenn das Delta größer als dieser
+                Anteil des vollständig komprimierten HTML ist
+            delta_max_bytes: Größeres HTML immer als Keyframe speichern (ohne Delta)
+        """
+        self.directory = directory
+        self.data_dir = data_directory(directory)
+        self.segment_dir = os.path.join(self.data_dir, 'segments')
+        self.segment_max_bytes = segment_max_bytes
+        self.store_html = store_html
+        self.keyframe_ratio = keyframe_ratio
+        self.delta_max_bytes = delta_max_bytes
+
+        os.makedirs(self.segment_dir, exist_ok=True)
+        self.index = sqlite3.connect(os.path.join(self.data_dir, 'index.sqlite3'), check_same_thread=False)
+        self.index.execute('PRAGMA journal_mode=WAL')
+        self.index.execute('PRAGMA synchronous=NORMAL')
+        self.index.executescript(SCHEMA)
+
+        self.active_name = None
+        self.active = None
+        self.readers: Dict[str, Any] = {}
+        self.keyframes: 'OrderedDict[Tuple[str, int], List[str]]' = OrderedDict()
+        self.logger = logging.getLogger(__name__)
+
+    # -----------------------------------------
+    # Segmente
+    # -----------------------------------------
+
+    def segments(self) -> List[str]:
+        """Namen aller Segmente in Schreibreihenfolge."""
+        return sorted(n for n in os.listdir(self.segment_dir) if n.endswith('.dat'))
+
+    def _open_active(self):
+        """Öffnet das letzte Segment zum Anhängen oder beginnt ein neues."""
+        names = self.segments()
+        name = names[-1] if names else 'segment-000001.dat'
+        path = os.path.join(self.segment_dir, name)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_max_bytes:
+            name = f'segment-{int(name[8:14]) + 1:06d}.dat'
+            path = os.path.join(self.segment_dir, name)
+        self.active_name = name
+        self.active = open(path, 'ab')
+
+    def _append(self, header: Dict[str, Any], payload: bytes = b'') -> Tuple[str, int]:
+        """
+        Hängt einen Record an das aktive Segment an.
+
+        Returns:
+            Tuple: (Segment, Offset) des Records
+        """
+        if self.active is None:
+            self._open_active()
+        elif self.active.tell() >= self.segment_max_bytes:
+            self.active.close()
+            self.active = None
+            self._open_active()
+
+        raw_header = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        offset = self.active.tell()
+        self.active.write(RECORD_HEADER.pack(len(raw_header), len(payload)))
+        self.active.write(raw_header)
+        self.active.write(payload)
+        self.active.flush()
+        return self.active_name, offset
+
+    def _read(self, segment: str, offset: int) -> Tuple[Dict[str, Any], bytes]:
+        """Liest Header und Payload eines Records."""
+        reader = self.readers.get(segment)
+        if reader is None:
+            reader = self.readers[segment] = open(os.path.join(self.segment_dir, segment), 'rb')
+        reader.seek(offset)
+        header_len, payload_len = RECORD_HEADER.unpack(reader.read(RECORD_HEADER.size))
+        header = json.loads(reader.read(header_len))
+        return header, reader.read(payload_len)
+
+    def scan(self, segment: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Liest alle vollständigen Records eines Segments (ohne Payload).
+
+        Ein unvollständiger Record am Ende (Abbruch beim Schreiben) wird ignoriert.
+
+        Yields:
+            Tuple: (Offset, Header)
+        """
+        path = os.path.join(self.segment_dir, segment)
+        size = os.path.getsize(path)
+        with open(path, 'rb') as file:
+            offset = 0
+            while offset + RECORD_HEADER.size <= size:
+                header_len, payload_len = RECORD_HEADER.unpack(file.read(RECORD_HEADER.size))
+                end = offset + RECORD_HEADER.size + header_len + payload_len
+                if end > size:
+                    break
+                header = json.loads(file.read(header_len))
+                file.seek(payload_len, os.SEEK_CUR)
+                yield offset, header
+                offset = end
+
+    # -----------------------------------------
+    # HTML-Kodierung
+    # -----------------------------------------
+
+    def _keyframe_tokens(self, segment: str, offset: int) -> List[str]:
+        """Tokens eines Keyframes (mit kleinem LRU-Cache)."""
+        key = (segment, offset)
+        tokens = self.keyframes.get(key)
+        if tokens is None:
+            _, payload = self._read(segment, offset)
+            tokens = _tokens(zlib.decompress(payload).decode('utf-8'))
+            self.keyframes[key] = tokens
+            if len(self.keyframes) > 64:
+                self.keyframes.popitem(last=False)
+        else:
+            self.keyframes.move_to_end(key)
+        return tokens
+
+    def _encode_html(self, url: str, html: str) -> Tuple[Dict[str, Any], bytes]:
+        """
+        Kodiert HTML als Delta zum letzten Keyframe der URL oder als neuen Keyframe.
+
+        Returns:
+            Tuple: (Header-Felder, Payload)
+        """
+        raw = html.encode('utf-8')
+        full = zlib.compress(raw, 6)
+        if len(raw) > self.delta_max_bytes:
+            return {'enc': 'full'}, full
+        row = self.index.execute(
+            "SELECT segment, offset FROM versions WHERE url = ? AND has_html = 2 "
+            "ORDER BY version DESC LIMIT 1", (url,)
+        ).fetchone()
+        if row:
+            base_tokens = self._keyframe_tokens(*row)
+            ops = make_delta(base_tokens, _tokens(html))
+            delta = zlib.compress(json.dumps(ops, ensure_ascii=False).encode('utf-8'), 6)
+            if len(delta) <= len(full) * self.keyframe_ratio:
+                return {'enc': 'delta', 'base': list(row)}, delta
+        return {'enc': 'full'}, full
+
+    def html(self, header: Dict[str, Any], payload: bytes) -> Optional[str]:
+        """Rekonstruiert das HTML eines Version-Records."""
+        enc = header.get('enc')
+        if enc == 'full':
+            return zlib.decompress(payload).decode('utf-8')
+        if enc == 'delta':
+            base_tokens = self._keyframe_tokens(*header['base'])
+            return apply_delta(base_tokens, json.loads(zlib.decompress(payload)))
+        return None
+
+    # -----------------------------------------
+    # Schreiben
+    # -----------------------------------------
+
+    def record(self, url: str, kind: str, metadata: Dict[str, Any], html: Optional[str] = None,
+               observed_at: Optional[str] = None) -> str:
+        """
+        Erfasst eine Beobachtung einer URL.
+
+        Args:
+            url: URL der Seite
+            kind: Item-Art
+            metadata: Versionierte Felder (history_metadata)
+            html: HTML der Seite (optional, nur bei einer neuen Version gespeichert)
+            observed_at: ISO-Zeitstempel der Beobachtung
+
+        Returns:
+            str: 'new', 'changed' oder 'unchanged'
+        """
+        observed_at = observed_at or datetime.now().isoformat()
+        digest = content_hash(metadata)
+        latest = self.index.execute(
+            "SELECT version, content_hash FROM versions WHERE url = ? ORDER BY version DESC LIMIT 1",
+            (url,)
+        ).fetchone()
+
+        if latest and latest[1] == digest:
+            self._append({'url': url, 't': observed_at, 'hash': digest, 'same': 1})
+            with self.index:
+                self.index.execute(
+                    "UPDATE versions SET last_seen = ?, observations = observations + 1 "
+                    "WHERE url = ? AND version = ?", (observed_at, url, latest[0])
+                )
+                self.index.execute(
+                    "INSERT INTO counters (name, value) VALUES ('markers', 1) "
+                    "ON CONFLICT (name) DO UPDATE SET value = value + 1"
+                )
+            return 'unchanged'
+
+        version = latest[0] + 1 if latest else 1
+        self._write_version(url, version, kind, metadata, digest, html, observed_at, observed_at, 1)
+        return 'changed' if latest else 'new'
+
+    def _write_version(self, url: str, version: int, kind: str, metadata: Dict[str, Any], digest: str,
+                       html: Optional[str], first_seen: str, last_seen: str, observations: int):
+        """Hängt einen Version-Record an und trägt ihn in den Index ein."""
+        header = {
+            'url': url, 'v': version, 'kind': kind, 't': first_seen, 'last_seen': last_seen,
+            'n': observations, 'hash': digest, 'meta': metadata,
+        }
+        payload = b''
+        has_html = 0
+        if html and self.store_html:
+            encoding, payload = self._encode_html(url, html)
+            header.update(encoding)
+            has_html = 2 if encoding['enc'] == 'full' else 1
+
+        segment, offset = self._append(header, payload)
+        with self.index:
+            self.index.execute(
+                "INSERT OR REPLACE INTO versions (url, version, kind, domain, first_seen, last_seen, "
+                "observations, content_hash, segment, offset, has_html) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, version, kind, urlparse(url).netloc.lower(), first_seen, last_seen,
+                 observations, digest, segment, offset, has_html),
+            )
+
+    # -----------------------------------------
+    # Abfragen
+    # -----------------------------------------
+
+    def versions(self, url: str) -> List[Dict[str, Any]]:
+        """Alle Versionen einer URL (älteste zuerst)."""
+        rows = self.index.execute(
+            "SELECT version, first_seen, last_seen, observations, content_hash, has_html "
+            "FROM versions WHERE url = ? ORDER BY version", (url,)
+        ).fetchall()
+        return [
+            {'version': v, 'first_seen': first, 'last_seen': last, 'observations': n,
+             'content_hash': digest, 'html': bool(has_html)}
+            for v, first, last, n, digest, has_html in rows
+        ]
+
+    def get(self, url: str, version: Optional[int] = None, at: Optional[str] = None,
+            with_html: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Liefert eine Version einer URL.
+
+        Args:
+            url: URL der Seite
+            version: Versionsnummer (Standard: neueste)
+            at: Version, die zu diesem Zeitpunkt gültig war (ISO)
+            with_html: HTML rekonstruieren
+
+        Returns:
+            Dict: Metadaten der Version (und HTML) oder None
+        """
+        if version is not None:
+            where, params = "url = ? AND version = ?", (url, version)
+        elif at is not None:
+            where, params = "url = ? AND first_seen <= ?", (url, at)
+        else:
+            where, params = "url = ?", (url,)
+        row = self.index.execute(
+            f"SELECT segment, offset, last_seen, observations FROM versions WHERE {where} "
+            f"ORDER BY version DESC LIMIT 1", params
+        ).fetchone()
+        if not row:
+            return None
+
+        header, payload = self._read(row[0], row[1])
+        result = {
+            'url': url, 'version': header['v'], 'first_seen': header['t'], 'last_seen': row[2],
+            'observations': row[3], 'content_hash': header['hash'], 'metadata': header['meta'],
+        }
+        if with_html:
+            result['html'] = self.html(header, payload)
+        return result
+
+    def changes(self, since: str, until: Optional[str] = None,
+                domain: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        URLs mit neuen Versionen im Zeitraum.
+
+        Args:
+            since: Frühester Zeitpunkt (ISO)
+            until: Spätester Zeitpunkt (ISO)
+            domain: Nur diese Domain inklusive Subdomains
+
+        Returns:
+            List[Dict]: url, version, first_seen (neueste zuerst)
+        """
+        sql = "SELECT url, version, first_seen FROM versions WHERE first_seen >= ? AND version > 1"
+        params: List[Any] = [since]
+        if until:
+            sql += " AND first_seen <= ?"
+            params.append(until)
+        if domain:
+            sql += " AND (domain = ? OR domain LIKE ?)"
+            params += [domain.lower(), f'%.{domain.lower()}']
+        rows = self.index.execute(sql + " ORDER BY first_seen DESC", params).fetchall()
+        return [{'url': url, 'version': v, 'first_seen': first} for url, v, first in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """Kennzahlen für die Entscheidung über eine Kompaktierung."""
+        urls, versions, observations = self.index.execute(
+            "SELECT COUNT(DISTINCT url), COUNT(*), COALESCE(SUM(observations), 0) FROM versions"
+        ).fetchone()
+        markers = self.index.execute("SELECT value FROM counters WHERE name = 'markers'").fetchone()
+        size = sum(os.path.getsize(os.path.join(self.segment_dir, n)) for n in self.segments())
+        return {
+            'urls': urls,
+            'versions': versions,
+            'observations': observations,
+            'markers': markers[0] if markers else 0,
+            'segments': len(self.segments()),
+            'bytes': size,
+        }
+
+    def close(self):
+        """Schließt Segmente und Index."""
+        if self.active is not None:
+            self.active.close()
+            self.active = None
+        for reader in self.readers.values():
+            reader.close()
+        self.readers = {}
+        self.index.close()
+
+
+def compact(directory: str, segment_max_bytes: int = 64 * 1024 * 1024,
+            keyframe_ratio: float = 0.5) -> Dict[str, Any]:
+    """
+    Kompaktiert die Historie: führt Segmente zusammen, verwirft unveränderte
+    Beobachtungen und Versionen ohne Inhaltsänderung und kodiert das HTML neu.
+
+    Der Index wird aus den Segmenten neu aufgebaut. Das Ergebnis entsteht
+    als neue Generation in einem temporären Verzeichnis; erst das
+    abschließende os.replace() von CURRENT schaltet um, ein Abbruch davor
+    lässt die bisherige Historie unverändert. Darf nicht parallel zu
+    einem laufenden Crawl ausgeführt werden.
+
+    Args:
+        directory: Basisverzeichnis der Historie
+        segment_max_bytes: Größe der neuen Segmente
+        keyframe_ratio: Wie PageHistoryStore
+
+    Returns:
+        Dict: Kennzahlen vor und nach der Kompaktierung
+    """
+    source = PageHistoryStore(directory)
+    before = source.stats()
+
+    # Pass 1: Versionen pro URL aus den Segmenten sammeln (ohne Payload)
+    history: 'OrderedDict[str, List[Dict[str, Any]]]' = OrderedDict()
+    for segment in source.segments():
+        for offset, header in source.scan(segment):
+            versions = history.setdefault(header['url'], [])
+            if versions and versions[-1]['hash'] == header['hash']:
+                versions[-1]['last_seen'] = max(versions[-1]['last_seen'], header.get('last_seen', header['t']))
+                versions[-1]['n'] += header.get('n', 1)
+                continue
+            if header.get('same'):
+                continue  # Marker ohne zugehörige Version (abgeschnittenes Segment)
+            versions.append({
+                'hash': header['hash'], 'kind': header.get('kind'), 'meta': header['meta'],
+                'first_seen': header['t'], 'last_seen': header.get('last_seen', header['t']),
+                'n': header.get('n', 1), 'ref': (segment, offset), 'html': 'enc' in header,
+            })
+
+    # Pass 2: Versionen gruppiert nach URL in eine neue Generation schreiben
+    old_data_dir = source.data_dir
+    current = os.path.basename(old_data_dir) if old_data_dir != directory else 'gen-000000'
+    generation = f'gen-{int(current[4:]) + 1:06d}'
+    target_dir = os.path.join(directory, f'{generation}.tmp')
+    shutil.rmtree(target_dir, ignore_errors=True)
+    target = PageHistoryStore(target_dir, segment_max_bytes=segment_max_bytes, keyframe_ratio=keyframe_ratio)
+    for url, versions in history.items():
+        for number, entry in enumerate(versions, 1):
+            html = None
+            if entry['html']:
+                header, payload = source._read(*entry['ref'])
+                html = source.html(header, payload)
+            target._write_version(url, number, entry['kind'], entry['meta'], entry['hash'], html,
+                                  entry['first_seen'], entry['last_seen'], entry['n'])
+    after = target.stats()
+    source.close()
+    target.close()
+
+    # Neue Generation aktivieren: bis zum os.replace() von CURRENT bleibt die alte gültig
+    generation_dir = os.path.join(directory, generation)
+    shutil.rmtree(generation_dir, ignore_errors=True)
+    os.replace(target_dir, generation_dir)
+    pointer = os.path.join(directory, f'{CURRENT_FILE}.tmp')
+    with open(pointer, 'w', encoding='utf-8') as file:
+        file.write(generation)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+
+    # Alte Generation entfernen (bzw. Segmente und Index im Basisverzeichnis)
+    if old_data_dir != directory:
+        shutil.rmtree(old_data_dir, ignore_errors=True)
+    else:
+        shutil.rmtree(os.path.join(directory, 'segments'), ignore_errors=True)
+        for suffix in ('', '-wal', '-shm'):
+            path = os.path.join(directory, f'index.sqlite3{suffix}')
+            if os.path.exists(path):
+                os.remove(path)
+
+    return {'before': before, 'after': after}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeile für Abfragen und Kompaktierung der Seitenhistorie."""
+    parser = argparse.ArgumentParser(description='Versionierte Seitenhistorie')
+    parser.add_argument('--dir', default='data/state/history', help='Verzeichnis der Historie')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    versions = commands.add_parser('versions', help='Versionen einer URL')
+    versions.add_argument('url')
+
+    show = commands.add_parser('show', help='Eine Version einer URL anzeigen')
+    show.add_argument('url')
+    show.add_argument('--version', type=int, help='Versionsnummer (Standard: neueste)')
+    show.add_argument('--at', help='Zu diesem Zeitpunkt gültige Version (ISO-Datum)')
+    show.add_argument('--html', action='store_true', help='HTML ausgeben')
+
+    changes = commands.add_parser('changes', help='Geänderte URLs im Zeitraum')
+    changes.add_argument('--since', default='1d', help="ISO-Datum oder relativ, z.B. '7d', '12h'")
+    changes.add_argument('--until', help='ISO-Datum')
+    changes.add_argument('--domain', help='Nur diese Domain (inkl. Subdomains)')
+
+    compaction = commands.add_parser('compact', help='Segmente zusammenführen, Duplikate verwerfen')
+    compaction.add_argument('--min-ratio', type=float, default=1.0,
+                            help='Nur kompaktieren, wenn Marker/Versionen mindestens diesem Wert entsprechen')
+    compaction.add_argument('--force', action='store_true', help='Immer kompaktieren')
+
+    commands.add_parser('stats', help='Kennzahlen der Historie')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(os.path.join(data_directory(args.dir), 'segments')):
+        print(f"Historie nicht gefunden: {args.dir}", file=sys.stderr)
+        return 1
+
+    if args.command == 'compact':
+        store = PageHistoryStore(args.dir)
+        stats = store.stats()
+        store.close()
+        # Marker unveränderter Beobachtungen seit der letzten Kompaktierung
+        ratio = stats['markers'] / stats['versions'] if stats['versions'] else 0
+        if not args.force and ratio < args.min_ratio and stats['segments'] <= 1:
+            print(f"Kompaktierung nicht nötig (Verhältnis {ratio:.2f}, {stats['segments']} Segment(e))")
+            return 0
+        result = compact(args.dir)
+        before, after = result['before'], result['after']
+        print(f"Kompaktiert: {before['bytes']} -> {after['bytes']} Bytes, "
+              f"{before['segments']} -> {after['segments']} Segment(e), {after['versions']} Versionen")
+        return 0
+
+    store = PageHistoryStore(args.dir)
+    try:
+        if args.command == 'versions':
+            for entry in store.versions(args.url):
+                print(f"v{entry['version']:<4} {entry['first_seen']} .. {entry['last_seen']}  "
+                      f"{entry['observations']}x  {entry['content_hash'][:12]}{'  html' if entry['html'] else ''}")
+        elif args.command == 'show':
+            entry = store.get(args.url, version=args.version,
+                              at=_parse_time(args.at) if args.at else None, with_html=args.html)
+            if entry is None:
+                print("Keine Version gefunden", file=sys.stderr)
+                return 1
+            html = entry.pop('html', None)
+            print(json.dumps(entry, ensure_ascii=False, indent=2))
+            if html:
+                print(html)
+        elif args.command == 'changes':
+            for entry in store.changes(_parse_time(args.since),
+                                       _parse_time(args.until) if args.until else None, args.domain):
+                print(f"{entry['first_seen']}  v{entry['version']:<4} {entry['url']}")
+        elif args.command == 'stats':
+            print(json.dumps(store.stats(), indent=2))
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
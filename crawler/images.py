@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Inhaltsadressierter Bildspeicher für Artikelbilder.
+
+Bilder werden unter dem SHA-1 ihres Inhalts abgelegt; dasselbe
+Teaser-Bild unter mehreren URLs oder in mehreren Artikeln belegt nur
+eine Datei. Die Zuordnung URL -> Hash bleibt über Läufe erhalten, sodass
+bekannte URLs gar nicht erst heruntergeladen werden.
+
+Aufbau von IMAGES_DIR:
+
+    full/ab/ab12...ef.jpg            Original (Endung aus dem Bildformat)
+    thumbs/small/ab/ab12...ef.jpg    Vorschaubilder (JPEG) pro Größe
+
+Format und Abmessungen werden aus dem Dateikopf gelesen (ohne das Bild
+zu dekodieren); nur die Vorschaubilder brauchen Pillow.
+"""
+
+import os
+import struct
+import hashlib
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+from crawler.state import JsonStateStore
+
+try:
+    from PIL import Image
+except ImportError:  # Vorschaubilder sind optional
+    Image = None
+
+
+# Bildformat -> MIME-Typ
+IMAGE_TYPES = {
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+
+# JPEG-Marker mit Abmessungen (Start of Frame, ohne DHT/JPG/DAC)
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Abmessungen aus dem ersten SOF-Segment eines JPEG."""
+    offset = 2
+    while offset + 9 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        if marker in _JPEG_SOF:
+            height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + length
+    return None
+
+
+def sniff_image(data: bytes) -> Optional[Tuple[str, Optional[int], Optional[int]]]:
+    """
+    Erkennt Format und Abmessungen eines Bildes am Dateikopf.
+
+    Args:
+        data: Inhalt der Datei
+
+    Returns:
+        Tuple: (Endung, Breite, Höhe) oder None, wenn kein unterstütztes Bild
+    """
+    if data.startswith(b'\xff\xd8\xff'):
+        size = _jpeg_size(data)
+        return ('jpg',) + (size or (None, None))
+    if data.startswith(b'\x89PNG\r\n\x1a\n') and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return 'png', width, height
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        width, height = struct.unpack('<HH', data[6:10])
+        return 'gif', width, height
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8X':
+            width = int.from_bytes(data[24:27], 'little') + 1
+            height = int.from_bytes(data[27:30], 'little') + 1
+        elif chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            width, height = (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        elif chunk == b'VP8 ':
+            width, height = (value & 0x3FFF for value in struct.unpack('<HH', data[26:30]))
+        else:
+            width = height = None
+        return 'webp', width, height
+    return None
+
+
+class ImageStore:
+    """
+    Inhaltsadressierte Ablage der Bilder mit persistenter URL-Zuordnung.
+
+    store() und thumbnails() laufen in Worker-Threads; die Zuordnung
+    (self.urls) wird nur im Reactor verändert.
+    """
+
+    def __init__(self, directory: str, map_file: Optional[str] = None,
+                 thumb_sizes: Optional[Dict[str, int]] = None, thumb_quality: int = 80):
+        """
+        Args:
+            directory: Verzeichnis der Bilder
+            map_file: JSON-Datei der Zuordnung URL -> Bild (None = nur innerhalb des Laufs)
+            thumb_sizes: Vorschaubilder pro Name mit maximaler Kantenlänge (Pixel)
+            thumb_quality: JPEG-Qualität der Vorschaubilder
+        """
+        self.directory = directory
+        self.thumb_sizes = thumb_sizes or {}
+        self.thumb_quality = thumb_quality
+        self.state = JsonStateStore(map_file) if map_file else None
+        # URL -> {'checksum', 'path', 'width', 'height', 'thumbs'}
+        self.urls: Dict[str, Dict[str, Any]] = self.state.load() if self.state else {}
+        self.logger = logging.getLogger(__name__)
+        if self.thumb_sizes and Image is None:
+            self.logger.warning("Pillow nicht installiert, Vorschaubilder werden nicht erzeugt")
+
+    def cached(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Bekanntes Bild einer URL, sofern die Datei noch existiert.
+
+        Args:
+            url: URL des Bildes
+
+        Returns:
+            Dict: Eintrag der Zuordnung oder None
+        """
+        entry = self.urls.get(url)
+        if entry and os.path.exists(os.path.join(self.directory, entry['path'])):
+            return entry
+        return None
+
+    def thumb_paths(self, checksum: str) -> Dict[str, str]:
+        """Relative Pfade der Vorschaubilder eines Bildes."""
+        if Image is None:
+            return {}
+        return {name: f'thumbs/{name}/{checksum[:2]}/{checksum}.jpg' for name in self.thumb_sizes}
+
+    def store(self, data: bytes) -> Dict[str, Any]:
+        """
+        Legt ein Bild unter seinem Inhalts-Hash ab (im Writer-Thread).
+
+        Args:
+            data: Inhalt der Datei
+
+        Returns:
+            Dict: Eintrag mit Pfad, Abmessungen und 'new' (Datei neu geschrieben)
+
+        Raises:
+            ValueError: Wenn der Inhalt kein unterstütztes Bild ist
+        """
+        info = sniff_image(data)
+        if info is None:
+            raise ValueError("kein unterstütztes Bildformat")
+        ext, width, height = info
+        checksum = hashlib.sha1(data).hexdigest()
+        path = f'full/{checksum[:2]}/{checksum}.{ext}'
+        full_path = os.path.join(self.directory, path)
+
+        new = not os.path.exists(full_path)
+        if new:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            tmp_path = f'{full_path}.tmp'
+            with open(tmp_path, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, full_path)
+
+        return {
+            'checksum': checksum,
+            'path': path,
+            'width': width,
+            'height': height,
+            'thumbs': self.thumb_paths(checksum),
+            'new': new,
+        }
+
+    def thumbnails(self, entry: Dict[str, Any]) -> int:
+        """
+        Erzeugt fehlende Vorschaubilder eines Bildes (im Worker-Pool).
+
+        Args:
+            entry: Ergebnis von store()
+
+        Returns:
+            int: Anzahl neu erzeugter Vorschaubilder
+        """
+        missing = {
+            name: path for name, path in entry['thumbs'].items()
+            if not os.path.exists(os.path.join(self.directory, path))
+        }
+        if not missing or Image is None:
+            return 0
+
+        with Image.open(os.path.join(self.directory, entry['path'])) as image:
+            image.draft('RGB', (max(self.thumb_sizes.values()),) * 2)
+            image = image.convert('RGB')
+            for name, path in missing.items():
+                size = self.thumb_sizes[name]
+                thumb = image.copy()
+                thumb.thumbnail((size, size))
+                full_path = os.path.join(self.directory, path)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                thumb.save(f'{full_path}.tmp', 'JPEG', quality=self.thumb_quality)
+                os.replace(f'{full_path}.tmp', full_path)
+        return len(missing)
+
+    def remember(self, url: str, entry: Dict[str, Any]):
+        """Merkt die Zuordnung einer URL (im Reactor)."""
+        self.urls[url] = {key: value for key, value in entry.items() if key != 'new'}
+
+    def save(self):
+        """Speichert die Zuordnung URL -> Bild."""
+        if self.state:
+            self.state.data = self.urls
+            self.state.save()
@@ -10,7 +10,9 @@ Datenvalidierung und -verarbeitung.
 import scrapy
 from scrapy import Field
 from itemadapter import ItemAdapter
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Optional, List, Dict, Any
 
 
 class WebPageItem(scrapy.Item):
@@ -136,11 +138,26 @@ class NewsArticleItem(scrapy.Item):
         description="URLs der Bilder im Artikel"
     )
     
+    images = Field(
+        serializer=list,
+        description="Gespeicherte Bilder (URL, Pfad, Prüfsumme, Abmessungen, Vorschaubilder)"
+    )
+    
+    image_paths = Field(
+        serializer=list,
+        description="Pfade der gespeicherten Bilder relativ zu IMAGES_DIR"
+    )
+    
     word_count = Field(
         serializer=int,
         description="Wortanzahl des Artikels"
     )
 
+    timestamp = Field(
+        serializer=str,
+        description="Zeitpunkt der Extraktion (ISO-Format)"
+    )
+
 
 class TenderItem(scrapy.Item):
     """
@@ -198,3 +215,96 @@ class TenderItem(scrapy.Item):
     
     url = Field()
     timestamp = Field()
+
+
+# ---------------------------------------------
+# KOMPAKTE RECORDS
+# ---------------------------------------------
+#
+# Slot-basierte Varianten der obigen Items. Sie werden mit allen Feldern
+# auf einmal erzeugt (kein __setitem__ pro Feld, kein dict pro Instanz)
+# und von ItemAdapter wie Dataclass-Items behandelt, sodass alle
+# Pipelines unverändert damit arbeiten.
+
+
+def _now() -> str:
+    """Aktueller Zeitstempel im ISO-Format."""
+    return datetime.now().isoformat()
+
+
+@dataclass(slots=True)
+class WebPageRecord:
+    """Kompakte Variante von WebPageItem."""
+
+    title: Optional[str] = None
+    url: Optional[str] = None
+    domain: Optional[str] = None
+    description: Optional[str] = None
+    keywords: Optional[str] = None
+    language: Optional[str] = None
+    status_code: Optional[int] = None
+    content_type: Optional[str] = None
+    internal_links: List[str] = field(default_factory=list)
+    screenshot_path: Optional[str] = None
+    timestamp: str = field(default_factory=_now)
+
+
+@dataclass(slots=True)
+class NewsArticleRecord:
+    """Kompakte Variante von NewsArticleItem."""
+
+    title: Optional[str] = None
+    url: Optional[str] = None
+    domain: Optional[str] = None
+    description: Optional[str] = None
+    author: Optional[str] = None
+    publish_date: Optional[str] = None
+    category: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    article_text: Optional[str] = None
+    image_urls: List[str] = field(default_factory=list)
+    images: List[Dict[str, Any]] = field(default_factory=list)
+    image_paths: List[str] = field(default_factory=list)
+    word_count: Optional[int] = None
+    timestamp: str = field(default_factory=_now)
+
+
+@dataclass(slots=True)
+class TenderRecord:
+    """Kompakte Variante von TenderItem."""
+
+    tender_title: Optional[str] = None
+    tender_id: Optional[str] = None
+    organization: Optional[str] = None
+    deadline: Optional[str] = None
+    budget: Optional[str] = None
+    category: Optional[str] = None
+    location: Optional[str] = None
+    contact_info: Dict[str, Any] = field(default_factory=dict)
+    requirements: Optional[str] = None
+    url: Optional[str] = None
+    timestamp: str = field(default_factory=_now)
+
+
+# Export-Kategorie pro Item-Typ (Name der CSV-Datei ohne Endung)
+ITEM_KINDS = {
+    WebPageItem: 'webpages',
+    WebPageRecord: 'webpages',
+    NewsArticleItem: 'news',
+    NewsArticleRecord: 'news',
+    TenderItem: 'tenders',
+    TenderRecord: 'tenders',
+}
+
+
+def item_kind(item) -> str:
+    """
+    Bestimmt die Export-Kategorie eines Items.
+
+    Args:
+        item: Item oder Record
+
+    Returns:
+        str: 'webpages', 'news' oder 'tenders' (Fallback: 'webpages')
+    """
+    return ITEM_KINDS.get(type(item), 'webpages')
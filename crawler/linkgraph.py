@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+Kompakter Linkgraph über die internen Links aller Läufe.
+
+URLs werden auf fortlaufende Integer-IDs abgebildet, die Kanten liegen als
+Adjazenzliste im CSR-Format in zwei Arrays (Offsets und Ziele, je 4 Bytes
+pro Eintrag) statt als Dict von String-Listen. Wird eine Seite erneut
+gecrawlt, ersetzen ihre neuen Links die alten. Aus dem Graphen werden im
+Batch In-Link-Zahlen und ein PageRank berechnet und als Prioritäten für
+den nächsten Lauf exportiert.
+
+Aufbau von LINK_GRAPH_DIR:
+
+    nodes.txt      Eine URL pro Zeile, Zeilennummer = ID (nur angehängt)
+    graph.bin      Header >4sIII (Magic, Version, Knoten, Kanten),
+                   Offsets (Knoten + 1) und Ziele als uint32 little-endian
+    scores.json    In-Links, PageRank und Priorität der wichtigsten URLs
+
+Abfragen über die Kommandozeile:
+
+    python -m crawler.linkgraph stats
+    python -m crawler.linkgraph top --limit 20
+    python -m crawler.linkgraph links https://www.bund.de/
+    python -m crawler.linkgraph rank
+"""
+
+import os
+import sys
+import json
+import struct
+import argparse
+import logging
+from array import array
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable
+from urllib.parse import urldefrag
+
+
+MAGIC = b'LNKG'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>4sIII')
+
+# Byte-Reihenfolge der Arrays in graph.bin
+SWAP_BYTES = sys.byteorder != 'little'
+
+
+def normalize_url(url: str) -> str:
+    """Entfernt das Fragment, damit Sprungmarken keine eigenen Knoten bilden."""
+    return urldefrag(url.strip())[0]
+
+
+def _uint32_array(values: Iterable[int] = ()) -> array:
+    """Array mit 4-Byte-Einträgen ohne Vorzeichen."""
+    typecode = 'I' if array('I').itemsize == 4 else 'L'
+    return array(typecode, values)
+
+
+class LinkGraph:
+    """
+    Linkgraph mit internierten URLs und CSR-Adjazenzlisten.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Verzeichnis des Graphen (wird beim Speichern angelegt)
+        """
+        self.directory = directory
+        self.urls: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.offsets = _uint32_array([0])
+        self.targets = _uint32_array()
+        # Neue Links dieses Laufs pro Quelle (ersetzen die gespeicherten)
+        self.pending: Dict[int, array] = {}
+        self.saved_nodes = 0
+        self.logger = logging.getLogger(__name__)
+        self._load()
+
+    @property
+    def nodes_path(self) -> str:
+        return os.path.join(self.directory, 'nodes.txt')
+
+    @property
+    def graph_path(self) -> str:
+        return os.path.join(self.directory, 'graph.bin')
+
+    @property
+    def scores_path(self) -> str:
+        return os.path.join(self.directory, 'scores.json')
+
+    def _load(self):
+        """Lädt Knoten und Kanten des letzten Laufs."""
+        try:
+            with open(self.graph_path, 'rb') as file:
+                magic, version, nodes, edges = HEADER.unpack(file.read(HEADER.size))
+                if magic != MAGIC or version != FORMAT_VERSION:
+                    raise ValueError("unbekanntes Format")
+                offsets, targets = _uint32_array(), _uint32_array()
+                offsets.fromfile(file, nodes + 1)
+                targets.fromfile(file, edges)
+            with open(self.nodes_path, 'r', encoding='utf-8') as file:
+                urls = file.read().split('\n')[:nodes]
+            if len(urls) < nodes:
+                raise ValueError("nodes.txt ist unvollständig")
+        except FileNotFoundError:
+            return
+        except (OSError, EOFError, ValueError, struct.error) as e:
+            self.logger.warning(f"Linkgraph {self.directory} nicht lesbar, starte leer: {e}")
+            return
+
+        if SWAP_BYTES:
+            offsets.byteswap()
+            targets.byteswap()
+        self.urls = urls
+        self.ids = {url: node for node, url in enumerate(urls)}
+        self.offsets, self.targets = offsets, targets
+        self.saved_nodes = nodes
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    @property
+    def edge_count(self) -> int:
+        """Anzahl der Kanten inklusive der noch nicht gespeicherten."""
+        replaced = sum(self._saved_degree(node) for node in self.pending)
+        return len(self.targets) - replaced + sum(len(links) for links in self.pending.values())
+
+    def intern(self, url: str) -> int:
+        """
+        Liefert die ID einer URL (neue URLs erhalten die nächste freie ID).
+
+        Args:
+            url: Normalisierte URL
+
+        Returns:
+            int: ID des Knotens
+        """
+        node = self.ids.get(url)
+        if node is None:
+            node = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+        return node
+
+    def set_outlinks(self, url: str, links: Iterable[str]) -> int:
+        """
+        Setzt die ausgehenden Links einer gecrawlten Seite.
+
+        Args:
+            url: URL der Seite
+            links: Interne Links der Seite
+
+        Returns:
+            int: Anzahl der (eindeutigen) Kanten
+        """
+        source = self.intern(normalize_url(url))
+        seen = set()
+        targets = _uint32_array()
+        for link in links:
+            link = normalize_url(link)
+            if not link or '\n' in link:
+                continue
+            target = self.intern(link)
+            if target != source and target not in seen:
+                seen.add(target)
+                targets.append(target)
+        self.pending[source] = targets
+        return len(targets)
+
+    def _saved_degree(self, node: int) -> int:
+        """Anzahl der Links eines Knotens in den CSR-Arrays."""
+        if node >= len(self.offsets) - 1:
+            return 0
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def outlinks(self, node: int) -> array:
+        """Ziele der ausgehenden Links eines Knotens."""
+        if node in self.pending:
+            return self.pending[node]
+        if node >= len(self.offsets) - 1:
+            return _uint32_array()
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def compact(self):
+        """Übernimmt die neuen Links in die CSR-Arrays."""
+        if not self.pending and len(self.offsets) - 1 == len(self.urls):
+            return
+        offsets, targets = _uint32_array([0]), _uint32_array()
+        for node in range(len(self.urls)):
+            targets.extend(self.outlinks(node))
+            offsets.append(len(targets))
+        self.offsets, self.targets = offsets, targets
+        self.pending = {}
+
+    def save(self):
+        """Schreibt neue Knoten und den kompaktierten Graphen (atomar)."""
+        self.compact()
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Knoten nur anhängen; ungültige Reste eines Abbruchs abschneiden
+        with open(self.nodes_path, 'a+', encoding='utf-8') as file:
+            file.seek(0)
+            valid = sum(len(url.encode('utf-8')) + 1 for url in self.urls[:self.saved_nodes])
+            file.truncate(valid)
+            for url in self.urls[self.saved_nodes:]:
+                file.write(url + '\n')
+
+        offsets, targets = self.offsets, self.targets
+        if SWAP_BYTES:
+            offsets, targets = array(offsets.typecode, offsets), array(targets.typecode, targets)
+            offsets.byteswap()
+            targets.byteswap()
+        tmp_path = f'{self.graph_path}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(self.urls), len(self.targets)))
+            offsets.tofile(file)
+            targets.tofile(file)
+        os.replace(tmp_path, self.graph_path)
+        self.saved_nodes = len(self.urls)
+
+    def inlink_counts(self) -> array:
+        """
+        Zählt die eingehenden Links pro Knoten.
+
+        Returns:
+            array: In-Links, Index = ID
+        """
+        self.compact()
+        counts = _uint32_array([0]) * len(self.urls)
+        for target in self.targets:
+            counts[target] += 1
+        return counts
+
+    def pagerank(self, damping: float = 0.85, iterations: int = 30, tolerance: float = 1e-6) -> array:
+        """
+        Berechnet den PageRank per Potenziteration.
+
+        Der Rang von Knoten ohne ausgehende Links wird gleichmäßig auf alle
+        Knoten verteilt, damit die Summe der Ränge 1 bleibt.
+
+        Args:
+            damping: Dämpfungsfaktor
+            iterations: Maximale Anzahl Iterationen
+            tolerance: Abbruch, wenn sich die Ränge (L1) weniger ändern
+
+        Returns:
+            array: PageRank pro Knoten, Index = ID
+        """
+        self.compact()
+        count = len(self.urls)
+        if not count:
+            return array('d')
+        offsets, targets = self.offsets, self.targets
+        rank = array('d', [1.0 / count]) * count
+
+        for _ in range(iterations):
+            dangling = 0.0
+            # Liste statt Array: Zugriffe in der inneren Schleife sind deutlich schneller
+            incoming = [0.0] * count
+            for node in range(count):
+                start, end = offsets[node], offsets[node + 1]
+                if start == end:
+                    dangling += rank[node]
+                    continue
+                share = rank[node] / (end - start)
+                for target in targets[start:end]:
+                    incoming[target] += share
+            base = (1.0 - damping) / count + damping * dangling / count
+            new_rank = array('d', [base + damping * value for value in incoming])
+            delta = sum(abs(new - old) for new, old in zip(new_rank, rank))
+            rank = new_rank
+            if delta < tolerance:
+                break
+        return rank
+
+    def scores(self, limit: int = 10000, priority_range: int = 20, damping: float = 0.85) -> Dict[str, Any]:
+        """
+        Berechnet In-Links, PageRank und Crawl-Priorität der wichtigsten URLs.
+
+        Die Priorität verteilt die Ränge gleichmäßig auf 0..priority_range
+        (höchster PageRank = priority_range), damit wenige sehr stark
+        verlinkte Startseiten die Skala nicht dominieren.
+
+        Args:
+            limit: Anzahl der exportierten URLs (nach PageRank)
+            priority_range: Höchste vergebene Priorität
+            damping: Dämpfungsfaktor des PageRank
+
+        Returns:
+            Dict: Kennzahlen des Graphen und Scores pro URL
+        """
+        inlinks = self.inlink_counts()
+        rank = self.pagerank(damping=damping)
+        top = sorted(range(len(self.urls)), key=rank.__getitem__, reverse=True)[:limit]
+        scores = {}
+        for position, node in enumerate(top):
+            scores[self.urls[node]] = {
+                'inlinks': inlinks[node],
+                'pagerank': round(rank[node] * len(self.urls), 4),
+                'priority': round(priority_range * (1 - position / len(top))),
+            }
+        return {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'nodes': len(self.urls),
+            'edges': len(self.targets),
+            'scores': scores,
+        }
+
+    def export(self, limit: int = 10000, priority_range: int = 20, damping: float = 0.85) -> Dict[str, Any]:
+        """Berechnet die Scores und schreibt sie atomar nach scores.json."""
+        result = self.scores(limit=limit, priority_range=priority_range, damping=damping)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f'{self.scores_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.scores_path)
+        return result
+
+
+def load_priorities(directory: str) -> Dict[str, int]:
+    """
+    Lädt die exportierten Crawl-Prioritäten des letzten Laufs.
+
+    Args:
+        directory: Verzeichnis des Linkgraphen
+
+    Returns:
+        Dict: URL -> Priorität (leer, wenn noch nichts exportiert wurde)
+    """
+    try:
+        with open(os.path.join(directory, 'scores.json'), 'r', encoding='utf-8') as file:
+            scores = json.load(file).get('scores', {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.getLogger(__name__).warning(f"Link-Scores nicht lesbar: {e}")
+        return {}
+    return {url: entry['priority'] for url, entry in scores.items() if entry.get('priority')}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeile für Abfragen und Export des Linkgraphen."""
+    parser = argparse.ArgumentParser(description='Linkgraph der internen Links')
+    parser.add_argument('--dir', default='data/state/linkgraph', help='Verzeichnis des Linkgraphen')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('stats', help='Kennzahlen des Graphen')
+
+    top = commands.add_parser('top', help='URLs mit dem höchsten PageRank')
+    top.add_argument('--limit', type=int, default=20)
+
+    links = commands.add_parser('links', help='Aus- und eingehende Links einer URL')
+    links.add_argument('url')
+
+    rank = commands.add_parser('rank', help='Scores neu berechnen und exportieren')
+    rank.add_argument('--limit', type=int, default=10000, help='Anzahl exportierter URLs')
+    rank.add_argument('--priority-range', type=int, default=20, help='Höchste Priorität')
+    args = parser.parse_args(argv)
+
+    graph = LinkGraph(args.dir)
+    if not len(graph):
+        print(f"Linkgraph nicht gefunden: {args.dir}", file=sys.stderr)
+        return 1
+
+    if args.command == 'stats':
+        print(json.dumps({'nodes': len(graph), 'edges': graph.edge_count,
+                          'bytes': os.path.getsize(graph.graph_path)}, indent=2))
+    elif args.command == 'top':
+        for url, entry in list(graph.scores(limit=args.limit)['scores'].items()):
+            print(f"{entry['pagerank']:>10.4f}  {entry['inlinks']:>6}  {url}")
+    elif args.command == 'links':
+        node = graph.ids.get(normalize_url(args.url))
+        if node is None:
+            print("URL nicht im Graphen", file=sys.stderr)
+            return 1
+        for target in graph.outlinks(node):
+            print(f"-> {graph.urls[target]}")
+        offsets, targets = graph.offsets, graph.targets
+        for source in range(len(graph)):
+            if node in targets[offsets[source]:offsets[source + 1]]:
+                print(f"<- {graph.urls[source]}")
+    elif args.command == 'rank':
+        result = graph.export(limit=args.limit, priority_range=args.priority_range)
+        print(f"{len(result['scores'])} Scores exportiert ({result['nodes']} Knoten, {result['edges']} Kanten)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Logging mit geringem Overhead im Reactor-Thread.
+
+- Log-Records werden über eine Queue an einen eigenen Thread übergeben,
+  der die eigentlichen Handler (Konsole, Datei) bedient. Im Reactor
+  bleibt nur das Zusammensetzen der Nachricht.
+- Wiederkehrende Meldungen werden pro Meldungstyp (Logger + Format-String)
+  begrenzt: nach LOG_RATE_LIMIT_BURST Records pro Intervall wird nur noch
+  jeder n-te durchgelassen; die Anzahl der unterdrückten Records wird am
+  nächsten durchgelassenen Record vermerkt.
+- Optional werden alle Records zusätzlich als JSON-Zeilen mit Kontext
+  (Spider, Domain, URL, Status) geschrieben.
+
+Damit Begrenzung und verzögerte Formatierung greifen, loggen Hot Paths
+mit %-Platzhaltern statt f-Strings und übergeben den Kontext über
+log_context(request).
+"""
+
+import os
+import copy
+import json
+import queue
+import logging
+import logging.handlers
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+
+# Record-Attribute, die als Kontext in die JSON-Zeilen übernommen werden
+CONTEXT_FIELDS = ('spider', 'domain', 'url', 'status', 'reason', 'suppressed')
+
+
+def log_context(request, **fields) -> Dict[str, Any]:
+    """
+    Kontext eines Requests für das 'extra'-Argument eines Log-Aufrufs.
+
+    Args:
+        request: Scrapy-Request
+        **fields: Weitere Kontextfelder (z.B. status)
+
+    Returns:
+        Dict: URL, Domain und weitere Felder
+    """
+    return {'url': request.url, 'domain': request.meta.get('domain'), **fields}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatiert einen Record als JSON-Zeile mit Kontextfeldern.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = getattr(value, 'name', value) if name == 'spider' else value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Begrenzt gleichartige Records pro Zeitintervall und tastet darüber hinaus ab.
+
+    Meldungstyp ist Logger-Name plus Format-String (record.msg), d.h. alle
+    Aufrufe derselben Log-Zeile im Code zählen gemeinsam.
+    """
+
+    # Obergrenze verfolgter Meldungstypen (f-Strings erzeugen je Aufruf einen neuen)
+    MAX_KEYS = 10000
+
+    def __init__(self, burst: int = 20, interval: float = 60.0, sample: int = 100,
+                 exempt_level: int = logging.ERROR, stats=None):
+        """
+        Args:
+            burst: Records pro Meldungstyp und Intervall, die immer durchgelassen werden
+            interval: Länge des Intervalls (Sekunden)
+            sample: Darüber hinaus wird jeder n-te Record durchgelassen (0 = keiner)
+            exempt_level: Records ab diesem Level werden nie begrenzt
+            stats: Scrapy-Stats-Collector (optional)
+        """
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.sample = sample
+        self.exempt_level = exempt_level
+        self.stats = stats
+        # Meldungstyp -> [Intervallbeginn, Anzahl im Intervall, unterdrückt seit letztem Record]
+        self.windows: Dict[tuple, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.exempt_level:
+            return True
+
+        key = (record.name, record.msg)
+        now = record.created
+        window = self.windows.get(key)
+        if window is None:
+            if len(self.windows) >= self.MAX_KEYS:
+                self.windows.clear()
+            window = self.windows[key] = [now, 0, 0]
+        elif now - window[0] >= self.interval:
+            window[0], window[1] = now, 0
+
+        window[1] += 1
+        count = window[1]
+        if count <= self.burst or (self.sample and (count - self.burst) % self.sample == 0):
+            if window[2]:
+                record.suppressed = window[2]
+                window[2] = 0
+            return True
+
+        window[2] += 1
+        if self.stats is not None:
+            self.stats.inc_value('log/suppressed')
+        return False
+
+
+class PreparedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, der nur die Nachricht zusammensetzt.
+
+    Formatiert wird erst im Listener-Thread von dessen Handlern. Argumente
+    und Tracebacks werden vorher aufgelöst, damit der Record keine
+    veränderlichen Objekte oder Frames des Reactor-Threads mehr enthält.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        suppressed = getattr(record, 'suppressed', None)
+        if suppressed:
+            record.message = f"{record.message} ({suppressed} gleichartige Meldungen unterdrückt)"
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        spider = getattr(record, 'spider', None)
+        if spider is not None and not isinstance(spider, str):
+            record.spider = getattr(spider, 'name', str(spider))
+        return record
+
+
+class QueueLogging:
+    """
+    Leitet die Handler des Root-Loggers über eine Queue in einen eigenen Thread um.
+    """
+
+    def __init__(self, rate_limit: Optional[RateLimitFilter] = None, json_file: Optional[str] = None,
+                 json_level: int = logging.INFO):
+        """
+        Args:
+            rate_limit: Filter für die Begrenzung gleichartiger Records (optional)
+            json_file: Zusätzliche Ausgabe als JSON-Zeilen (optional)
+            json_level: Mindest-Level der JSON-Zeilen
+        """
+        self.rate_limit = rate_limit
+        self.json_file = json_file
+        self.json_level = json_level
+        self.queue_handler: Optional[PreparedQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.moved = []
+
+    def start(self, keep=()):
+        """
+        Ersetzt die Handler des Root-Loggers durch den Queue-Handler.
+
+        Scrapy lässt den Root-Logger auf NOTSET und setzt LOG_LEVEL nur am
+        Handler. Der Queue-Handler übernimmt deshalb das niedrigste Level
+        der ersetzten Handler; Records darunter werden schon im Reactor
+        verworfen, ohne prepare() und Queue.
+
+        Args:
+            keep: Handler-Typen, die synchron am Root-Logger bleiben (z.B. Zähler)
+        """
+        root = logging.getLogger()
+        self.moved = [handler for handler in root.handlers if not isinstance(handler, tuple(keep))]
+        handlers = list(self.moved)
+        if self.json_file:
+            os.makedirs(os.path.dirname(self.json_file) or '.', exist_ok=True)
+            json_handler = logging.FileHandler(self.json_file, encoding='utf-8')
+            json_handler.setLevel(self.json_level)
+            json_handler.setFormatter(JsonFormatter())
+            handlers.append(json_handler)
+
+        log_queue = queue.SimpleQueue()
+        self.queue_handler = PreparedQueueHandler(log_queue)
+        self.queue_handler.setLevel(min((handler.level for handler in handlers), default=logging.NOTSET))
+        if self.rate_limit:
+            self.queue_handler.addFilter(self.rate_limit)
+        self.listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+        for handler in self.moved:
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        self.listener.start()
+
+    def stop(self):
+        """Schreibt alle wartenden Records und stellt die ursprünglichen Handler wieder her."""
+        if self.listener is None:
+            return
+        root = logging.getLogger()
+        root.removeHandler(self.queue_handler)
+        for handler in self.moved:
+            root.addHandler(handler)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            if handler not in self.moved:
+                handler.close()
+        self.listener = None
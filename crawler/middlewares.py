@@ -6,15 +6,28 @@ Middlewares ermöglichen es, den Request/Response-Zyklus von Scrapy
 zu modifizieren und erweiterte Funktionalitäten hinzuzufügen.
 """
 
+import os
+import json
+import time
 import random
 import logging
+from datetime import datetime
 from typing import Union, Optional
 from urllib.parse import urlparse
 
 from scrapy import signals, Request, Spider
-from scrapy.http import HtmlResponse
+from scrapy.http import HtmlResponse, Headers, Response
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.misc import load_object
 from scrapy.downloadermiddlewares.useragent import UserAgentMiddleware
-from scrapy.exceptions import NotConfigured
+from scrapy.exceptions import IgnoreRequest, NotConfigured, StopDownload
+from twisted.internet import defer, reactor, task, threads
+from crawler.breaker import CircuitBreakerRegistry, DomainUnavailable, NEUTRAL_CATEGORIES, classify_exception, classify_status
+from crawler.budget import CrawlBudget, BudgetExhausted
+from crawler.har import open_archive
+from crawler.checkpoint import CheckpointStore, encode_request, decode_request, resume_checkpoint
+from crawler.logs import log_context
+from crawler.sessions import user_agent_for_domain
 
 
 class CrawlerSpiderMiddleware:
@@ -91,7 +104,7 @@ class CrawlerDownloaderMiddleware:
         
         spider.last_url = request.url
         
-        self.logger.debug(f"Processing request: {request.url}")
+        self.logger.debug("Processing request: %s", request.url, extra=log_context(request))
         return None
 
     def process_response(self, request: Request, response: HtmlResponse, spider: Spider) -> Union[HtmlResponse, Request]:
@@ -113,11 +126,12 @@ class CrawlerDownloaderMiddleware:
         
         # Umgang mit verschiedenen HTTP-Status-Codes
         if response.status == 403:
-            self.logger.warning(f"Access forbidden (403): {request.url}")
+            self.logger.warning("Access forbidden (403): %s", request.url, extra=log_context(request, status=403))
         elif response.status == 404:
-            self.logger.warning(f"Page not found (404): {request.url}")
+            self.logger.warning("Page not found (404): %s", request.url, extra=log_context(request, status=404))
         elif response.status >= 500:
-            self.logger.error(f"Server error ({response.status}): {request.url}")
+            self.logger.error("Server error (%s): %s", response.status, request.url,
+                              extra=log_context(request, status=response.status))
         
         return response
 
@@ -130,7 +144,7 @@ class CrawlerDownloaderMiddleware:
             exception: Die aufgetretene Exception
             spider: Der Spider
         """
-        self.logger.error(f"Request exception for {request.url}: {exception}")
+        self.logger.error("Request exception for %s: %s", request.url, exception, extra=log_context(request))
         pass
 
     def spider_opened(self, spider):
@@ -156,6 +170,9 @@ class RotateUserAgentMiddleware(UserAgentMiddleware):
         """
         self.user_agent = user_agent
         
+        # Fester User-Agent pro Domain (SESSION_PER_DOMAIN)
+        self.per_domain = False
+        
         # Liste realistischer User-Agent-Strings
         self.user_agent_list = [
             # Chrome Windows
@@ -208,21 +225,28 @@ class RotateUserAgentMiddleware(UserAgentMiddleware):
         
         middleware = cls(crawler.settings.get("USER_AGENT"))
         middleware.user_agent_list = user_agent_list
+        middleware.per_domain = crawler.settings.getbool("SESSION_PER_DOMAIN")
         return middleware
 
     def process_request(self, request: Request, spider: Spider):
         """
-        Wählt zufällig einen User-Agent für den Request aus.
+        Wählt einen User-Agent für den Request aus.
+        
+        Mit SESSION_PER_DOMAIN ist der User-Agent pro Domain fest, damit er
+        zum User-Agent des persistenten Playwright-Kontexts passt.
         
         Args:
             request: Der zu verarbeitende Request
             spider: Der Spider der den Request erstellt hat
         """
-        # Zufälligen User-Agent auswählen
-        ua = random.choice(self.user_agent_list)
+        if self.per_domain:
+            ua = user_agent_for_domain(request.url, self.user_agent_list)
+        else:
+            # Zufälligen User-Agent auswählen
+            ua = random.choice(self.user_agent_list)
         request.headers['User-Agent'] = ua
         
-        self.logger.debug(f"Rotated User-Agent for {request.url}: {ua[:50]}...")
+        self.logger.debug("Rotated User-Agent for %s: %.50s...", request.url, ua)
         
         return None
 
@@ -266,7 +290,7 @@ class ProxyMiddleware:
         if self.proxies and not request.meta.get('proxy'):
             proxy = random.choice(self.proxies)
             request.meta['proxy'] = proxy
-            self.logger.debug(f"Assigned proxy {proxy} to {request.url}")
+            self.logger.debug("Assigned proxy %s to %s", proxy, request.url)
         
         return None
 
@@ -312,7 +336,8 @@ class RetryMiddleware:
             retry_times = request.meta.get('retry_times', 0) + 1
             
             if retry_times <= self.retry_times:
-                self.logger.warning(f"Retrying {request.url} (attempt {retry_times}/{self.retry_times})")
+                self.logger.warning("Retrying %s (attempt %s/%s)", request.url, retry_times, self.retry_times,
+                                    extra=log_context(request))
                 
                 retry_req = request.copy()
                 retry_req.meta['retry_times'] = retry_times
@@ -320,7 +345,863 @@ class RetryMiddleware:
                 
                 return retry_req
             else:
-                self.logger.error(f"Gave up retrying {request.url} after {self.retry_times} attempts")
+                self.logger.error("Gave up retrying %s after %s attempts", request.url, self.retry_times,
+                                  extra=log_context(request))
         
         return response
 
+
+
+class BrowserRecoveryMiddleware:
+    """
+    Plant Playwright-Requests neu ein, wenn der Browser abgestürzt ist.
+
+    Stürzt Chromium ab oder wird er vom BrowserLifecycleManager neu
+    gestartet, schlagen alle laufenden Renders mit "Target closed"-Fehlern
+    fehl. Diese Requests werden (begrenzt) erneut eingeplant, statt im
+    Errback des Spiders verloren zu gehen.
+    """
+
+    # Fehlermeldungen von Playwright bei geschlossenem/abgestürztem Browser
+    CRASH_MESSAGES = (
+        'target page, context or browser has been closed',
+        'browser has been closed',
+        'target closed',
+        'browser closed',
+        'connection closed',
+        'page crashed',
+    )
+
+    def __init__(self, retry_times=2, stats=None):
+        """
+        Args:
+            retry_times: Maximale Anzahl Neuversuche pro Request
+            stats: Scrapy-Stats-Collector
+        """
+        self.retry_times = retry_times
+        self.stats = stats
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Middleware."""
+        return cls(crawler.settings.getint("BROWSER_CRASH_RETRY_TIMES", 2), crawler.stats)
+
+    def is_browser_crash(self, exception: Exception) -> bool:
+        """
+        Prüft ob eine Exception auf einen geschlossenen Browser hinweist.
+
+        Args:
+            exception: Die aufgetretene Exception
+
+        Returns:
+            bool: True bei Browser-Absturz oder -Neustart
+        """
+        if type(exception).__name__ == 'TargetClosedError':
+            return True
+        message = str(exception).lower()
+        return any(text in message for text in self.CRASH_MESSAGES)
+
+    def process_exception(self, request: Request, exception: Exception, spider: Spider):
+        """
+        Plant den Request nach einem Browser-Absturz erneut ein.
+
+        Args:
+            request: Der fehlgeschlagene Request
+            exception: Die aufgetretene Exception
+            spider: Der Spider
+
+        Returns:
+            Request: Kopie des Requests für den Neuversuch oder None
+        """
+        if not request.meta.get('playwright') or not self.is_browser_crash(exception):
+            return None
+
+        retries = request.meta.get('browser_retry_times', 0) + 1
+        if retries > self.retry_times:
+            self.logger.error("Gave up after browser crash: %s", request.url, extra=log_context(request))
+            return None
+
+        self.logger.warning("Browser closed during render, re-queueing %s (%s/%s)", request.url, retries, self.retry_times,
+                            extra=log_context(request))
+        if self.stats:
+            self.stats.inc_value('browser/requeued_requests')
+
+        retry_req = request.copy()
+        retry_req.meta['browser_retry_times'] = retries
+        retry_req.meta.pop('playwright_page', None)
+        retry_req.dont_filter = True
+        return retry_req
+
+
+def content_gate_verdict(content_type: Optional[str], size: Optional[int], max_bytes: int,
+                         allowed_types: tuple) -> Optional[str]:
+    """
+    Entscheidet ob ein Dokument am Rendering vorbeigeleitet wird.
+
+    Args:
+        content_type: Content-Type-Header (ohne Parameter ist ausreichend)
+        size: Größe in Bytes (None = unbekannt)
+        max_bytes: Maximale Größe eines gerenderten Dokuments
+        allowed_types: MIME-Typen, die gerendert werden
+
+    Returns:
+        str: 'content_type' oder 'size' beim Umleiten, sonst None
+    """
+    mime = (content_type or '').split(';')[0].strip().lower()
+    if mime and mime not in allowed_types:
+        return 'content_type'
+    if size is not None and max_bytes and size > max_bytes:
+        return 'size'
+    return None
+
+
+async def gate_main_document(page, request: Request):
+    """
+    Page-Init-Callback: prüft das Hauptdokument vor dem Rendering.
+
+    Die Navigation wird per route.fetch() geladen und nur dann an den
+    Browser übergeben, wenn Content-Type und Größe passen. Andernfalls
+    wird sie abgebrochen und das Ergebnis in request.meta['content_gate']
+    abgelegt; die ContentGateMiddleware leitet den Request dann in den
+    Metadaten-Pfad des Spiders um. Alle anderen Requests der Seite gehen
+    unverändert an den Handler von scrapy-playwright.
+
+    Args:
+        page: Playwright-Page
+        request: Scrapy-Request
+    """
+    max_bytes, allowed_types = request.meta['content_gate_limits']
+    scrapy_headers = {
+        key.decode('latin-1'): value[0].decode('latin-1')
+        for key, value in request.headers.items() if value
+    }
+
+    async def handler(route, playwright_request):
+        if not playwright_request.is_navigation_request() or playwright_request.frame != page.main_frame:
+            await route.fallback()
+            return
+
+        headers = await playwright_request.all_headers()
+        headers.update(scrapy_headers)
+        try:
+            response = await route.fetch(headers=headers, max_redirects=0)
+        except Exception:
+            await route.fallback()
+            return
+        if 300 <= response.status < 400:
+            # Weiterleitungen folgt der Browser selbst; das Ziel wird erneut geprüft
+            await route.fallback()
+            return
+
+        content_length = response.headers.get('content-length')
+        size = int(content_length) if content_length and content_length.isdigit() else None
+        content_type = response.headers.get('content-type')
+        verdict = content_gate_verdict(content_type, size, max_bytes, allowed_types)
+        if verdict is None and size is None and 200 <= response.status < 300:
+            size = len(await response.body())
+            verdict = content_gate_verdict(content_type, size, max_bytes, allowed_types)
+
+        if verdict:
+            request.meta['content_gate'] = {
+                'reason': verdict,
+                'url': playwright_request.url,
+                'status': response.status,
+                'content_type': content_type,
+                'content_length': size,
+            }
+            await route.abort('blockedbyclient')
+            return
+        await route.fulfill(response=response)
+
+    await page.route('**', handler)
+
+
+class ContentGateMiddleware:
+    """
+    Leitet Nicht-HTML- und übergroße Dokumente am Rendering vorbei.
+
+    - Playwright-Requests auf bekannte Binär-Endungen (.pdf, .jpg, ...)
+      werden ohne Browser als einfacher HTTP-Request gestellt
+    - Einfache HTTP-Requests werden nach den Headern (Content-Type,
+      Content-Length) oder beim Überschreiten der Maximalgröße während
+      des Downloads gestoppt (StopDownload)
+    - Für Playwright-Requests prüft gate_main_document das Hauptdokument,
+      bevor der Browser es lädt
+
+    Umgeleitete Responses gehen an spider.parse_metadata. Spiders ohne
+    diese Methode bleiben unberührt.
+    """
+
+    def __init__(self, max_bytes: int, allowed_types, binary_extensions, stats=None):
+        """
+        Args:
+            max_bytes: Maximale Größe eines gerenderten Dokuments
+            allowed_types: MIME-Typen, die gerendert werden
+            binary_extensions: URL-Endungen, die nie gerendert werden
+            stats: Scrapy-Stats-Collector
+        """
+        self.max_bytes = max_bytes
+        self.allowed_types = tuple(t.lower() for t in allowed_types)
+        self.binary_extensions = tuple(e.lower() for e in binary_extensions)
+        self.stats = stats
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Middleware aus den Settings."""
+        settings = crawler.settings
+        if not settings.getbool('CONTENT_GATE_ENABLED'):
+            raise NotConfigured("CONTENT_GATE_ENABLED is False")
+        middleware = cls(
+            max_bytes=settings.getint('CONTENT_GATE_MAX_BYTES', 5 * 1024 * 1024),
+            allowed_types=settings.getlist('CONTENT_GATE_ALLOWED_TYPES', ['text/html', 'application/xhtml+xml']),
+            binary_extensions=settings.getlist('CONTENT_GATE_BINARY_EXTENSIONS'),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(middleware.headers_received, signal=signals.headers_received)
+        crawler.signals.connect(middleware.bytes_received, signal=signals.bytes_received)
+        return middleware
+
+    @staticmethod
+    def _enabled_for(spider: Spider) -> bool:
+        """Nur Spiders mit Metadaten-Pfad werden gefiltert."""
+        return hasattr(spider, 'parse_metadata')
+
+    def _gate(self, request: Request, reason: str, **details):
+        """Vermerkt die Umleitung im Request und in den Stats."""
+        request.meta['content_gate'] = {'reason': reason, 'url': request.url, **details}
+        if self.stats:
+            self.stats.inc_value(f'content_gate/{reason}')
+
+    def process_request(self, request: Request, spider: Spider):
+        """
+        Stellt Binär-URLs ohne Browser und hängt die Prüfung des Hauptdokuments an.
+
+        Args:
+            request: Der zu verarbeitende Request
+            spider: Der Spider der den Request erstellt hat
+        """
+        if not self._enabled_for(spider) or not request.meta.get('playwright'):
+            return None
+
+        path = urlparse(request.url).path.lower()
+        if path.endswith(self.binary_extensions):
+            self.logger.debug("Binary URL, skipping render: %s", request.url)
+            if self.stats:
+                self.stats.inc_value('content_gate/extension')
+            meta = {k: v for k, v in request.meta.items() if not k.startswith('playwright')}
+            return request.replace(meta=meta, callback=spider.parse_metadata,
+                                   errback=spider.handle_error, dont_filter=True)
+
+        request.meta.setdefault('playwright_page_init_callback', 'crawler.middlewares.gate_main_document')
+        request.meta['content_gate_limits'] = (self.max_bytes, self.allowed_types)
+        return None
+
+    @staticmethod
+    def _exempt(request: Request) -> bool:
+        """JSON-Abrufe gelernter API-Endpunkte und Bild-Downloads werden nicht geprüft."""
+        return 'api_endpoint' in request.meta or 'image_download' in request.meta
+
+    def headers_received(self, headers, body_length, request, spider):
+        """Stoppt einfache HTTP-Downloads nach den Headern bei falschem Typ oder Größe."""
+        if not self._enabled_for(spider) or request.meta.get('playwright') or self._exempt(request):
+            return
+        if body_length == 0:
+            # Redirects und leere Antworten
+            return
+        content_type = headers.get('Content-Type', b'').decode('latin-1')
+        size = body_length if body_length > 0 else None
+        verdict = content_gate_verdict(content_type, size, self.max_bytes, self.allowed_types)
+        if verdict:
+            self._gate(request, verdict, content_type=content_type, content_length=size)
+            raise StopDownload(fail=False)
+
+    def bytes_received(self, data, request, spider):
+        """Stoppt einfache HTTP-Downloads ohne Content-Length beim Überschreiten der Maximalgröße."""
+        if (not self._enabled_for(spider) or request.meta.get('playwright')
+                or self._exempt(request) or not self.max_bytes):
+            return
+        received = request.meta.get('content_gate_received', 0) + len(data)
+        request.meta['content_gate_received'] = received
+        if received > self.max_bytes:
+            self._gate(request, 'size', content_length=received)
+            raise StopDownload(fail=False)
+
+    def _divert(self, request: Request, response, spider: Spider):
+        """Übergibt eine Response an den Metadaten-Pfad des Spiders."""
+        return response.replace(request=request.replace(
+            callback=spider.parse_metadata, errback=spider.handle_error, dont_filter=True,
+        ))
+
+    def process_response(self, request: Request, response, spider: Spider):
+        """Leitet gestoppte oder nicht-HTML-Responses in den Metadaten-Pfad um."""
+        if not self._enabled_for(spider):
+            return response
+        if 'content_gate' in request.meta:
+            return self._divert(request, response, spider)
+
+        # Einfache HTTP-Requests ohne (passenden) Content-Type-Header
+        # (JSON-Abrufe gelernter API-Endpunkte und Bild-Downloads ausgenommen)
+        if (not request.meta.get('playwright') and not self._exempt(request)
+                and not isinstance(response, HtmlResponse) and response.status < 300):
+            content_type = response.headers.get('Content-Type', b'').decode('latin-1')
+            self._gate(request, 'content_type', content_type=content_type)
+            return self._divert(request, response, spider)
+        return response
+
+    def process_exception(self, request: Request, exception: Exception, spider: Spider):
+        """Erzeugt für abgebrochene Playwright-Navigationen eine Metadaten-Response."""
+        gate = request.meta.get('content_gate')
+        if not self._enabled_for(spider) or not gate or not request.meta.get('playwright'):
+            return None
+
+        if self.stats:
+            self.stats.inc_value(f"content_gate/{gate['reason']}")
+        headers = {'Content-Type': gate['content_type']} if gate.get('content_type') else {}
+        response = Response(url=gate['url'], status=gate.get('status') or 200, headers=headers,
+                            request=request, flags=['content_gated'])
+        return self._divert(request, response, spider)
+
+
+class CrawlBudgetMiddleware:
+    """
+    Lässt Requests nur zu, solange sie ins Zeitbudget des Laufs passen.
+
+    Misst die Ladezeit jedes Downloads pro Domain, berechnet periodisch
+    die Mindestpriorität der noch schaffbaren Requests und beendet den
+    Spider eine Sicherheitsmarge vor der Deadline. Beim Beenden wartet
+    Scrapy auf laufende Requests und schließt danach die Pipelines, so
+    dass alle Exporte vollständig geschrieben werden.
+
+    Das Budget wird dem Spider als spider.budget übergeben, damit er
+    neuen Requests eine Priorität zuweisen kann.
+    """
+
+    def __init__(self, crawler, budget: CrawlBudget, check_interval: float = 10):
+        """
+        Args:
+            crawler: Scrapy-Crawler-Objekt
+            budget: Zeitbudget des Laufs
+            check_interval: Intervall der Budget-Prüfung (Sekunden)
+        """
+        self.crawler = crawler
+        self.budget = budget
+        self.check_interval = check_interval
+        self.stats = crawler.stats
+        self.winding_down = False
+        self.task = None
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Middleware aus den Settings."""
+        if not crawler.settings.getbool('CRAWL_BUDGET_ENABLED'):
+            raise NotConfigured("CRAWL_BUDGET_ENABLED is False")
+        budget = CrawlBudget.from_crawler(crawler)
+        if budget is None:
+            raise NotConfigured("Keine Deadline (CRAWL_DEADLINE/CRAWL_BUDGET_MINUTES)")
+
+        middleware = cls(crawler, budget, crawler.settings.getfloat('CRAWL_BUDGET_CHECK_INTERVAL', 10))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(middleware.request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(middleware.request_dropped, signal=signals.request_dropped)
+        crawler.signals.connect(middleware.request_reached_downloader, signal=signals.request_reached_downloader)
+        crawler.signals.connect(middleware.response_received, signal=signals.response_received)
+        return middleware
+
+    def spider_opened(self, spider: Spider):
+        """Übergibt das Budget an den Spider und startet die periodische Prüfung."""
+        spider.budget = self.budget
+        self.budget.concurrency = max(1, self._capacity())
+        self.logger.info(
+            f"Zeitbudget: {self.budget.remaining() / 60:.1f} Minuten "
+            f"(Marge {self.budget.margin:.0f}s vor der Deadline)"
+        )
+        self.task = task.LoopingCall(self._check, spider)
+        self.task.start(self.check_interval, now=False)
+
+    def spider_closed(self, spider: Spider, reason: str):
+        """Stoppt die Prüfung und speichert die gelernten Ladezeiten."""
+        if self.task and self.task.running:
+            self.task.stop()
+        self.budget.save()
+        self.logger.info(f"Zeitbudget am Ende ({reason}): {self.budget.summary()}")
+
+    def request_scheduled(self, request: Request, spider: Spider):
+        """Zählt wartende Requests pro Priorität und markiert sie als gezählt."""
+        request.meta['budget_pending'] = True
+        self.budget.scheduled(request.priority)
+
+    def request_dropped(self, request: Request, spider: Spider):
+        """Vom Scheduler verworfene Requests (z.B. Duplikate) zählen nicht mehr."""
+        self._dequeued(request)
+
+    def _dequeued(self, request: Request):
+        """
+        Nimmt einen Request aus den wartenden Requests.
+
+        Nur Requests aus request_scheduled werden gezählt; an der Warteschlange
+        vorbei gestartete (engine.download, z.B. Bilder und robots.txt) nicht.
+        """
+        if request.meta.pop('budget_pending', False):
+            self.budget.dequeued(request.priority)
+
+    def _capacity(self) -> int:
+        """
+        Gleichzeitig mögliche Downloads: Summe der Download-Lanes (LaneDownloader),
+        begrenzt durch eine vom MemoryPressureController gesenkte Obergrenze.
+        """
+        downloader = self.crawler.engine.downloader
+        lanes = getattr(downloader, 'lanes', None)
+        if not lanes:
+            return self.crawler.settings.getint('CONCURRENT_REQUESTS')
+        capacity = sum(lane.concurrency for lane in lanes.values())
+        return min(capacity, getattr(downloader, 'total_concurrency', capacity))
+
+    def request_reached_downloader(self, request: Request, spider: Spider):
+        """Merkt sich den Start des Downloads."""
+        request.meta['budget_started'] = time.monotonic()
+
+    def response_received(self, response, request: Request, spider: Spider):
+        """Erfasst die Ladezeit pro Domain."""
+        started = request.meta.get('budget_started')
+        if started is not None:
+            domain = urlparse(request.url).netloc
+            self.budget.record(domain, bool(request.meta.get('playwright')), time.monotonic() - started)
+
+    def process_request(self, request: Request, spider: Spider):
+        """
+        Startet einen Request nur, wenn er ins Budget passt.
+
+        Raises:
+            BudgetExhausted: Wenn der Request nicht mehr gestartet wird
+        """
+        self._dequeued(request)
+        domain = urlparse(request.url).netloc
+        reason = self.budget.admit(domain, request.priority, bool(request.meta.get('playwright')))
+        if reason:
+            self.stats.inc_value(f'budget/dropped/{reason}')
+            raise BudgetExhausted(f"Zeitbudget ({reason}): {request.url}")
+        return None
+
+    def _check(self, spider: Spider):
+        """Aktualisiert die Mindestpriorität und beendet den Spider vor der Deadline."""
+        if self.winding_down:
+            return
+
+        if self.budget.remaining() <= 0:
+            self.winding_down = True
+            self.logger.warning(
+                f"Deadline naht: keine neuen Requests mehr, "
+                f"{sum(self.budget.pending.values())} wartende verworfen, laufende werden abgeschlossen"
+            )
+            self.stats.set_value('budget/wind_down', True)
+            self.crawler.engine.close_spider(spider, 'deadline_reached')
+            return
+
+        previous = self.budget.cutoff
+        self.budget.concurrency = max(1, self._capacity())
+        cutoff = self.budget.update_cutoff()
+        if cutoff != previous:
+            self.logger.info(
+                f"Zeitbudget: {self.budget.remaining() / 60:.1f} Minuten übrig, "
+                f"Mindestpriorität {cutoff if cutoff is not None else '-'}"
+            )
+
+
+class CheckpointMiddleware:
+    """
+    Spider-Middleware für periodische Checkpoints und das Fortsetzen eines Laufs.
+
+    Offene Requests werden über das Signal request_scheduled erfasst und
+    gelten als erledigt, sobald die Ausgabe ihres Callbacks vollständig
+    verarbeitet ist. Fehlgeschlagene Downloads bleiben offen und werden
+    beim Fortsetzen erneut versucht.
+
+    Beim Fortsetzen ersetzen die offenen Requests des Checkpoints die
+    Start-Requests; die Fingerprints des Duplikatfilters verhindern, dass
+    bereits erledigte Seiten erneut gerendert werden. Nach einem
+    vollständigen Lauf (reason 'finished') wird der Checkpoint gelöscht,
+    sonst (z.B. Deadline) ein letzter geschrieben.
+    """
+
+    def __init__(self, crawler, store: CheckpointStore, interval: float = 60, resume: Optional[dict] = None):
+        """
+        Args:
+            crawler: Scrapy-Crawler-Objekt
+            store: Speicher des Checkpoints
+            interval: Intervall zwischen zwei Checkpoints (Sekunden)
+            resume: Checkpoint, mit dem der Lauf fortgesetzt wird
+        """
+        self.crawler = crawler
+        self.store = store
+        self.interval = interval
+        self.resume = resume
+        self.stats = crawler.stats
+        self.outstanding: dict = {}
+        self.sequence = 0
+        self.saving = None
+        self.task = None
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Middleware aus den Settings."""
+        settings = crawler.settings
+        if not settings.getbool('CHECKPOINT_ENABLED'):
+            raise NotConfigured("CHECKPOINT_ENABLED is False")
+        middleware = cls(
+            crawler,
+            store=CheckpointStore.from_settings(settings, crawler.spidercls.name),
+            interval=settings.getfloat('CHECKPOINT_INTERVAL', 60),
+            resume=resume_checkpoint(crawler),
+        )
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(middleware.request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(middleware.request_dropped, signal=signals.request_dropped)
+        return middleware
+
+    def _fingerprint(self, request: Request) -> str:
+        """Fingerprint eines Requests (wie der Duplikatfilter)."""
+        return self.crawler.request_fingerprinter.fingerprint(request).hex()
+
+    def spider_opened(self, spider: Spider):
+        """Stellt einen Checkpoint wieder her und startet die periodische Sicherung."""
+        if self.resume:
+            self._restore(spider, self.resume)
+            self.resume = None
+        self.task = task.LoopingCall(self._save, spider)
+        self.task.start(self.interval, now=False)
+
+    def _restore(self, spider: Spider, checkpoint: dict):
+        """
+        Setzt Scheduler und Duplikatfilter auf den Stand des Checkpoints.
+
+        Args:
+            spider: Der Spider
+            checkpoint: Geladener Checkpoint
+        """
+        requests = []
+        for data in checkpoint.get('requests', []):
+            try:
+                requests.append(decode_request(data, spider))
+            except Exception as e:
+                self.logger.warning(f"Request aus Checkpoint nicht wiederherstellbar ({data.get('url')}): {e}")
+
+        # engine.slot.start_requests und scheduler.df sind interne Attribute
+        # (Stand Scrapy 2.11, siehe requirements.txt); fehlen sie, wird neu begonnen
+        slot = getattr(self.crawler.engine, 'slot', None)
+        if slot is None or not hasattr(slot, 'start_requests'):
+            self.logger.warning("Checkpoint nicht anwendbar (Engine ohne slot.start_requests), starte neu")
+            return
+        dupefilter = getattr(getattr(slot, 'scheduler', None), 'df', None)
+        if dupefilter is not None and hasattr(dupefilter, 'fingerprints'):
+            dupefilter.fingerprints.update(checkpoint.get('fingerprints', []))
+        else:
+            self.logger.warning("Duplikatfilter ohne Fingerprints, erledigte Seiten werden erneut gecrawlt")
+
+        # Die offenen Requests ersetzen die Start-Requests des Spiders
+        slot.start_requests = iter(requests)
+        self.stats.set_value('checkpoint/resumed_requests', len(requests))
+        self.logger.info(
+            f"Setze Lauf vom {checkpoint.get('created')} fort: {len(requests)} offene Requests, "
+            f"{len(checkpoint.get('fingerprints', []))} bekannte Seiten"
+        )
+
+    def request_scheduled(self, request: Request, spider: Spider):
+        """Erfasst einen offenen Request (spätere Versionen ersetzen frühere)."""
+        self.sequence += 1
+        request.meta['checkpoint_seq'] = self.sequence
+        self.outstanding[self._fingerprint(request)] = request
+
+    def request_dropped(self, request: Request, spider: Spider):
+        """Vom Scheduler verworfene Requests sind nicht offen."""
+        self._done(request)
+
+    def _done(self, request: Request):
+        """Markiert einen Request als erledigt, sofern kein neuerer für dieselbe Seite offen ist."""
+        fingerprint = self._fingerprint(request)
+        current = self.outstanding.get(fingerprint)
+        if current is not None and current.meta.get('checkpoint_seq') == request.meta.get('checkpoint_seq'):
+            del self.outstanding[fingerprint]
+
+    def process_spider_output(self, response, result, spider: Spider):
+        """Markiert den Request nach vollständig verarbeiteter Callback-Ausgabe als erledigt."""
+        for element in result:
+            yield element
+        self._done(response.request)
+
+    async def process_spider_output_async(self, response, result, spider: Spider):
+        """Wie process_spider_output für asynchrone Callbacks."""
+        async for element in result:
+            yield element
+        self._done(response.request)
+
+    def process_spider_exception(self, response, exception: Exception, spider: Spider):
+        """Auch bei Fehlern im Callback gilt der Request als erledigt."""
+        self._done(response.request)
+        return None
+
+    def _snapshot(self, spider: Spider) -> defer.Deferred:
+        """
+        Erstellt einen konsistenten Checkpoint.
+
+        Offene Requests und Fingerprints werden sofort erfasst, die
+        Pipelines liefern ihren Zustand zum selben Zeitpunkt (Deferred).
+
+        Returns:
+            Deferred: Feuert mit dem Checkpoint-Dictionary
+        """
+        requests = []
+        for request in list(self.outstanding.values()):
+            try:
+                requests.append(encode_request(request, spider))
+            except (ValueError, TypeError) as e:
+                self.logger.debug("Request nicht serialisierbar (%s): %s", request.url, e)
+
+        # Interne Attribute wie in _restore (Scrapy 2.11)
+        slot = getattr(self.crawler.engine, 'slot', None)
+        dupefilter = getattr(getattr(slot, 'scheduler', None), 'df', None)
+        outstanding = set(self.outstanding)
+        fingerprints = [fp for fp in getattr(dupefilter, 'fingerprints', ()) if fp not in outstanding]
+
+        checkpoint = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'spider': spider.name,
+            'requests': requests,
+            'fingerprints': fingerprints,
+            'pipelines': {},
+        }
+
+        pending = []
+        for pipeline in self.crawler.engine.scraper.itemproc.middlewares:
+            if hasattr(pipeline, 'checkpoint_state'):
+                d = defer.maybeDeferred(pipeline.checkpoint_state)
+                d.addCallback(lambda state, name=type(pipeline).__name__: checkpoint['pipelines'].__setitem__(name, state))
+                pending.append(d)
+        return defer.DeferredList(pending).addCallback(lambda _: checkpoint)
+
+    def _save(self, spider: Spider):
+        """Schreibt einen Checkpoint außerhalb des Reactor-Threads."""
+        if self.saving is not None:
+            return self.saving
+
+        d = self._snapshot(spider)
+        d.addCallback(lambda checkpoint: threads.deferToThread(self.store.save, checkpoint))
+        d.addCallback(lambda _: self.stats.inc_value('checkpoint/saved'))
+        d.addErrback(lambda failure: self.logger.error(f"Checkpoint fehlgeschlagen: {failure.value}"))
+        d.addBoth(lambda _: setattr(self, 'saving', None))
+        self.saving = d
+        return d
+
+    def spider_closed(self, spider: Spider, reason: str):
+        """Löscht den Checkpoint nach vollständigem Lauf, sonst wird ein letzter geschrieben."""
+        if self.task and self.task.running:
+            self.task.stop()
+        return self._finish(spider, reason)
+
+    @defer.inlineCallbacks
+    def _finish(self, spider: Spider, reason: str):
+        """Wartet auf eine laufende Sicherung und schreibt bzw. löscht den Checkpoint."""
+        if self.saving is not None:
+            yield self.saving
+
+        if reason == 'finished':
+            self.store.clear()
+            return
+        yield self._save(spider)
+        self.logger.info(f"Checkpoint für Fortsetzung gespeichert ({reason}): {len(self.outstanding)} offene Requests")
+
+
+class CircuitBreakerMiddleware:
+    """
+    Circuit Breaker pro Domain für nicht erreichbare oder blockierende Sites.
+
+    Fehler (403/429, Serverfehler, Timeouts, TLS-, DNS- und
+    Verbindungsfehler) werden pro Domain gezählt. Ist der Breaker einer
+    Domain offen, werden ihre Requests sofort mit DomainUnavailable
+    abgewiesen und belegen keinen Browser-Slot. Abgewiesene Requests
+    bleiben nur bei einem abgebrochenen Lauf im Checkpoint offen; nach
+    einem vollständigen Lauf (reason 'finished') wird der Checkpoint
+    gelöscht und sie sind verloren, bis die Seite erneut eingeplant wird.
+
+    Am Ende des Laufs wird ein Fehlerbericht für das Dashboard
+    geschrieben (CIRCUIT_BREAKER_REPORT_FILE).
+    """
+
+    def __init__(self, registry: CircuitBreakerRegistry, report_file: Optional[str] = None):
+        """
+        Args:
+            registry: Zustand der Circuit Breaker
+            report_file: JSON-Datei für den Fehlerbericht (None = kein Bericht)
+        """
+        self.registry = registry
+        self.report_file = report_file
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Middleware aus den Settings."""
+        settings = crawler.settings
+        if not settings.getbool('CIRCUIT_BREAKER_ENABLED'):
+            raise NotConfigured("CIRCUIT_BREAKER_ENABLED is False")
+        middleware = cls(
+            CircuitBreakerRegistry.from_crawler(crawler),
+            report_file=settings.get('CIRCUIT_BREAKER_REPORT_FILE'),
+        )
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_request(self, request: Request, spider: Spider):
+        """Weist Requests für Domains mit offenem Breaker ab und markiert Proben."""
+        domain = urlparse(request.url).netloc
+        # Markierung eines früheren Versuchs (Retry kopiert meta) verwerfen
+        request.meta.pop('breaker_probe', None)
+        if not self.registry.allow(domain):
+            raise DomainUnavailable(f"Circuit Breaker offen für {domain}: {request.url}")
+        if self.registry.is_probing(domain):
+            request.meta['breaker_probe'] = True
+        return None
+
+    def process_response(self, request: Request, response, spider: Spider):
+        """Wertet den HTTP-Status als Erfolg oder Domain-Fehler."""
+        domain = urlparse(request.url).netloc
+        request.meta.pop('breaker_probe', None)
+        category = classify_status(response.status)
+        if category:
+            self.registry.record_failure(domain, category, f"HTTP {response.status}")
+        else:
+            self.registry.record_success(domain)
+        return response
+
+    def process_exception(self, request: Request, exception: Exception, spider: Spider):
+        """
+        Klassifiziert Download-Fehler.
+
+        Eigene Abweisungen, verworfene Requests (IgnoreRequest, Inhalts-Prüfung)
+        und Browser-Fehler zählen nicht; eine Probe gibt dann nur ihren Platz frei.
+        """
+        domain = urlparse(request.url).netloc
+        probe = request.meta.pop('breaker_probe', False)
+        category = None
+        if not isinstance(exception, IgnoreRequest) and 'content_gate' not in request.meta:
+            category = classify_exception(exception)
+        if category is None or category in NEUTRAL_CATEGORIES:
+            if probe:
+                self.registry.release_probe(domain)
+            if category and self.registry.stats is not None:
+                self.registry.stats.inc_value(f'breaker/ignored/{category}')
+            return None
+        self.registry.record_failure(domain, category, f"{type(exception).__name__}: {exception}"[:300])
+        return None
+
+    def spider_closed(self, spider: Spider):
+        """Schreibt den Fehlerbericht und speichert offene Breaker."""
+        self.registry.save()
+        if not self.report_file:
+            return
+
+        report = self.registry.report()
+        report['spider'] = spider.name
+        directory = os.path.dirname(self.report_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.report_file}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.report_file)
+        self.logger.info(
+            f"Fehlerbericht: {sum(report['failures'].values())} Fehler, "
+            f"{report['open_domains']} Domains gesperrt ({self.report_file})"
+        )
+
+
+async def replay_page_from_har(page, request: Request):
+    """
+    Page-Init-Callback der HAR-Wiedergabe: alle Browser-Requests aus dem Archiv.
+
+    Führt zuerst den ursprünglichen Init-Callback aus (z.B. die Prüfung
+    des Hauptdokuments) und registriert danach den Route-Handler des
+    Archivs. Als zuletzt registrierte Route hat er Vorrang, sodass kein
+    Request der Seite das Netzwerk erreicht.
+
+    Args:
+        page: Playwright-Page
+        request: Scrapy-Request
+    """
+    directory, previous = request.meta['har_replay']
+    if previous:
+        callback = load_object(previous) if isinstance(previous, str) else previous
+        await callback(page, request)
+    await page.route('**', open_archive(directory).route)
+
+
+class HarReplayMiddleware:
+    """
+    Beantwortet alle Requests aus aufgezeichneten HAR-Dateien (siehe crawler.har).
+
+    Playwright-Requests bekommen den Route-Handler des Archivs über den
+    Page-Init-Callback, einfache HTTP-Requests direkt eine Response mit
+    der aufgezeichneten Latenz. Nicht aufgezeichnete URLs werden
+    abgewiesen; es gibt keinen Netzwerkzugriff.
+    """
+
+    def __init__(self, directory: str, latency_scale: float = 1.0, ignore_query: bool = True, stats=None):
+        """
+        Args:
+            directory: Verzeichnis der HAR-Dateien
+            latency_scale: Faktor für die aufgezeichneten Latenzen
+            ignore_query: Unbekannte URLs über die URL ohne Query zuordnen
+            stats: Scrapy-Stats-Collector (optional)
+        """
+        self.directory = directory
+        self.archive = open_archive(directory, latency_scale=latency_scale, ignore_query=ignore_query)
+        self.stats = stats
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Middleware aus den Settings."""
+        settings = crawler.settings
+        if not settings.getbool('HAR_REPLAY'):
+            raise NotConfigured("HAR_REPLAY is False")
+        middleware = cls(
+            settings.get('HAR_DIR', 'data/har'),
+            latency_scale=settings.getfloat('HAR_REPLAY_LATENCY_SCALE', 1.0),
+            ignore_query=settings.getbool('HAR_REPLAY_IGNORE_QUERY', True),
+            stats=crawler.stats,
+        )
+        if not middleware.archive.files:
+            raise NotConfigured(f"Keine HAR-Dateien in {middleware.directory}")
+        middleware.logger.info(
+            f"HAR-Wiedergabe: {len(middleware.archive)} Einträge aus {middleware.archive.files} Dateien"
+        )
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_request(self, request: Request, spider: Spider):
+        """Hängt die Wiedergabe an Playwright-Requests bzw. liefert die Response aus dem Archiv."""
+        if request.meta.get('playwright'):
+            if 'har_replay' not in request.meta:
+                request.meta['har_replay'] = (self.directory, request.meta.get('playwright_page_init_callback'))
+                request.meta['playwright_page_init_callback'] = 'crawler.middlewares.replay_page_from_har'
+            return None
+
+        entry = self.archive.lookup(request.method, request.url)
+        if entry is None:
+            raise IgnoreRequest(f"Nicht in der HAR-Aufzeichnung: {request.url}")
+        status, headers, body = self.archive.response_parts(entry)
+        headers = Headers(headers)
+        respcls = responsetypes.from_args(headers=headers, url=request.url, body=body)
+        response = respcls(url=request.url, status=status, headers=headers, body=body,
+                           request=request, flags=['har_replay'])
+        return task.deferLater(reactor, self.archive.delay(entry), lambda: response)
+
+    def spider_closed(self, spider: Spider):
+        """Überträgt Treffer und Fehlstellen des Archivs in die Stats."""
+        if self.stats is not None:
+            self.stats.set_value('har/served', self.archive.hits)
+            self.stats.set_value('har/missing', self.archive.misses)
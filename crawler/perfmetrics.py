@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Browser-Performance-Kennzahlen gerenderter Seiten.
+
+Bevor die Playwright-Page geschlossen wird, liest ein Skript die
+Navigation- und Resource-Timing-Einträge des Browsers aus: TTFB,
+DOMContentLoaded, Load, Anzahl Requests, übertragene Bytes und die
+größten Drittanbieter-Hosts. Die Kennzahlen jeder Seite werden als
+JSON-Zeile in eine eigene Datei geschrieben (das Item-Schema bleibt
+unverändert) und pro Domain in den Scrapy-Stats zusammengefasst.
+"""
+
+import os
+import json
+import logging
+from collections import Counter
+from datetime import datetime
+from statistics import median
+from typing import Dict, Any, List, Optional
+
+
+# Liest Navigation- und Resource-Timing aus. Ressourcen werden im Browser
+# pro Host zusammengefasst, damit nur eine kleine Antwort übertragen wird.
+# transferSize ist bei Cross-Origin-Ressourcen ohne Timing-Allow-Origin 0,
+# dann wird encodedBodySize verwendet (ebenfalls 0 wenn nicht freigegeben).
+PERF_METRICS_SCRIPT = """
+() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const resources = performance.getEntriesByType('resource');
+    const hosts = {};
+    let transferred = nav ? (nav.transferSize || nav.encodedBodySize || 0) : 0;
+    for (const entry of resources) {
+        let host;
+        try { host = new URL(entry.name).hostname; } catch (e) { continue; }
+        const bytes = entry.transferSize || entry.encodedBodySize || 0;
+        const stats = hosts[host] || (hosts[host] = [0, 0]);
+        stats[0] += 1;
+        stats[1] += bytes;
+        transferred += bytes;
+    }
+    return {
+        host: location.hostname,
+        ttfb_ms: nav ? Math.round(nav.responseStart) : null,
+        dom_content_loaded_ms: nav && nav.domContentLoadedEventEnd ? Math.round(nav.domContentLoadedEventEnd) : null,
+        load_ms: nav && nav.loadEventEnd ? Math.round(nav.loadEventEnd) : null,
+        requests: resources.length + (nav ? 1 : 0),
+        transfer_bytes: transferred,
+        hosts: hosts,
+    };
+}
+"""
+
+# Kennzahlen, die pro Domain zusammengefasst werden
+AGGREGATED_METRICS = ('ttfb_ms', 'dom_content_loaded_ms', 'load_ms', 'requests', 'transfer_bytes')
+
+
+def is_first_party(host: str, page_host: str) -> bool:
+    """
+    Prüft ob ein Host zur Seite selbst gehört (gleiche Domain oder Subdomain).
+
+    Args:
+        host: Host einer Ressource
+        page_host: Host der Seite
+
+    Returns:
+        bool: True für eigene Hosts, False für Drittanbieter
+    """
+    site = page_host[4:] if page_host.startswith('www.') else page_host
+    return host == site or host.endswith('.' + site)
+
+
+class PerfMetricsRecorder:
+    """
+    Sammelt die Kennzahlen pro Seite und fasst sie pro Domain zusammen.
+    """
+
+    def __init__(self, sink_file: Optional[str] = None, top_hosts: int = 5, stats=None):
+        """
+        Args:
+            sink_file: JSON-Lines-Datei für die Kennzahlen jeder Seite (None = nicht schreiben)
+            top_hosts: Anzahl der größten Drittanbieter-Hosts pro Seite und Domain
+            stats: Scrapy-Stats-Collector (optional)
+        """
+        self.sink_file = sink_file
+        self.top_hosts = top_hosts
+        self.stats = stats
+        self.sink = None
+        self.domains: Dict[str, Dict[str, Any]] = {}
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Erstellt den Recorder aus den Crawler-Settings."""
+        settings = crawler.settings
+        return cls(
+            sink_file=settings.get('PERF_METRICS_FILE'),
+            top_hosts=settings.getint('PERF_METRICS_TOP_HOSTS', 5),
+            stats=crawler.stats,
+        )
+
+    async def collect(self, page, url: str, domain: str) -> Optional[Dict[str, Any]]:
+        """
+        Liest die Kennzahlen einer noch offenen Page aus und erfasst sie.
+
+        Args:
+            page: Playwright-Page (vor page.close())
+            url: URL der Seite
+            domain: Domain der Seite
+
+        Returns:
+            Dict: Kennzahlen der Seite oder None, wenn nicht lesbar
+        """
+        try:
+            timing = await page.evaluate(PERF_METRICS_SCRIPT)
+        except Exception as e:
+            self.logger.debug("Performance metrics unavailable for %s: %s", url, e)
+            return None
+        if not isinstance(timing, dict):
+            return None
+
+        metrics = self.page_metrics(timing)
+        self.record(domain, metrics)
+        self._write({'url': url, 'domain': domain, 'timestamp': datetime.now().isoformat(), **metrics})
+        return metrics
+
+    def page_metrics(self, timing: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Bereitet das Ergebnis von PERF_METRICS_SCRIPT auf.
+
+        Args:
+            timing: Rohdaten aus dem Browser
+
+        Returns:
+            Dict: Kennzahlen der Seite inklusive der größten Drittanbieter-Hosts
+        """
+        page_host = timing.get('host') or ''
+        third_party = {
+            host: {'requests': count, 'bytes': size}
+            for host, (count, size) in (timing.get('hosts') or {}).items()
+            if not is_first_party(host, page_host)
+        }
+        top = sorted(third_party.items(), key=lambda entry: (entry[1]['bytes'], entry[1]['requests']), reverse=True)
+        metrics = {name: timing.get(name) for name in AGGREGATED_METRICS}
+        metrics['third_party_requests'] = sum(entry['requests'] for entry in third_party.values())
+        metrics['third_party_bytes'] = sum(entry['bytes'] for entry in third_party.values())
+        metrics['top_third_party'] = [{'host': host, **entry} for host, entry in top[:self.top_hosts]]
+        return metrics
+
+    def record(self, domain: str, metrics: Dict[str, Any]):
+        """
+        Erfasst die Kennzahlen einer Seite für die Zusammenfassung der Domain.
+
+        Args:
+            domain: Domain der Seite
+            metrics: Ergebnis von page_metrics()
+        """
+        aggregate = self.domains.setdefault(domain, {
+            'pages': 0,
+            'values': {name: [] for name in AGGREGATED_METRICS},
+            'third_party': Counter(),
+        })
+        aggregate['pages'] += 1
+        for name in AGGREGATED_METRICS:
+            if metrics.get(name) is not None:
+                aggregate['values'][name].append(metrics[name])
+        for entry in metrics['top_third_party']:
+            aggregate['third_party'][entry['host']] += entry['bytes']
+
+        if self.stats is not None:
+            self.stats.inc_value('perf/pages')
+            self.stats.inc_value(f'perf/{domain}/pages')
+            if metrics.get('transfer_bytes'):
+                self.stats.inc_value(f'perf/{domain}/transfer_bytes', metrics['transfer_bytes'])
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Zusammenfassung pro Domain (Median und 90. Perzentil).
+
+        Returns:
+            Dict: Kennzahlen pro Domain
+        """
+        result = {}
+        for domain, aggregate in sorted(self.domains.items()):
+            summary = {'pages': aggregate['pages']}
+            for name, values in aggregate['values'].items():
+                if values:
+                    ordered = sorted(values)
+                    summary[f'{name}_median'] = int(median(ordered))
+                    summary[f'{name}_p90'] = int(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))])
+            summary['top_third_party'] = [host for host, _ in aggregate['third_party'].most_common(self.top_hosts)]
+            result[domain] = summary
+        return result
+
+    def _write(self, entry: Dict[str, Any]):
+        """Hängt die Kennzahlen einer Seite an die JSON-Lines-Datei an."""
+        if not self.sink_file:
+            return
+        if self.sink is None:
+            directory = os.path.dirname(self.sink_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.sink = open(self.sink_file, 'a', encoding='utf-8')
+        self.sink.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def close(self) -> List[str]:
+        """
+        Schreibt die Zusammenfassung in die Stats und schließt die Datei.
+
+        Returns:
+            List[str]: Log-Zeilen der Zusammenfassung pro Domain
+        """
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+        lines = []
+        for domain, summary in self.summary().items():
+            if self.stats is not None:
+                for name, value in summary.items():
+                    if name not in ('pages', 'top_third_party'):
+                        self.stats.set_value(f'perf/{domain}/{name}', value)
+                self.stats.set_value(f'perf/{domain}/top_third_party', summary['top_third_party'])
+            lines.append(
+                f"{domain}: {summary['pages']} pages, "
+                f"TTFB {summary.get('ttfb_ms_median', '-')} ms, "
+                f"load {summary.get('load_ms_median', '-')} ms, "
+                f"{summary.get('requests_median', '-')} requests, "
+                f"{summary.get('transfer_bytes_median', 0) // 1024} KiB"
+            )
+        return lines
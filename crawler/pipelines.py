@@ -9,15 +9,25 @@ zu verarbeiten, zu validieren, zu transformieren und zu speichern.
 import csv
 import os
 import json
+import shutil
 import logging
 from datetime import datetime
 from typing import Dict, Any
 from urllib.parse import urlparse
 
-from itemadapter import ItemAdapter, is_item
-from scrapy import Spider
-from scrapy.exceptions import DropItem
-from crawler.items import WebPageItem, NewsArticleItem, TenderItem
+from itemadapter import ItemAdapter
+from twisted.internet import defer, reactor, task, threads
+from twisted.python.threadpool import ThreadPool
+from scrapy import Request, Spider
+from scrapy.exceptions import DropItem, NotConfigured
+from crawler.items import item_kind
+from crawler.serialization import get_serializer, all_fieldnames
+from crawler.search import SearchIndex
+from crawler.linkgraph import LinkGraph
+from crawler.images import IMAGE_TYPES, ImageStore
+from crawler.extensions import memory_pressure
+from crawler.daemon import batch_url_released
+from crawler.checkpoint import CheckpointStore, resume_checkpoint
 
 
 class CrawlerPipeline:
@@ -47,16 +57,30 @@ class CrawlerPipeline:
         Raises:
             DropItem: Wenn das Item ungültig ist
         """
-        adapter = ItemAdapter(item)
+        self.normalize(ItemAdapter(item))
+        return item
+    
+    def normalize(self, adapter: ItemAdapter):
+        """
+        Validiert und bereinigt ein Item über einen bestehenden Adapter.
         
+        Args:
+            adapter: ItemAdapter des zu verarbeitenden Items
+            
+        Raises:
+            DropItem: Wenn das Item ungültig ist
+        """
+        fields = adapter.field_names()
+
         # Grundlegende Validierung
         if not adapter.get('url'):
             self.logger.warning("Item ohne URL gefunden, wird verworfen")
             self.items_dropped += 1
             raise DropItem("Missing URL")
-        
-        if not adapter.get('title'):
-            self.logger.warning(f"Item ohne Titel: {adapter.get('url')}")
+
+        # Items ohne title/domain-Feld (z.B. TenderItem) nicht erweitern
+        if 'title' in fields and not adapter.get('title'):
+            self.logger.warning("Item ohne Titel: %s", adapter.get('url'))
             adapter['title'] = "Ohne Titel"
         
         # Zeitstempel hinzufügen falls nicht vorhanden
@@ -69,7 +93,7 @@ class CrawlerPipeline:
             adapter['url'] = url
             
             # Domain extrahieren falls nicht vorhanden
-            if not adapter.get('domain'):
+            if 'domain' in fields and not adapter.get('domain'):
                 try:
                     domain = urlparse(url).netloc
                     adapter['domain'] = domain
@@ -77,7 +101,7 @@ class CrawlerPipeline:
                     adapter['domain'] = 'unknown'
         
         # Titel bereinigen
-        title = adapter.get('title', '').strip()
+        title = (adapter.get('title') or '').strip()
         if title:
             # Übermäßige Whitespaces entfernen
             title = ' '.join(title.split())
@@ -95,9 +119,7 @@ class CrawlerPipeline:
             adapter['description'] = description
         
         self.items_processed += 1
-        self.logger.debug(f"Item verarbeitet: {adapter.get('title', 'Unknown')}")
-        
-        return item
+        self.logger.debug("Item verarbeitet: %s", adapter.get('title', 'Unknown'))
     
     def close_spider(self, spider: Spider):
         """
@@ -138,7 +160,7 @@ class DuplicateFilterPipeline:
         
         if url in self.seen_urls:
             self.duplicates_dropped += 1
-            self.logger.debug(f"Duplikat gefunden: {url}")
+            self.logger.debug("Duplikat gefunden: %s", url)
             raise DropItem(f"Duplicate item found: {url}")
         else:
             self.seen_urls.add(url)
@@ -160,7 +182,10 @@ class CSVExportPipeline:
     def __init__(self):
         self.files = {}
         self.writers = {}
+        self.fieldnames = {}
         self.items_exported = 0
+        # Byte-Offsets pro Datei, ab denen beim Fortsetzen weitergeschrieben wird
+        self.resume_offsets = {}
         self.logger = logging.getLogger(__name__)
     
     def open_spider(self, spider: Spider):
@@ -179,7 +204,7 @@ class CSVExportPipeline:
         # Spezielle CSV für NewsArticleItems
         self._setup_csv_writer('news', [
             'title', 'url', 'domain', 'author', 'publish_date', 
-            'category', 'word_count', 'timestamp'
+            'category', 'word_count', 'timestamp', 'image_paths', 'images'
         ])
         
         # Spezielle CSV für TenderItems
@@ -190,6 +215,11 @@ class CSVExportPipeline:
         
         self.logger.info("CSV-Export-Pipeline initialisiert")
     
+    @staticmethod
+    def csv_path(name: str) -> str:
+        """Pfad der CSV-Datei eines Item-Typs."""
+        return f'data/{name}.csv'
+    
     def _setup_csv_writer(self, name: str, fieldnames: list):
         """
         Richtet einen CSV-Writer für einen bestimmten Item-Typ ein.
@@ -201,13 +231,22 @@ class CSVExportPipeline:
         # Datenverzeichnis erstellen
         os.makedirs('data', exist_ok=True)
         
-        filename = f'data/{name}.csv'
-        file = open(filename, 'w', newline='', encoding='utf-8')
-        writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore')
-        writer.writeheader()
+        filename = self.csv_path(name)
+        offset = self.resume_offsets.get(name)
+        if offset and os.path.exists(filename) and os.path.getsize(filename) >= offset:
+            # Fortsetzen: Zeilen nach dem Checkpoint verwerfen, Kopfzeile existiert bereits
+            with open(filename, 'r+b') as existing:
+                existing.truncate(offset)
+            file = open(filename, 'a', newline='', encoding='utf-8')
+            writer = csv.writer(file)
+        else:
+            file = open(filename, 'w', newline='', encoding='utf-8')
+            writer = csv.writer(file)
+            writer.writerow(fieldnames)
         
         self.files[name] = file
         self.writers[name] = writer
+        self.fieldnames[name] = tuple(fieldnames)
         
         self.logger.info(f"CSV-Writer für {name} erstellt: {filename}")
     
@@ -222,41 +261,30 @@ class CSVExportPipeline:
         Returns:
             Item: Das unveränderte Item
         """
-        adapter = ItemAdapter(item)
-        
         # Item-Typ bestimmen und entsprechend exportieren
-        if isinstance(item, NewsArticleItem):
-            self._write_to_csv('news', adapter.asdict())
-        elif isinstance(item, TenderItem):
-            self._write_to_csv('tenders', adapter.asdict())
-        elif isinstance(item, WebPageItem):
-            self._write_to_csv('webpages', adapter.asdict())
-        else:
-            # Fallback für unbekannte Item-Typen
-            self._write_to_csv('webpages', adapter.asdict())
+        # (unbekannte Item-Typen landen in webpages.csv)
+        self._write_to_csv(item_kind(item), item)
         
         self.items_exported += 1
         return item
     
-    def _write_to_csv(self, writer_name: str, item_dict: Dict[str, Any]):
+    def _write_to_csv(self, writer_name: str, item):
         """
-        Schreibt ein Item-Dictionary in die entsprechende CSV-Datei.
+        Schreibt ein Item in die entsprechende CSV-Datei.
+        
+        Die Zeile wird über einen vorkompilierten Serializer direkt aus dem
+        Item erzeugt, ohne Zwischenkopie als Dictionary.
         
         Args:
             writer_name: Name des CSV-Writers
-            item_dict: Dictionary mit Item-Daten
+            item: Zu exportierendes Item
         """
         try:
             writer = self.writers.get(writer_name)
             if writer:
-                # Listen und komplexe Objekte zu Strings konvertieren
-                for key, value in item_dict.items():
-                    if isinstance(value, (list, dict)):
-                        item_dict[key] = json.dumps(value, ensure_ascii=False)
-                    elif value is None:
-                        item_dict[key] = ''
-                
-                writer.writerow(item_dict)
+                # Listen und komplexe Objekte werden zu JSON-Strings
+                serializer = get_serializer(type(item), self.fieldnames[writer_name])
+                writer.writerow(serializer.csv_row(item))
                 self.files[writer_name].flush()  # Sofort schreiben
         except Exception as e:
             self.logger.error(f"Fehler beim CSV-Export: {e}")
@@ -274,6 +302,733 @@ class CSVExportPipeline:
         self.logger.info(f"CSV-Export abgeschlossen: {self.items_exported} Items exportiert")
 
 
+class FusedExportPipeline(CSVExportPipeline):
+    """
+    Fusionierte Pipeline: Normalisierung, Duplikatfilter und CSV-Export in einem Durchlauf.
+    
+    Pro Item wird genau ein ItemAdapter erzeugt. Die CSV-Zeilen werden in
+    Micro-Batches gesammelt und in einem eigenen Writer-Thread pro Datei
+    geschrieben, sodass Datei-I/O den Reactor nicht blockiert. Stauen sich
+    mehr als PIPELINE_MAX_PENDING_BATCHES Batches, liefert process_item ein
+    Deferred, das erst nach dem Abarbeiten feuert. Scrapy drosselt dann
+    über den Scraper-Slot das Scheduling neuer Requests (Backpressure).
+    
+    Mit Checkpoints kopiert der Writer-Thread bei jedem Checkpoint die seit
+    dem letzten geschriebenen Bytes in CHECKPOINT_DIR/<spider>.exports/;
+    beim Fortsetzen werden die CSV-Dateien daraus wiederhergestellt.
+    """
+    
+    def __init__(self, batch_size: int = 50, max_pending_batches: int = 4, flush_interval: float = 5.0, stats=None):
+        """
+        Args:
+            batch_size: Anzahl Zeilen pro Schreibvorgang
+            max_pending_batches: Ab so vielen offenen Batches greift Backpressure
+            flush_interval: Intervall für das Schreiben unvollständiger Batches (Sekunden)
+            stats: Scrapy-Stats-Collector
+        """
+        super(FusedExportPipeline, self).__init__()
+        self.batch_size = batch_size
+        self.max_pending_batches = max_pending_batches
+        self.flush_interval = flush_interval
+        self.stats = stats
+        
+        self.normalizer = CrawlerPipeline()
+        self.seen_urls = set()
+        self.duplicates_dropped = 0
+        
+        self.buffers: Dict[str, list] = {}
+        self.pools: Dict[str, ThreadPool] = {}
+        # Kopie der Exporte im Checkpoint-Verzeichnis (None = ohne Checkpoints)
+        self.export_dir = None
+        self.mirrored: Dict[str, int] = {}
+        self.pending_batches = 0
+        self.inflight = set()
+        self.waiters = []
+        self.flush_task = None
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Pipeline aus den Settings."""
+        settings = crawler.settings
+        pipeline = cls(
+            batch_size=settings.getint('PIPELINE_BATCH_SIZE', 50),
+            max_pending_batches=settings.getint('PIPELINE_MAX_PENDING_BATCHES', 4),
+            flush_interval=settings.getfloat('PIPELINE_FLUSH_INTERVAL', 5.0),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(pipeline._flush_all, signal=memory_pressure)
+        crawler.signals.connect(pipeline.release_url, signal=batch_url_released)
+        
+        if settings.getbool('CHECKPOINT_ENABLED'):
+            pipeline.export_dir = CheckpointStore.from_settings(settings, crawler.spidercls.name).export_dir
+        checkpoint = resume_checkpoint(crawler)
+        if checkpoint:
+            pipeline.restore_checkpoint(checkpoint.get('pipelines', {}).get(cls.__name__, {}))
+        return pipeline
+    
+    def restore_checkpoint(self, state: Dict[str, Any]):
+        """
+        Übernimmt Duplikatfilter, Zähler und Datei-Offsets aus einem Checkpoint.
+        
+        Args:
+            state: Zustand aus checkpoint_state() des abgebrochenen Laufs
+        """
+        self.seen_urls.update(state.get('seen_urls', []))
+        self.items_exported = state.get('items_exported', 0)
+        self.duplicates_dropped = state.get('duplicates_dropped', 0)
+        self.resume_offsets = {
+            kind: offset for kind, offset in state.get('offsets', {}).items()
+            if self._restore_file(kind, offset)
+        }
+    
+    def _mirror_path(self, kind: str) -> str:
+        """Pfad der Kopie einer CSV-Datei im Checkpoint-Verzeichnis."""
+        return os.path.join(self.export_dir, f'{kind}.csv')
+    
+    def _restore_file(self, kind: str, offset: int) -> bool:
+        """
+        Stellt eine CSV-Datei bis zum Offset des Checkpoints wieder her.
+        
+        Die Kopie im Checkpoint-Verzeichnis hat Vorrang; ohne sie wird die
+        vorhandene Datei weiterverwendet, sofern sie lang genug ist.
+        
+        Args:
+            kind: Item-Typ der Datei
+            offset: Byte-Offset aus dem Checkpoint
+        
+        Returns:
+            bool: True wenn ab dem Offset weitergeschrieben werden kann
+        """
+        filename = self.csv_path(kind)
+        mirror = self._mirror_path(kind) if self.export_dir else None
+        if mirror and os.path.exists(mirror) and os.path.getsize(mirror) >= offset:
+            with open(mirror, 'r+b') as file:
+                file.truncate(offset)
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            shutil.copyfile(mirror, filename)
+            self.mirrored[kind] = offset
+            return True
+        if os.path.exists(filename) and os.path.getsize(filename) >= offset:
+            return True
+        self.logger.warning(
+            f"Export {filename} fehlt oder ist kürzer als im Checkpoint, "
+            f"Zeilen vor dem Checkpoint fehlen in der neuen Datei"
+        )
+        return False
+    
+    def check_duplicate(self, url: str):
+        """
+        Verwirft ein Item, dessen URL bereits exportiert wurde.
+        
+        Wird auch von der ImagePipeline vor dem Laden der Bilder aufgerufen,
+        damit Duplikate keine Downloads kosten.
+        
+        Raises:
+            DropItem: Bei einem Duplikat
+        """
+        if url in self.seen_urls:
+            self.duplicates_dropped += 1
+            raise DropItem(f"Duplicate item found: {url}")
+    
+    def release_url(self, url: str):
+        """
+        Nimmt eine URL aus dem Duplikatfilter (neuer Daemon-Batch).
+        
+        Args:
+            url: URL, die ein weiterer Batch erneut exportieren soll
+        """
+        self.seen_urls.discard(url)
+    
+    def checkpoint_state(self) -> defer.Deferred:
+        """
+        Liefert den Zustand für einen Checkpoint.
+        
+        Die Offsets werden im Writer-Thread jeder Datei nach allen bis jetzt
+        gepufferten Zeilen ermittelt und passen damit zu den gesehenen URLs.
+        
+        Returns:
+            Deferred: Feuert mit seen_urls, Zählern und Byte-Offsets pro Datei
+        """
+        state = {
+            'seen_urls': list(self.seen_urls),
+            'items_exported': self.items_exported,
+            'duplicates_dropped': self.duplicates_dropped,
+            'offsets': {},
+        }
+        self._flush_all()
+        
+        pending = []
+        for kind, file in self.files.items():
+            if file.closed:
+                state['offsets'][kind] = os.path.getsize(file.name)
+                self._mirror(kind, state['offsets'][kind])
+                continue
+            d = threads.deferToThreadPool(reactor, self.pools[kind], self._file_offset, kind)
+            d.addCallback(lambda offset, kind=kind: state['offsets'].__setitem__(kind, offset))
+            pending.append(d)
+        return defer.DeferredList(pending).addCallback(lambda _: state)
+    
+    def _file_offset(self, kind: str) -> int:
+        """Byte-Offset des Dateiendes, Kopie für den Checkpoint nachziehen (läuft im Writer-Thread)."""
+        file = self.files[kind]
+        file.flush()
+        offset = file.buffer.tell()
+        self._mirror(kind, offset)
+        return offset
+    
+    def _mirror(self, kind: str, offset: int):
+        """
+        Hängt die seit dem letzten Checkpoint geschriebenen Bytes an die Kopie an.
+        
+        Args:
+            kind: Item-Typ der Datei
+            offset: Byte-Offset des Checkpoints
+        """
+        start = self.mirrored.get(kind, 0)
+        if self.export_dir is None or offset <= start:
+            return
+        os.makedirs(self.export_dir, exist_ok=True)
+        with open(self.files[kind].name, 'rb') as source, open(self._mirror_path(kind), 'ab') as target:
+            target.truncate(start)
+            source.seek(start)
+            remaining = offset - start
+            while remaining > 0:
+                chunk = source.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    break
+                target.write(chunk)
+                remaining -= len(chunk)
+        self.mirrored[kind] = offset
+    
+    def open_spider(self, spider: Spider):
+        """
+        Öffnet die CSV-Dateien und startet einen Writer-Thread pro Datei.
+        
+        Args:
+            spider: Der Spider der gestartet wird
+        """
+        super(FusedExportPipeline, self).open_spider(spider)
+        
+        for name in self.writers:
+            if name not in self.resume_offsets:
+                # Neu begonnene Datei: Kopie eines früheren Laufs verwerfen
+                self.mirrored[name] = 0
+                if self.export_dir and os.path.exists(self._mirror_path(name)):
+                    os.remove(self._mirror_path(name))
+        
+        for name in self.writers:
+            # Ein Thread pro Datei hält die Schreibreihenfolge ein
+            pool = ThreadPool(minthreads=1, maxthreads=1, name=f'csv-{name}')
+            pool.start()
+            self.pools[name] = pool
+            self.buffers[name] = []
+        
+        self.flush_task = task.LoopingCall(self._flush_all)
+        self.flush_task.start(self.flush_interval, now=False)
+    
+    def process_item(self, item, spider: Spider):
+        """
+        Normalisiert, filtert und puffert ein Item für den Export.
+        
+        Args:
+            item: Das zu verarbeitende Item
+            spider: Der Spider
+            
+        Returns:
+            Item oder Deferred: Das Item, bei Rückstau ein Deferred mit dem Item
+            
+        Raises:
+            DropItem: Bei ungültigen Items oder Duplikaten
+        """
+        adapter = ItemAdapter(item)
+        self.normalizer.normalize(adapter)
+        
+        url = adapter.get('url')
+        self.check_duplicate(url)
+        self.seen_urls.add(url)
+        
+        kind = item_kind(item)
+        buffer = self.buffers.get(kind)
+        if buffer is not None:
+            serializer = get_serializer(type(item), self.fieldnames[kind])
+            buffer.append(serializer.csv_row(item))
+            if len(buffer) >= self.batch_size:
+                self._flush(kind)
+        
+        self.items_exported += 1
+        
+        if self.pending_batches > self.max_pending_batches:
+            if self.stats:
+                self.stats.inc_value('pipeline/backpressure_waits')
+            waiter = defer.Deferred()
+            self.waiters.append(waiter)
+            return waiter.addCallback(lambda _: item)
+        return item
+    
+    def _flush(self, kind: str):
+        """Übergibt den Puffer einer Datei an deren Writer-Thread."""
+        rows = self.buffers[kind]
+        if not rows:
+            return
+        self.buffers[kind] = []
+        self.pending_batches += 1
+        
+        d = threads.deferToThreadPool(reactor, self.pools[kind], self._write_rows, kind, rows)
+        d.addErrback(lambda failure: self.logger.error(f"Fehler beim CSV-Export ({kind}): {failure.value}"))
+        d.addBoth(self._batch_done, d)
+        self.inflight.add(d)
+    
+    def _write_rows(self, kind: str, rows: list):
+        """Schreibt einen Batch (läuft im Writer-Thread)."""
+        self.writers[kind].writerows(rows)
+        self.files[kind].flush()
+    
+    def _batch_done(self, _, d):
+        """Gibt wartende Items frei, sobald der Rückstau abgebaut ist."""
+        self.inflight.discard(d)
+        self.pending_batches -= 1
+        if self.stats:
+            self.stats.inc_value('pipeline/batches_written')
+        while self.waiters and self.pending_batches <= self.max_pending_batches:
+            self.waiters.pop(0).callback(None)
+    
+    def _flush_all(self):
+        """Schreibt alle unvollständigen Batches."""
+        for kind in self.buffers:
+            self._flush(kind)
+    
+    @defer.inlineCallbacks
+    def close_spider(self, spider: Spider):
+        """
+        Schreibt alle Puffer, wartet auf die Writer-Threads und schließt die Dateien.
+        
+        Args:
+            spider: Der Spider der geschlossen wird
+        """
+        if self.flush_task and self.flush_task.running:
+            self.flush_task.stop()
+        
+        self._flush_all()
+        yield defer.DeferredList(list(self.inflight))
+        
+        for waiter in self.waiters:
+            waiter.callback(None)
+        self.waiters = []
+        for pool in self.pools.values():
+            pool.stop()
+        
+        self.logger.info(f"Duplikate-Pipeline: {self.duplicates_dropped} Duplikate entfernt")
+        self.normalizer.close_spider(spider)
+        super(FusedExportPipeline, self).close_spider(spider)
+
+
+class SearchIndexPipeline:
+    """
+    Pipeline zum inkrementellen Befüllen des lokalen Volltext-Index.
+    
+    Pro Item wird nur die Index-Zeile erzeugt und gepuffert; geschrieben
+    wird in Batches (eine Transaktion pro Batch) in einem eigenen
+    Writer-Thread. Abfragen über: python -m crawler.search
+    """
+    
+    def __init__(self, path: str, batch_size: int = 50, flush_interval: float = 5.0, stats=None):
+        """
+        Args:
+            path: Pfad der SQLite-Datei des Index
+            batch_size: Anzahl Dokumente pro Transaktion
+            flush_interval: Intervall für das Schreiben unvollständiger Batches (Sekunden)
+            stats: Scrapy-Stats-Collector
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = stats
+        self.index = None
+        self.pool = None
+        self.buffer = []
+        self.inflight = set()
+        self.flush_task = None
+        self.items_indexed = 0
+        self.logger = logging.getLogger(__name__)
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Pipeline aus den Settings."""
+        settings = crawler.settings
+        if not settings.getbool('SEARCH_INDEX_ENABLED', True):
+            raise NotConfigured("SEARCH_INDEX_ENABLED is False")
+        pipeline = cls(
+            path=settings.get('SEARCH_INDEX_PATH', 'data/state/search.sqlite3'),
+            batch_size=settings.getint('PIPELINE_BATCH_SIZE', 50),
+            flush_interval=settings.getfloat('PIPELINE_FLUSH_INTERVAL', 5.0),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(pipeline._flush, signal=memory_pressure)
+        return pipeline
+    
+    def open_spider(self, spider: Spider):
+        """Öffnet den Index und startet den Writer-Thread."""
+        self.index = SearchIndex(self.path)
+        self.pool = ThreadPool(minthreads=1, maxthreads=1, name='search-index')
+        self.pool.start()
+        self.flush_task = task.LoopingCall(self._flush)
+        self.flush_task.start(self.flush_interval, now=False)
+    
+    def process_item(self, item, spider: Spider):
+        """Puffert die Index-Zeile eines Items."""
+        self.buffer.append(SearchIndex.document(item, item_kind(item)))
+        if len(self.buffer) >= self.batch_size:
+            self._flush()
+        return item
+    
+    def _flush(self):
+        """Übergibt den Puffer an den Writer-Thread."""
+        if not self.buffer:
+            return
+        documents, self.buffer = self.buffer, []
+        
+        d = threads.deferToThreadPool(reactor, self.pool, self.index.add_documents, documents)
+        d.addCallback(self._batch_done)
+        d.addErrback(lambda failure: self.logger.error(f"Fehler beim Indexieren: {failure.value}"))
+        d.addBoth(lambda _: self.inflight.discard(d))
+        self.inflight.add(d)
+    
+    def _batch_done(self, count: int):
+        """Zählt indexierte Dokumente."""
+        self.items_indexed += count
+        if self.stats:
+            self.stats.inc_value('search_index/documents', count)
+    
+    @defer.inlineCallbacks
+    def close_spider(self, spider: Spider):
+        """Schreibt den Puffer, wartet auf den Writer-Thread und schließt den Index."""
+        if self.flush_task and self.flush_task.running:
+            self.flush_task.stop()
+        
+        self._flush()
+        yield defer.DeferredList(list(self.inflight))
+        self.pool.stop()
+        self.index.close()
+        self.logger.info(f"Volltext-Index: {self.items_indexed} Dokumente indexiert ({self.path})")
+
+
+class LinkGraphPipeline:
+    """
+    Pipeline zum Fortschreiben des Linkgraphen aus den internen Links.
+    
+    Pro Seite werden nur die URLs interniert und die Kanten als Array
+    gepuffert. Am Ende des Laufs wird der Graph im Writer-Thread
+    kompaktiert, gespeichert und die Scores (In-Links, PageRank,
+    Priorität) für den nächsten Lauf exportiert.
+    Abfragen über: python -m crawler.linkgraph
+    """
+    
+    def __init__(self, directory: str, export_limit: int = 10000, priority_range: int = 20,
+                 damping: float = 0.85, stats=None):
+        """
+        Args:
+            directory: Verzeichnis des Linkgraphen
+            export_limit: Anzahl der exportierten URLs (nach PageRank)
+            priority_range: Höchste exportierte Crawl-Priorität
+            damping: Dämpfungsfaktor des PageRank
+            stats: Scrapy-Stats-Collector
+        """
+        self.directory = directory
+        self.export_limit = export_limit
+        self.priority_range = priority_range
+        self.damping = damping
+        self.stats = stats
+        self.graph = None
+        self.pages = 0
+        self.logger = logging.getLogger(__name__)
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Pipeline aus den Settings."""
+        settings = crawler.settings
+        if not settings.getbool('LINK_GRAPH_ENABLED'):
+            raise NotConfigured("LINK_GRAPH_ENABLED is False")
+        return cls(
+            directory=settings.get('LINK_GRAPH_DIR', 'data/state/linkgraph'),
+            export_limit=settings.getint('LINK_GRAPH_EXPORT_LIMIT', 10000),
+            priority_range=settings.getint('LINK_GRAPH_PRIORITY_RANGE', 20),
+            damping=settings.getfloat('LINK_GRAPH_DAMPING', 0.85),
+            stats=crawler.stats,
+        )
+    
+    def open_spider(self, spider: Spider):
+        """Lädt den Graphen der bisherigen Läufe."""
+        self.graph = LinkGraph(self.directory)
+    
+    def process_item(self, item, spider: Spider):
+        """Übernimmt die internen Links einer Seite in den Graphen."""
+        adapter = ItemAdapter(item)
+        if 'internal_links' in adapter.field_names() and adapter.get('url'):
+            edges = self.graph.set_outlinks(adapter['url'], adapter.get('internal_links') or [])
+            self.pages += 1
+            if self.stats:
+                self.stats.inc_value('link_graph/edges_added', edges)
+        return item
+    
+    def _save_and_export(self) -> Dict[str, Any]:
+        """Speichert den Graphen und exportiert die Scores (im Writer-Thread)."""
+        self.graph.save()
+        result = self.graph.export(limit=self.export_limit, priority_range=self.priority_range,
+                                   damping=self.damping)
+        return {'nodes': result['nodes'], 'edges': result['edges'], 'exported': len(result['scores'])}
+    
+    @defer.inlineCallbacks
+    def close_spider(self, spider: Spider):
+        """Speichert den Graphen und berechnet die Scores außerhalb des Reactors."""
+        if not self.pages:
+            return
+        try:
+            summary = yield threads.deferToThread(self._save_and_export)
+        except Exception as e:
+            self.logger.error(f"Fehler beim Speichern des Linkgraphen: {e}")
+            return
+        if self.stats:
+            self.stats.set_value('link_graph/nodes', summary['nodes'])
+            self.stats.set_value('link_graph/edges', summary['edges'])
+        self.logger.info(
+            f"Linkgraph: {self.pages} Seiten übernommen, {summary['nodes']} Knoten, "
+            f"{summary['edges']} Kanten, {summary['exported']} Scores exportiert ({self.directory})"
+        )
+
+
+class ImagePipeline:
+    """
+    Pipeline zum Herunterladen der Artikelbilder (image_urls) in den ImageStore.
+    
+    Bilder werden über die Engine (HTTP-Lane, ohne Rendering) mit
+    begrenzter Parallelität geladen, nach Größe und Typ geprüft und unter
+    ihrem Inhalts-Hash abgelegt. Bekannte URLs (auch aus früheren Läufen)
+    und gleichzeitige Anfragen derselben URL werden nur einmal geladen.
+    Vorschaubilder entstehen in einem Worker-Pool, ohne dass das Item
+    darauf wartet; ihre Pfade stehen vorab fest.
+    
+    Pfade und Abmessungen werden in die Felder images und image_paths
+    des Items geschrieben. Die Pipeline läuft vor dem Export, damit die
+    Pfade in der CSV landen; Duplikate verwirft sie vorab über den
+    Duplikatfilter der Export-Pipeline, sodass sie keine Downloads kosten. Ein Item wartet höchstens item_wait Sekunden
+    auf seine Bilder (der Scraper-Slot der Antwort bleibt so lange
+    belegt); später fertige Downloads laufen weiter und stehen dem
+    nächsten Artikel bzw. Lauf über die Zuordnung zur Verfügung.
+    """
+    
+    def __init__(self, crawler, store: ImageStore, concurrency: int = 4, max_bytes: int = 5 * 1024 * 1024,
+                 allowed_types=None, max_per_item: int = 5, thumb_workers: int = 2, timeout: float = 20,
+                 item_wait: float = 5):
+        """
+        Args:
+            crawler: Scrapy-Crawler-Objekt (für engine.download)
+            store: Ablage der Bilder
+            concurrency: Gleichzeitige Bild-Downloads
+            max_bytes: Größere Bilder werden abgebrochen
+            allowed_types: Erlaubte Bildformate (Endungen aus IMAGE_TYPES)
+            max_per_item: Höchstens so viele Bilder pro Artikel
+            thumb_workers: Threads für die Vorschaubilder
+            timeout: Timeout eines Downloads (Sekunden)
+            item_wait: So lange wartet ein Item höchstens auf seine Bilder (Sekunden)
+        """
+        self.crawler = crawler
+        self.store = store
+        self.stats = crawler.stats
+        self.max_bytes = max_bytes
+        self.allowed_types = set(allowed_types or IMAGE_TYPES)
+        self.max_per_item = max_per_item
+        self.thumb_workers = thumb_workers
+        self.timeout = timeout
+        self.item_wait = max(0.0, item_wait)
+        self.semaphore = defer.DeferredSemaphore(max(1, concurrency))
+        self.writer: ThreadPool = None
+        self.thumb_pool: ThreadPool = None
+        # URL -> wartende Deferreds eines laufenden Downloads
+        self.waiting: Dict[str, list] = {}
+        self.inflight = set()
+        # Duplikatprüfung der Export-Pipeline (None = ohne Duplikatfilter)
+        self.duplicate_check = None
+        self.logger = logging.getLogger(__name__)
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Factory-Methode zur Erstellung der Pipeline aus den Settings."""
+        settings = crawler.settings
+        if not settings.getbool('IMAGES_ENABLED'):
+            raise NotConfigured("IMAGES_ENABLED is False")
+        store = ImageStore(
+            settings.get('IMAGES_DIR', 'data/images'),
+            map_file=settings.get('IMAGES_MAP_FILE') or None,
+            thumb_sizes=settings.getdict('IMAGES_THUMBS'),
+            thumb_quality=settings.getint('IMAGES_THUMB_QUALITY', 80),
+        )
+        return cls(
+            crawler,
+            store,
+            concurrency=settings.getint('IMAGES_CONCURRENCY', 4),
+            max_bytes=settings.getint('IMAGES_MAX_BYTES', 5 * 1024 * 1024),
+            allowed_types=settings.getlist('IMAGES_ALLOWED_TYPES', list(IMAGE_TYPES)),
+            max_per_item=settings.getint('IMAGES_MAX_PER_ITEM', 5),
+            thumb_workers=settings.getint('IMAGES_THUMB_WORKERS', 2),
+            timeout=settings.getfloat('IMAGES_TIMEOUT', 20),
+            item_wait=settings.getfloat('IMAGES_ITEM_WAIT', 5),
+        )
+    
+    def open_spider(self, spider: Spider):
+        """Startet Writer-Thread und Worker-Pool für die Vorschaubilder."""
+        for pipeline in self.crawler.engine.scraper.itemproc.middlewares:
+            if hasattr(pipeline, 'check_duplicate'):
+                self.duplicate_check = pipeline.check_duplicate
+        self.writer = ThreadPool(minthreads=1, maxthreads=1, name='image-store')
+        self.writer.start()
+        self.thumb_pool = ThreadPool(minthreads=0, maxthreads=max(1, self.thumb_workers), name='image-thumbs')
+        self.thumb_pool.start()
+    
+    def process_item(self, item, spider: Spider):
+        """Lädt die Bilder eines Artikels und schreibt Pfade und Abmessungen zurück."""
+        adapter = ItemAdapter(item)
+        if 'images' not in adapter.field_names() or not adapter.get('image_urls'):
+            return item
+        if self.duplicate_check:
+            # Wie die Normalisierung der Export-Pipeline (URL ohne Leerraum)
+            self.duplicate_check((adapter.get('url') or '').strip())
+        
+        urls = list(dict.fromkeys(url for url in adapter['image_urls'] if url.startswith(('http://', 'https://'))))
+        urls = urls[:self.max_per_item]
+        d = defer.gatherResults([self._within(self._image(url)) for url in urls])
+        
+        def _write_back(entries):
+            images = [
+                {'url': url, **{key: entry[key] for key in ('path', 'checksum', 'width', 'height', 'thumbs')}}
+                for url, entry in zip(urls, entries) if entry
+            ]
+            adapter['images'] = images
+            adapter['image_paths'] = [image['path'] for image in images]
+            return item
+        
+        return d.addCallback(_write_back)
+    
+    def _within(self, waiter: defer.Deferred) -> defer.Deferred:
+        """
+        Begrenzt das Warten eines Items auf ein Bild auf item_wait Sekunden.
+        
+        Der Download selbst wird nicht abgebrochen (andere Items können auf
+        dieselbe URL warten), sein Ergebnis landet nur nicht mehr in diesem Item.
+        
+        Returns:
+            Deferred: Feuert mit dem Eintrag oder None nach Ablauf der Frist
+        """
+        if waiter.called:
+            return waiter
+        result = defer.Deferred()
+        
+        def _expired():
+            self.stats.inc_value('images/item_wait_expired')
+            result.callback(None)
+        
+        timer = reactor.callLater(self.item_wait, _expired)
+        
+        def _fire(entry):
+            if timer.active():
+                timer.cancel()
+                result.callback(entry)
+            return entry
+        
+        waiter.addCallback(_fire)
+        return result
+    
+    def _image(self, url: str) -> defer.Deferred:
+        """
+        Liefert den Eintrag eines Bildes (aus der Zuordnung oder per Download).
+        
+        Returns:
+            Deferred: Feuert mit dem Eintrag oder None bei Fehlern (nie mit einem Fehler)
+        """
+        entry = self.store.cached(url)
+        if entry is not None:
+            self.stats.inc_value('images/cached')
+            return defer.succeed(entry)
+        
+        waiter = defer.Deferred()
+        if url in self.waiting:
+            self.waiting[url].append(waiter)
+            return waiter
+        self.waiting[url] = [waiter]
+        
+        d = self.semaphore.run(self._download, url)
+        d.addErrback(self._failed, url)
+        d.addCallback(self._notify, url)
+        if not d.called:
+            d.addBoth(lambda _: self.inflight.discard(d))
+            self.inflight.add(d)
+        return waiter
+    
+    @defer.inlineCallbacks
+    def _download(self, url: str):
+        """Lädt ein Bild, prüft Typ und Größe und legt es im Writer-Thread ab."""
+        request = Request(url, meta={
+            'image_download': True,
+            'download_lane': 'http',
+            'download_maxsize': self.max_bytes,
+            'download_timeout': self.timeout,
+        })
+        response = yield self.crawler.engine.download(request)
+        if response.status != 200:
+            raise ValueError(f"HTTP {response.status}")
+        
+        content_type = response.headers.get('Content-Type', b'').decode('latin-1').split(';')[0].strip().lower()
+        if content_type and not content_type.startswith('image/') and content_type != 'application/octet-stream':
+            raise ValueError(f"Content-Type {content_type}")
+        if len(response.body) > self.max_bytes:
+            raise ValueError(f"{len(response.body)} Bytes")
+        
+        entry = yield threads.deferToThreadPool(reactor, self.writer, self.store.store, response.body)
+        if entry['path'].rsplit('.', 1)[1] not in self.allowed_types:
+            raise ValueError(f"Format {entry['path'].rsplit('.', 1)[1]} nicht erlaubt")
+        
+        self.store.remember(url, entry)
+        self.stats.inc_value('images/downloaded')
+        if entry['new']:
+            self.stats.inc_value('images/stored')
+            self.stats.inc_value('images/stored_bytes', len(response.body))
+        else:
+            self.stats.inc_value('images/deduplicated')
+        self._thumbnails(url, entry)
+        return entry
+    
+    def _thumbnails(self, url: str, entry: Dict[str, Any]):
+        """Erzeugt die Vorschaubilder im Worker-Pool (das Item wartet nicht darauf)."""
+        if not entry['thumbs']:
+            return
+        d = threads.deferToThreadPool(reactor, self.thumb_pool, self.store.thumbnails, entry)
+        d.addCallback(lambda count: count and self.stats.inc_value('images/thumbnails', count))
+        d.addErrback(lambda failure: self.logger.warning("Vorschaubild fehlgeschlagen (%s): %s", url, failure.value))
+        d.addBoth(lambda _: self.inflight.discard(d))
+        self.inflight.add(d)
+    
+    def _failed(self, failure, url: str):
+        """Zählt fehlgeschlagene Downloads; das Item bleibt ohne dieses Bild."""
+        self.stats.inc_value('images/failed')
+        self.logger.debug("Bild nicht übernommen (%s): %s", url, failure.value)
+        return None
+    
+    def _notify(self, entry, url: str):
+        """Übergibt das Ergebnis an alle Items, die auf die URL warten."""
+        for waiter in self.waiting.pop(url, []):
+            waiter.callback(entry)
+    
+    @defer.inlineCallbacks
+    def close_spider(self, spider: Spider):
+        """Wartet auf Downloads und Vorschaubilder und speichert die Zuordnung URL -> Bild."""
+        yield defer.DeferredList(list(self.inflight))
+        try:
+            yield threads.deferToThreadPool(reactor, self.writer, self.store.save)
+        finally:
+            self.writer.stop()
+            self.thumb_pool.stop()
+        self.logger.info(f"Bilder: {len(self.store.urls)} URLs in der Zuordnung ({self.store.directory})")
+
+
 class JSONExportPipeline:
     """
     Pipeline zum Exportieren von Items in JSON-Format.
@@ -292,12 +1047,12 @@ class JSONExportPipeline:
     
     def process_item(self, item, spider: Spider):
         """Exportiert ein Item als JSON."""
-        adapter = ItemAdapter(item)
+        serializer = get_serializer(type(item), all_fieldnames(item))
         
         if self.items_exported > 0:
             self.file.write(',\n')
         
-        json.dump(adapter.asdict(), self.file, ensure_ascii=False, indent=2)
+        json.dump(serializer.as_dict(item), self.file, ensure_ascii=False, indent=2)
         self.items_exported += 1
         
         return item
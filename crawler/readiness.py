@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive Wartestrategie für JavaScript-lastige Seiten.
+
+Statt auf 'networkidle' plus eine feste Pause zu warten, wird im Browser
+gewartet bis ein domainspezifischer Inhalts-Selektor erscheint oder das
+DOM für eine kurze Zeit stabil bleibt. Eine harte Obergrenze verhindert
+endloses Warten. Pro Domain wird gelernt, wie lange Seiten tatsächlich
+brauchen, und verglichen, wann die alte Strategie zurückgekehrt wäre.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional
+
+from scrapy_playwright.page import PageMethod
+from crawler.state import JsonStateStore
+
+
+# Wartet im Browser auf Selektor oder DOM-Stabilität (mit Obergrenze).
+# Zeiten sind relativ zum Navigationsstart (performance.now()).
+READINESS_SCRIPT = """
+({selector, quietMs, capMs}) => new Promise((resolve) => {
+    const start = performance.now();
+    let lastMutation = start;
+    let done = false;
+    const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+    const finish = (reason) => {
+        if (done) return;
+        done = true;
+        observer.disconnect();
+        clearInterval(timer);
+        clearTimeout(cap);
+        const now = performance.now();
+        resolve({reason: reason, ready_ms: Math.round(now), waited_ms: Math.round(now - start)});
+    };
+    observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    const timer = setInterval(() => {
+        if (selector && document.querySelector(selector)) {
+            finish('selector');
+        } else if (performance.now() - lastMutation >= quietMs) {
+            finish('stable');
+        }
+    }, 50);
+    const cap = setTimeout(() => finish('timeout'), capMs);
+})
+"""
+
+# Liefert die Netzwerk-Zeitpunkte, aus denen sich das Ende der alten
+# Strategie (networkidle + 2 Sekunden) abschätzen lässt
+NETWORK_TIMING_SCRIPT = """
+() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const resources = performance.getEntriesByType('resource');
+    let lastResponseEnd = nav ? nav.responseEnd : 0;
+    for (const entry of resources) {
+        lastResponseEnd = Math.max(lastResponseEnd, entry.responseEnd);
+    }
+    return {
+        dom_content_loaded: nav ? Math.round(nav.domContentLoadedEventEnd) : 0,
+        last_response_end: Math.round(lastResponseEnd),
+    };
+}
+"""
+
+# Playwright wertet 'networkidle' nach 500 ms ohne Netzwerkverkehr aus,
+# danach folgte die feste Pause von 2 Sekunden
+NETWORKIDLE_QUIET_MS = 500
+LEGACY_FIXED_WAIT_MS = 2000
+
+
+class ReadinessTracker:
+    """
+    Erzeugt die Wartestrategie pro Domain und lernt die Ladezeiten.
+
+    Pro Domain werden gleitende Mittelwerte (EWMA) der Ladezeit und ihrer
+    Abweichung gehalten. Daraus ergibt sich die Obergrenze für die nächste
+    Seite dieser Domain (Mittelwert + 4 Abweichungen, begrenzt durch
+    READINESS_MIN_WAIT_MS und READINESS_MAX_WAIT_MS).
+    """
+
+    # Gewicht neuer Messungen im gleitenden Mittelwert
+    ALPHA = 0.3
+
+    # Mindestanzahl Messungen bevor die gelernte Obergrenze greift
+    MIN_SAMPLES = 3
+
+    def __init__(self, selectors: Dict[str, str], quiet_ms: int = 500, min_wait_ms: int = 1500,
+                 max_wait_ms: int = 10000, state_file: Optional[str] = None, stats=None):
+        """
+        Args:
+            selectors: Inhalts-Selektoren pro Domain (Teilstring der Domain)
+            quiet_ms: Dauer ohne DOM-Änderungen, ab der eine Seite als stabil gilt
+            min_wait_ms: Untergrenze der gelernten Obergrenze
+            max_wait_ms: Harte Obergrenze für das Warten
+            state_file: JSON-Datei für die gelernten Werte (None = nicht speichern)
+            stats: Scrapy-Stats-Collector (optional)
+        """
+        self.selectors = selectors
+        self.quiet_ms = quiet_ms
+        self.min_wait_ms = min_wait_ms
+        self.max_wait_ms = max_wait_ms
+        self.stats = stats
+        self.store = JsonStateStore(state_file) if state_file else None
+        self.domains: Dict[str, Dict[str, Any]] = self.store.load() if self.store else {}
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Erstellt den Tracker aus den Crawler-Settings."""
+        settings = crawler.settings
+        return cls(
+            selectors=settings.getdict('READINESS_SELECTORS'),
+            quiet_ms=settings.getint('READINESS_QUIET_MS', 500),
+            min_wait_ms=settings.getint('READINESS_MIN_WAIT_MS', 1500),
+            max_wait_ms=settings.getint('READINESS_MAX_WAIT_MS', 10000),
+            state_file=settings.get('READINESS_STATE_FILE'),
+            stats=crawler.stats,
+        )
+
+    def selector_for(self, domain: str) -> Optional[str]:
+        """Liefert den Inhalts-Selektor für eine Domain (falls konfiguriert)."""
+        for site, selector in self.selectors.items():
+            if site in domain:
+                return selector
+        return None
+
+    def cap_for(self, domain: str) -> int:
+        """
+        Berechnet die Obergrenze für das Warten auf eine Domain.
+
+        Args:
+            domain: Domain der Seite
+
+        Returns:
+            int: Obergrenze in Millisekunden
+        """
+        learned = self.domains.get(domain)
+        if not learned or learned['samples'] < self.MIN_SAMPLES:
+            return self.max_wait_ms
+        cap = learned['mean_ms'] + 4 * learned['dev_ms']
+        return int(min(self.max_wait_ms, max(self.min_wait_ms, cap)))
+
+    def page_methods(self, domain: str) -> List[PageMethod]:
+        """
+        Erzeugt die Playwright-Methoden für das Warten auf eine Seite.
+
+        Args:
+            domain: Domain der Seite
+
+        Returns:
+            List[PageMethod]: domcontentloaded gefolgt vom Readiness-Skript
+        """
+        return [
+            PageMethod('wait_for_load_state', 'domcontentloaded'),
+            PageMethod('evaluate', READINESS_SCRIPT, {
+                'selector': self.selector_for(domain),
+                'quietMs': self.quiet_ms,
+                'capMs': self.cap_for(domain),
+            }),
+        ]
+
+    @staticmethod
+    def result_from_meta(meta: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Liest das Ergebnis des Readiness-Skripts aus den Request-Meta-Daten.
+
+        scrapy-playwright legt den Rückgabewert jeder PageMethod in deren
+        Attribut 'result' ab.
+        """
+        for method in meta.get('playwright_page_methods') or []:
+            if isinstance(method, PageMethod) and method.args and method.args[0] == READINESS_SCRIPT:
+                result = getattr(method, 'result', None)
+                return result if isinstance(result, dict) else None
+        return None
+
+    @staticmethod
+    def legacy_estimate(timing: Dict[str, Any]) -> int:
+        """
+        Schätzt, wann 'networkidle' + 2 Sekunden zurückgekehrt wäre.
+
+        Args:
+            timing: Ergebnis von NETWORK_TIMING_SCRIPT
+
+        Returns:
+            int: Geschätzter Zeitpunkt in Millisekunden seit Navigationsstart
+        """
+        network_idle = max(timing.get('dom_content_loaded', 0), timing.get('last_response_end', 0)) + NETWORKIDLE_QUIET_MS
+        return int(network_idle + LEGACY_FIXED_WAIT_MS)
+
+    def record(self, domain: str, result: Dict[str, Any], legacy_ms: Optional[int] = None):
+        """
+        Erfasst eine Messung und aktualisiert die gelernten Werte der Domain.
+
+        Args:
+            domain: Domain der Seite
+            result: Ergebnis des Readiness-Skripts
+            legacy_ms: Geschätztes Ende der alten Strategie (optional)
+        """
+        ready_ms = result.get('ready_ms', 0)
+        reason = result.get('reason', 'unknown')
+
+        learned = self.domains.setdefault(domain, {
+            'samples': 0, 'mean_ms': float(ready_ms), 'dev_ms': 0.0,
+            'legacy_mean_ms': None, 'timeouts': 0,
+        })
+        learned['samples'] += 1
+        deviation = abs(ready_ms - learned['mean_ms'])
+        learned['mean_ms'] += self.ALPHA * (ready_ms - learned['mean_ms'])
+        learned['dev_ms'] += self.ALPHA * (deviation - learned['dev_ms'])
+        if reason == 'timeout':
+            learned['timeouts'] += 1
+
+        if legacy_ms is not None:
+            if learned['legacy_mean_ms'] is None:
+                learned['legacy_mean_ms'] = float(legacy_ms)
+            else:
+                learned['legacy_mean_ms'] += self.ALPHA * (legacy_ms - learned['legacy_mean_ms'])
+
+        if self.stats is not None:
+            self.stats.inc_value(f'readiness/reason/{reason}')
+            self.stats.set_value(f'readiness/{domain}/mean_ms', int(learned['mean_ms']))
+            if legacy_ms is not None:
+                self.stats.inc_value('readiness/saved_ms', max(0, legacy_ms - ready_ms))
+
+        self.logger.debug("Readiness %s: %s nach %s ms (alte Strategie ~%s ms)", domain, reason, ready_ms, legacy_ms)
+
+    def save(self):
+        """Speichert die gelernten Werte aller Domains."""
+        if self.store:
+            self.store.data = self.domains
+            self.store.save()
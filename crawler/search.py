@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+Lokaler Volltext-Index über die gecrawlten Inhalte (SQLite FTS5).
+
+Der Index wird von der SearchIndexPipeline inkrementell befüllt: pro URL
+gibt es genau ein Dokument, ein erneuter Crawl ersetzt es. Abfragen sind
+nach BM25 gerankt und nach Domain, Item-Art und Zeitraum filterbar.
+
+Abfrage über die Kommandozeile:
+
+    python -m crawler.search "bundeswehr beschaffung" --domain bund.de --since 7d
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from itemadapter import ItemAdapter
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    domain TEXT,
+    crawled_at REAL NOT NULL,
+    title TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_domain ON documents (domain, crawled_at);
+CREATE INDEX IF NOT EXISTS documents_crawled_at ON documents (crawled_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5 (
+    title, description, keywords, body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Index-Spalten pro Item-Art und die Item-Felder, aus denen sie bestehen
+INDEX_FIELDS = {
+    'webpages': {
+        'title': ('title',),
+        'description': ('description',),
+        'keywords': ('keywords',),
+        'body': (),
+    },
+    'news': {
+        'title': ('title',),
+        'description': ('description',),
+        'keywords': ('tags', 'category', 'author'),
+        'body': ('article_text',),
+    },
+    'tenders': {
+        'title': ('tender_title',),
+        'description': ('organization', 'category', 'location'),
+        'keywords': ('tender_id', 'budget', 'deadline'),
+        'body': ('requirements',),
+    },
+}
+
+# BM25-Gewichte der Spalten title, description, keywords, body
+COLUMN_WEIGHTS = (10.0, 4.0, 4.0, 1.0)
+
+TERM_PATTERN = re.compile(r'\w+\*?', re.UNICODE)
+
+
+def _text(value) -> str:
+    """Wandelt einen Feldwert (auch Listen) in indexierbaren Text um."""
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(v) for v in value if v)
+    return str(value)
+
+
+def _epoch(timestamp: Optional[str]) -> float:
+    """ISO-Zeitstempel eines Items als Unix-Zeit (Fallback: jetzt)."""
+    if timestamp:
+        try:
+            return datetime.fromisoformat(timestamp).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+def build_match_query(query: str) -> str:
+    """
+    Übersetzt eine Suchanfrage in einen FTS5-Ausdruck.
+
+    Alle Begriffe müssen vorkommen; ein '*' am Wortende sucht nach Präfixen.
+    Sonderzeichen werden nicht als FTS5-Syntax interpretiert.
+
+    Args:
+        query: Suchbegriffe
+
+    Returns:
+        str: FTS5-MATCH-Ausdruck
+    """
+    terms = []
+    for term in TERM_PATTERN.findall(query):
+        if term.endswith('*'):
+            terms.append(f'"{term[:-1]}"*')
+        else:
+            terms.append(f'"{term}"')
+    return ' '.join(terms)
+
+
+def parse_since(value: str) -> float:
+    """
+    Wandelt eine Zeitangabe (ISO-Datum oder relativ wie '7d', '12h') in Unix-Zeit um.
+
+    Args:
+        value: Zeitangabe
+
+    Returns:
+        float: Unix-Zeit
+    """
+    match = re.fullmatch(r'(\d+)([dh])', value.strip())
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        delta = timedelta(days=amount) if unit == 'd' else timedelta(hours=amount)
+        return (datetime.now() - delta).timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+class SearchIndex:
+    """
+    Volltext-Index auf Basis von SQLite FTS5.
+
+    Die Verbindung darf nur aus einem Thread gleichzeitig genutzt werden;
+    die Pipeline schreibt deshalb über einen eigenen Writer-Thread.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Pfad der SQLite-Datei
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def document(item, kind: str) -> Tuple:
+        """
+        Erstellt die Index-Zeile eines Items.
+
+        Args:
+            item: Item oder Record
+            kind: Item-Art ('webpages', 'news', 'tenders')
+
+        Returns:
+            Tuple: (url, kind, domain, crawled_at, title, description, keywords, body)
+        """
+        adapter = ItemAdapter(item)
+        url = adapter.get('url')
+        columns = {
+            column: ' '.join(filter(None, (_text(adapter.get(name)) for name in names)))
+            for column, names in INDEX_FIELDS.get(kind, INDEX_FIELDS['webpages']).items()
+        }
+        domain = adapter.get('domain') if 'domain' in adapter.field_names() else None
+        domain = (domain or urlparse(url or '').netloc).lower()
+
+        return (
+            url, kind, domain, _epoch(adapter.get('timestamp')),
+            columns['title'], columns['description'], columns['keywords'], columns['body'],
+        )
+
+    def add_documents(self, documents: List[Tuple]) -> int:
+        """
+        Fügt Dokumente hinzu bzw. ersetzt vorhandene Dokumente derselben URL.
+
+        Args:
+            documents: Zeilen aus document()
+
+        Returns:
+            int: Anzahl indexierter Dokumente
+        """
+        with self.connection:
+            cursor = self.connection.cursor()
+            for url, kind, domain, crawled_at, title, description, keywords, body in documents:
+                if not url:
+                    continue
+                row = cursor.execute('SELECT id FROM documents WHERE url = ?', (url,)).fetchone()
+                if row:
+                    doc_id = row[0]
+                    cursor.execute(
+                        'UPDATE documents SET kind = ?, domain = ?, crawled_at = ?, title = ? WHERE id = ?',
+                        (kind, domain, crawled_at, title, doc_id),
+                    )
+                    cursor.execute('DELETE FROM documents_fts WHERE rowid = ?', (doc_id,))
+                else:
+                    cursor.execute(
+                        'INSERT INTO documents (url, kind, domain, crawled_at, title) VALUES (?, ?, ?, ?, ?)',
+                        (url, kind, domain, crawled_at, title),
+                    )
+                    doc_id = cursor.lastrowid
+                cursor.execute(
+                    'INSERT INTO documents_fts (rowid, title, description, keywords, body) VALUES (?, ?, ?, ?, ?)',
+                    (doc_id, title, description, keywords, body),
+                )
+        return len(documents)
+
+    def search(self, query: str, domain: Optional[str] = None, kind: Optional[str] = None,
+               since: Optional[float] = None, until: Optional[float] = None,
+               limit: int = 20, raw: bool = False) -> List[Dict[str, Any]]:
+        """
+        Gerankte Volltextsuche.
+
+        Args:
+            query: Suchbegriffe (oder FTS5-Ausdruck bei raw=True)
+            domain: Nur diese Domain inklusive Subdomains
+            kind: Nur diese Item-Art
+            since: Frühester Crawl-Zeitpunkt (Unix-Zeit)
+            until: Spätester Crawl-Zeitpunkt (Unix-Zeit)
+            limit: Maximale Anzahl Treffer
+            raw: Anfrage unverändert als FTS5-Ausdruck verwenden
+
+        Returns:
+            List[Dict]: Treffer, bester zuerst
+        """
+        match = query if raw else build_match_query(query)
+        if not match:
+            return []
+
+        weights = ', '.join(str(w) for w in COLUMN_WEIGHTS)
+        sql = [
+            "SELECT d.url, d.kind, d.domain, d.crawled_at, d.title,",
+            "  snippet(documents_fts, -1, '[', ']', ' … ', 12),",
+            f"  bm25(documents_fts, {weights}) AS score",
+            "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid",
+            "WHERE documents_fts MATCH ?",
+        ]
+        params: List[Any] = [match]
+
+        if domain:
+            domain = domain.lower()
+            sql.append("AND (d.domain = ? OR d.domain LIKE ?)")
+            params += [domain, f'%.{domain}']
+        if kind:
+            sql.append("AND d.kind = ?")
+            params.append(kind)
+        if since is not None:
+            sql.append("AND d.crawled_at >= ?")
+            params.append(since)
+        if until is not None:
+            sql.append("AND d.crawled_at <= ?")
+            params.append(until)
+
+        sql.append("ORDER BY score LIMIT ?")
+        params.append(limit)
+
+        rows = self.connection.execute('\n'.join(sql), params).fetchall()
+        return [
+            {
+                'url': url,
+                'kind': kind,
+                'domain': domain,
+                'crawled_at': datetime.fromtimestamp(crawled_at).isoformat(timespec='seconds'),
+                'title': title,
+                'snippet': snippet,
+                'score': round(-score, 4),
+            }
+            for url, kind, domain, crawled_at, title, snippet, score in rows
+        ]
+
+    def count(self) -> int:
+        """Anzahl indexierter Dokumente."""
+        return self.connection.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def optimize(self):
+        """Führt die FTS5-Segmente zusammen (nach vielen inkrementellen Läufen)."""
+        with self.connection:
+            self.connection.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+
+    def close(self):
+        """Schließt die Datenbankverbindung."""
+        self.connection.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeile für Abfragen des Volltext-Index."""
+    parser = argparse.ArgumentParser(description='Volltextsuche über die gecrawlten Inhalte')
+    parser.add_argument('query', nargs='?', default='', help='Suchbegriffe (Präfixsuche mit wort*)')
+    parser.add_argument('--db', default='data/state/search.sqlite3', help='Pfad des Index')
+    parser.add_argument('--domain', help='Nur diese Domain (inkl. Subdomains)')
+    parser.add_argument('--kind', choices=sorted(INDEX_FIELDS), help='Nur diese Item-Art')
+    parser.add_argument('--since', help="Ab Zeitpunkt (ISO-Datum oder relativ, z.B. '7d', '12h')")
+    parser.add_argument('--until', help='Bis Zeitpunkt (ISO-Datum)')
+    parser.add_argument('--limit', type=int, default=20, help='Maximale Anzahl Treffer')
+    parser.add_argument('--raw', action='store_true', help='Anfrage als FTS5-Ausdruck verwenden')
+    parser.add_argument('--optimize', action='store_true', help='Index-Segmente zusammenführen')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Index nicht gefunden: {args.db}", file=sys.stderr)
+        return 1
+
+    index = SearchIndex(args.db)
+    try:
+        if args.optimize:
+            index.optimize()
+            print(f"Index optimiert ({index.count()} Dokumente)")
+            if not args.query:
+                return 0
+
+        started = time.perf_counter()
+        try:
+            results = index.search(
+                args.query,
+                domain=args.domain,
+                kind=args.kind,
+                since=parse_since(args.since) if args.since else None,
+                until=parse_since(args.until) if args.until else None,
+                limit=args.limit,
+                raw=args.raw,
+            )
+        except sqlite3.OperationalError as e:
+            print(f"Ungültige Anfrage: {e}", file=sys.stderr)
+            return 2
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        for rank, hit in enumerate(results, 1):
+            print(f"{rank:>3}. [{hit['kind']}] {hit['title'] or '(ohne Titel)'}")
+            print(f"     {hit['url']}  ({hit['domain']}, {hit['crawled_at']}, Score {hit['score']})")
+            if hit['snippet']:
+                print(f"     {hit['snippet']}")
+        print(f"{len(results)} Treffer in {elapsed_ms:.1f} ms")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
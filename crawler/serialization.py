@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Vorkompilierte Serializer für CSV- und JSON-Zeilen.
+
+Pro Kombination aus Item-Typ und Feldliste wird einmalig eine
+Zugriffsfunktion erzeugt (operator.attrgetter für Slot-Records,
+dict-Zugriff für scrapy.Item/dict). Das Serialisieren eines Items
+erzeugt so nur noch das Zeilen-Tupel statt mehrerer dict-Kopien.
+"""
+
+import json
+from collections.abc import Mapping
+from dataclasses import is_dataclass, fields as dataclass_fields
+from operator import attrgetter
+from typing import Dict, Any, Tuple, Callable, Sequence
+
+from itemadapter import ItemAdapter
+
+
+class RowSerializer:
+    """
+    Serializer für eine feste Feldliste eines Item-Typs.
+    """
+
+    __slots__ = ('fieldnames', '_values')
+
+    def __init__(self, item_type: type, fieldnames: Sequence[str]):
+        """
+        Args:
+            item_type: Klasse der zu serialisierenden Items
+            fieldnames: Spalten in Ausgabereihenfolge
+        """
+        self.fieldnames: Tuple[str, ...] = tuple(fieldnames)
+        self._values = self._compile(item_type, self.fieldnames)
+
+    @staticmethod
+    def _compile(item_type: type, fieldnames: Tuple[str, ...]) -> Callable[[Any], tuple]:
+        """Erzeugt die Zugriffsfunktion, die ein Item auf ein Werte-Tupel abbildet."""
+        if is_dataclass(item_type):
+            available = {f.name for f in dataclass_fields(item_type)}
+            if set(fieldnames) <= available:
+                if len(fieldnames) == 1:
+                    getter = attrgetter(fieldnames[0])
+                    return lambda item: (getter(item),)
+                return attrgetter(*fieldnames)
+
+        if issubclass(item_type, dict) or hasattr(item_type, 'fields'):
+            # dict und scrapy.Item (MutableMapping)
+            return lambda item: tuple(map(item.get, fieldnames))
+
+        # Fallback für andere von ItemAdapter unterstützte Typen
+        return lambda item: tuple(map(ItemAdapter(item).get, fieldnames))
+
+    def values(self, item) -> tuple:
+        """Liefert die Rohwerte eines Items in Spaltenreihenfolge."""
+        return self._values(item)
+
+    def csv_row(self, item) -> list:
+        """
+        Liefert eine CSV-Zeile (Listen/Dicts als JSON, None als '').
+
+        Args:
+            item: Zu serialisierendes Item
+
+        Returns:
+            list: Zellenwerte in Spaltenreihenfolge
+        """
+        return [
+            '' if value is None
+            else json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict))
+            else value
+            for value in self._values(item)
+        ]
+
+    def as_dict(self, item) -> Dict[str, Any]:
+        """Liefert ein flaches dict (ohne Kopie verschachtelter Werte) für JSON."""
+        return dict(zip(self.fieldnames, self._values(item)))
+
+
+_SERIALIZERS: Dict[Tuple[type, Tuple[str, ...]], RowSerializer] = {}
+
+
+def get_serializer(item_type: type, fieldnames: Sequence[str]) -> RowSerializer:
+    """
+    Liefert den (gecachten) Serializer für Item-Typ und Feldliste.
+
+    Args:
+        item_type: Klasse der Items
+        fieldnames: Spalten in Ausgabereihenfolge
+
+    Returns:
+        RowSerializer: Vorkompilierter Serializer
+    """
+    key = (item_type, tuple(fieldnames))
+    serializer = _SERIALIZERS.get(key)
+    if serializer is None:
+        serializer = _SERIALIZERS[key] = RowSerializer(item_type, key[1])
+    return serializer
+
+
+def all_fieldnames(item) -> Tuple[str, ...]:
+    """
+    Liefert alle Feldnamen eines Items (für vollständige JSON-Exporte).
+
+    Args:
+        item: Item oder Record
+
+    Returns:
+        Tuple[str, ...]: Feldnamen des Item-Typs
+    """
+    if is_dataclass(item):
+        return tuple(f.name for f in dataclass_fields(item))
+    if isinstance(item, Mapping):
+        # dict und scrapy.Item: nur gesetzte Felder
+        return tuple(item.keys())
+    return tuple(ItemAdapter(item).field_names())
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Persistente Browser-Sitzungen pro Domain.
+
+Jede Domain erhält einen eigenen Playwright-Kontext. Dessen storage_state
+(Cookies und localStorage, z.B. Consent-Entscheidungen) wird nach dem
+ersten erfolgreichen Besuch gespeichert und in späteren Läufen beim
+Anlegen des Kontexts wieder geladen. Kontext und User-Agent bleiben pro
+Domain über alle Läufe hinweg gleich.
+
+Innerhalb eines Laufs bleibt der Kontext einer Domain nach dem letzten
+Request offen (warme Sitzung). Ruhende Kontexte werden in LRU-Reihenfolge
+geschlossen, sobald mehr als SESSION_MAX_IDLE_CONTEXTS ruhen, sie länger
+als SESSION_IDLE_TIMEOUT ungenutzt sind oder ein Request auf einen freien
+Platz von PLAYWRIGHT_MAX_CONTEXTS wartet.
+"""
+
+import os
+import time
+import zlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from twisted.internet import task
+from scrapy import signals
+from scrapy.utils.defer import deferred_from_coro
+from crawler.extensions import playwright_handler
+
+
+def session_key(url_or_domain: str) -> str:
+    """
+    Ermittelt den Sitzungsschlüssel (Domain ohne Subdomains) einer URL.
+
+    Args:
+        url_or_domain: URL oder Hostname
+
+    Returns:
+        str: z.B. 'spiegel.de' für 'https://www.spiegel.de/politik/'
+    """
+    host = urlparse(url_or_domain).netloc if '//' in url_or_domain else url_or_domain
+    host = host.split(':')[0].lower()
+    labels = [label for label in host.split('.') if label]
+    return '.'.join(labels[-2:]) if len(labels) >= 2 else host
+
+
+def user_agent_for_domain(domain: str, user_agents: List[str]) -> Optional[str]:
+    """
+    Wählt einen stabilen User-Agent pro Domain.
+
+    Die Auswahl hängt nur vom Sitzungsschlüssel ab (CRC32), damit Header
+    und navigator.userAgent des Kontexts in jedem Lauf übereinstimmen.
+
+    Args:
+        domain: URL oder Hostname
+        user_agents: Liste möglicher User-Agents
+
+    Returns:
+        str: User-Agent oder None bei leerer Liste
+    """
+    if not user_agents:
+        return None
+    return user_agents[zlib.crc32(session_key(domain).encode('utf-8')) % len(user_agents)]
+
+
+class SessionStore:
+    """
+    Verwaltet Kontext-Namen, Kontext-Optionen und gespeicherte Sitzungen.
+    """
+
+    CONTEXT_PREFIX = 'session:'
+
+    def __init__(self, directory: str, base_context: Dict[str, Any], user_agents: List[str],
+                 max_age_days: float = 7, consent_selectors: Optional[Dict[str, List[str]]] = None,
+                 max_idle: int = 1, idle_timeout: float = 120):
+        """
+        Args:
+            directory: Verzeichnis für die storage_state-Dateien
+            base_context: Basis-Optionen für neue Kontexte
+            user_agents: User-Agent-Liste (wie RotateUserAgentMiddleware)
+            max_age_days: Ältere Sitzungen werden nicht mehr geladen
+            consent_selectors: Selektoren für Consent-Buttons pro Domain
+            max_idle: Maximale Anzahl offener Kontexte ohne Page
+            idle_timeout: Ruhende Kontexte nach dieser Zeit schließen (Sekunden)
+        """
+        self.directory = directory
+        self.base_context = base_context
+        self.user_agents = user_agents
+        self.max_age = max_age_days * 86400
+        self.consent_selectors = consent_selectors or {}
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.saved = set()
+        # Sitzungsschlüssel -> (Kontext, Zeitpunkt der letzten Nutzung), älteste zuerst
+        self.idle: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self.crawler = None
+        self.task: Optional[task.LoopingCall] = None
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Erstellt den Store aus den Crawler-Settings."""
+        settings = crawler.settings
+        contexts = settings.getdict('PLAYWRIGHT_CONTEXTS')
+        max_contexts = settings.getint('PLAYWRIGHT_MAX_CONTEXTS')
+        # Standard: ein Platz bleibt für den Kontext einer neuen Domain frei
+        max_idle = settings.getint('SESSION_MAX_IDLE_CONTEXTS') \
+            or (max(0, max_contexts - len(contexts) - 1) if max_contexts else 8)
+        store = cls(
+            directory=settings.get('SESSION_STATE_DIR', 'data/state/sessions'),
+            base_context=dict(contexts.get('default', {})),
+            user_agents=settings.getlist('USER_AGENT_LIST'),
+            max_age_days=settings.getfloat('SESSION_MAX_AGE_DAYS', 7),
+            consent_selectors=settings.getdict('SESSION_CONSENT_SELECTORS'),
+            max_idle=max_idle,
+            idle_timeout=settings.getfloat('SESSION_IDLE_TIMEOUT', 120),
+        )
+        store.crawler = crawler
+        crawler.signals.connect(store.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(store.spider_closed, signal=signals.spider_closed)
+        return store
+
+    def spider_opened(self, spider):
+        """Startet die periodische Prüfung ruhender Kontexte."""
+        self.task = task.LoopingCall(lambda: deferred_from_coro(self._trim()))
+        self.task.start(1.0, now=False)
+
+    def spider_closed(self, spider):
+        """Stoppt die Prüfung (die Kontexte schließt scrapy-playwright)."""
+        if self.task and self.task.running:
+            self.task.stop()
+        self.idle.clear()
+
+    def state_path(self, key: str) -> str:
+        """Pfad der storage_state-Datei einer Domain."""
+        return os.path.join(self.directory, f'{key}.json')
+
+    def has_state(self, key: str) -> bool:
+        """Prüft ob eine gültige (nicht abgelaufene) Sitzung vorliegt."""
+        path = self.state_path(key)
+        try:
+            return time.time() - os.path.getmtime(path) < self.max_age
+        except OSError:
+            return False
+
+    def request_meta(self, url: str) -> Dict[str, Any]:
+        """
+        Liefert die Playwright-Meta-Daten für den Kontext einer Domain.
+
+        Args:
+            url: Ziel-URL des Requests
+
+        Returns:
+            Dict: playwright_context, playwright_context_kwargs und session_key
+        """
+        key = session_key(url)
+        kwargs = dict(self.base_context)
+
+        user_agent = user_agent_for_domain(key, self.user_agents)
+        if user_agent:
+            kwargs['user_agent'] = user_agent
+        if self.has_state(key):
+            kwargs['storage_state'] = self.state_path(key)
+
+        return {
+            'playwright_context': f'{self.CONTEXT_PREFIX}{key}',
+            'playwright_context_kwargs': kwargs,
+            'session_key': key,
+        }
+
+    async def accept_consent(self, page, key: str) -> bool:
+        """
+        Klickt den Consent-Button, falls noch keine Sitzung gespeichert ist.
+
+        Consent-Dialoge liegen oft in iframes, daher werden alle Frames
+        durchsucht.
+
+        Args:
+            page: Playwright-Page
+            key: Sitzungsschlüssel der Domain
+
+        Returns:
+            bool: True wenn ein Button geklickt wurde
+        """
+        if key in self.saved or self.has_state(key):
+            return False
+
+        selectors = self.consent_selectors.get(key, [])
+        for selector in selectors:
+            for frame in page.frames:
+                try:
+                    await frame.click(selector, timeout=1000)
+                    self.logger.debug("Consent akzeptiert für %s (%s)", key, selector)
+                    return True
+                except Exception:
+                    continue
+        return False
+
+    async def release(self, context, key: Optional[str], success: bool):
+        """
+        Speichert die Sitzung und merkt den Kontext als ruhend vor, wenn er ungenutzt ist.
+
+        Der Kontext bleibt offen, damit weitere Requests der Domain die warme
+        Sitzung nutzen; geschlossen wird er erst durch _trim().
+
+        Args:
+            context: Playwright-BrowserContext der Page
+            key: Sitzungsschlüssel der Domain
+            success: Ob der Besuch erfolgreich war
+        """
+        if context is None or not key:
+            return
+
+        try:
+            if success and key not in self.saved:
+                tmp_path = f'{self.state_path(key)}.tmp'
+                await context.storage_state(path=tmp_path)
+                os.replace(tmp_path, self.state_path(key))
+                self.saved.add(key)
+                self.logger.debug("Sitzung gespeichert: %s", key)
+        except Exception as e:
+            self.logger.debug("Sitzung %s konnte nicht gesichert werden: %s", key, e)
+
+        if not context.pages:
+            self.idle.pop(key, None)
+            self.idle[key] = (context, time.monotonic())
+        await self._trim()
+
+    def _contended(self) -> bool:
+        """
+        Prüft ob ein Request auf einen Kontext-Platz von scrapy-playwright wartet.
+
+        Nutzt context_semaphore des Handlers und dessen (private) Warteliste;
+        Plätze, die der MemoryPressureController belegt, zählen mit.
+        """
+        semaphore = getattr(playwright_handler(self.crawler), 'context_semaphore', None) if self.crawler else None
+        return semaphore is not None and semaphore.locked() and bool(getattr(semaphore, '_waiters', None))
+
+    async def _trim(self):
+        """Schließt ruhende Kontexte (LRU) über dem Limit, nach Timeout oder bei Wartenden."""
+        now = time.monotonic()
+        for key, (context, since) in list(self.idle.items()):
+            if context.pages:
+                # Wieder in Benutzung; release() trägt ihn erneut ein
+                del self.idle[key]
+            elif now - since > self.idle_timeout:
+                await self._close(key)
+
+        while self.idle and (len(self.idle) > self.max_idle or self._contended()):
+            await self._close(next(iter(self.idle)))
+
+    async def _close(self, key: str):
+        """Schließt den ruhenden Kontext einer Domain."""
+        entry = self.idle.pop(key, None)
+        if entry is None or entry[0].pages:
+            return
+        context = entry[0]
+        try:
+            await context.close()
+        except Exception as e:
+            self.logger.debug("Kontext %s konnte nicht geschlossen werden: %s", key, e)
@@ -66,6 +66,221 @@ PLAYWRIGHT_CONTEXTS = {
     }
 }
 
+# ---------------------------------------------
+# ADAPTIVE WARTESTRATEGIE (JS-LASTIGE SEITEN)
+# ---------------------------------------------
+
+# Inhalts-Selektor oder DOM-Stabilität statt networkidle + feste Pause
+READINESS_ENABLED = True
+
+# Selektoren, deren Erscheinen den Hauptinhalt signalisiert (pro Domain)
+READINESS_SELECTORS = {
+    'zdf.de': 'main article, main [class*="teaser"]',
+    'spiegel.de': 'main article',
+    'zeit.de': 'main article',
+}
+
+# DOM gilt als stabil nach dieser Zeit ohne Änderungen (Millisekunden)
+READINESS_QUIET_MS = 500
+
+# Grenzen der gelernten Obergrenze pro Domain (Millisekunden)
+READINESS_MIN_WAIT_MS = 1500
+READINESS_MAX_WAIT_MS = 10000
+
+# Gelernte Ladezeiten pro Domain (wird zwischen Läufen gecacht)
+READINESS_STATE_FILE = 'data/state/readiness.json'
+
+# ---------------------------------------------
+# API-ERKENNUNG (OHNE RENDERING)
+# ---------------------------------------------
+
+# JSON-Antworten (XHR/fetch) beim Rendern mitschneiden, den Endpunkt mit dem
+# Inhalt der Seite pro Domain lernen und später direkt per HTTP abrufen
+# (Pflichtfelder wie beim Fast Path: FASTPATH_REQUIRED_FIELDS)
+API_DISCOVERY_ENABLED = True
+
+# Felder, die auf JSON-Pfade abgebildet werden (pro Item-Art)
+API_DISCOVERY_FIELDS = {
+    'webpages': ['title', 'description', 'keywords'],
+    'news': ['title', 'description', 'author', 'publish_date', 'category', 'article_text'],
+}
+
+# Größere JSON-Antworten werden nicht ausgewertet (Bytes)
+API_DISCOVERY_MAX_BYTES = 2 * 1024 * 1024
+
+# Ein Endpunkt wird ab so vielen übereinstimmenden Beobachtungen genutzt ...
+API_DISCOVERY_MIN_CONFIRMATIONS = 2
+
+# ... und nach so vielen Fehlschlägen in Folge verworfen
+API_DISCOVERY_MAX_FAILURES = 3
+
+# Gelernte Endpunkte pro Domain (wird zwischen Läufen gecacht)
+API_DISCOVERY_STATE_FILE = 'data/state/api_endpoints.json'
+
+# ---------------------------------------------
+# BROWSER-PERFORMANCE-KENNZAHLEN
+# ---------------------------------------------
+
+# TTFB, DOMContentLoaded, Load, Requests und übertragene Bytes jeder
+# gerenderten Seite auslesen (Zusammenfassung pro Domain in den Stats)
+PERF_METRICS_ENABLED = True
+
+# Kennzahlen jeder Seite als JSON Lines
+PERF_METRICS_FILE = 'data/perf_metrics.jsonl'
+
+# Anzahl der größten Drittanbieter-Hosts pro Seite und Domain
+PERF_METRICS_TOP_HOSTS = 5
+
+# ---------------------------------------------
+# PERSISTENTE SITZUNGEN PRO DOMAIN
+# ---------------------------------------------
+
+# Eigener Playwright-Kontext mit gespeicherten Cookies/Storage pro Domain
+# und fester User-Agent pro Domain (statt zufälliger Rotation)
+SESSION_PER_DOMAIN = True
+
+# storage_state-Dateien pro Domain (wird zwischen Läufen gecacht)
+SESSION_STATE_DIR = 'data/state/sessions'
+
+# Ältere Sitzungen werden verworfen und neu aufgebaut (Tage)
+SESSION_MAX_AGE_DAYS = 7
+
+# Ruhende Domain-Kontexte bleiben offen (0 = PLAYWRIGHT_MAX_CONTEXTS minus
+# Start-Kontexte minus 1); geschlossen wird der älteste, sobald ein Request
+# auf einen Kontext-Platz wartet
+SESSION_MAX_IDLE_CONTEXTS = 0
+
+# Ungenutzte Domain-Kontexte nach dieser Zeit schließen (Sekunden)
+SESSION_IDLE_TIMEOUT = 120
+
+# Consent-Buttons, die beim ersten Besuch einer Domain geklickt werden
+SESSION_CONSENT_SELECTORS = {
+    'spiegel.de': ['button[title="Zustimmen"]', 'button[title="Akzeptieren und weiter"]'],
+    'zeit.de': ['button[title="Einverstanden"]', 'button[title="Akzeptieren und weiter"]'],
+    'welt.de': ['button[title="Alle akzeptieren"]'],
+    'faz.net': ['button[title="ZUSTIMMEN"]', 'button[title="Zustimmen"]'],
+    'handelsblatt.com': ['button[title="Alle akzeptieren"]'],
+}
+
+# ---------------------------------------------
+# FAST PATH (OHNE RENDERING)
+# ---------------------------------------------
+
+# Seiten zuerst per einfachem HTTP laden und aus JSON-LD/Microdata/OpenGraph
+# extrahieren; gerendert wird nur, wenn Pflichtfelder fehlen
+# (Seiten aus dem Fast Path haben keinen Screenshot)
+FASTPATH_ENABLED = True
+
+# Pflichtfelder pro Item-Art, damit ein Item ohne Rendering erzeugt wird
+FASTPATH_REQUIRED_FIELDS = {
+    'webpages': ['title', 'description'],
+    'news': ['title', 'publish_date', 'article_text'],
+}
+
+# Domains unterhalb dieser Erfolgsquote werden direkt gerendert ...
+FASTPATH_MIN_HIT_RATE = 0.3
+
+# ... mit einer Probe über den Fast Path alle n Seiten
+FASTPATH_PROBE_INTERVAL = 20
+
+# Gelernte Erfolgsquoten pro Domain (wird zwischen Läufen gecacht)
+FASTPATH_STATE_FILE = 'data/state/fastpath.json'
+
+# ---------------------------------------------
+# INHALTS-PRÜFUNG VOR DEM RENDERING
+# ---------------------------------------------
+
+# Nicht-HTML- und übergroße Dokumente nur mit Metadaten erfassen
+# (Abbruch nach den Headern statt vollständigem Download im Browser)
+CONTENT_GATE_ENABLED = True
+
+# Größere Dokumente werden nicht gerendert (Bytes)
+CONTENT_GATE_MAX_BYTES = 5 * 1024 * 1024
+
+# Nur diese MIME-Typen werden gerendert
+CONTENT_GATE_ALLOWED_TYPES = ['text/html', 'application/xhtml+xml']
+
+# URLs mit diesen Endungen werden ohne Browser geladen
+CONTENT_GATE_BINARY_EXTENSIONS = [
+    '.pdf', '.zip', '.gz', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.mp3', '.mp4', '.webm', '.avi',
+]
+
+# ---------------------------------------------
+# ZEITBUDGET (DEADLINE DES WORKFLOWS)
+# ---------------------------------------------
+
+# Requests nach Wert und geschätzter Ladezeit zulassen und vor der Deadline
+# sauber beenden (nur aktiv, wenn eine Deadline gesetzt ist)
+CRAWL_BUDGET_ENABLED = True
+
+# Deadline als Unix-Zeit oder ISO-Zeitstempel (setzt der Workflow)
+CRAWL_DEADLINE = os.getenv('CRAWL_DEADLINE')
+
+# Alternativ/zusätzlich: maximale Laufzeit dieses Spiders (Minuten, 0 = keine)
+CRAWL_BUDGET_MINUTES = float(os.getenv('CRAWL_BUDGET_MINUTES', 0))
+
+# So lange vor der Deadline werden keine neuen Requests mehr gestartet (Sekunden)
+CRAWL_BUDGET_MARGIN_SECONDS = 120
+
+# Basis-Priorität pro Callback (Startseiten vor Artikeln)
+CRAWL_BUDGET_PRIORITIES = {
+    'parse': 100,
+    'parse_article': 50,
+}
+
+# Angenommene Ladezeiten unbekannter Domains (Sekunden)
+CRAWL_BUDGET_DEFAULT_RENDER_SECONDS = 8.0
+CRAWL_BUDGET_DEFAULT_HTTP_SECONDS = 1.0
+
+# Prüfintervall (Sekunden)
+CRAWL_BUDGET_CHECK_INTERVAL = 10
+
+# Gelernte Ladezeiten pro Domain (wird zwischen Läufen gecacht)
+CRAWL_BUDGET_STATE_FILE = 'data/state/render_times.json'
+
+# ---------------------------------------------
+# CHECKPOINTS UND FORTSETZEN
+# ---------------------------------------------
+
+# Offene Requests, Duplikatfilter und Export-Stand regelmäßig sichern
+CHECKPOINT_ENABLED = True
+
+# Checkpoints pro Spider (wird zwischen Läufen gecacht)
+CHECKPOINT_DIR = 'data/state/checkpoint'
+
+# Intervall zwischen zwei Checkpoints (Sekunden)
+CHECKPOINT_INTERVAL = 60
+
+# 'auto': abgebrochenen Lauf fortsetzen, falls ein Checkpoint vorliegt;
+# 'true': fortsetzen erzwingen; 'false': immer neu beginnen
+# (z.B. scrapy crawl webspider -s CHECKPOINT_RESUME=false)
+CHECKPOINT_RESUME = os.getenv('CHECKPOINT_RESUME', 'auto')
+
+# ---------------------------------------------
+# CIRCUIT BREAKER PRO DOMAIN
+# ---------------------------------------------
+
+# Domains nach wiederholten Fehlern (403/429, 5xx, Timeouts, TLS, DNS)
+# vorübergehend sperren, statt weiter Browser-Slots zu belegen
+CIRCUIT_BREAKER_ENABLED = True
+
+# Fehler in Folge, ab denen eine Domain gesperrt wird
+CIRCUIT_BREAKER_THRESHOLD = 5
+
+# Sperrdauer, danach einzelne Proben (verdoppelt sich bis zur Obergrenze, Sekunden)
+CIRCUIT_BREAKER_COOLDOWN = 300
+CIRCUIT_BREAKER_MAX_COOLDOWN = 3600
+
+# Gleichzeitige Proben einer halb offenen Domain
+CIRCUIT_BREAKER_HALF_OPEN_PROBES = 1
+
+# Gesperrte Domains (wird zwischen Läufen gecacht)
+CIRCUIT_BREAKER_STATE_FILE = 'data/state/breakers.json'
+
+# Fehlerbericht des Laufs für das Dashboard
+CIRCUIT_BREAKER_REPORT_FILE = 'data/failures.json'
+
 # ---------------------------------------------
 # GENERAL SCRAPY EINSTELLUNGEN
 # ---------------------------------------------
@@ -77,6 +292,20 @@ ROBOTSTXT_OBEY = False
 CONCURRENT_REQUESTS = int(os.getenv('CONCURRENT_REQUESTS', 2))
 CONCURRENT_REQUESTS_PER_DOMAIN = 1
 
+# Getrennte Lanes für Browser-Renderings und einfache HTTP-Requests
+# (Feeds, API-Abrufe, Fast Path); jede Lane hat ein eigenes Limit
+DOWNLOADER = 'crawler.downloader.LaneDownloader'
+
+# Größe der Lanes (None = browser aus PLAYWRIGHT_MAX_CONTEXTS, http aus CONCURRENT_REQUESTS);
+# Requests wählen eine Lane über meta['download_lane']
+DOWNLOAD_LANES = {
+    'browser': None,
+    'http': None,
+}
+
+# Requests, die zusätzlich auf eine volle Lane warten dürfen
+DOWNLOAD_LANE_BACKLOG = 4
+
 # Download-Verzögerung zwischen Requests (in Sekunden)
 DOWNLOAD_DELAY = 3
 RANDOMIZE_DOWNLOAD_DELAY = 0.5
@@ -124,13 +353,19 @@ USER_AGENT_LIST = [
 
 # Spider-Middlewares aktivieren
 SPIDER_MIDDLEWARES = {
+    'crawler.middlewares.CheckpointMiddleware': 20,  # Checkpoints zum Fortsetzen abgebrochener Läufe
     'crawler.middlewares.CrawlerSpiderMiddleware': 543,
 }
 
 # Downloader-Middlewares aktivieren
 DOWNLOADER_MIDDLEWARES = {
+    'crawler.middlewares.CrawlBudgetMiddleware': 100,  # Zeitbudget vor allen anderen prüfen
     'crawler.middlewares.CrawlerDownloaderMiddleware': 543,
     'crawler.middlewares.RotateUserAgentMiddleware': 400,  # User-Agent-Rotation
+    'crawler.middlewares.BrowserRecoveryMiddleware': 560,  # Neuversuch nach Browser-Absturz
+    'crawler.middlewares.ContentGateMiddleware': 580,  # Kein Rendering für PDFs/Bilder/große Dokumente
+    'crawler.middlewares.CircuitBreakerMiddleware': 590,  # Sieht jeden Fehlversuch (auch vor Retries)
+    'crawler.middlewares.HarReplayMiddleware': 600,  # Nach der Inhalts-Prüfung (übernimmt deren Init-Callback)
 }
 
 # ---------------------------------------------
@@ -138,11 +373,99 @@ DOWNLOADER_MIDDLEWARES = {
 # ---------------------------------------------
 
 # Item-Processing-Pipeline aktivieren
+# FusedExportPipeline vereint CrawlerPipeline, DuplicateFilterPipeline und
+# CSVExportPipeline in einem Durchlauf mit gebündeltem Schreiben
 ITEM_PIPELINES = {
-    'crawler.pipelines.CrawlerPipeline': 300,
-    'crawler.pipelines.CSVExportPipeline': 400,
+    'crawler.pipelines.ImagePipeline': 250,  # Vor dem Export (Bildpfade in der CSV), Duplikate vorab verworfen
+    'crawler.pipelines.FusedExportPipeline': 300,
+    'crawler.pipelines.SearchIndexPipeline': 400,
+    'crawler.pipelines.LinkGraphPipeline': 500,
+}
+
+# Zeilen pro Schreibvorgang der CSV-Dateien
+PIPELINE_BATCH_SIZE = 50
+
+# Ab so vielen noch nicht geschriebenen Batches wird der Spider gedrosselt
+PIPELINE_MAX_PENDING_BATCHES = 4
+
+# Unvollständige Batches spätestens nach dieser Zeit schreiben (Sekunden)
+PIPELINE_FLUSH_INTERVAL = 5.0
+
+# Volltext-Index über alle Läufe (wird zwischen Läufen gecacht)
+# Abfrage: python -m crawler.search "suchbegriffe" --domain bund.de --since 7d
+SEARCH_INDEX_ENABLED = True
+SEARCH_INDEX_PATH = 'data/state/search.sqlite3'
+
+# Linkgraph der internen Links über alle Läufe (wird zwischen Läufen gecacht)
+# Abfrage: python -m crawler.linkgraph top --limit 20
+LINK_GRAPH_ENABLED = True
+LINK_GRAPH_DIR = 'data/state/linkgraph'
+
+# Exportierte URLs (nach PageRank) und deren Prioritäten 0..LINK_GRAPH_PRIORITY_RANGE
+LINK_GRAPH_EXPORT_LIMIT = 10000
+LINK_GRAPH_PRIORITY_RANGE = 20
+LINK_GRAPH_DAMPING = 0.85
+
+# Exportierte Prioritäten beim Erstellen neuer Requests berücksichtigen
+LINK_GRAPH_PRIORITIES = True
+
+# ---------------------------------------------
+# ARTIKEL-EXTRAKTION
+# ---------------------------------------------
+
+# Worker-Prozesse für die Volltext-Extraktion (0 = im Reactor-Prozess)
+ARTICLE_EXTRACTION_WORKERS = int(os.getenv('ARTICLE_EXTRACTION_WORKERS', 2))
+
+# Maximale Anzahl verfolgter Artikel-Links pro Startseite
+ARTICLE_MAX_PER_SITE = int(os.getenv('ARTICLE_MAX_PER_SITE', 5))
+
+# ---------------------------------------------
+# AUSSCHREIBUNGSPORTALE
+# ---------------------------------------------
+
+# Cursor-Datei für inkrementelle Tender-Crawls (wird zwischen Läufen gecacht)
+TENDER_STATE_FILE = os.getenv('TENDER_STATE_FILE', 'data/state/tender_cursors.json')
+
+# Maximale Anzahl Listenseiten pro Portal und Lauf
+TENDER_MAX_PAGES = int(os.getenv('TENDER_MAX_PAGES', 20))
+
+# Anzahl gemerkter Einträge pro Portal (für Änderungserkennung)
+TENDER_SEEN_LIMIT = 5000
+
+# Portal-Konfiguration: Start-URL (neueste zuerst sortiert) und Selektoren
+TENDER_PORTALS = {
+    'bund.de': {
+        'start_url': 'https://www.service.bund.de/Content/DE/Ausschreibungen/Suche/Formular.html?view=processForm&nn=4641514&sortOrder=dateOfIssue_dt+desc',
+        'entry_selector': 'ul.result-list > li',
+        'link_selector': 'a::attr(href)',
+        'title_selector': 'h3::text',
+        'next_page_selector': 'li.next a::attr(href)',
+        'tender_id_pattern': r'/(\d+)\.html',
+    },
 }
 
+# ---------------------------------------------
+# DAEMON-MODUS (scrapy crawl crawldaemon)
+# ---------------------------------------------
+
+# Lokaler HTTP-Endpunkt für URL-Batches (nur localhost)
+DAEMON_HOST = '127.0.0.1'
+DAEMON_PORT = int(os.getenv('DAEMON_PORT', 6810))
+
+# Einzige Browser-Origin (z.B. Dashboard), die den Endpunkt nutzen darf;
+# leer = Anfragen mit Origin-Header werden abgelehnt
+DAEMON_ALLOWED_ORIGIN = os.getenv('DAEMON_ALLOWED_ORIGIN', '')
+
+# Token für den Header X-Daemon-Token (leer = nicht erforderlich)
+DAEMON_TOKEN = os.getenv('DAEMON_TOKEN', '')
+
+# Spool-Verzeichnis für Batch-Dateien und Prüfintervall (Sekunden)
+DAEMON_SPOOL_DIR = 'data/spool'
+DAEMON_SPOOL_INTERVAL = 1.0
+
+# Ergebnisse pro Batch (<batch_id>.json)
+DAEMON_RESULTS_DIR = 'data/batches'
+
 # ---------------------------------------------
 # LOGGING KONFIGURATION
 # ---------------------------------------------
@@ -156,6 +479,26 @@ LOG_FORMAT = '%(levelname)s: %(message)s'
 # Log-Datei aktivieren (optional)
 # LOG_FILE = 'scrapy.log'
 
+# Log-Ausgabe über eine Queue in einem eigenen Thread (AsyncLogging)
+LOG_ASYNC = True
+
+# Gleichartige Meldungen (gleiche Log-Zeile im Code) begrenzen: pro Intervall
+# werden LOG_RATE_LIMIT_BURST durchgelassen, danach jede n-te (Sekunden / n)
+LOG_RATE_LIMIT_ENABLED = True
+LOG_RATE_LIMIT_BURST = 20
+LOG_RATE_LIMIT_INTERVAL = 60
+LOG_RATE_LIMIT_SAMPLE = 100
+
+# Meldungen ab diesem Level werden nie begrenzt
+LOG_RATE_LIMIT_EXEMPT_LEVEL = 'ERROR'
+
+# Alle Meldungen zusätzlich als JSON-Zeilen mit Kontext (Spider, Domain, URL)
+LOG_JSON_FILE = os.getenv('LOG_JSON_FILE', 'data/crawl_log.jsonl')
+
+# Mindest-Level der JSON-Zeilen (None = LOG_LEVEL); niedriger als LOG_LEVEL
+# lässt auch diese Records wieder durch den Queue-Handler
+LOG_JSON_LEVEL = None
+
 # ---------------------------------------------
 # FEEDS/EXPORT KONFIGURATION
 # ---------------------------------------------
@@ -188,9 +531,14 @@ HTTPCACHE_ENABLED = False
 REQUEST_FINGERPRINTER_IMPLEMENTATION = '2.7'
 
 # Memory-Optimierungen
+# MEMUSAGE ist nur noch die Notbremse; vorher drosselt der MemoryPressureController.
+# MEMUSAGE misst nur den Crawler-Prozess, MEMORY_PRESSURE_LIMIT_MB den Crawler
+# plus Chromium. Mit dem früheren Limit von 512 MB hätte MemoryUsage den Crawl
+# beenden können, bevor die erste Stufe (70 % von 1024 MB) greift; auf Höhe von
+# MEMORY_PRESSURE_LIMIT_MB löst es erst aus, wenn alle Stufen aktiv sind.
 MEMUSAGE_ENABLED = True
-MEMUSAGE_LIMIT_MB = 512  # Für GitHub Actions begrenzt
-MEMUSAGE_WARNING_MB = 400
+MEMUSAGE_LIMIT_MB = 1024
+MEMUSAGE_WARNING_MB = 768
 
 # ---------------------------------------------
 # EXTENSIONS
@@ -200,5 +548,162 @@ MEMUSAGE_WARNING_MB = 400
 EXTENSIONS = {
     'scrapy.extensions.telnet.TelnetConsole': None,  # Deaktivieren für Sicherheit
     'scrapy.extensions.memusage.MemoryUsage': 500,
+    'crawler.extensions.BrowserLifecycleManager': 510,
+    'crawler.extensions.PageHistoryRecorder': 520,
+    'crawler.extensions.MemoryPressureController': 530,
+    'crawler.extensions.AsyncLogging': 540,
+    'crawler.extensions.WarcArchiver': 550,
+}
+
+# ---------------------------------------------
+# BROWSER-LEBENSZYKLUS
+# ---------------------------------------------
+
+# Browser regelmäßig recyceln um Speicherwachstum zu begrenzen
+BROWSER_RECYCLE_ENABLED = True
+
+# Neustart nach so vielen gerenderten Seiten
+BROWSER_MAX_PAGES = 200
+
+# Neustart wenn Chromium-Prozesse zusammen mehr RSS belegen (Megabyte)
+BROWSER_MAX_RSS_MB = 350
+
+# Prüfintervall und maximale Wartezeit für das Abarbeiten laufender Renders (Sekunden)
+BROWSER_CHECK_INTERVAL = 10
+BROWSER_DRAIN_TIMEOUT = 60
+
+# Browser gilt als hängend, wenn so lange kein Render abgeschlossen wurde (Sekunden)
+BROWSER_HANG_TIMEOUT = 120
+
+# Neuversuche für Requests, die durch einen Browser-Absturz fehlschlagen
+BROWSER_CRASH_RETRY_TIMES = 2
+
+# ---------------------------------------------
+# LASTABWURF UNTER SPEICHERDRUCK
+# ---------------------------------------------
+
+# Stufenweise drosseln statt den Crawl bei MEMUSAGE_LIMIT_MB abzubrechen
+MEMORY_PRESSURE_ENABLED = True
+
+# Speicherbudget für Crawler-Prozess plus Chromium (Megabyte)
+MEMORY_PRESSURE_LIMIT_MB = 1024
+
+# Anteile des Budgets, ab denen Stufe 1, 2 und 3 greifen
+MEMORY_PRESSURE_THRESHOLDS = [0.7, 0.8, 0.9]
+
+# Eine Stufe wird zurückgenommen, wenn der Verbrauch so viele Prüfungen lang
+# um mindestens diesen Anteil unter ihrer Schwelle lag
+MEMORY_PRESSURE_RECOVERY_MARGIN = 0.1
+MEMORY_PRESSURE_RECOVERY_CHECKS = 3
+
+# Prüfintervall (Sekunden)
+MEMORY_PRESSURE_CHECK_INTERVAL = 5
+
+# ---------------------------------------------
+# SEITENHISTORIE
+# ---------------------------------------------
+
+# Jede Beobachtung einer Seite append-only speichern (über alle Läufe)
+# Abfrage/Kompaktierung: python -m crawler.history versions|show|changes|compact
+HISTORY_ENABLED = True
+
+# Segmente und Index (wird zwischen Läufen gecacht)
+HISTORY_DIR = 'data/state/history'
+
+# Neues Segment ab dieser Größe (Megabyte)
+HISTORY_SEGMENT_MAX_MB = 64
+
+# HTML jeder Version speichern (als Delta zum letzten Keyframe der URL)
+HISTORY_STORE_HTML = True
+
+# Neuer Keyframe, wenn das Delta größer als dieser Anteil des vollen HTML ist
+HISTORY_KEYFRAME_RATIO = 0.5
+
+# Größeres HTML ohne Delta-Berechnung als Keyframe speichern (Kilobyte)
+HISTORY_DELTA_MAX_KB = 4096
+
+# ---------------------------------------------
+# WARC-ARCHIV
+# ---------------------------------------------
+
+# Jede Seite als WARC-Record archivieren (Original-Header, Body bzw. gerendertes DOM)
+# Abfrage: python -m crawler.warc list|get <url>
+WARC_ENABLED = False
+
+# WARC-Dateien und CDX-Index (index.cdx)
+WARC_DIR = 'data/warc'
+
+# Präfix der Dateinamen
+WARC_PREFIX = 'crawl'
+
+# Neue Datei ab dieser Größe (Megabyte)
+WARC_MAX_SIZE_MB = 1024
+
+# Bekannte Payload-Digests für revisit-Records über Läufe hinweg
+# (wird zwischen Läufen gecacht; leer = nur innerhalb eines Laufs).
+# Digests, deren WARC-Datei in WARC_DIR fehlt, werden beim Start verworfen
+WARC_DIGESTS_FILE = 'data/state/warc_digests.json'
+
+# ---------------------------------------------
+# HAR-AUFZEICHNUNG UND -WIEDERGABE
+# ---------------------------------------------
+
+# Reproduzierbare Render-Läufe ohne Netzwerk: Startseiten aufzeichnen mit
+# python -m crawler.har record, dann z.B.
+# scrapy crawl webspider -s HAR_REPLAY=1 -s DOWNLOAD_DELAY=0
+HAR_REPLAY = False
+
+# HAR-Dateien (eine pro Domain)
+HAR_DIR = 'data/har'
+
+# Faktor für die aufgezeichneten Latenzen (1.0 = wie aufgezeichnet, 0 = ohne Verzögerung)
+HAR_REPLAY_LATENCY_SCALE = 1.0
+
+# Unbekannte URLs über die URL ohne Query zuordnen (Cache-Busting-Parameter)
+HAR_REPLAY_IGNORE_QUERY = True
+
+# Aufzeichnung: Ladezustand und zusätzliche Wartezeit für nachgeladene Inhalte
+HAR_RECORD_WAIT_UNTIL = 'networkidle'
+HAR_RECORD_SETTLE_MS = 2000
+
+# ---------------------------------------------
+# ARTIKELBILDER
+# ---------------------------------------------
+
+# image_urls der Artikel herunterladen und inhaltsadressiert ablegen;
+# Pfade und Abmessungen landen in den Feldern images und image_paths
+IMAGES_ENABLED = os.getenv('IMAGES_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Ablage der Bilder (full/ und thumbs/)
+IMAGES_DIR = 'data/images'
+
+# Zuordnung URL -> Bild über Läufe hinweg (wird zwischen Läufen gecacht)
+IMAGES_MAP_FILE = 'data/state/image_map.json'
+
+# Gleichzeitige Bild-Downloads (HTTP-Lane, ohne Rendering)
+IMAGES_CONCURRENCY = 4
+
+# Größere Bilder werden abgebrochen (Bytes)
+IMAGES_MAX_BYTES = 5 * 1024 * 1024
+
+# Erlaubte Bildformate (am Dateikopf erkannt)
+IMAGES_ALLOWED_TYPES = ['jpg', 'png', 'gif', 'webp']
+
+# Höchstens so viele Bilder pro Artikel
+IMAGES_MAX_PER_ITEM = 5
+
+# Timeout eines Bild-Downloads (Sekunden)
+IMAGES_TIMEOUT = 20
+
+# So lange wartet ein Artikel höchstens auf seine Bilder, bevor er ohne die
+# noch laufenden Downloads exportiert wird (Sekunden, 0 = nur bekannte Bilder)
+IMAGES_ITEM_WAIT = 5
+
+# Vorschaubilder (Name -> maximale Kantenlänge in Pixel, benötigt Pillow)
+IMAGES_THUMBS = {
+    'small': 320,
 }
+IMAGES_THUMB_QUALITY = 80
 
+# Threads für die Vorschaubilder
+IMAGES_THUMB_WORKERS = 2
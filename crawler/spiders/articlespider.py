@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Spider für Nachrichtenartikel.
+
+Dieser Spider crawlt die Startseiten wie der WebSpider, folgt aber
+zusätzlich den Artikel-Links und erzeugt daraus NewsArticleRecords.
+Metadaten stammen aus JSON-LD/OpenGraph, der Volltext wird nur bei
+Bedarf per Boilerplate-Entfernung in einem Prozess-Pool extrahiert.
+"""
+
+from typing import Dict, Any, Generator, List
+from urllib.parse import urljoin
+
+from scrapy.http import Request, Response
+from crawler.items import NewsArticleRecord
+from crawler.extraction import (
+    ArticleTextExtractor,
+    extract_article_metadata,
+    looks_like_article_url,
+)
+from crawler.spiders.webspider import WebSpider
+
+
+class ArticleSpider(WebSpider):
+    """
+    Spider für Nachrichtenartikel der konfigurierten Startseiten.
+
+    Features:
+    - Erkennung von Artikel-Links auf den Startseiten
+    - Metadaten aus JSON-LD (NewsArticle) und OpenGraph
+    - Volltext-Extraktion außerhalb des Reactor-Threads
+    """
+
+    name = 'articlespider'
+
+    # Artikel können aus gelernten JSON-APIs erzeugt werden, Startseiten nicht
+    # (deren Artikel-Links stammen aus dem HTML)
+    api_callbacks = {'parse_article': 'news'}
+
+    def __init__(self, *args, **kwargs):
+        """
+        Spider-Initialisierung.
+
+        Args:
+            *args: Variable Argumente
+            **kwargs: Keyword-Argumente (url_list für custom URLs)
+        """
+        super(ArticleSpider, self).__init__(*args, **kwargs)
+        self.max_articles_per_site = 5
+        self.text_extractor = ArticleTextExtractor(max_workers=0)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        """Erstellt den Spider und konfiguriert die Text-Extraktion aus den Settings."""
+        spider = super(ArticleSpider, cls).from_crawler(crawler, *args, **kwargs)
+        spider.max_articles_per_site = crawler.settings.getint('ARTICLE_MAX_PER_SITE', 5)
+        spider.text_extractor = ArticleTextExtractor(
+            max_workers=crawler.settings.getint('ARTICLE_EXTRACTION_WORKERS', 2)
+        )
+        return spider
+
+    async def parse(self, response: Response) -> Generator[Dict[str, Any], None, None]:
+        """
+        Parst die Startseite und erzeugt Requests für die Artikel-Links.
+
+        Args:
+            response: Scrapy-Response der Startseite
+
+        Yields:
+            WebPageRecord: Daten der Startseite
+            Request: Requests für die gefundenen Artikel
+        """
+        async for result in super(ArticleSpider, self).parse(response):
+            yield result
+
+        for request in self._article_requests(response):
+            yield request
+
+    def _article_requests(self, response: Response) -> List[Request]:
+        """
+        Erzeugt die Requests für die Artikel-Links einer Seite.
+
+        Args:
+            response: Scrapy-Response der Übersichtsseite
+
+        Returns:
+            List[Request]: Requests für parse_article (bei Fast Path zuerst ohne Rendering)
+        """
+        return [
+            self._page_request(url, self.parse_article, include_page=False)
+            for url in self._article_links(response)
+        ]
+
+    def _follow_requests(self, callback: str, response: Response) -> List[Request]:
+        """Folgt auch bei Startseiten aus dem Fast Path den Artikel-Links."""
+        if callback == 'parse':
+            return self._article_requests(response)
+        return []
+
+    async def _fast_item(self, callback: str, response: Response):
+        """Erzeugt Artikel aus dem statischen HTML (JSON-LD, Microdata, OpenGraph)."""
+        if callback == 'parse_article':
+            return await self._article_record(response)
+        return await super(ArticleSpider, self)._fast_item(callback, response)
+
+    def _article_links(self, response: Response) -> List[str]:
+        """
+        Sammelt die Artikel-Links einer Seite.
+
+        Args:
+            response: Scrapy-Response der Übersichtsseite
+
+        Returns:
+            List[str]: Eindeutige Artikel-URLs (begrenzt pro Seite)
+        """
+        links = []
+        for link in response.css('a[href]::attr(href)').getall():
+            absolute_url = urljoin(response.url, link).split('#')[0]
+            if absolute_url in links:
+                continue
+            if self._is_allowed_domain(absolute_url) and looks_like_article_url(absolute_url):
+                links.append(absolute_url)
+                if len(links) >= self.max_articles_per_site:
+                    break
+        return links
+
+    async def parse_article(self, response: Response) -> Generator[Dict[str, Any], None, None]:
+        """
+        Parst eine Artikelseite in einen NewsArticleRecord.
+
+        Args:
+            response: Scrapy-Response der Artikelseite
+
+        Yields:
+            NewsArticleRecord: Extrahierte Artikeldaten
+        """
+        # Nur bei persistenten Sitzungen wird die Page übergeben
+        page = response.meta.get('playwright_page')
+        success = False
+
+        try:
+            await self._record_readiness(response, None)
+
+            item = await self._article_record(response)
+
+            if page and self.api:
+                self.api.learn(page, response.url, response.meta.get('domain', 'unknown'), item)
+
+            self.logger.debug("Article parsed: %s (%s words)", response.url, item.word_count)
+
+            success = response.status < 400
+            yield item
+
+        except Exception as e:
+            self.logger.error(f"Error parsing article {response.url}: {str(e)}")
+
+        finally:
+            await self._close_page(response.meta, page, success)
+
+    async def _article_record(self, response: Response) -> NewsArticleRecord:
+        """
+        Extrahiert einen Artikel aus dem (gerenderten oder statischen) HTML.
+
+        Args:
+            response: Scrapy-Response der Artikelseite
+
+        Returns:
+            NewsArticleRecord: Extrahierte Artikeldaten
+        """
+        metadata = extract_article_metadata(response)
+
+        # Volltext aus JSON-LD/Microdata (articleBody) bevorzugen, sonst extrahieren
+        article_text = metadata.pop('article_text', None)
+        if not article_text:
+            article_text = await self.text_extractor.extract(response.text)
+
+        title = metadata.get('title') or response.css('title::text').get()
+
+        return NewsArticleRecord(
+            title=title.strip() if title else None,
+            url=response.url,
+            domain=response.meta.get('domain'),
+            description=metadata.get('description'),
+            author=metadata.get('author'),
+            publish_date=metadata.get('publish_date'),
+            category=metadata.get('category'),
+            tags=metadata.get('tags', []),
+            article_text=article_text,
+            image_urls=metadata.get('image_urls', []),
+            word_count=len(article_text.split()) if article_text else 0,
+        )
+
+    def closed(self, reason):
+        """
+        Callback wenn Spider beendet wird.
+
+        Args:
+            reason: Grund für das Beenden des Spiders
+        """
+        self.text_extractor.shutdown()
+        super(ArticleSpider, self).closed(reason)
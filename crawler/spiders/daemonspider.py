@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+Daemon-Spider mit dauerhaft warmem Reactor und Browser.
+
+Der Spider beendet sich nicht, wenn keine Requests mehr anstehen, und
+nimmt URL-Batches über einen lokalen HTTP-Endpunkt oder ein
+Spool-Verzeichnis an. Dadurch entfallen Import, Reactor-Start und
+Browser-Start bei jedem Ad-hoc-Crawl.
+
+Start: scrapy crawl crawldaemon
+"""
+
+import os
+from typing import Dict, Any, Generator, List
+from urllib.parse import urlparse
+
+from itemadapter import ItemAdapter, is_item
+from twisted.internet import reactor, task
+from twisted.web import server
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider
+from scrapy.http import Request, Response
+from crawler.daemon import Batch, BatchRegistry, DaemonResource, batch_url_released, read_url_file
+from crawler.spiders.webspider import WebSpider
+
+
+class CrawlDaemonSpider(WebSpider):
+    """
+    Langlaufender Spider für URL-Batches.
+
+    Features:
+    - HTTP-Endpunkt auf localhost (DAEMON_HOST/DAEMON_PORT)
+    - Spool-Verzeichnis für Batch-Dateien (.txt oder .json)
+    - Ergebnisse pro Batch in DAEMON_RESULTS_DIR
+    - Nutzt die regulären Item-Pipelines
+
+    Batch-URLs außerhalb von allowed_domains werden nicht geladen, sondern
+    im Batch als Fehler vermerkt. Die übrigen URLs laufen wie beim
+    WebSpider über _page_request (Fast Path, API, Budget-Priorität).
+
+    Der Duplikatfilter der Pipelines gilt pro Batch: Eine URL, die schon
+    ein früherer Batch exportiert hat, wird für den neuen Batch wieder
+    freigegeben. Das Ergebnis einer URL steht erst fest, wenn ihr Item die
+    Pipelines durchlaufen hat (item_scraped/item_dropped/item_error).
+    """
+
+    name = 'crawldaemon'
+
+    def __init__(self, *args, **kwargs):
+        """
+        Spider-Initialisierung.
+
+        Args:
+            *args: Variable Argumente
+            **kwargs: Keyword-Argumente (url_list für die Standard-URLs)
+        """
+        super(CrawlDaemonSpider, self).__init__(*args, **kwargs)
+        self.batches = None
+        self.listener = None
+        self.spool_task = None
+        self.host = '127.0.0.1'
+        self.port = 6810
+        self.spool_dir = 'data/spool'
+        self.spool_interval = 1.0
+        self.allowed_origin = None
+        self.token = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        """Erstellt den Spider und verbindet die Daemon-Signale."""
+        spider = super(CrawlDaemonSpider, cls).from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.host = settings.get('DAEMON_HOST', '127.0.0.1')
+        spider.port = settings.getint('DAEMON_PORT', 6810)
+        spider.spool_dir = settings.get('DAEMON_SPOOL_DIR', 'data/spool')
+        spider.spool_interval = settings.getfloat('DAEMON_SPOOL_INTERVAL', 1.0)
+        spider.allowed_origin = settings.get('DAEMON_ALLOWED_ORIGIN') or None
+        spider.token = settings.get('DAEMON_TOKEN') or None
+        spider.batches = BatchRegistry(settings.get('DAEMON_RESULTS_DIR', 'data/batches'))
+
+        crawler.signals.connect(spider.daemon_opened, signal=signals.spider_opened)
+        crawler.signals.connect(spider.daemon_idle, signal=signals.spider_idle)
+        crawler.signals.connect(spider.daemon_closed, signal=signals.spider_closed)
+        crawler.signals.connect(spider.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(spider.item_dropped, signal=signals.item_dropped)
+        crawler.signals.connect(spider.item_error, signal=signals.item_error)
+        return spider
+
+    def start_requests(self) -> Generator[Request, None, None]:
+        """Keine Start-Requests: der Daemon wartet auf Batches."""
+        return iter(())
+
+    def daemon_opened(self, spider):
+        """Startet HTTP-Endpunkt und Spool-Überwachung."""
+        site = server.Site(DaemonResource(
+            self.batches, self.submit_batch, allowed_origin=self.allowed_origin, token=self.token,
+        ))
+        self.listener = reactor.listenTCP(self.port, site, interface=self.host)
+        self.logger.info(f"Crawl daemon listening on http://{self.host}:{self.port}/crawl")
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.spool_task = task.LoopingCall(self._poll_spool)
+        self.spool_task.start(self.spool_interval)
+
+    def daemon_idle(self, spider):
+        """Verhindert das Beenden des Spiders bei leerer Queue."""
+        raise DontCloseSpider
+
+    def daemon_closed(self, spider):
+        """Stoppt HTTP-Endpunkt und Spool-Überwachung."""
+        if self.spool_task and self.spool_task.running:
+            self.spool_task.stop()
+        if self.listener:
+            self.listener.stopListening()
+
+    def submit_batch(self, urls: List[str], batch_id: str = None) -> Batch:
+        """
+        Plant einen URL-Batch im laufenden Crawler ein.
+
+        Args:
+            urls: URLs des Batches (leer = Standard-URLs des Spiders)
+            batch_id: Vorgegebene Batch-ID
+
+        Returns:
+            Batch: Der angelegte Batch
+        """
+        urls = urls or list(self.start_urls)
+        batch = self.batches.create(urls, batch_id)
+
+        rejected = 0
+        for url in urls:
+            if not self._batch_url_allowed(url):
+                # Keine beliebigen (internen) URLs über den Daemon abrufen
+                rejected += 1
+                self.batches.request_done(batch.id, url, ok=False, error='domain not allowed')
+                continue
+
+            request = self._page_request(url, self.parse, dont_filter=True)
+            request.meta['batch_id'] = batch.id
+            request.meta['batch_url'] = url
+            self.crawler.engine.crawl(request)
+
+        if rejected:
+            self.crawler.stats.inc_value('daemon/rejected_urls', rejected)
+        self.logger.info(f"Batch {batch.id} accepted: {len(urls) - rejected} URLs ({rejected} rejected)")
+        return batch
+
+    def _batch_url_allowed(self, url: str) -> bool:
+        """
+        Prüft eine Batch-URL strenger als _is_allowed_domain: nur http(s)
+        und nur der Host einer erlaubten Domain oder deren Subdomains.
+        """
+        try:
+            parsed = urlparse(url)
+            host = (parsed.hostname or '').lower()
+        except ValueError:
+            return False
+        if parsed.scheme not in ('http', 'https') or not host:
+            return False
+        return any(host == domain or host.endswith(f'.{domain}') for domain in self.allowed_domains)
+
+    def _render_request(self, request: Request) -> Request:
+        """Playwright-Request nach Fast Path/API; behält die Batch-Zuordnung."""
+        render = super(CrawlDaemonSpider, self)._render_request(request)
+        for key in ('batch_id', 'batch_url'):
+            if key in request.meta:
+                render.meta[key] = request.meta[key]
+        return render
+
+    def handle_fast_error(self, failure) -> List[Request]:
+        """Fast-Path-Fehler; ohne Render-Request wird das Ergebnis an den Batch gemeldet."""
+        return self._fallback_done(failure, super(CrawlDaemonSpider, self).handle_fast_error(failure))
+
+    def handle_api_error(self, failure) -> List[Request]:
+        """API-Fehler; ohne Render-Request wird das Ergebnis an den Batch gemeldet."""
+        return self._fallback_done(failure, super(CrawlDaemonSpider, self).handle_api_error(failure))
+
+    def _fallback_done(self, failure, requests: List[Request]) -> List[Request]:
+        """Meldet einen übersprungenen Request (Budget, Circuit Breaker) als Fehler."""
+        if not requests:
+            meta = failure.request.meta
+            self.batches.request_done(
+                meta.get('batch_id'),
+                meta.get('batch_url', failure.request.url),
+                ok=False,
+                error=f"{failure.type.__name__}: {failure.value}",
+            )
+        return requests
+
+    def _poll_spool(self):
+        """Übernimmt neue Batch-Dateien aus dem Spool-Verzeichnis."""
+        for name in sorted(os.listdir(self.spool_dir)):
+            if not name.endswith(('.txt', '.json')):
+                continue
+
+            path = os.path.join(self.spool_dir, name)
+            try:
+                urls = read_url_file(path)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Invalid spool file {name}: {e}")
+                os.replace(path, f'{path}.invalid')
+                continue
+
+            os.replace(path, f'{path}.accepted')
+            self.submit_batch(urls, batch_id=os.path.splitext(name)[0])
+
+    async def parse(self, response: Response) -> Generator[Dict[str, Any], None, None]:
+        """
+        Parst eine Seite und meldet das Ergebnis an den Batch.
+
+        Args:
+            response: Scrapy-Response-Objekt mit Playwright-Daten
+
+        Yields:
+            WebPageRecord: Extrahierte Daten der Webseite
+        """
+        batch = self.batches.get(response.meta.get('batch_id'))
+        has_item = False
+        try:
+            async for result in super(CrawlDaemonSpider, self).parse(response):
+                if is_item(result):
+                    has_item = True
+                    if batch is not None:
+                        self._release_url(batch, ItemAdapter(result).get('url'))
+                yield result
+        finally:
+            # Mit Item meldet item_scraped/item_dropped das Ergebnis
+            if not has_item:
+                self.batches.request_done(
+                    response.meta.get('batch_id'),
+                    response.meta.get('batch_url', response.url),
+                    ok=False,
+                    title=None,
+                    status=response.status,
+                )
+
+    def _release_url(self, batch: Batch, url):
+        """Gibt eine URL einmal pro Batch für den Duplikatfilter der Pipelines frei."""
+        url = (url or '').strip()
+        if url and url not in batch.item_urls:
+            batch.item_urls.add(url)
+            self.crawler.signals.send_catch_log(batch_url_released, url=url)
+
+    def _item_done(self, item, response, **details):
+        """Meldet das Ergebnis eines Items aus einem Batch-Request."""
+        meta = getattr(response, 'meta', None) or {}
+        if not meta.get('batch_id'):
+            return
+        self.batches.request_done(
+            meta['batch_id'],
+            meta.get('batch_url', response.url),
+            status=response.status,
+            **details,
+        )
+
+    def item_scraped(self, item, response, spider):
+        """Item wurde exportiert."""
+        title = ItemAdapter(item).get('title')
+        self._item_done(item, response, ok=title is not None, title=title)
+
+    def item_dropped(self, item, response, exception, spider):
+        """Item wurde verworfen (z.B. Duplikat innerhalb des Batches)."""
+        self._item_done(item, response, ok=False, title=ItemAdapter(item).get('title'), dropped=str(exception))
+
+    def item_error(self, item, response, spider, failure):
+        """Fehler in einer Pipeline."""
+        self._item_done(
+            item, response, ok=False, title=ItemAdapter(item).get('title'),
+            error=f"{failure.type.__name__}: {failure.value}",
+        )
+
+    async def handle_error(self, failure):
+        """
+        Error-Handler, der Fehler zusätzlich an den Batch meldet.
+
+        Args:
+            failure: Twisted-Failure-Objekt mit Fehlerinformationen
+        """
+        await super(CrawlDaemonSpider, self).handle_error(failure)
+
+        meta = failure.request.meta
+        self.batches.request_done(
+            meta.get('batch_id'),
+            meta.get('batch_url', failure.request.url),
+            ok=False,
+            error=f"{failure.type.__name__}: {failure.value}",
+        )
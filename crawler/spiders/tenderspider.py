@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+Inkrementeller Spider für Ausschreibungsportale.
+
+Der Spider merkt sich pro Portal einen Cursor (neuestes Veröffentlichungs-
+datum, höchste Tender-ID und Fingerabdrücke bekannter Einträge). Die
+Paginierung der Trefferlisten endet, sobald bereits bekannte Einträge
+erreicht sind, und Detailseiten werden nur für neue oder geänderte
+Ausschreibungen abgerufen.
+"""
+
+import re
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, Generator, Optional
+from urllib.parse import urljoin
+
+import scrapy
+from scrapy.http import Request, Response
+from crawler.items import TenderRecord
+from crawler.state import JsonStateStore
+
+
+# Beschriftungen der Felder auf Detailseiten (dt/dd- oder th/td-Paare)
+DETAIL_LABELS = {
+    'organization': ('Vergabestelle', 'Auftraggeber', 'Ausschreibende Stelle'),
+    'deadline': ('Angebotsfrist', 'Abgabefrist', 'Bewerbungsfrist', 'Teilnahmefrist'),
+    'budget': ('Auftragswert', 'Geschätzter Wert', 'Budget'),
+    'category': ('Leistungsart', 'Kategorie', 'CPV'),
+    'location': ('Erfüllungsort', 'Ausführungsort', 'Leistungsort'),
+    'requirements': ('Eignungskriterien', 'Teilnahmebedingungen', 'Anforderungen'),
+}
+
+DATE_PATTERN = re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{4})')
+
+
+def parse_german_date(text: Optional[str]) -> Optional[str]:
+    """
+    Wandelt das erste Datum im Format TT.MM.JJJJ in ISO-Format um.
+
+    Args:
+        text: Text mit einem deutschen Datum
+
+    Returns:
+        str: Datum im Format JJJJ-MM-TT oder None
+    """
+    match = DATE_PATTERN.search(text or '')
+    if not match:
+        return None
+    day, month, year = (int(part) for part in match.groups())
+    try:
+        return datetime(year, month, day).date().isoformat()
+    except ValueError:
+        return None
+
+
+class TenderSpider(scrapy.Spider):
+    """
+    Spider für paginierte Trefferlisten von Ausschreibungsportalen.
+
+    Die Portale werden über das Setting TENDER_PORTALS konfiguriert
+    (Start-URL und CSS-Selektoren für Einträge, Links und Folgeseiten).
+    """
+
+    name = 'tenderspider'
+
+    custom_settings = {
+        'CONCURRENT_REQUESTS': 2,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
+        'DOWNLOAD_DELAY': 3,
+        'RANDOMIZE_DOWNLOAD_DELAY': 0.5,
+        # Ausschreibungen landen in data/tenders.csv, nicht im results.csv-Feed
+        'FEEDS': {},
+    }
+
+    def __init__(self, *args, **kwargs):
+        """
+        Spider-Initialisierung.
+
+        Args:
+            *args: Variable Argumente
+            **kwargs: Keyword-Argumente (portals zur Auswahl einzelner Portale)
+        """
+        super(TenderSpider, self).__init__(*args, **kwargs)
+        self.portals: Dict[str, Dict[str, Any]] = {}
+        self.max_pages = 20
+        self.seen_limit = 5000
+        self.store: Optional[JsonStateStore] = None
+        self.new_tenders = 0
+        self.changed_tenders = 0
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        """Erstellt den Spider und lädt Portal-Konfiguration und Cursor."""
+        spider = super(TenderSpider, cls).from_crawler(crawler, *args, **kwargs)
+
+        portals = crawler.settings.getdict('TENDER_PORTALS')
+        selected = kwargs.get('portals')
+        if selected:
+            wanted = {name.strip() for name in selected.split(',')}
+            portals = {name: config for name, config in portals.items() if name in wanted}
+
+        spider.portals = portals
+        spider.allowed_domains = list(portals)
+        spider.max_pages = crawler.settings.getint('TENDER_MAX_PAGES', 20)
+        spider.seen_limit = crawler.settings.getint('TENDER_SEEN_LIMIT', 5000)
+        spider.store = JsonStateStore(crawler.settings.get('TENDER_STATE_FILE', 'data/state/tender_cursors.json'))
+        spider.store.load()
+        return spider
+
+    def start_requests(self) -> Generator[Request, None, None]:
+        """
+        Erzeugt je Portal einen Request auf die erste Trefferseite.
+
+        Yields:
+            Request: Request für die erste Listenseite
+        """
+        for portal, config in self.portals.items():
+            yield Request(
+                url=config['start_url'],
+                callback=self.parse_listing,
+                errback=self.handle_error,
+                meta={'portal': portal, 'page_number': 1},
+                dont_filter=True
+            )
+
+    def _cursor(self, portal: str) -> Dict[str, Any]:
+        """Liefert den (ggf. neu angelegten) Cursor eines Portals."""
+        cursor = self.store.data.setdefault(portal, {
+            'newest_date': None,
+            'max_tender_id': None,
+            'seen': {},
+        })
+        if '://' in (cursor['max_tender_id'] or ''):
+            # Ältere Cursor konnten eine Detail-URL als höchste ID enthalten
+            cursor['max_tender_id'] = None
+        return cursor
+
+    @staticmethod
+    def _id_greater(tender_id: str, other: Optional[str]) -> bool:
+        """Vergleicht Tender-IDs numerisch, sonst lexikographisch."""
+        if other is None:
+            return True
+        if tender_id.isdigit() and other.isdigit():
+            return int(tender_id) > int(other)
+        return tender_id > other
+
+    def parse_listing(self, response: Response) -> Generator[Request, None, None]:
+        """
+        Verarbeitet eine Trefferseite und entscheidet über die Paginierung.
+
+        Args:
+            response: Scrapy-Response der Listenseite
+
+        Yields:
+            Request: Detail-Requests für neue/geänderte Einträge und ggf.
+            den Request für die nächste Listenseite
+        """
+        portal = response.meta['portal']
+        page_number = response.meta['page_number']
+        config = self.portals[portal]
+        cursor = self._cursor(portal)
+        id_pattern = re.compile(config.get('tender_id_pattern', r'(\d+)'))
+
+        reached_known = False
+        entries = response.css(config['entry_selector'])
+
+        for entry in entries:
+            href = entry.css(config['link_selector']).get()
+            if not href:
+                continue
+            detail_url = urljoin(response.url, href)
+
+            # Ohne Treffer dient die URL nur als Schlüssel in 'seen', nicht als ID-Cursor
+            match = id_pattern.search(detail_url)
+            tender_id = match.group(1) if match else detail_url
+
+            entry_text = ' '.join(' '.join(entry.xpath('.//text()').getall()).split())
+            fingerprint = hashlib.sha1(entry_text.encode('utf-8')).hexdigest()[:16]
+            published = parse_german_date(entry_text)
+
+            previous = cursor['seen'].get(tender_id)
+            if previous == fingerprint:
+                reached_known = True
+                continue
+
+            if previous is None and published and cursor['newest_date'] and published < cursor['newest_date']:
+                # Älter als der Cursor: war schon in früheren Läufen sichtbar
+                reached_known = True
+                continue
+
+            if previous is None and not published and tender_id.isdigit() \
+                    and cursor['max_tender_id'] and not self._id_greater(tender_id, cursor['max_tender_id']):
+                # Ohne Datum: IDs unterhalb des Cursors gelten als bekannt
+                reached_known = True
+                continue
+
+            if previous is None:
+                self.new_tenders += 1
+            else:
+                self.changed_tenders += 1
+
+            yield Request(
+                url=detail_url,
+                callback=self.parse_tender,
+                errback=self.handle_error,
+                meta={
+                    'portal': portal,
+                    'tender_id': tender_id,
+                    'id_matched': match is not None,
+                    'fingerprint': fingerprint,
+                    'published': published,
+                    'listing_title': config.get('title_selector') and entry.css(config['title_selector']).get(),
+                },
+            )
+
+        if reached_known:
+            self.logger.info(f"{portal}: bekannte Einträge auf Seite {page_number} erreicht, Paginierung beendet")
+            return
+
+        if not entries:
+            self.logger.warning(f"{portal}: keine Einträge auf Seite {page_number} ({response.url})")
+            return
+
+        next_href = response.css(config['next_page_selector']).get()
+        if next_href and page_number < self.max_pages:
+            yield Request(
+                url=urljoin(response.url, next_href),
+                callback=self.parse_listing,
+                errback=self.handle_error,
+                meta={'portal': portal, 'page_number': page_number + 1},
+            )
+
+    def _labelled_value(self, response: Response, labels) -> Optional[str]:
+        """
+        Sucht den Wert zu einer Beschriftung in dt/dd- oder th/td-Paaren.
+
+        Args:
+            response: Scrapy-Response der Detailseite
+            labels: Mögliche Beschriftungen in absteigender Priorität
+
+        Returns:
+            str: Bereinigter Wert oder None
+        """
+        for label in labels:
+            for query in (
+                '//dt[contains(normalize-space(.), $label)]/following-sibling::dd[1]//text()',
+                '//th[contains(normalize-space(.), $label)]/following-sibling::td[1]//text()',
+            ):
+                value = ' '.join(' '.join(response.xpath(query, label=label).getall()).split())
+                if value:
+                    return value
+        return None
+
+    def parse_tender(self, response: Response) -> Generator[TenderRecord, None, None]:
+        """
+        Parst eine Detailseite in einen TenderRecord und aktualisiert den Cursor.
+
+        Args:
+            response: Scrapy-Response der Detailseite
+
+        Yields:
+            TenderRecord: Extrahierte Ausschreibungsdaten
+        """
+        portal = response.meta['portal']
+        tender_id = response.meta['tender_id']
+
+        title = response.css('h1::text').get() or response.meta.get('listing_title') or response.css('title::text').get()
+
+        item = TenderRecord(
+            tender_title=' '.join(title.split()) if title else None,
+            tender_id=tender_id,
+            contact_info={
+                'email': (response.css('a[href^="mailto:"]::attr(href)').get() or '').replace('mailto:', '') or None,
+                'phone': self._labelled_value(response, ('Telefon', 'Tel.')),
+            },
+            url=response.url,
+            **{field: self._labelled_value(response, labels) for field, labels in DETAIL_LABELS.items()}
+        )
+
+        self._remember(
+            portal, tender_id, response.meta['fingerprint'], response.meta.get('published'),
+            id_matched=response.meta.get('id_matched', True),
+        )
+
+        yield item
+
+    def _remember(self, portal: str, tender_id: str, fingerprint: str, published: Optional[str],
+                  id_matched: bool = True):
+        """
+        Trägt eine erfolgreich verarbeitete Ausschreibung in den Cursor ein.
+
+        Erst nach dem Parsen der Detailseite, damit fehlgeschlagene Einträge
+        im nächsten Lauf erneut versucht werden. max_tender_id wird nur mit
+        IDs aus tender_id_pattern fortgeschrieben; eine Detail-URL als
+        Ersatz-ID würde sonst lexikographisch über allen Nummern liegen.
+        """
+        cursor = self._cursor(portal)
+        seen = cursor['seen']
+
+        # Neu einfügen, damit die Reihenfolge der letzten Sichtung entspricht
+        seen.pop(tender_id, None)
+        seen[tender_id] = fingerprint
+        while len(seen) > self.seen_limit:
+            seen.pop(next(iter(seen)))
+
+        if published and (not cursor['newest_date'] or published > cursor['newest_date']):
+            cursor['newest_date'] = published
+        if id_matched and self._id_greater(tender_id, cursor['max_tender_id']):
+            cursor['max_tender_id'] = tender_id
+
+    def handle_error(self, failure):
+        """
+        Error-Handler für fehlgeschlagene Requests.
+
+        Args:
+            failure: Twisted-Failure-Objekt mit Fehlerinformationen
+        """
+        self.logger.error(f"Request failed: {failure.request.url} ({failure.value})")
+
+    def closed(self, reason):
+        """
+        Speichert die Cursor aller Portale.
+
+        Args:
+            reason: Grund für das Beenden des Spiders
+        """
+        self.store.save()
+        self.logger.info(
+            f"Spider closed: {reason} ({self.new_tenders} neue, {self.changed_tenders} geänderte Ausschreibungen)"
+        )
@@ -9,11 +9,20 @@ und unterstützt erweiterte Browser-Interaktionen wie Screenshots und Scrolling.
 import scrapy
 import random
 import os
-from typing import Dict, Any, Generator
+import json
+from typing import Dict, Any, Generator, List
 from urllib.parse import urlparse, urljoin
-from scrapy.http import Request, Response
+from scrapy.http import Request, Response, TextResponse
 from scrapy_playwright.page import PageMethod
-from crawler.items import WebPageItem
+from crawler.apidiscovery import ApiDiscovery
+from crawler.breaker import DomainUnavailable
+from crawler.budget import BudgetExhausted
+from crawler.fastpath import FastPathTracker
+from crawler.items import WebPageRecord
+from crawler.linkgraph import load_priorities
+from crawler.perfmetrics import PerfMetricsRecorder
+from crawler.readiness import ReadinessTracker, NETWORK_TIMING_SCRIPT
+from crawler.sessions import SessionStore
 
 
 class WebSpider(scrapy.Spider):
@@ -65,6 +74,9 @@ class WebSpider(scrapy.Spider):
         'zeit.de'
     ]
     
+    # Callbacks, deren Items aus gelernten JSON-APIs erzeugt werden können (Item-Art)
+    api_callbacks = {'parse': 'webpages'}
+    
     custom_settings = {
         'CONCURRENT_REQUESTS': 2,
         'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
@@ -92,8 +104,50 @@ class WebSpider(scrapy.Spider):
         self.screenshot_dir = "screenshots"
         os.makedirs(self.screenshot_dir, exist_ok=True)
         
+        # Wird vom MemoryPressureController unter Speicherdruck gesetzt
+        self.screenshots_paused = False
+        
+        # Adaptive Wartestrategie (wird in from_crawler konfiguriert)
+        self.readiness = None
+        
+        # Persistente Sitzungen pro Domain (wird in from_crawler konfiguriert)
+        self.sessions = None
+        
+        # Fast Path ohne Rendering (wird in from_crawler konfiguriert)
+        self.fastpath = None
+        
+        # Browser-Performance-Kennzahlen (wird in from_crawler konfiguriert)
+        self.perf = None
+        
+        # Gelernte JSON-APIs (wird in from_crawler konfiguriert)
+        self.api = None
+        
+        # Crawl-Prioritäten aus dem Linkgraphen (wird in from_crawler geladen)
+        self.link_priorities = {}
+        
+        # Zeitbudget mit Deadline (wird von der CrawlBudgetMiddleware gesetzt)
+        self.budget = None
+        
         self.logger.info(f"WebSpider initialized with {len(self.start_urls)} start URLs")
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        """Erstellt den Spider und die adaptive Wartestrategie aus den Settings."""
+        spider = super(WebSpider, cls).from_crawler(crawler, *args, **kwargs)
+        if crawler.settings.getbool('READINESS_ENABLED', True):
+            spider.readiness = ReadinessTracker.from_crawler(crawler)
+        if crawler.settings.getbool('SESSION_PER_DOMAIN'):
+            spider.sessions = SessionStore.from_crawler(crawler)
+        if crawler.settings.getbool('FASTPATH_ENABLED'):
+            spider.fastpath = FastPathTracker.from_crawler(crawler)
+        if crawler.settings.getbool('PERF_METRICS_ENABLED'):
+            spider.perf = PerfMetricsRecorder.from_crawler(crawler)
+        if crawler.settings.getbool('API_DISCOVERY_ENABLED'):
+            spider.api = ApiDiscovery.from_crawler(crawler)
+        if crawler.settings.getbool('LINK_GRAPH_PRIORITIES'):
+            spider.link_priorities = load_priorities(crawler.settings.get('LINK_GRAPH_DIR', 'data/state/linkgraph'))
+        return spider
+
     def start_requests(self) -> Generator[Request, None, None]:
         """
         Generiert die initialen Requests mit Playwright-Konfiguration.
@@ -102,40 +156,147 @@ class WebSpider(scrapy.Spider):
             Request: Scrapy-Request mit Playwright-Meta-Daten
         """
         for url in self.start_urls:
-            # Domain aus URL extrahieren für spezifische Behandlung
-            domain = urlparse(url).netloc
-            
-            # Prüfen ob JavaScript-Rendering erforderlich ist
-            needs_js = any(js_site in domain for js_site in self.js_heavy_sites)
-            
-            # Meta-Daten für Playwright konfigurieren
-            meta = {
-                'playwright': True,
-                'playwright_include_page': True,
-                'playwright_context': 'default',
-                'domain': domain,
-                'needs_js': needs_js
-            }
-            
-            # Erweiterte Playwright-Methoden für JavaScript-lastige Seiten
-            if needs_js:
-                meta['playwright_page_methods'] = [
-                    PageMethod('wait_for_load_state', 'networkidle'),
-                    PageMethod('wait_for_timeout', 2000),  # 2 Sekunden warten
-                ]
-                self.logger.info(f"Using JavaScript rendering for {url}")
-            else:
-                meta['playwright_page_methods'] = [
-                    PageMethod('wait_for_load_state', 'domcontentloaded'),
-                ]
+            yield self._page_request(url, self.parse, dont_filter=True)
+
+    def _page_request(self, url: str, callback, include_page: bool = True, **kwargs) -> Request:
+        """
+        Erstellt den Request für eine Seite: über eine gelernte JSON-API,
+        bei aktivem Fast Path zuerst ohne Rendering oder gerendert.
+        
+        Args:
+            url: Ziel-URL des Requests
+            callback: Callback für die gerenderte Seite
+            include_page: Ob das Page-Objekt an den Callback übergeben wird
+            **kwargs: Weitere Request-Argumente (z.B. dont_filter)
             
-            yield Request(
+        Returns:
+            Request: API-Request, einfacher HTTP-Request (Fast Path) oder Playwright-Request
+        """
+        domain = urlparse(url).netloc
+        kind = self.api_callbacks.get(callback.__name__)
+        endpoint = self.api.endpoint_for(url, domain, kind) if self.api and kind else None
+        fast = bool(endpoint or (self.fastpath and self.fastpath.should_try(domain)))
+        if self.budget and 'priority' not in kwargs:
+            kwargs['priority'] = self.budget.priority(callback.__name__, domain, rendered=not fast)
+        if url in self.link_priorities:
+            # Stark verlinkte Seiten innerhalb ihrer Stufe zuerst
+            kwargs['priority'] = kwargs.get('priority', 0) + self.link_priorities[url]
+        
+        if endpoint:
+            key, api_url = endpoint
+            return Request(
+                url=api_url,
+                callback=self.parse_api,
+                errback=self.handle_api_error,
+                meta={
+                    'domain': domain,
+                    'page_url': url,
+                    'api_endpoint': key,
+                    'render_callback': callback.__name__,
+                    'render_include_page': include_page,
+                },
+                headers={'Accept': 'application/json', 'Accept-Encoding': 'gzip, deflate'},
+                **kwargs
+            )
+        
+        if fast:
+            return Request(
                 url=url,
-                callback=self.parse,
-                errback=self.handle_error,
-                meta=meta,
-                dont_filter=True
+                callback=self.parse_fast,
+                errback=self.handle_fast_error,
+                meta={
+                    'domain': domain,
+                    'render_callback': callback.__name__,
+                    'render_include_page': include_page,
+                },
+                # Ohne brotli-Paket kann Scrapy 'br' nicht dekodieren
+                headers={'Accept-Encoding': 'gzip, deflate'},
+                **kwargs
             )
+        
+        return Request(
+            url=url,
+            callback=callback,
+            errback=self.handle_error,
+            meta=self._playwright_meta(url, include_page=include_page),
+            **kwargs
+        )
+
+    def _render_request(self, request: Request) -> Request:
+        """
+        Erstellt aus einem Fast-Path- oder API-Request den Playwright-Request für die Seite.
+        
+        Args:
+            request: Request des Fast Path bzw. der API
+            
+        Returns:
+            Request: Playwright-Request mit dem ursprünglichen Callback
+        """
+        meta = request.meta
+        url = meta.get('page_url', request.url)
+        return Request(
+            url=url,
+            callback=getattr(self, meta['render_callback']),
+            errback=self.handle_error,
+            meta=self._playwright_meta(url, include_page=meta.get('render_include_page', True)),
+            priority=request.priority,
+            dont_filter=True
+        )
+
+    def _playwright_meta(self, url: str, include_page: bool = True) -> Dict[str, Any]:
+        """
+        Erstellt die Playwright-Meta-Daten für eine URL.
+        
+        Args:
+            url: Ziel-URL des Requests
+            include_page: Ob das Page-Objekt an den Callback übergeben wird
+            
+        Returns:
+            Dict: Meta-Daten inklusive Wartestrategie für die Domain
+        """
+        # Domain aus URL extrahieren für spezifische Behandlung
+        domain = urlparse(url).netloc
+        
+        # Prüfen ob JavaScript-Rendering erforderlich ist
+        needs_js = any(js_site in domain for js_site in self.js_heavy_sites)
+        
+        # Meta-Daten für Playwright konfigurieren
+        meta = {
+            'playwright': True,
+            'playwright_include_page': include_page,
+            'playwright_context': 'default',
+            'domain': domain,
+            'needs_js': needs_js
+        }
+        
+        # Eigener Kontext mit gespeicherter Sitzung pro Domain. Die Page wird
+        # immer übergeben, damit der Kontext nach dem Besuch gesichert und
+        # geschlossen werden kann.
+        if self.sessions:
+            meta.update(self.sessions.request_meta(url))
+            meta['playwright_include_page'] = True
+        
+        # Erweiterte Playwright-Methoden für JavaScript-lastige Seiten
+        if needs_js and self.readiness:
+            # Auf Inhalts-Selektor oder DOM-Stabilität warten (mit Obergrenze)
+            meta['playwright_page_methods'] = self.readiness.page_methods(domain)
+            self.logger.debug("Using adaptive JavaScript rendering for %s", url)
+        elif needs_js:
+            meta['playwright_page_methods'] = [
+                PageMethod('wait_for_load_state', 'networkidle'),
+                PageMethod('wait_for_timeout', 2000),  # 2 Sekunden warten
+            ]
+            self.logger.debug("Using JavaScript rendering for %s", url)
+        else:
+            meta['playwright_page_methods'] = [
+                PageMethod('wait_for_load_state', 'domcontentloaded'),
+            ]
+        
+        # JSON-Antworten für die API-Erkennung mitschneiden (nur mit Page im Callback)
+        if self.api and meta['playwright_include_page']:
+            meta['playwright_page_event_handlers'] = {'response': 'observe_api_response'}
+        
+        return meta
 
     async def parse(self, response: Response) -> Generator[Dict[str, Any], None, None]:
         """
@@ -145,68 +306,43 @@ class WebSpider(scrapy.Spider):
             response: Scrapy-Response-Objekt mit Playwright-Daten
             
         Yields:
-            WebPageItem: Extrahierte Daten der Webseite
+            WebPageRecord: Extrahierte Daten der Webseite
         """
         # Playwright-Page-Objekt aus Response-Meta extrahieren
         page = response.meta.get("playwright_page")
         domain = response.meta.get('domain', 'unknown')
+        success = False
         
         try:
-            # Screenshot erstellen (optional, für Debugging)
-            screenshot_path = f"{self.screenshot_dir}/{domain}_{random.randint(1000, 9999)}.png"
-            if page:
-                await page.screenshot(path=screenshot_path, full_page=True)
-                self.logger.info(f"Screenshot saved: {screenshot_path}")
-            
-            # Seitentitel extrahieren
-            title = response.css('title::text').get()
-            if not title:
-                title = response.css('h1::text').get()
-            if not title:
-                title = "Ohne Titel"
-            
-            # Titel bereinigen
-            title = title.strip() if title else "Ohne Titel"
-            
-            # Meta-Beschreibung extrahieren
-            description = response.css('meta[name="description"]::attr(content)').get()
-            if not description:
-                description = response.css('meta[property="og:description"]::attr(content)').get()
+            # Ladezeit der adaptiven Wartestrategie erfassen
+            await self._record_readiness(response, page)
             
-            # Keywords extrahieren
-            keywords = response.css('meta[name="keywords"]::attr(content)').get()
+            # Consent-Dialog beim ersten Besuch einer Domain bestätigen
+            if page and self.sessions:
+                await self.sessions.accept_consent(page, response.meta.get('session_key'))
             
-            # Sprache der Seite ermitteln
-            language = response.css('html::attr(lang)').get()
-            if not language:
-                language = response.css('meta[http-equiv="content-language"]::attr(content)').get()
+            # Screenshot erstellen (optional, für Debugging; pausiert unter Speicherdruck)
+            screenshot_path = f"{self.screenshot_dir}/{domain}_{random.randint(1000, 9999)}.png"
+            if page and not self.screenshots_paused:
+                await page.screenshot(path=screenshot_path, full_page=True)
+                self.logger.debug("Screenshot saved: %s", screenshot_path)
             
-            # Zusätzliche Links extrahieren (für weitere Crawling-Möglichkeiten)
-            internal_links = []
-            for link in response.css('a[href]::attr(href)').getall()[:10]:  # Begrenzt auf 10
-                absolute_url = urljoin(response.url, link)
-                if self._is_allowed_domain(absolute_url):
-                    internal_links.append(absolute_url)
+            item = self._page_record(
+                response,
+                screenshot_path=screenshot_path if os.path.exists(screenshot_path) else None,
+            )
             
-            # WebPageItem erstellen und befüllen
-            item = WebPageItem()
-            item['title'] = title
-            item['url'] = response.url
-            item['domain'] = domain
-            item['description'] = description[:500] if description else None
-            item['keywords'] = keywords
-            item['language'] = language
-            item['internal_links'] = internal_links
-            item['screenshot_path'] = screenshot_path if os.path.exists(screenshot_path) else None
-            item['status_code'] = response.status
-            item['content_type'] = response.headers.get('content-type', b'').decode('utf-8')
+            self.logger.debug("Successfully parsed: %.50s... (%s)", item.title, response.url)
             
-            self.logger.info(f"Successfully parsed: {title[:50]}... ({response.url})")
+            # JSON-API suchen, aus der die Seite ihren Inhalt lädt
+            if page and self.api:
+                self.api.learn(page, response.url, domain, item)
             
+            success = response.status < 400
             yield item
             
             # Optional: Weitere interne Links crawlen (begrenzt)
-            # for link_url in internal_links[:2]:  # Nur 2 weitere Links pro Seite
+            # for link_url in item.internal_links[:2]:  # Nur 2 weitere Links pro Seite
             #     yield Request(
             #         url=link_url,
             #         callback=self.parse,
@@ -219,8 +355,286 @@ class WebSpider(scrapy.Spider):
             
         finally:
             # Playwright-Page schließen um Memory-Leaks zu vermeiden
-            if page:
-                await page.close()
+            await self._close_page(response.meta, page, success)
+
+    def _page_record(self, response: Response, screenshot_path: str = None,
+                     untitled: str = "Ohne Titel") -> WebPageRecord:
+        """
+        Extrahiert die Daten einer Webseite aus dem (gerenderten oder statischen) HTML.
+        
+        Args:
+            response: Scrapy-Response der Seite
+            screenshot_path: Pfad des Screenshots (falls vorhanden)
+            untitled: Titel für Seiten ohne <title> und <h1>
+            
+        Returns:
+            WebPageRecord: Extrahierte Daten der Webseite
+        """
+        domain = response.meta.get('domain', 'unknown')
+        
+        # Seitentitel extrahieren
+        title = response.css('title::text').get()
+        if not title:
+            title = response.css('h1::text').get()
+        
+        # Titel bereinigen
+        title = title.strip() if title and title.strip() else untitled
+        
+        # Meta-Beschreibung extrahieren
+        description = response.css('meta[name="description"]::attr(content)').get()
+        if not description:
+            description = response.css('meta[property="og:description"]::attr(content)').get()
+        
+        # Keywords extrahieren
+        keywords = response.css('meta[name="keywords"]::attr(content)').get()
+        
+        # Sprache der Seite ermitteln
+        language = response.css('html::attr(lang)').get()
+        if not language:
+            language = response.css('meta[http-equiv="content-language"]::attr(content)').get()
+        
+        # Zusätzliche Links extrahieren (für weitere Crawling-Möglichkeiten)
+        internal_links = []
+        for link in response.css('a[href]::attr(href)').getall()[:10]:  # Begrenzt auf 10
+            absolute_url = urljoin(response.url, link)
+            if self._is_allowed_domain(absolute_url):
+                internal_links.append(absolute_url)
+        
+        # Kompakten WebPageRecord in einem Schritt erstellen
+        return WebPageRecord(
+            title=title,
+            url=response.url,
+            domain=domain,
+            description=description[:500] if description else None,
+            keywords=keywords,
+            language=language,
+            internal_links=internal_links,
+            screenshot_path=screenshot_path,
+            status_code=response.status,
+            content_type=response.headers.get('content-type', b'').decode('utf-8'),
+        )
+
+    async def parse_fast(self, response: Response) -> Generator[Dict[str, Any], None, None]:
+        """
+        Fast Path: erzeugt das Item aus dem statischen HTML, sonst wird gerendert.
+        
+        Args:
+            response: Scrapy-Response des einfachen HTTP-Requests
+            
+        Yields:
+            Item: Das vollständige Item (ohne Rendering)
+            Request: Folge-Requests oder der Playwright-Request für dieselbe URL
+        """
+        callback = response.meta['render_callback']
+        domain = response.meta.get('domain', 'unknown')
+        
+        item = None
+        if isinstance(response, TextResponse):
+            try:
+                item = await self._fast_item(callback, response)
+            except Exception as e:
+                self.logger.debug("Fast path extraction failed for %s: %s", response.url, e)
+        
+        missing = self.fastpath.missing_fields(item)
+        self.fastpath.record(domain, hit=not missing, missing=missing)
+        
+        if missing:
+            self.logger.debug("Fast path incomplete for %s (missing: %s), rendering", response.url, missing)
+            yield self._render_request(response.request)
+            return
+        
+        yield item
+        for request in self._follow_requests(callback, response):
+            yield request
+
+    async def _fast_item(self, callback: str, response: Response):
+        """
+        Erzeugt das Item eines Callbacks aus dem statischen HTML.
+        
+        Args:
+            callback: Name des Render-Callbacks
+            response: Scrapy-Response des einfachen HTTP-Requests
+            
+        Returns:
+            Item oder None, wenn der Callback keinen Fast Path unterstützt
+        """
+        if callback == 'parse':
+            return self._page_record(response, untitled=None)
+        return None
+
+    def _follow_requests(self, callback: str, response: Response) -> List[Request]:
+        """
+        Folge-Requests, die der Render-Callback zusätzlich zum Item erzeugt hätte.
+        
+        Args:
+            callback: Name des Render-Callbacks
+            response: Scrapy-Response der Seite
+            
+        Returns:
+            List[Request]: Folge-Requests (WebSpider: keine)
+        """
+        return []
+
+    def handle_fast_error(self, failure) -> List[Request]:
+        """
+        Error-Handler des Fast Path: die Seite wird stattdessen gerendert.
+        
+        Args:
+            failure: Twisted-Failure-Objekt mit Fehlerinformationen
+            
+        Returns:
+            List[Request]: Playwright-Request für dieselbe URL
+        """
+        request = failure.request
+        if failure.check(BudgetExhausted, DomainUnavailable):
+            self.logger.debug(f"Skipped ({failure.type.__name__}): {request.url}")
+            return []
+        self.logger.debug("Fast path failed for %s (%s), rendering", request.url, failure.type.__name__)
+        self.fastpath.record(request.meta.get('domain', 'unknown'), hit=False, missing=['response'])
+        return [self._render_request(request)]
+
+    async def observe_api_response(self, response) -> None:
+        """
+        Playwright-Event-Handler: schneidet JSON-Antworten für die API-Erkennung mit.
+        
+        Args:
+            response: Playwright-Response eines Requests der Page
+        """
+        await self.api.observe(response)
+
+    def parse_api(self, response: Response) -> Generator[Dict[str, Any], None, None]:
+        """
+        Erzeugt das Item einer Seite aus ihrer gelernten JSON-API, sonst wird gerendert.
+        
+        Args:
+            response: Scrapy-Response des API-Requests
+            
+        Yields:
+            Item: Das vollständige Item (ohne Rendering)
+            Request: Playwright-Request für die Seite, wenn Pflichtfelder fehlen
+        """
+        meta = response.meta
+        domain = meta.get('domain', 'unknown')
+        extra = {}
+        if self.api_callbacks.get(meta['render_callback']) == 'webpages':
+            extra = {'status_code': response.status, 'content_type': 'application/json'}
+        
+        item = None
+        try:
+            item = self.api.build_item(meta['api_endpoint'], domain, meta['page_url'], json.loads(response.text), **extra)
+        except Exception as e:
+            self.logger.debug("API mapping failed for %s: %s", meta['page_url'], e)
+        
+        missing = self.api.missing_fields(item)
+        self.api.record(domain, meta['api_endpoint'], hit=not missing)
+        if missing:
+            self.logger.debug("API incomplete for %s (missing: %s), rendering", meta['page_url'], missing)
+            yield self._render_request(response.request)
+            return
+        
+        yield item
+
+    def handle_api_error(self, failure) -> List[Request]:
+        """
+        Error-Handler des API-Abrufs: die Seite wird stattdessen gerendert.
+        
+        Args:
+            failure: Twisted-Failure-Objekt mit Fehlerinformationen
+            
+        Returns:
+            List[Request]: Playwright-Request für die Seite
+        """
+        request = failure.request
+        if failure.check(BudgetExhausted, DomainUnavailable):
+            self.logger.debug(f"Skipped ({failure.type.__name__}): {request.url}")
+            return []
+        self.logger.debug("API request failed for %s (%s), rendering", request.meta['page_url'], failure.type.__name__)
+        self.api.record(request.meta.get('domain', 'unknown'), request.meta['api_endpoint'], hit=False)
+        return [self._render_request(request)]
+
+    async def parse_metadata(self, response: Response) -> Generator[Dict[str, Any], None, None]:
+        """
+        Metadaten-Pfad für Dokumente, die nicht gerendert werden (ContentGateMiddleware).
+        
+        PDFs, Bilder und übergroße Dokumente werden nur mit URL, Status und
+        Content-Type erfasst; der Body wird nicht (vollständig) geladen.
+        
+        Args:
+            response: Gestoppte oder leere Response des Dokuments
+            
+        Yields:
+            WebPageRecord: Item mit den Metadaten des Dokuments
+        """
+        gate = response.meta.get('content_gate', {})
+        page = response.meta.get('playwright_page')
+        try:
+            content_type = gate.get('content_type') or response.headers.get('content-type', b'').decode('latin-1')
+            filename = os.path.basename(urlparse(response.url).path.rstrip('/'))
+            self.logger.debug("Not rendered (%s): %s", gate.get('reason', 'extension'), response.url)
+            
+            yield WebPageRecord(
+                title=filename or None,
+                url=response.url,
+                domain=urlparse(response.url).netloc,
+                status_code=response.status,
+                content_type=content_type or None,
+            )
+        finally:
+            if page is not None:
+                await self._close_page(response.meta, page, False)
+
+    async def _close_page(self, meta: Dict[str, Any], page, success: bool) -> None:
+        """
+        Schließt die Playwright-Page und sichert die Sitzung der Domain.
+        
+        Args:
+            meta: Meta-Daten des Requests
+            page: Playwright-Page (oder None)
+            success: Ob der Besuch erfolgreich war
+        """
+        if not page:
+            return
+        
+        if self.api:
+            self.api.forget(page)
+        
+        # Performance-Kennzahlen auslesen, solange die Page noch offen ist
+        if self.perf and success:
+            await self.perf.collect(page, page.url, meta.get('domain', 'unknown'))
+        
+        context = page.context
+        try:
+            await page.close()
+        except Exception:
+            pass  # Page könnte bereits geschlossen sein
+        
+        if self.sessions:
+            await self.sessions.release(context, meta.get('session_key'), success)
+
+    async def _record_readiness(self, response: Response, page) -> None:
+        """
+        Erfasst die Ladezeit einer Seite für die adaptive Wartestrategie.
+        
+        Args:
+            response: Scrapy-Response mit den ausgeführten PageMethods
+            page: Playwright-Page (für die Schätzung der alten Strategie)
+        """
+        if not self.readiness:
+            return
+        
+        result = self.readiness.result_from_meta(response.meta)
+        if not result:
+            return
+        
+        legacy_ms = None
+        if page:
+            try:
+                timing = await page.evaluate(NETWORK_TIMING_SCRIPT)
+                legacy_ms = self.readiness.legacy_estimate(timing)
+            except Exception as e:
+                self.logger.debug("Network timing unavailable for %s: %s", response.url, e)
+        
+        self.readiness.record(response.meta.get('domain', 'unknown'), result, legacy_ms)
 
     async def handle_error(self, failure):
         """
@@ -231,17 +645,16 @@ class WebSpider(scrapy.Spider):
         """
         request = failure.request
         
+        if failure.check(BudgetExhausted, DomainUnavailable):
+            self.logger.debug(f"Skipped ({failure.type.__name__}): {request.url}")
+            return
+        
         self.logger.error(f"Request failed: {request.url}")
         self.logger.error(f"Error type: {failure.type}")
         self.logger.error(f"Error value: {failure.value}")
         
         # Playwright-Page schließen auch bei Fehlern
-        page = request.meta.get("playwright_page")
-        if page:
-            try:
-                await page.close()
-            except:
-                pass  # Page könnte bereits geschlossen sein
+        await self._close_page(request.meta, request.meta.get("playwright_page"), False)
 
     def _is_allowed_domain(self, url: str) -> bool:
         """
@@ -268,6 +681,24 @@ class WebSpider(scrapy.Spider):
         """
         self.logger.info(f"Spider closed: {reason}")
         
+        # Gelernte Ladezeiten für den nächsten Lauf speichern
+        if self.readiness:
+            self.readiness.save()
+        
+        # Gelernte Fast-Path-Quoten speichern
+        if self.fastpath:
+            self.fastpath.save()
+            self.logger.info(f"Fast path coverage: {self.fastpath.coverage()}")
+        
+        # Gelernte JSON-APIs speichern
+        if self.api:
+            self.api.save()
+        
+        # Performance-Kennzahlen pro Domain zusammenfassen
+        if self.perf:
+            for line in self.perf.close():
+                self.logger.info(f"Performance {line}")
+        
         # Aufräumen von temporären Dateien (optional)
         # for file in os.listdir(self.screenshot_dir):
         #     if file.endswith('.png'):
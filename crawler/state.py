@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Persistenter Crawl-Zustand zwischen einzelnen Läufen.
+
+Der Zustand wird als JSON-Datei gespeichert und atomar ersetzt, damit
+ein abgebrochener Lauf keine halb geschriebene Datei hinterlässt.
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Any
+
+
+class JsonStateStore:
+    """
+    Einfacher JSON-Speicher für Zustandsdaten eines Spiders oder einer Pipeline.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Pfad der JSON-Datei
+        """
+        self.path = path
+        self.data: Dict[str, Any] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Lädt den gespeicherten Zustand (leer wenn keine Datei existiert).
+
+        Returns:
+            Dict: Der geladene Zustand
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.data = json.load(file)
+        except FileNotFoundError:
+            self.data = {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Zustand {self.path} nicht lesbar, starte leer: {e}")
+            self.data = {}
+        return self.data
+
+    def save(self):
+        """Schreibt den Zustand atomar (temporäre Datei + Umbenennen)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.data, file, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+WARC-Archiv der gecrawlten Seiten (WARC/1.1, gzip pro Record).
+
+Pro Seite werden ein response-Record (Original-Header der Antwort und der
+Body, bei Playwright das gerenderte DOM) und ein request-Record
+geschrieben. Jeder Record ist ein eigenes gzip-Member, sodass über
+Offset und Länge aus dem Index einzelne Records gelesen werden können.
+
+- Payloads werden über ihren SHA-1-Digest dedupliziert (auch über Läufe
+  hinweg): unveränderte Seiten werden als revisit-Record ohne Body
+  geschrieben. Bekannte Digests, deren WARC-Datei nicht mehr in WARC_DIR
+  liegt (z.B. wenn nur data/state zwischen Läufen erhalten bleibt),
+  werden verworfen, damit kein revisit auf ein fehlendes Original zeigt
+- Ab WARC_MAX_SIZE_MB wird eine neue Datei begonnen
+- index.cdx enthält pro Record eine CDX-Zeile (sortiert nach SURT-Schlüssel);
+  er wird bei jeder Rotation und beim Schließen fortgeschrieben
+
+Aufbau von WARC_DIR:
+
+    crawl-20261019120000-00000.warc.gz   Records (warcinfo am Anfang jeder Datei)
+    index.cdx                            CDX N b a m s k r M S V g
+
+Abfragen über die Kommandozeile:
+
+    python -m crawler.warc list https://www.bund.de/
+    python -m crawler.warc get https://www.bund.de/ [--timestamp 20261019]
+"""
+
+import os
+import sys
+import gzip
+import uuid
+import base64
+import hashlib
+import argparse
+import logging
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from crawler.state import JsonStateStore
+
+
+CDX_HEADER = ' CDX N b a m s k r M S V g\n'
+
+REVISIT_PROFILE = 'http://netpreserve.org/warc/1.1/revisit/identical-payload-digest'
+
+# Header, die nach der Dekodierung durch Scrapy nicht mehr zum Body passen
+STALE_HEADERS = frozenset({'content-encoding', 'transfer-encoding', 'content-length'})
+
+Headers = List[Tuple[str, str]]
+
+
+def surt(url: str) -> str:
+    """
+    SURT-Schlüssel einer URL für die Sortierung im CDX-Index.
+
+    Beispiel: https://www.bund.de/DE/Home?x=1 -> de,bund)/de/home?x=1
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    key = ','.join(reversed(host.split('.'))) + ')' + (parts.path or '/').lower()
+    if parts.query:
+        key += '?' + '&'.join(sorted(parts.query.lower().split('&')))
+    return key
+
+
+def payload_digest(body: bytes) -> str:
+    """SHA-1-Digest eines Payloads im WARC-Format (sha1:BASE32)."""
+    return 'sha1:' + base64.b32encode(hashlib.sha1(body).digest()).decode('ascii')
+
+
+def warc_date(timestamp: float) -> str:
+    """WARC-Date (UTC, ISO 8601)."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def http_response_head(status: int, headers: Headers, body_length: Optional[int]) -> bytes:
+    """
+    Statuszeile und Header einer HTTP-Antwort.
+
+    Args:
+        status: HTTP-Status
+        headers: Original-Header der Antwort
+        body_length: Länge des archivierten Bodys (None = revisit ohne Body)
+
+    Returns:
+        bytes: Header-Block inklusive Leerzeile
+    """
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ''
+    lines = [f'HTTP/1.1 {status} {reason}'.rstrip()]
+    lines.extend(f'{name}: {value}' for name, value in headers if name.lower() not in STALE_HEADERS)
+    if body_length is not None:
+        lines.append(f'Content-Length: {body_length}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8', 'replace')
+
+
+def http_request_head(method: str, url: str, headers: Headers) -> bytes:
+    """Request-Zeile und Header eines HTTP-Requests."""
+    parts = urlsplit(url)
+    target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+    lines = [f'{method} {target} HTTP/1.1']
+    if not any(name.lower() == 'host' for name, _ in headers):
+        lines.append(f'Host: {parts.netloc}')
+    lines.extend(f'{name}: {value}' for name, value in headers)
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8', 'replace')
+
+
+class WarcWriter:
+    """
+    Schreibt Records in rotierende WARC-Dateien und sammelt die CDX-Zeilen.
+
+    Nicht thread-sicher: alle Aufrufe kommen aus einem Writer-Thread.
+    """
+
+    def __init__(self, directory: str, prefix: str = 'crawl', max_size: int = 1024 ** 3,
+                 digests_file: Optional[str] = None, compresslevel: int = 6):
+        """
+        Args:
+            directory: Verzeichnis der WARC-Dateien und des Index
+            prefix: Präfix der Dateinamen
+            max_size: Neue Datei ab dieser Größe (Bytes)
+            digests_file: JSON-Datei der bekannten Payload-Digests (None = nur innerhalb des Laufs)
+            compresslevel: gzip-Kompressionsstufe
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.max_size = max_size
+        self.compresslevel = compresslevel
+        self.logger = logging.getLogger(__name__)
+        self.store = JsonStateStore(digests_file) if digests_file else None
+        # Digest -> [URL, WARC-Date, Datei] des ersten Records mit diesem Payload
+        self.digests: Dict[str, List[str]] = self._existing(self.store.load()) if self.store else {}
+        self.run_id = datetime.now().strftime('%Y%m%d%H%M%S')
+        self.serial = 0
+        self.file = None
+        self.filename = None
+        self.cdx_lines: List[str] = []
+        self.counts = {'response': 0, 'revisit': 0, 'files': 0, 'bytes': 0}
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, 'index.cdx')
+
+    def _existing(self, digests: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Nur Digests, deren Original-Record noch in einer WARC-Datei vorliegt."""
+        try:
+            files = set(os.listdir(self.directory))
+        except FileNotFoundError:
+            files = set()
+        existing = {
+            digest: original for digest, original in digests.items()
+            if len(original) >= 3 and original[2] in files
+        }
+        if len(existing) < len(digests):
+            self.logger.info(
+                "%d bekannte Digests ohne WARC-Datei in %s verworfen", len(digests) - len(existing), self.directory
+            )
+        return existing
+
+    def _record(self, warc_type: str, headers: Headers, block: bytes) -> bytes:
+        """Ein gzip-komprimierter WARC-Record."""
+        lines = ['WARC/1.1', f'WARC-Type: {warc_type}']
+        lines.extend(f'{name}: {value}' for name, value in headers)
+        lines.append(f'Content-Length: {len(block)}')
+        raw = ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8') + block + b'\r\n\r\n'
+        return gzip.compress(raw, compresslevel=self.compresslevel)
+
+    def _open(self):
+        """Beginnt eine neue WARC-Datei mit warcinfo-Record."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.filename = f'{self.prefix}-{self.run_id}-{self.serial:05d}.warc.gz'
+        self.serial += 1
+        self.file = open(os.path.join(self.directory, self.filename), 'ab')
+        self.counts['files'] += 1
+        info = (
+            'software: crawler.warc\r\n'
+            'format: WARC File Format 1.1\r\n'
+            'description: Antworten mit Original-Headern; Body gerenderter Seiten ist das DOM nach dem Rendern\r\n'
+        ).encode('utf-8')
+        self._append(self._record('warcinfo', [
+            ('WARC-Date', warc_date(datetime.now().timestamp())),
+            ('WARC-Filename', self.filename),
+            ('WARC-Record-ID', f'<urn:uuid:{uuid.uuid4()}>'),
+            ('Content-Type', 'application/warc-fields'),
+        ], info))
+
+    def _append(self, data: bytes) -> int:
+        """Hängt einen Record an und liefert seinen Offset."""
+        offset = self.file.tell()
+        self.file.write(data)
+        self.counts['bytes'] += len(data)
+        return offset
+
+    def write(self, url: str, status: int, response_headers: Headers, body: bytes,
+              request_headers: Headers, method: str = 'GET', timestamp: Optional[float] = None) -> str:
+        """
+        Archiviert eine Seite als response- bzw. revisit-Record plus request-Record.
+
+        Args:
+            url: URL der Seite
+            status: HTTP-Status
+            response_headers: Original-Header der Antwort
+            body: Body (bei gerenderten Seiten das DOM)
+            request_headers: Header des Requests
+            method: HTTP-Methode
+            timestamp: Zeitpunkt des Abrufs (Unix-Zeit)
+
+        Returns:
+            str: 'response' oder 'revisit'
+        """
+        if self.file is None or self.file.tell() >= self.max_size:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+                self.flush_index()
+            self._open()
+
+        date = warc_date(timestamp or datetime.now().timestamp())
+        digest = payload_digest(body)
+        record_id = f'<urn:uuid:{uuid.uuid4()}>'
+        headers = [
+            ('WARC-Record-ID', record_id),
+            ('WARC-Date', date),
+            ('WARC-Target-URI', url),
+            ('WARC-Payload-Digest', digest),
+            ('Content-Type', 'application/http; msgtype=response'),
+        ]
+
+        original = self.digests.get(digest) if body and status == 200 else None
+        if original:
+            warc_type = 'revisit'
+            headers += [
+                ('WARC-Profile', REVISIT_PROFILE),
+                ('WARC-Refers-To-Target-URI', original[0]),
+                ('WARC-Refers-To-Date', original[1]),
+            ]
+            block = http_response_head(status, response_headers, None)
+        else:
+            warc_type = 'response'
+            block = http_response_head(status, response_headers, len(body)) + body
+            if body and status == 200:
+                self.digests[digest] = [url, date, self.filename]
+
+        data = self._record(warc_type, headers, block)
+        offset = self._append(data)
+        self.counts[warc_type] += 1
+
+        mime = 'warc/revisit' if original else next(
+            (value.split(';')[0].strip() for name, value in response_headers if name.lower() == 'content-type'),
+            '-',
+        )
+        self.cdx_lines.append(' '.join([
+            surt(url), date.replace('-', '').replace('T', '').replace(':', '').rstrip('Z'), url,
+            mime or '-', str(status), digest.split(':', 1)[1], '-', '-',
+            str(len(data)), str(offset), self.filename,
+        ]) + '\n')
+
+        self._append(self._record('request', [
+            ('WARC-Record-ID', f'<urn:uuid:{uuid.uuid4()}>'),
+            ('WARC-Date', date),
+            ('WARC-Target-URI', url),
+            ('WARC-Concurrent-To', record_id),
+            ('Content-Type', 'application/http; msgtype=request'),
+        ], http_request_head(method, url, request_headers)))
+        return warc_type
+
+    def close(self) -> Dict[str, int]:
+        """
+        Schließt die aktuelle Datei, führt den Index zusammen und speichert die Digests.
+
+        Returns:
+            Dict: Anzahl response/revisit-Records, Dateien und geschriebene Bytes
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.flush_index()
+        return dict(self.counts)
+
+    def flush_index(self):
+        """
+        Führt die gesammelten CDX-Zeilen in index.cdx zusammen und speichert die Digests.
+
+        Wird nach jeder abgeschlossenen Datei aufgerufen; bei einem Abbruch
+        fehlen im Index dadurch höchstens die Records der letzten Datei.
+        """
+        if self.cdx_lines:
+            lines = []
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as file:
+                    lines = [line for line in file if not line.startswith(' CDX')]
+            except FileNotFoundError:
+                pass
+            lines.extend(self.cdx_lines)
+            lines.sort()
+            tmp_path = f'{self.index_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(CDX_HEADER)
+                file.writelines(lines)
+            os.replace(tmp_path, self.index_path)
+            self.cdx_lines = []
+
+        if self.store:
+            self.store.data = self.digests
+            self.store.save()
+
+
+def lookup(directory: str, url: str) -> List[Dict[str, Any]]:
+    """
+    Sucht die Records einer URL im CDX-Index.
+
+    Args:
+        directory: Verzeichnis der WARC-Dateien
+        url: Gesuchte URL
+
+    Returns:
+        List[Dict]: Einträge (timestamp, status, mime, digest, length, offset, filename)
+    """
+    key = surt(url)
+    entries = []
+    with open(os.path.join(directory, 'index.cdx'), 'r', encoding='utf-8') as file:
+        for line in file:
+            fields = line.rstrip('\n').split(' ')
+            if len(fields) != 11 or fields[0] != key:
+                continue
+            entries.append({
+                'timestamp': fields[1], 'url': fields[2], 'mime': fields[3], 'status': fields[4],
+                'digest': fields[5], 'length': int(fields[8]), 'offset': int(fields[9]), 'filename': fields[10],
+            })
+    return entries
+
+
+def read_record(directory: str, filename: str, offset: int, length: int) -> bytes:
+    """Liest einen einzelnen (dekomprimierten) Record über Offset und Länge."""
+    with open(os.path.join(directory, filename), 'rb') as file:
+        file.seek(offset)
+        return gzip.decompress(file.read(length))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeile für Abfragen des WARC-Archivs."""
+    parser = argparse.ArgumentParser(description='WARC-Archiv der gecrawlten Seiten')
+    parser.add_argument('--dir', default='data/warc', help='Verzeichnis des Archivs')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    listing = commands.add_parser('list', help='Archivierte Versionen einer URL')
+    listing.add_argument('url')
+
+    get = commands.add_parser('get', help='Record einer URL ausgeben (Standard: neueste Version)')
+    get.add_argument('url')
+    get.add_argument('--timestamp', help='Erste Version ab diesem Zeitstempel (JJJJMMTT...)')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.dir, 'index.cdx')):
+        print(f"Archiv nicht gefunden: {args.dir}", file=sys.stderr)
+        return 1
+
+    entries = lookup(args.dir, args.url)
+    if args.command == 'list':
+        for entry in entries:
+            print(f"{entry['timestamp']}  {entry['status']}  {entry['mime']:<24} {entry['filename']}:{entry['offset']}")
+        return 0
+
+    if args.timestamp:
+        entries = [entry for entry in entries if entry['timestamp'] >= args.timestamp][:1]
+    if not entries:
+        print("Kein Record gefunden", file=sys.stderr)
+        return 1
+    entry = entries[-1]
+    sys.stdout.buffer.write(read_record(args.dir, entry['filename'], entry['offset'], entry['length']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())